@@ -12,6 +12,10 @@ let enableCompression = true;
 let maxQueueSize = 10000;
 let flushTimer = null;
 
+// 전송 실패한 배치 ({ id, logs }): 다음 전송에서 같은 배치 ID로 먼저 재전송
+// (커밋 후 응답만 유실된 배치는 서버가 X-Batch-Id로 중복 제거)
+let retryBatches = [];
+
 // 메인 스레드로부터 메시지 수신
 self.onmessage = (event) => {
     const { type, data } = event.data;
@@ -43,7 +47,7 @@ self.onmessage = (event) => {
 
         case 'flush':
             // 강제 flush
-            if (queue.length > 0) {
+            if (queue.length > 0 || retryBatches.length > 0) {
                 sendBatch();
             }
             break;
@@ -62,26 +66,46 @@ function startFlushLoop() {
     }
 
     flushTimer = setInterval(() => {
-        if (queue.length > 0 && queue.length < batchSize) {
+        if (retryBatches.length > 0 || (queue.length > 0 && queue.length < batchSize)) {
             // 배치 크기에 도달하지 않았지만 시간이 지나면 전송
             sendBatch();
         }
     }, flushInterval);
 }
 
+/**
+ * 배치 ID (UUID v4)
+ *
+ * crypto.randomUUID는 보안 컨텍스트(HTTPS/localhost)에서만 제공되므로 getRandomValues로 폴백
+ */
+function newBatchId() {
+    if (typeof self.crypto.randomUUID === 'function') {
+        return self.crypto.randomUUID();
+    }
+    const bytes = self.crypto.getRandomValues(new Uint8Array(16));
+    bytes[6] = (bytes[6] & 0x0f) | 0x40;
+    bytes[8] = (bytes[8] & 0x3f) | 0x80;
+    const hex = Array.from(bytes, (b) => b.toString(16).padStart(2, '0')).join('');
+    return `${hex.slice(0, 8)}-${hex.slice(8, 12)}-${hex.slice(12, 16)}-${hex.slice(16, 20)}-${hex.slice(20)}`;
+}
+
 /**
  * 배치 전송
  */
 async function sendBatch() {
-    if (queue.length === 0) return;
+    if (queue.length === 0 && retryBatches.length === 0) return;
 
-    // 큐에서 배치 추출
-    const batch = queue.splice(0, Math.min(batchSize, queue.length));
+    // 실패했던 배치를 먼저 재전송, 없으면 큐에서 새 배치 추출
+    const entry = retryBatches.shift() || {
+        id: newBatchId(),
+        logs: queue.splice(0, Math.min(batchSize, queue.length))
+    };
+    const batch = entry.logs;
 
     try {
         // JSON 직렬화
         let payload = JSON.stringify({ logs: batch });
-        let headers = { 'Content-Type': 'application/json' };
+        let headers = { 'Content-Type': 'application/json', 'X-Batch-Id': entry.id };
 
         // 압축 (100건 이상)
         if (enableCompression && batch.length >= 100) {
@@ -107,8 +131,11 @@ async function sendBatch() {
 
     } catch (error) {
         console.error('[Worker] Log send failed:', error);
-        // 실패한 로그는 큐 맨 앞에 다시 추가 (재시도)
-        queue.unshift(...batch);
+        // 실패한 배치는 같은 ID로 재시도 (새 로그와 섞어 다른 배치로 보내면 서버가 중복을 알 수 없음)
+        retryBatches.unshift(entry);
+        if (retryBatches.length > Math.max(1, Math.ceil(maxQueueSize / batchSize))) {
+            retryBatches.pop(); // 가장 오래된 배치 제거
+        }
     }
 }
 
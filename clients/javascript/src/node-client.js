@@ -48,6 +48,7 @@ class WorkerThreadsLogClient {
      * @param {number} options.batchSize - 배치 크기
      * @param {number} options.flushInterval - Flush 간격 (ms)
      * @param {boolean} options.enableCompression - 압축 활성화
+     * @param {string} options.compression - 압축 코덱 'auto' | 'zstd' | 'gzip' (기본: 환경 변수 LOG_COMPRESSION 또는 'auto' = 서버와 협상)
      * @param {boolean} options.enableGlobalErrorHandler - 글로벌 에러 핸들러 활성화 (기본: false)
      *
      * 환경 변수 우선순위: 명시적 파라미터 > 환경 변수 > package.json > 기본값
@@ -58,6 +59,7 @@ class WorkerThreadsLogClient {
      *   NODE_ENV=production
      *   SERVICE_VERSION=v1.2.3
      *   LOG_TYPE=BACKEND
+     *   LOG_COMPRESSION=auto
      *   ENABLE_GLOBAL_ERROR_HANDLER=true
      */
     constructor(serverUrl = null, options = {}) {
@@ -72,6 +74,7 @@ class WorkerThreadsLogClient {
             batchSize: options.batchSize || 1000,
             flushInterval: options.flushInterval || 1000,
             enableCompression: options.enableCompression !== false,
+            compression: (options.compression || process.env.LOG_COMPRESSION || 'auto').toLowerCase(),
             enableGlobalErrorHandler: options.enableGlobalErrorHandler || process.env.ENABLE_GLOBAL_ERROR_HANDLER === 'true'
         };
 
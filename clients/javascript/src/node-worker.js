@@ -7,7 +7,13 @@
 import { parentPort, workerData } from 'worker_threads';
 import zlib from 'zlib';
 import { promisify } from 'util';
+import { randomUUID } from 'crypto';
 const gzip = promisify(zlib.gzip);
+// zstd는 Node.js 22.15+ / 23.8+ 내장 zlib에서만 지원
+const zstdCompress = typeof zlib.zstdCompress === 'function' ? promisify(zlib.zstdCompress) : null;
+
+// 이 워커가 압축할 수 있는 코덱
+const clientEncodings = zstdCompress ? ['zstd', 'gzip'] : ['gzip'];
 
 // node-fetch 동적 import (Node.js 18+ 내장 fetch 사용 또는 폴백)
 let fetch;
@@ -21,10 +27,23 @@ let fetch;
 })();
 
 let queue = [];
-const { serverUrl, batchSize, flushInterval, enableCompression } = workerData;
+const { serverUrl, batchSize, flushInterval, enableCompression, compression = 'auto' } = workerData;
 const maxQueueSize = 10000;
 let flushTimer = null;
 
+// 전송 실패한 배치 ({ id, logs }): 다음 전송에서 같은 배치 ID로 먼저 재전송
+// (커밋 후 응답만 유실된 배치는 서버가 X-Batch-Id로 중복 제거)
+let retryBatches = [];
+const maxRetryBatches = Math.max(1, Math.ceil(maxQueueSize / batchSize));
+
+// 협상된 압축 코덱 (auto면 첫 압축 전송 시 GET /ingest/capabilities로 결정)
+let negotiatedEncoding = compression === 'auto' ? null : compression;
+let negotiation = null;
+if (negotiatedEncoding && !clientEncodings.includes(negotiatedEncoding)) {
+    console.warn(`[Worker] Compression '${negotiatedEncoding}' not available, using gzip`);
+    negotiatedEncoding = 'gzip';
+}
+
 // 메인 스레드로부터 메시지 수신
 if (parentPort) {
     parentPort.on('message', async (message) => {
@@ -48,7 +67,7 @@ if (parentPort) {
 
             case 'flush':
                 // 강제 flush
-                if (queue.length > 0) {
+                if (queue.length > 0 || retryBatches.length > 0) {
                     await sendBatch();
                 }
                 break;
@@ -68,34 +87,80 @@ function startFlushLoop() {
     }
 
     flushTimer = setInterval(async () => {
-        if (queue.length > 0 && queue.length < batchSize) {
+        if (retryBatches.length > 0 || (queue.length > 0 && queue.length < batchSize)) {
             await sendBatch();
         }
     }, flushInterval);
 }
 
+/**
+ * 서버와 압축 코덱 협상
+ *
+ * 서버 목록(권장 순서) 중 이 워커도 지원하는 첫 코덱. 구버전 서버(404)는 gzip.
+ */
+async function getEncoding() {
+    if (negotiatedEncoding) return negotiatedEncoding;
+    // 동시에 전송되는 배치가 협상 요청을 중복으로 보내지 않도록 공유
+    if (!negotiation) {
+        negotiation = negotiateEncoding().finally(() => { negotiation = null; });
+    }
+    return negotiation;
+}
+
+async function negotiateEncoding() {
+    try {
+        const response = await fetch(`${serverUrl}/ingest/capabilities`);
+        if (response.ok) {
+            const capabilities = await response.json();
+            const serverEncodings = capabilities.encodings || ['gzip'];
+            negotiatedEncoding = serverEncodings.find((e) => clientEncodings.includes(e)) || 'gzip';
+        } else {
+            negotiatedEncoding = 'gzip';
+        }
+    } catch (error) {
+        // 서버 미응답: 이번 전송만 gzip, 다음 전송에서 다시 협상
+        return 'gzip';
+    }
+    return negotiatedEncoding;
+}
+
+/**
+ * 압축
+ */
+async function compress(payload, encoding) {
+    if (encoding === 'zstd') {
+        return zstdCompress(Buffer.from(payload));
+    }
+    return gzip(Buffer.from(payload));
+}
+
 /**
  * 배치 전송
  */
 async function sendBatch() {
-    if (queue.length === 0) return;
+    if (queue.length === 0 && retryBatches.length === 0) return;
     if (!fetch) {
         console.warn('[Worker] Fetch not available yet');
         return;
     }
 
-    // 큐에서 배치 추출
-    const batch = queue.splice(0, Math.min(batchSize, queue.length));
+    // 실패했던 배치를 먼저 재전송, 없으면 큐에서 새 배치 추출
+    const entry = retryBatches.shift() || {
+        id: randomUUID(),
+        logs: queue.splice(0, Math.min(batchSize, queue.length))
+    };
+    const batch = entry.logs;
 
     try {
         // JSON 직렬화
         let payload = JSON.stringify({ logs: batch });
-        let headers = { 'Content-Type': 'application/json' };
+        let headers = { 'Content-Type': 'application/json', 'X-Batch-Id': entry.id };
 
-        // gzip 압축 (100건 이상)
+        // 압축 (100건 이상, 서버와 협상한 코덱)
         if (enableCompression && batch.length >= 100) {
-            payload = await gzip(Buffer.from(payload));
-            headers['Content-Encoding'] = 'gzip';
+            const encoding = await getEncoding();
+            payload = await compress(payload, encoding);
+            headers['Content-Encoding'] = encoding;
         }
 
         // HTTP POST
@@ -106,13 +171,20 @@ async function sendBatch() {
         });
 
         if (!response.ok) {
+            if (response.status === 400 && compression === 'auto') {
+                // 서버 재배포로 코덱 지원이 바뀌었을 수 있음 → 다음 전송에서 재협상
+                negotiatedEncoding = null;
+            }
             throw new Error(`HTTP ${response.status}: ${response.statusText}`);
         }
 
     } catch (error) {
         console.error('[Worker] Log send failed:', error);
-        // 실패한 로그는 큐 맨 앞에 다시 추가 (재시도)
-        queue.unshift(...batch);
+        // 실패한 배치는 같은 ID로 재시도 (새 로그와 섞어 다른 배치로 보내면 서버가 중복을 알 수 없음)
+        retryBatches.unshift(entry);
+        if (retryBatches.length > maxRetryBatches) {
+            retryBatches.pop(); // 가장 오래된 배치 제거
+        }
     }
 }
 
@@ -121,7 +193,7 @@ startFlushLoop();
 
 // Worker 종료 처리
 process.on('exit', async () => {
-    if (queue.length > 0) {
+    if (queue.length > 0 || retryBatches.length > 0) {
         await sendBatch();
     }
 });
@@ -9,21 +9,27 @@
 """
 
 import asyncio
-import gzip
-import json
+import concurrent.futures
 import time
 import atexit
 import traceback
 import functools
+import math
 import os
-import inspect
+import sys
+import uuid
 from collections import deque
 from threading import Thread, Event
-from typing import Dict, Any, Optional, Callable
-from contextlib import contextmanager
+from types import CodeType
+from typing import Dict, Any, Optional, Callable, Tuple
+from contextlib import contextmanager, asynccontextmanager
 from contextvars import ContextVar
 import aiohttp
 
+from .compression import Compressor, choose_encoding
+from .records import COLUMNAR_CONTENT_TYPE, LogRecord, encode_columns, encode_rows
+from .spill import SpillQueue
+
 try:
     from dotenv import load_dotenv
     load_dotenv()  # .env 파일 자동 로드
@@ -36,17 +42,44 @@ _request_context: ContextVar[Optional[Dict[str, Any]]] = ContextVar('request_con
 # 사용자 컨텍스트 저장용 (user_id, trace_id, session_id 등)
 _user_context: ContextVar[Optional[Dict[str, Any]]] = ContextVar('user_context', default=None)
 
+# 호출 위치 캐시: 코드 객체 → (function_name, file_path)
+# (코드 객체는 함수 정의 위치마다 하나이므로 호출마다 속성을 다시 읽지 않음, 동적으로 만든 코드 대비 상한)
+_caller_cache: Dict[CodeType, Tuple[str, str]] = {}
+_CALLER_CACHE_MAX = 4096
+
+# 병합한 컨텍스트 스냅샷 캐시 상한 (클라이언트마다, 동시에 처리 중인 요청 수 정도면 충분)
+_CONTEXT_CACHE_MAX = 1024
+_EMPTY: Dict[str, Any] = {}
+
+# 프레임 접근을 지원하지 않는 인터프리터면 None (호출 위치 추적 생략)
+_getframe = getattr(sys, "_getframe", None)
+
+# 워커가 깨어 있을 때의 _wake_at (log()가 깨우지 않음)
+_NEVER = math.inf
+
+# 종료 시 워커가 남은 로그를 보내고 끝날 때까지 기다리는 시간 (초)
+SHUTDOWN_TIMEOUT = 10.0
+
+# 워커 세션 커넥션 풀: 유휴 keep-alive 커넥션 유지 시간 / DNS 캐시 시간 (초)
+KEEPALIVE_TIMEOUT = 30.0
+DNS_CACHE_TTL = 300
+
 
 class AsyncLogClient:
     """
     비동기 로그 수집 클라이언트
 
     특징:
-    - 로컬 큐 + 백그라운드 스레드
-    - 스마트 배치 (1000건 or 1초)
-    - 압축 전송 (100건 이상)
+    - 로컬 큐 + 백그라운드 스레드 (이벤트 루프 하나를 계속 사용)
+    - 스마트 배치 (1000건 or 1초): 타이머 폴링 없이 첫 로그 / batch_size 도달 시에만 워커를 깨움
+    - 여러 배치 동시 전송 (max_in_flight)
+    - 워커 루프에 묶인 HTTP 세션 재사용 (keep-alive 커넥션 풀 + DNS 캐시)
+    - 디스크 스필 (옵션): 재시도까지 실패했거나 큐가 넘친 배치를 디스크에 저장 → 서버 복구 후 순서대로 재전송
+    - 직렬화는 워커에서: 큐에는 __slots__ 레코드만 (orjson이 있으면 사용)
+    - 압축 전송 (100건 이상, 서버와 코덱 협상: zstd > lz4 > gzip)
+    - 열 단위 배치 (100건 이상, 서버가 지원하면)
     - Graceful shutdown
-    - 재시도 로직 (3회)
+    - 재시도 로직 (3회, 같은 배치 ID로 재전송 → 서버에서 중복 제거)
     - duration_ms 자동 측정
     - stack_trace 자동 추출
     """
@@ -62,7 +95,12 @@ class AsyncLogClient:
         flush_interval: float = 1.0,
         max_queue_size: int = 10000,
         enable_compression: bool = True,
+        compression: Optional[str] = None,
+        batch_format: Optional[str] = None,
         max_retries: int = 3,
+        max_in_flight: int = 4,
+        spill_dir: Optional[str] = None,
+        spill_max_bytes: int = 128 * 1024 * 1024,
         enable_global_error_handler: bool = False
     ):
         """
@@ -75,8 +113,15 @@ class AsyncLogClient:
             batch_size: 배치 크기 (기본: 1000)
             flush_interval: Flush 간격 (초, 기본: 1.0)
             max_queue_size: 최대 큐 크기 (기본: 10000)
-            enable_compression: gzip 압축 활성화 (기본: True)
+            enable_compression: 압축 활성화 (기본: True)
+            compression: 압축 코덱 auto | zstd | lz4 | gzip
+                (기본: 환경 변수 LOG_COMPRESSION 또는 'auto' = 서버와 협상)
+            batch_format: 배치 본문 형식 auto | rows | columnar
+                (기본: 환경 변수 LOG_BATCH_FORMAT 또는 'auto' = 서버가 지원하면 100건 이상 배치는 열 단위)
             max_retries: 최대 재시도 횟수 (기본: 3)
+            max_in_flight: 동시에 전송 중인 최대 배치 수 (기본: 4, 가득 차면 다음 배치는 큐에서 대기)
+            spill_dir: 디스크 스필 디렉터리 (기본: 환경 변수 LOG_SPILL_DIR, 없으면 사용 안 함)
+            spill_max_bytes: 스필 디스크 사용 한도 (기본: 128MB, 넘으면 가장 오래된 배치부터 삭제)
             enable_global_error_handler: 글로벌 에러 핸들러 활성화 (기본: False)
 
         환경 변수 우선순위: 명시적 파라미터 > 환경 변수 > 기본값
@@ -87,6 +132,8 @@ class AsyncLogClient:
             ENVIRONMENT=production
             SERVICE_VERSION=v1.2.3
             LOG_TYPE=BACKEND
+            LOG_COMPRESSION=auto
+            LOG_SPILL_DIR=/var/lib/payment-api/log-spill
             ENABLE_GLOBAL_ERROR_HANDLER=true
         """
         # 환경 변수에서 자동 로드 (우선순위: 파라미터 > 환경 변수 > 기본값)
@@ -99,14 +146,51 @@ class AsyncLogClient:
         self.flush_interval = flush_interval
         self.max_queue_size = max_queue_size
         self.enable_compression = enable_compression
+        self.compression = (compression or os.getenv('LOG_COMPRESSION', 'auto')).lower()
+        self.batch_format = (batch_format or os.getenv('LOG_BATCH_FORMAT', 'auto')).lower()
         self.max_retries = max_retries
+        self.max_in_flight = max(1, max_in_flight)
+        self.spill_dir = spill_dir or os.getenv('LOG_SPILL_DIR') or None
+        # 모든 로그에 붙는 공통 필드 (생성 시 한 번만 구성)
+        self._base_fields = {
+            key: value for key, value in (
+                ("service", self.service),
+                ("environment", self.environment),
+                ("service_version", self.service_version),
+                ("log_type", self.log_type),
+            ) if value
+        }
+        # (id(사용자 컨텍스트), id(요청 컨텍스트)) → (사용자 컨텍스트, 요청 컨텍스트, 병합 스냅샷)
+        self._contexts: Dict[Tuple[int, int], Tuple[Any, Any, Dict[str, Any]]] = {}
         self.enable_global_error_handler = enable_global_error_handler or os.getenv('ENABLE_GLOBAL_ERROR_HANDLER', 'false').lower() == 'true'
 
         self.queue = deque(maxlen=max_queue_size)
         self._stop_event = Event()
         self._worker_thread: Optional[Thread] = None
+
+        # 워커 이벤트 루프 (배치 전송은 모두 이 루프에서 실행)
+        self._loop = asyncio.new_event_loop()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._in_flight: Optional[asyncio.Semaphore] = None
+        self._sending: set = set()
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        # 디스크 스필: 큐가 이 길이 이상인데 전송 슬롯이 없으면 배치를 디스크로 (maxlen 초과로 버려지기 전에)
+        self._spill = SpillQueue(self.spill_dir, spill_max_bytes) if self.spill_dir else None
+        self._spill_at = max(self.batch_size, max_queue_size - self.batch_size)
+        self._replay_task: Optional[asyncio.Future] = None
+        self._replay_position = (0, 0)  # (세그먼트 번호, 이미 재전송한 배치 수)
+        self.metrics = {"spilled": 0, "replayed": 0, "dropped": 0}
+        # 큐 길이가 이 값에 도달하면 log()가 워커를 깨움 (1: 큐가 비어 대기 중, batch_size: 타이머 대기 중)
+        self._wake_at = _NEVER
         self._original_excepthook = None
 
+        # 서버 capabilities (100건 이상 배치의 첫 전송 때 조회) / 압축기 (auto면 capabilities로 협상)
+        self._capabilities: Optional[Dict[str, Any]] = None
+        self._compressor: Optional[Compressor] = None
+        if self.compression != 'auto':
+            self._compressor = Compressor(self.compression)
+
         # 백그라운드 워커 시작
         self._start_background_worker()
 
@@ -125,7 +209,7 @@ class AsyncLogClient:
         **kwargs: Any
     ) -> None:
         """
-        로그 추가 (비블로킹, ~0.05ms)
+        로그 추가 (비블로킹, 호출당 ~2µs)
 
         Args:
             level: 로그 레벨 (TRACE, DEBUG, INFO, WARN, ERROR, FATAL)
@@ -133,50 +217,63 @@ class AsyncLogClient:
             auto_caller: 호출 위치 자동 추적 활성화 (기본: True)
             **kwargs: 추가 필드 (trace_id, user_id, duration_ms 등)
         """
-        log_entry = {
-            "level": level,
-            "message": message,
-            "created_at": time.time(),
-            **kwargs
-        }
+        self._enqueue(level, message, 2 if auto_caller else 0, kwargs)
 
+    def _enqueue(self, level: str, message: str, caller_depth: int, fields: Dict[str, Any]) -> None:
+        """
+        로그 한 건을 레코드로 큐에 추가
+
+        공통 필드 / 컨텍스트는 병합한 스냅샷(_context_snapshot)을 공유하고,
+        레코드별 병합(LogRecord.to_dict)과 직렬화는 워커에서 합니다.
+
+        Args:
+            caller_depth: 이 메서드 기준 호출자 프레임 깊이 (0: 호출 위치 추적 안 함)
+            fields: 추가 필드
+        """
         # 호출 위치 자동 추적 (function_name, file_path)
-        if auto_caller:
+        caller = None
+        if caller_depth and _getframe is not None:
             try:
-                # 현재 프레임의 호출자 정보 추출
-                frame = inspect.currentframe()
-                if frame and frame.f_back:
-                    caller_frame = frame.f_back
-                    log_entry.setdefault("function_name", caller_frame.f_code.co_name)
-                    log_entry.setdefault("file_path", caller_frame.f_code.co_filename)
-            except Exception:
-                # 프레임 추출 실패 시 무시
+                code = _getframe(caller_depth).f_code
+                caller = _caller_cache.get(code)
+                if caller is None:
+                    if len(_caller_cache) >= _CALLER_CACHE_MAX:
+                        _caller_cache.clear()
+                    caller = _caller_cache[code] = (code.co_name, code.co_filename)
+            except ValueError:
+                # 호출 스택이 더 얕음
                 pass
 
-        # HTTP 요청 컨텍스트 자동 추가 (웹 프레임워크에서 설정한 경우)
-        request_ctx = _request_context.get()
-        if request_ctx:
-            for key, value in request_ctx.items():
-                log_entry.setdefault(key, value)
-
-        # 사용자 컨텍스트 자동 추가 (user_id, trace_id, session_id 등)
-        user_ctx = _user_context.get()
-        if user_ctx:
-            for key, value in user_ctx.items():
-                log_entry.setdefault(key, value)
-
-        # 공통 필드 자동 추가
-        if self.service:
-            log_entry.setdefault("service", self.service)
-        if self.environment:
-            log_entry.setdefault("environment", self.environment)
-        if self.service_version:
-            log_entry.setdefault("service_version", self.service_version)
-        if self.log_type:
-            log_entry.setdefault("log_type", self.log_type)
+        # 큐가 가득 차면 deque(maxlen)가 가장 오래된 로그를 버림 (워커가 따라가지 못함)
+        if len(self.queue) == self.max_queue_size:
+            self.metrics["dropped"] += 1
 
         # 큐에 추가만 (즉시 리턴!)
-        self.queue.append(log_entry)
+        self.queue.append(LogRecord(
+            time.time(), level, message, caller, self._context_snapshot(),
+            (*fields, *fields.values()) if fields else None,
+        ))
+        if len(self.queue) >= self._wake_at:
+            self._wake_worker()
+
+    def _context_snapshot(self) -> Dict[str, Any]:
+        """
+        공통 필드 + 사용자 / HTTP 요청 컨텍스트를 병합한 dict
+
+        컨텍스트 dict는 set_*_context / user_context()가 매번 새로 만들고 (get_*_context는 복사본 반환)
+        이후 바뀌지 않으므로, 같은 컨텍스트 객체 조합이면 이전 스냅샷을 그대로 공유합니다.
+        """
+        user, request = _user_context.get(), _request_context.get()
+        key = (id(user), id(request))
+        cached = self._contexts.get(key)
+        # 캐시가 컨텍스트 객체를 붙잡고 있으므로 id가 재사용되지 않지만, 객체까지 비교해 확인
+        if cached is not None and cached[0] is user and cached[1] is request:
+            return cached[2]
+        if len(self._contexts) >= _CONTEXT_CACHE_MAX:
+            self._contexts.clear()
+        context = {**self._base_fields, **(user or _EMPTY), **(request or _EMPTY)}
+        self._contexts[key] = (user, request, context)
+        return context
 
     def start_timer(self) -> float:
         """
@@ -338,52 +435,27 @@ class AsyncLogClient:
     # 편의 메서드
     def trace(self, message: str, auto_caller: bool = True, **kwargs: Any) -> None:
         """TRACE 레벨 로그"""
-        self._log_with_caller_adjustment("TRACE", message, auto_caller, **kwargs)
+        self._enqueue("TRACE", message, 2 if auto_caller else 0, kwargs)
 
     def debug(self, message: str, auto_caller: bool = True, **kwargs: Any) -> None:
         """DEBUG 레벨 로그"""
-        self._log_with_caller_adjustment("DEBUG", message, auto_caller, **kwargs)
+        self._enqueue("DEBUG", message, 2 if auto_caller else 0, kwargs)
 
     def info(self, message: str, auto_caller: bool = True, **kwargs: Any) -> None:
         """INFO 레벨 로그"""
-        self._log_with_caller_adjustment("INFO", message, auto_caller, **kwargs)
+        self._enqueue("INFO", message, 2 if auto_caller else 0, kwargs)
 
     def warn(self, message: str, auto_caller: bool = True, **kwargs: Any) -> None:
         """WARN 레벨 로그"""
-        self._log_with_caller_adjustment("WARN", message, auto_caller, **kwargs)
+        self._enqueue("WARN", message, 2 if auto_caller else 0, kwargs)
 
     def error(self, message: str, auto_caller: bool = True, **kwargs: Any) -> None:
         """ERROR 레벨 로그"""
-        self._log_with_caller_adjustment("ERROR", message, auto_caller, **kwargs)
+        self._enqueue("ERROR", message, 2 if auto_caller else 0, kwargs)
 
     def fatal(self, message: str, auto_caller: bool = True, **kwargs: Any) -> None:
         """FATAL 레벨 로그"""
-        self._log_with_caller_adjustment("FATAL", message, auto_caller, **kwargs)
-
-    def _log_with_caller_adjustment(
-        self,
-        level: str,
-        message: str,
-        auto_caller: bool,
-        **kwargs: Any
-    ) -> None:
-        """
-        편의 메서드를 위한 로그 호출 (호출자 프레임 조정)
-        편의 메서드를 통해 호출되므로 한 단계 위의 프레임을 추적
-        """
-        if auto_caller:
-            try:
-                # 2단계 위의 프레임 추출 (호출자 -> 편의 메서드 -> 이 메서드)
-                frame = inspect.currentframe()
-                if frame and frame.f_back and frame.f_back.f_back:
-                    caller_frame = frame.f_back.f_back
-                    kwargs.setdefault("function_name", caller_frame.f_code.co_name)
-                    kwargs.setdefault("file_path", caller_frame.f_code.co_filename)
-            except Exception:
-                pass
-
-        # auto_caller=False로 설정해서 log()에서 중복 추출 방지
-        self.log(level, message, auto_caller=False, **kwargs)
+        self._enqueue("FATAL", message, 2 if auto_caller else 0, kwargs)
 
     def _start_background_worker(self) -> None:
         """백그라운드 워커 스레드 시작"""
@@ -396,70 +468,314 @@ class AsyncLogClient:
 
     def _flush_loop(self) -> None:
         """배치 전송 루프 (백그라운드 스레드)"""
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._worker())
+        finally:
+            self._loop.close()
+
+    async def _worker(self) -> None:
+        """
+        큐 이벤트로 깨어나 배치를 보내는 워커
+
+        - batch_size건이 모이면 즉시 전송 (타이머를 기다리지 않음)
+        - 첫 로그가 들어온 뒤 flush_interval이 지나면 쌓인 것만이라도 전송
+        - 큐가 비어 있으면 log()가 깨울 때까지 잠듦 (유휴 CPU 0)
+        """
+        self._wakeup = asyncio.Event()
+        self._in_flight = asyncio.Semaphore(self.max_in_flight)
+        deadline = None
+
+        while not self._stop_event.is_set():
+            size = len(self.queue)
+            if size >= self.batch_size or (size and deadline is not None and time.monotonic() >= deadline):
+                await self._dispatch(self._take_batch())
+                deadline = None
+                continue
+            if size and deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+
+            # log()가 _wake_at을 본 뒤 추가했을 수 있으므로 설정 후 큐를 다시 확인
+            self._wakeup.clear()
+            self._wake_at = self.batch_size if size else 1
+            if len(self.queue) < self._wake_at and not self._stop_event.is_set():
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            self._wake_at = _NEVER
 
+        # 종료: 재전송 중단(남은 배치는 디스크에 유지) + 남은 로그 전송 + 전송 중인 배치 완료 대기 후 정리
         try:
-            while not self._stop_event.is_set():
-                if len(self.queue) >= self.batch_size:
-                    # 1000건 모이면 즉시 전송
-                    batch = [self.queue.popleft() for _ in range(self.batch_size)]
-                    loop.run_until_complete(self._send_batch(batch))
+            if self._replay_task is not None:
+                self._replay_task.cancel()
+                await asyncio.gather(self._replay_task, return_exceptions=True)
+            await self._drain()
+        finally:
+            if self._spill is not None:
+                self._spill.close()
+            if self._session is not None:
+                await self._session.close()
+                self._session = None
+
+    def _wake_worker(self) -> None:
+        """다른 스레드에서 워커 깨우기"""
+        self._wake_at = _NEVER
+        try:
+            self._loop.call_soon_threadsafe(self._set_wakeup)
+        except RuntimeError:
+            pass  # 워커 종료 후 (루프 닫힘)
 
-                elif len(self.queue) > 0:
-                    # 1초 지나면 쌓인 것만이라도 전송
-                    time.sleep(self.flush_interval)
-                    if len(self.queue) > 0:
-                        batch = [self.queue.popleft() for _ in range(len(self.queue))]
-                        loop.run_until_complete(self._send_batch(batch))
-                else:
-                    # 큐가 비어있으면 대기
-                    time.sleep(0.1)
+    def _set_wakeup(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _take_batch(self) -> list:
+        """큐 앞에서 최대 batch_size건 꺼내기"""
+        return [self.queue.popleft() for _ in range(min(self.batch_size, len(self.queue)))]
+
+    async def _dispatch(self, batch: list) -> None:
+        """배치 전송 시작 (max_in_flight개가 전송 중이면 하나가 끝날 때까지 대기)"""
+        if not await self._acquire_slot():
+            # 전송이 밀려 큐가 넘치기 직전 → 버려지기 전에 디스크로
+            self._spill_batch(encode_rows(batch), len(batch), str(uuid.uuid4()))
+            return
+        task = asyncio.ensure_future(self._send_batch(batch))
+        self._sending.add(task)
+        task.add_done_callback(self._on_sent)
+
+    async def _acquire_slot(self) -> bool:
+        """
+        전송 슬롯 대기
+
+        Returns:
+            False: 스필 사용 중이고, 기다리는 동안 큐가 _spill_at건에 도달함
+        """
+        if self._spill is None:
+            await self._in_flight.acquire()
+            return True
+        while self._in_flight.locked():
+            if len(self.queue) >= self._spill_at:
+                return False
+            # 전송 완료(_on_sent) 또는 큐가 _spill_at건이 되면(log()) 깨어남
+            self._wakeup.clear()
+            self._wake_at = self._spill_at
+            if len(self.queue) < self._wake_at:
+                await self._wakeup.wait()
+            self._wake_at = _NEVER
+        await self._in_flight.acquire()
+        return True
+
+    def _on_sent(self, task: asyncio.Future) -> None:
+        self._sending.discard(task)
+        self._in_flight.release()
+        self._set_wakeup()
+
+    def _spill_batch(self, payload: bytes, count: int, batch_id: str) -> None:
+        """배치를 디스크 스필 큐에 저장 (한도 초과로 밀려난 오래된 배치는 dropped)"""
+        try:
+            self.metrics["dropped"] += self._spill.append(payload, count, batch_id)
+            self.metrics["spilled"] += count
+        except OSError as e:
+            self.metrics["dropped"] += count
+            print(f"[Log Client] Spill failed: {e}")
+
+    def _schedule_replay(self) -> None:
+        """전송 성공 후 디스크에 남은 배치가 있으면 재전송 시작 (워커 루프에서만, 한 번에 하나)"""
+        if (self._spill and self._replay_task is None and not self._stop_event.is_set()
+                and asyncio.get_running_loop() is self._loop):
+            self._replay_task = asyncio.ensure_future(self._replay_spilled())
+
+    async def _replay_spilled(self) -> None:
+        """
+        디스크에 저장된 배치를 오래된 순서대로 재전송
+
+        실패하면 중단하고 다음 전송 성공 후 이어서 재전송합니다 (배치 ID가 같아 서버에서 중복 저장되지 않음).
+        """
+        try:
+            while True:
+                segment = self._spill.oldest()
+                if segment is None:
+                    return
+                seq, batches = segment
+                done = self._replay_position[1] if self._replay_position[0] == seq else 0
+                for index in range(done, len(batches)):
+                    batch_id, count, body = batches[index]
+                    headers = {"Content-Type": "application/json", "Content-Encoding": "gzip", "X-Batch-Id": batch_id}
+                    async with self._session_scope() as session:
+                        await self._post(session, body, headers)
+                    self._replay_position = (seq, index + 1)
+                    self.metrics["replayed"] += count
+                self._spill.remove(seq)
+        except Exception:
+            pass  # 서버가 아직 불안정 → 디스크에 남겨 둠
         finally:
-            loop.close()
+            self._replay_task = None
+
+    def get_metrics(self) -> Dict[str, int]:
+        """
+        디스크 스필 / 유실 지표
+
+        Returns:
+            spilled / replayed / dropped (로그 건수, dropped는 큐가 넘쳐 버린 로그 포함),
+            spill_pending_bytes (디스크에 남은 바이트)
+        """
+        return {
+            **self.metrics,
+            "spill_pending_bytes": self._spill.pending_bytes if self._spill else 0,
+        }
+
+    async def _drain(self) -> None:
+        """큐에 남은 로그를 모두 보내고 전송 중인 배치까지 완료 대기 (워커 루프에서 실행)"""
+        while self.queue:
+            await self._dispatch(self._take_batch())
+        if self._sending:
+            await asyncio.gather(*list(self._sending), return_exceptions=True)
+
+    def _stop_worker(self) -> None:
+        """워커 종료 요청 후 남은 로그 전송까지 대기 (최대 SHUTDOWN_TIMEOUT초)"""
+        self._stop_event.set()
+        self._wake_worker()
+        if self._worker_thread and self._worker_thread.is_alive():
+            self._worker_thread.join(timeout=SHUTDOWN_TIMEOUT)
+
+    def _make_connector(self) -> aiohttp.TCPConnector:
+        """로그 서버용 커넥션 풀 (전송 중인 배치마다 커넥션 하나)"""
+        return aiohttp.TCPConnector(
+            limit_per_host=self.max_in_flight,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=DNS_CACHE_TTL,
+        )
 
-    async def _send_batch(self, batch: list, retry_count: int = 0) -> None:
+    @asynccontextmanager
+    async def _session_scope(self):
+        """
+        전송용 HTTP 세션
+
+        워커 루프에서는 계속 쓰는 세션(커넥션 / DNS 재사용, 워커 종료 시 닫힘),
+        다른 루프(close() 이후의 남은 로그 등)에서는 이번 전송에만 쓰는 세션
+        """
+        if asyncio.get_running_loop() is self._loop:
+            if self._session is None or self._session.closed:
+                self._session = aiohttp.ClientSession(connector=self._make_connector())
+            yield self._session
+        else:
+            async with aiohttp.ClientSession(connector=self._make_connector()) as session:
+                yield session
+
+    async def _send_batch(self, batch: list, retry_count: int = 0, batch_id: Optional[str] = None) -> None:
         """
         배치 전송 (비동기 HTTP POST)
 
         Args:
             batch: 로그 배치
             retry_count: 현재 재시도 횟수
+            batch_id: 배치 UUID (재시도 시 같은 ID → 커밋 후 응답만 유실된 배치를 서버가 다시 저장하지 않음)
         """
-        # JSON 직렬화
-        payload = json.dumps({"logs": batch})
+        if batch_id is None:
+            batch_id = str(uuid.uuid4())
 
-        # 압축 (100건 이상)
-        headers = {"Content-Type": "application/json"}
-        if self.enable_compression and len(batch) >= 100:
-            payload = gzip.compress(payload.encode())
-            headers["Content-Encoding"] = "gzip"
+        large = len(batch) >= 100
 
         # HTTP POST
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.server_url}/logs",
-                    data=payload if isinstance(payload, bytes) else payload.encode(),
-                    headers=headers,
-                    timeout=aiohttp.ClientTimeout(total=5)
-                ) as response:
-                    if response.status != 200:
-                        raise Exception(f"HTTP {response.status}: {await response.text()}")
+            async with self._session_scope() as session:
+                # 직렬화 (100건 이상이고 서버가 지원하면 열 단위)
+                if large and await self._use_columnar(session):
+                    payload = encode_columns(batch)
+                    headers = {"Content-Type": COLUMNAR_CONTENT_TYPE, "X-Batch-Id": batch_id}
+                else:
+                    payload = encode_rows(batch)
+                    headers = {"Content-Type": "application/json", "X-Batch-Id": batch_id}
+
+                # 압축 (100건 이상)
+                if self.enable_compression and large:
+                    compressor = await self._get_compressor(session)
+                    payload = compressor.compress(payload)
+                    headers["Content-Encoding"] = compressor.encoding
+
+                await self._post(session, payload, headers)
+            self._schedule_replay()
 
         except Exception as e:
-            # 재시도 로직
-            if retry_count < self.max_retries:
+            # 재시도 로직 (종료 중이고 스필을 쓰면 기다리지 않고 디스크로)
+            if retry_count < self.max_retries and not (self._spill and self._stop_event.is_set()):
                 # Exponential backoff
                 await asyncio.sleep(2 ** retry_count)
-                await self._send_batch(batch, retry_count + 1)
+                await self._send_batch(batch, retry_count + 1, batch_id)
+            elif self._spill is not None:
+                self._spill_batch(encode_rows(batch), len(batch), batch_id)
             else:
+                self.metrics["dropped"] += len(batch)
                 print(f"[Log Client] Final retry failed: {e}")
 
+    async def _post(self, session: aiohttp.ClientSession, payload: bytes, headers: Dict[str, str]) -> None:
+        """POST /logs (200이 아니면 예외)"""
+        async with session.post(
+            f"{self.server_url}/logs",
+            data=payload,
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=5)
+        ) as response:
+            if response.status != 200:
+                if response.status == 400:
+                    # 서버 재배포로 코덱 / 형식 지원이 바뀌었을 수 있음 → 다음 전송에서 재협상
+                    self._capabilities = None
+                    if self.compression == 'auto':
+                        self._compressor = None
+                raise Exception(f"HTTP {response.status}: {await response.text()}")
+
+    async def _get_compressor(self, session: aiohttp.ClientSession) -> Compressor:
+        """협상된 압축기 (처음 한 번만 서버에 질의)"""
+        if self._compressor is None:
+            self._compressor = await self._negotiate_compression(session)
+        return self._compressor
+
+    async def _get_capabilities(self, session: aiohttp.ClientSession) -> Dict[str, Any]:
+        """GET /ingest/capabilities (처음 한 번만 질의, 구버전 서버(404)는 빈 dict)"""
+        if self._capabilities is None:
+            timeout = aiohttp.ClientTimeout(total=2)
+            async with session.get(f"{self.server_url}/ingest/capabilities", timeout=timeout) as response:
+                self._capabilities = await response.json() if response.status == 200 else {}
+        return self._capabilities
+
+    async def _use_columnar(self, session: aiohttp.ClientSession) -> bool:
+        """열 단위 배치로 보낼지 (auto: 서버 batch_formats에 columnar가 있을 때)"""
+        if self.batch_format != 'auto':
+            return self.batch_format == 'columnar'
+        capabilities = await self._get_capabilities(session)
+        return "columnar" in (capabilities.get("batch_formats") or ())
+
+    async def _negotiate_compression(self, session: aiohttp.ClientSession) -> Compressor:
+        """
+        GET /ingest/capabilities로 코덱 협상
+
+        서버 목록 순서대로 이 클라이언트에도 설치된 첫 코덱을 고르고,
+        zstd 공유 사전이 있으면 함께 받습니다. 구버전 서버(404)는 gzip.
+        """
+        timeout = aiohttp.ClientTimeout(total=2)
+        capabilities = await self._get_capabilities(session)
+        if not capabilities:
+            return Compressor("gzip")
+
+        encoding = choose_encoding(capabilities.get("encodings") or ["gzip"])
+        dictionary = None
+        dictionary_info = capabilities.get("zstd_dictionary")
+        if encoding == "zstd" and dictionary_info:
+            async with session.get(f"{self.server_url}{dictionary_info['path']}", timeout=timeout) as response:
+                if response.status == 200:
+                    dictionary = await response.read()
+        return Compressor(encoding, zstd_dictionary=dictionary)
+
     def _graceful_shutdown(self) -> None:
         """Graceful shutdown - 앱 종료 시 큐 비우기"""
         if len(self.queue) > 0:
             print(f"[Log Client] Flushing {len(self.queue)} remaining logs...")
+        self._stop_worker()
+
+        # 워커가 시간 안에 끝내지 못한 로그
+        if len(self.queue) > 0:
             batch = [self.queue.popleft() for _ in range(len(self.queue))]
 
             # 이벤트 루프 안전하게 처리
@@ -476,28 +792,58 @@ class AsyncLogClient:
                     loop.close()
 
     def flush(self) -> None:
-        """수동 flush - 큐에 있는 모든 로그 즉시 전송"""
-        if len(self.queue) > 0:
-            batch = [self.queue.popleft() for _ in range(len(self.queue))]
+        """
+        수동 flush - 큐에 있는 모든 로그 즉시 전송
+
+        워커 루프에서 전송합니다. 실행 중인 이벤트 루프 밖에서 호출하면 전송이 끝날 때까지 대기하고,
+        async 코드 안에서 호출하면 전송만 시작하고 바로 리턴합니다.
+        """
+        if len(self.queue) == 0:
+            return
+        future = None
+        # 워커가 멈추는 중이면 예약한 _drain이 실행되기 전에 루프가 닫힐 수 있음
+        if self._worker_thread is not None and self._worker_thread.is_alive() and not self._stop_event.is_set():
             try:
-                loop = asyncio.get_running_loop()
-                # 이미 실행 중인 루프가 있으면 태스크 생성
-                asyncio.create_task(self._send_batch(batch))
+                future = asyncio.run_coroutine_threadsafe(self._drain(), self._loop)
             except RuntimeError:
-                # 실행 중인 루프가 없으면 새로 생성
-                loop = asyncio.new_event_loop()
-                try:
-                    loop.run_until_complete(self._send_batch(batch))
-                finally:
-                    loop.close()
+                # 루프가 이미 닫힘
+                pass
+        if future is None:
+            self._send_remaining()
+            return
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            try:
+                future.result(timeout=SHUTDOWN_TIMEOUT)
+            except (concurrent.futures.TimeoutError, concurrent.futures.CancelledError):
+                # 예약 직후 워커가 종료되어 _drain이 실행되지 않았거나 전송이 지연됨: 남은 로그 직접 전송
+                self._send_remaining()
+
+    def _send_remaining(self) -> None:
+        """큐에 남은 로그를 호출한 스레드에서 직접 전송 (워커 종료 후, 또는 워커와 함께 큐를 비움)"""
+        batch = []
+        try:
+            while self.queue:
+                batch.append(self.queue.popleft())
+        except IndexError:
+            # 같은 순간 워커가 마지막 로그를 가져감
+            pass
+        if not batch:
+            return
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self._send_batch(batch))
+        finally:
+            loop.close()
 
     async def close(self) -> None:
         """클라이언트 종료 (async 메서드)"""
-        self._stop_event.set()
-        if self._worker_thread and self._worker_thread.is_alive():
-            self._worker_thread.join(timeout=5)
+        # 워커가 남은 로그를 보내고 끝날 때까지 대기 (이 루프를 막지 않도록 스레드에서 join)
+        await asyncio.get_running_loop().run_in_executor(None, self._stop_worker)
 
-        # 남은 로그 전송
+        # 워커가 시간 안에 끝내지 못한 로그 전송
         if len(self.queue) > 0:
             print(f"[Log Client] Flushing {len(self.queue)} remaining logs...")
             batch = [self.queue.popleft() for _ in range(len(self.queue))]
@@ -581,9 +927,10 @@ class AsyncLogClient:
         현재 HTTP 요청 컨텍스트 조회
 
         Returns:
-            현재 설정된 컨텍스트 또는 None
+            현재 설정된 컨텍스트의 복사본 또는 None (수정해도 로그에는 반영되지 않음, set_request_context 사용)
         """
-        return _request_context.get()
+        context = _request_context.get()
+        return None if context is None else dict(context)
 
     # 사용자 컨텍스트 관리 (user_id, trace_id, session_id 등)
     @staticmethod
@@ -625,9 +972,10 @@ class AsyncLogClient:
         현재 사용자 컨텍스트 조회
 
         Returns:
-            현재 설정된 컨텍스트 또는 None
+            현재 설정된 컨텍스트의 복사본 또는 None (수정해도 로그에는 반영되지 않음, set_user_context 사용)
         """
-        return _user_context.get()
+        context = _user_context.get()
+        return None if context is None else dict(context)
 
     @staticmethod
     @contextmanager
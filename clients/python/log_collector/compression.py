@@ -0,0 +1,91 @@
+"""
+압축 코덱 (gzip / zstd / lz4) 및 서버 협상
+
+서버의 GET /ingest/capabilities가 알려 주는 코덱 목록(서버 권장 순서) 중
+이 클라이언트에도 설치된 첫 코덱을 사용합니다.
+- zstd: zstandard 패키지 (pip install log-collector-async[zstd])
+- lz4: lz4 패키지 (pip install log-collector-async[lz4])
+- gzip: 항상 사용 가능 (협상 실패 / 구버전 서버 폴백)
+"""
+
+import gzip
+import threading
+from typing import Iterable, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # zstd는 선택 사항
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # lz4는 선택 사항
+    lz4_frame = None
+
+# gzip 기본 압축 레벨 9는 1000건 배치에서 CPU 비용이 큼 (레벨 6: 약 4배 빠르고 크기 +10% 이내)
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# 서버가 코덱 목록을 주지 않을 때의 선호 순서
+DEFAULT_PREFERENCE = ("zstd", "lz4", "gzip")
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """이 클라이언트에서 사용 가능한 코덱"""
+    installed = {"zstd": zstandard is not None, "lz4": lz4_frame is not None, "gzip": True}
+    return tuple(encoding for encoding in DEFAULT_PREFERENCE if installed[encoding])
+
+
+def choose_encoding(server_encodings: Iterable[str]) -> str:
+    """
+    서버 목록 순서대로, 클라이언트도 지원하는 첫 코덱
+
+    Args:
+        server_encodings: 서버가 지원하는 코덱 (권장 순서)
+
+    Returns:
+        코덱 이름 (공통 코덱이 없으면 gzip)
+    """
+    local = available_encodings()
+    for encoding in server_encodings:
+        if encoding in local:
+            return encoding
+    return "gzip"
+
+
+class Compressor:
+    """
+    배치 본문 압축기
+
+    Example:
+        compressor = Compressor("zstd")
+        body = compressor.compress(payload)
+        headers["Content-Encoding"] = compressor.encoding
+    """
+
+    def __init__(self, encoding: str, zstd_dictionary: Optional[bytes] = None):
+        """
+        Args:
+            encoding: gzip | zstd | lz4
+            zstd_dictionary: 서버와 공유하는 zstd 사전 (GET /ingest/zstd-dictionary)
+        """
+        if encoding not in available_encodings():
+            raise ValueError(f"Unsupported or not installed compression: {encoding}")
+
+        self.encoding = encoding
+        self.dictionary_id: Optional[int] = None
+        self._zstd = None
+        if encoding == "zstd":
+            dictionary = zstandard.ZstdCompressionDict(zstd_dictionary) if zstd_dictionary else None
+            self.dictionary_id = dictionary.dict_id() if dictionary else None
+            self._zstd = zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=dictionary)
+        # ZstdCompressor는 동시 사용 불가 (flush()가 호출 스레드에서 전송할 수 있음)
+        self._lock = threading.Lock()
+
+    def compress(self, data: bytes) -> bytes:
+        if self._zstd is not None:
+            with self._lock:
+                return self._zstd.compress(data)
+        if self.encoding == "lz4":
+            return lz4_frame.compress(data)
+        return gzip.compress(data, compresslevel=GZIP_LEVEL)
@@ -0,0 +1,124 @@
+"""
+큐 레코드와 배치 인코딩
+
+log()는 로그마다 dict를 만들지 않고 __slots__ 레코드(LogRecord)를 큐에 넣습니다.
+공통 필드 / 컨텍스트는 컨텍스트가 바뀔 때만 병합한 스냅샷 dict를 여러 레코드가 공유하고,
+레코드별 병합과 JSON 직렬화는 워커에서 배치 단위로 합니다.
+
+- encode_rows: {"logs": [...]} (모든 서버)
+- encode_columns: 열 단위 배치 (서버 GET /ingest/capabilities의 batch_formats에 "columnar"가 있을 때)
+- JSON 인코더: orjson (pip install log-collector-async[fast]), 없으면 표준 json
+"""
+
+import json
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # orjson은 선택 사항
+    orjson = None
+
+# 열 단위 배치 본문의 Content-Type (log-save-server streaming.COLUMNAR_CONTENT_TYPE)
+COLUMNAR_CONTENT_TYPE = "application/vnd.logs.columnar+json"
+
+
+class LogRecord(Mapping):
+    """
+    큐에 쌓이는 로그 한 건
+
+    우선순위: 명시적 필드 > 호출 위치 > HTTP 요청 컨텍스트 > 사용자 컨텍스트 > 공통 필드
+    (to_dict()에서 한 번에 병합, 읽기 전용 dict처럼 조회 가능)
+
+    추가 필드는 dict 대신 (키..., 값...) 튜플로 보관 (kwargs dict는 키 1개여도 ~180바이트)
+    context는 공통 필드 + 사용자 + HTTP 요청 컨텍스트를 병합한 스냅샷 (여러 레코드가 공유, 수정 금지)
+    """
+
+    __slots__ = ("created_at", "level", "message", "caller", "context", "fields")
+
+    def __init__(
+        self,
+        created_at: float,
+        level: str,
+        message: str,
+        caller: Optional[Tuple[str, str]],
+        context: Dict[str, Any],
+        fields: Optional[Tuple[Any, ...]],
+    ):
+        self.created_at = created_at
+        self.level = level
+        self.message = message
+        self.caller = caller
+        self.context = context
+        self.fields = fields
+
+    def to_dict(self) -> Dict[str, Any]:
+        """전송할 로그 dict"""
+        entry = self.context.copy()
+        if self.caller is not None:
+            entry["function_name"], entry["file_path"] = self.caller
+        entry["level"] = self.level
+        entry["message"] = self.message
+        entry["created_at"] = self.created_at
+        fields = self.fields
+        if fields:
+            half = len(fields) >> 1
+            entry.update(zip(fields[:half], fields[half:]))
+        return entry
+
+    def __getitem__(self, key: str) -> Any:
+        return self.to_dict()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.to_dict())
+
+    def __len__(self) -> int:
+        return len(self.to_dict())
+
+    def __repr__(self) -> str:
+        return f"LogRecord({self.to_dict()!r})"
+
+
+def _as_dict(entry: Any) -> Dict[str, Any]:
+    return entry.to_dict() if type(entry) is LogRecord else entry
+
+
+def dumps(document: Any) -> bytes:
+    """JSON 직렬화 (orjson이 처리하지 못하는 값은 표준 json으로)"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(document)
+        except TypeError:  # 64비트 범위 밖 정수, 문자열이 아닌 키 등
+            pass
+    return json.dumps(document).encode()
+
+
+def encode_rows(batch: List[Any]) -> bytes:
+    """배치 → {"logs": [...]} JSON (LogRecord 또는 dict)"""
+    return dumps({"logs": [_as_dict(entry) for entry in batch]})
+
+
+def encode_columns(batch: List[Any]) -> bytes:
+    """
+    배치 → 열 단위 JSON
+
+    {"count": n, "columns": {필드: [값...]}, "constants": {필드: 값}}
+    모든 행에서 같은 값인 필드는 constants로, 없는 값은 null로 보냅니다.
+    """
+    rows = [_as_dict(entry) for entry in batch]
+    count = len(rows)
+
+    names: Dict[str, None] = {}
+    for row in rows:
+        names.update(dict.fromkeys(row))
+
+    columns = {}
+    constants = {}
+    for name in names:
+        values = [row.get(name) for row in rows]
+        first = values[0]
+        if type(first) is str and values.count(first) == count:
+            constants[name] = first
+        else:
+            columns[name] = values
+    return dumps({"count": count, "columns": columns, "constants": constants})
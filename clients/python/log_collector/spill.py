@@ -0,0 +1,164 @@
+"""
+디스크 스필 큐 (로그 서버 장애 대비)
+
+전송에 실패했거나 메모리 큐가 넘친 배치를 gzip으로 압축해 디렉터리의 세그먼트 파일에
+이어 쓰고(append-only), 서버가 복구되면 오래된 순서대로 다시 보냅니다.
+
+파일 형식: {번호:012d}.seg
+- 레코드 = 헤더(본문 길이, CRC32, 로그 건수, 배치 ID 36바이트) + gzip 본문 ({"logs": [...]} JSON)
+- 재전송에는 저장해 둔 배치 ID를 그대로 사용 → 이미 커밋된 배치는 서버가 다시 저장하지 않음
+- 전체 크기가 max_bytes를 넘으면 가장 오래된 세그먼트부터 삭제 (dropped)
+- 쓰는 도중 프로세스가 죽어 잘리거나 깨진 레코드부터는 무시
+"""
+
+import gzip
+import os
+import struct
+import threading
+import zlib
+from typing import List, Optional, Tuple
+
+from .compression import GZIP_LEVEL
+
+HEADER = struct.Struct(">III36s")
+SEGMENT_SUFFIX = ".seg"
+
+# 세그먼트 하나의 크기 (max_bytes의 1/8, 작은 한도에서도 최소 64KB)
+MIN_SEGMENT_BYTES = 64 * 1024
+
+# (배치 ID, 로그 건수, gzip 본문)
+SpilledBatch = Tuple[str, int, bytes]
+
+
+class SpillQueue:
+    """
+    세그먼트 파일 기반 FIFO 배치 큐 (스레드 안전)
+
+    Example:
+        spill = SpillQueue("/var/lib/myapp/log-spill", max_bytes=64 * 1024 * 1024)
+        spill.append(json_bytes, count=1000, batch_id=batch_id)
+        segment = spill.oldest()            # (번호, [(batch_id, count, gzip 본문), ...])
+        spill.remove(segment[0])            # 전부 재전송한 뒤 삭제
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        """
+        Args:
+            directory: 세그먼트 파일 디렉터리 (없으면 생성, 이전 프로세스가 남긴 세그먼트도 이어서 재전송)
+            max_bytes: 디스크 사용 한도 (바이트)
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.segment_bytes = max(MIN_SEGMENT_BYTES, max_bytes // 8)
+        self._lock = threading.Lock()
+        self._writer = None
+
+        self._sizes = {}
+        for name in os.listdir(directory):
+            if name.endswith(SEGMENT_SUFFIX) and name[:-len(SEGMENT_SUFFIX)].isdigit():
+                self._sizes[int(name[:-len(SEGMENT_SUFFIX)])] = os.path.getsize(os.path.join(directory, name))
+        self._next_seq = max(self._sizes, default=0) + 1
+
+    def _path(self, seq: int) -> str:
+        return os.path.join(self.directory, f"{seq:012d}{SEGMENT_SUFFIX}")
+
+    @property
+    def pending_bytes(self) -> int:
+        """디스크에 남아 있는 바이트"""
+        return sum(self._sizes.values())
+
+    def __bool__(self) -> bool:
+        return bool(self._sizes)
+
+    def append(self, payload: bytes, count: int, batch_id: str) -> int:
+        """
+        배치 하나를 현재 세그먼트 끝에 추가
+
+        Args:
+            payload: {"logs": [...]} JSON (압축 전)
+            count: 배치 로그 건수
+            batch_id: 배치 UUID
+
+        Returns:
+            한도 초과로 버린 로그 건수 (가장 오래된 세그먼트부터)
+        """
+        body = gzip.compress(payload, compresslevel=GZIP_LEVEL)
+        record = HEADER.pack(len(body), zlib.crc32(body), count, batch_id.encode()) + body
+        with self._lock:
+            if self._writer is None or self._sizes[self._writer_seq] + len(record) > self.segment_bytes:
+                self._roll()
+            self._writer.write(record)
+            self._writer.flush()
+            self._sizes[self._writer_seq] += len(record)
+            return self._enforce_cap()
+
+    def oldest(self) -> Optional[Tuple[int, List[SpilledBatch]]]:
+        """
+        가장 오래된 세그먼트와 그 배치들 (쓰는 중인 세그먼트면 닫고 다음 추가는 새 세그먼트로)
+
+        Returns:
+            (세그먼트 번호, 배치 목록) 또는 None (비어 있음)
+        """
+        with self._lock:
+            if not self._sizes:
+                return None
+            seq = min(self._sizes)
+            if self._writer is not None and seq == self._writer_seq:
+                self._close_writer()
+            return seq, self._read(seq)
+
+    def remove(self, seq: int) -> None:
+        """재전송을 마친 세그먼트 삭제"""
+        with self._lock:
+            if self._sizes.pop(seq, None) is not None:
+                self._unlink(seq)
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_writer()
+
+    def _roll(self) -> None:
+        self._close_writer()
+        self._writer_seq = self._next_seq
+        self._next_seq += 1
+        self._writer = open(self._path(self._writer_seq), "ab")
+        self._sizes[self._writer_seq] = 0
+
+    def _close_writer(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def _enforce_cap(self) -> int:
+        dropped = 0
+        while self.pending_bytes > self.max_bytes and len(self._sizes) > 1:
+            seq = min(self._sizes)
+            dropped += sum(count for _, count, _ in self._read(seq))
+            del self._sizes[seq]
+            self._unlink(seq)
+        return dropped
+
+    def _unlink(self, seq: int) -> None:
+        try:
+            os.remove(self._path(seq))
+        except FileNotFoundError:
+            pass
+
+    def _read(self, seq: int) -> List[SpilledBatch]:
+        try:
+            with open(self._path(seq), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return []
+
+        batches = []
+        offset = 0
+        while offset + HEADER.size <= len(data):
+            length, crc, count, batch_id = HEADER.unpack_from(data, offset)
+            body = data[offset + HEADER.size:offset + HEADER.size + length]
+            if len(body) < length or zlib.crc32(body) != crc:
+                break  # 잘린 / 깨진 레코드
+            batches.append((batch_id.decode(), count, body))
+            offset += HEADER.size + length
+        return batches
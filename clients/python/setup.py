@@ -43,6 +43,9 @@ setup(
         "python-dotenv>=0.19.0",
     ],
     extras_require={
+        "zstd": ["zstandard>=0.22.0"],
+        "lz4": ["lz4>=4.3.0"],
+        "fast": ["orjson>=3.9.0"],
         "dev": [
             "pytest>=7.0.0",
             "pytest-asyncio>=0.20.0",
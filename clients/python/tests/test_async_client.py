@@ -279,6 +279,29 @@ def test_user_context_with_http_context():
     AsyncLogClient.clear_request_context()
 
 
+def test_queued_logs_keep_context_snapshot():
+    """큐에 들어간 로그는 이후 컨텍스트 변경 / 조회 결과 수정의 영향을 받지 않음"""
+    client = AsyncLogClient("http://localhost:8000", batch_size=100)
+
+    AsyncLogClient.set_request_context(path="/api/users")
+    try:
+        with AsyncLogClient.user_context(user_id="user_1"):
+            client.info("first")
+            client.info("second")
+            first, second = client.queue[-2], client.queue[-1]
+
+            AsyncLogClient.get_user_context()["user_id"] = "mutated"
+            AsyncLogClient.get_request_context()["extra"] = "added"
+            AsyncLogClient.set_request_context(path="/api/orders")
+            client.info("third")
+    finally:
+        AsyncLogClient.clear_request_context()
+
+    assert first.context is second.context
+    assert first["user_id"] == "user_1" and first["path"] == "/api/users" and "extra" not in first
+    assert client.queue[-1]["user_id"] == "user_1" and client.queue[-1]["path"] == "/api/orders"
+
+
 def test_user_context_manual_override():
     """사용자 컨텍스트보다 수동 값이 우선하는지 테스트"""
     client = AsyncLogClient("http://localhost:8000", batch_size=100)
@@ -290,3 +313,26 @@ def test_user_context_manual_override():
 
         # 수동 값이 우선해야 함
         assert log_entry["user_id"] == "manual_user"
+
+
+def test_field_priority():
+    """필드 우선순위: 명시적 값 > 호출 위치 > HTTP 요청 컨텍스트 > 사용자 컨텍스트 > 공통 필드"""
+    client = AsyncLogClient("http://localhost:8000", service="base-service", batch_size=100)
+
+    AsyncLogClient.set_request_context(path="/api/orders", service="request-service", function_name="ctx_function")
+    try:
+        with AsyncLogClient.user_context(path="/user/path", user_id="u1", service="user-service"):
+            client.info("Priority", user_id="explicit")
+            log_entry = client.queue[-1]
+    finally:
+        AsyncLogClient.clear_request_context()
+
+    assert log_entry["user_id"] == "explicit"
+    assert log_entry["function_name"] == "test_field_priority"
+    assert log_entry["path"] == "/api/orders"
+    assert log_entry["service"] == "request-service"
+    assert log_entry["environment"] == client.environment
+
+    client.log("INFO", "No context")
+    assert client.queue[-1]["service"] == "base-service"
+    assert "path" not in client.queue[-1]
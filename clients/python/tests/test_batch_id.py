@@ -0,0 +1,60 @@
+"""
+단위 테스트: 배치 ID (멱등 재전송)
+로컬 aiohttp 테스트 서버 사용 (로그 서버 불필요)
+"""
+import uuid
+
+import pytest
+from aiohttp import web
+
+from log_collector import AsyncLogClient
+
+
+async def start_server(failures: int):
+    """처음 failures번은 500으로 응답하는 가짜 로그 서버"""
+    batch_ids = []
+
+    async def post_logs(request):
+        batch_ids.append(request.headers.get("X-Batch-Id"))
+        await request.read()
+        if len(batch_ids) <= failures:
+            return web.json_response({"detail": "boom"}, status=500)
+        return web.json_response({"status": "ok", "count": 1})
+
+    app = web.Application()
+    app.router.add_post("/logs", post_logs)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}", batch_ids
+
+
+@pytest.mark.asyncio
+async def test_retry_reuses_batch_id():
+    """재시도는 같은 X-Batch-Id로 전송 (서버가 중복 적재를 건너뜀)"""
+    runner, url, batch_ids = await start_server(failures=1)
+    client = AsyncLogClient(url, batch_size=10000, flush_interval=60)
+    try:
+        await client._send_batch([{"level": "INFO", "message": "m"}])
+        assert len(batch_ids) == 2
+        assert batch_ids[0] == batch_ids[1]
+        uuid.UUID(batch_ids[0])
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_batches_get_distinct_ids():
+    """배치마다 새 ID"""
+    runner, url, batch_ids = await start_server(failures=0)
+    client = AsyncLogClient(url, batch_size=10000, flush_interval=60)
+    try:
+        await client._send_batch([{"level": "INFO", "message": "a"}])
+        await client._send_batch([{"level": "INFO", "message": "b"}])
+        assert len(set(batch_ids)) == 2
+    finally:
+        await client.close()
+        await runner.cleanup()
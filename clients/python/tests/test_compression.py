@@ -0,0 +1,128 @@
+"""
+단위 테스트: 압축 코덱 및 서버 협상
+로컬 aiohttp 테스트 서버 사용 (로그 서버 불필요)
+"""
+import gzip
+import json
+
+import pytest
+from aiohttp import web
+
+from log_collector import AsyncLogClient
+from log_collector.compression import Compressor, available_encodings, choose_encoding
+
+zstandard = pytest.importorskip("zstandard")
+
+
+def decompress(body: bytes, encoding: str, dictionary: bytes = None) -> bytes:
+    if encoding == "zstd":
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        return zstandard.ZstdDecompressor(dict_data=dict_data).decompress(body)
+    if encoding == "lz4":
+        import lz4.frame
+        return lz4.frame.decompress(body)
+    return gzip.decompress(body)
+
+
+def test_choose_encoding_follows_server_order():
+    """서버 권장 순서 중 클라이언트도 가진 첫 코덱"""
+    assert choose_encoding(["zstd", "gzip"]) == "zstd"
+    assert choose_encoding(["br", "gzip"]) == "gzip"
+    assert choose_encoding([]) == "gzip"
+
+
+@pytest.mark.parametrize("encoding", available_encodings())
+def test_compressor_roundtrip(encoding):
+    """코덱별 압축 → 해제 왕복"""
+    payload = json.dumps({"logs": [{"level": "INFO", "message": f"m{i}"} for i in range(500)]}).encode()
+    assert decompress(Compressor(encoding).compress(payload), encoding) == payload
+
+
+def test_unknown_compression_rejected():
+    with pytest.raises(ValueError):
+        Compressor("br")
+
+
+async def start_server(capabilities, dictionary=None):
+    """코덱 협상 엔드포인트가 있는 가짜 로그 서버"""
+    received = []
+
+    async def get_capabilities(request):
+        if capabilities is None:
+            raise web.HTTPNotFound()
+        return web.json_response(capabilities)
+
+    async def get_dictionary(request):
+        return web.Response(body=dictionary)
+
+    async def post_logs(request):
+        encoding = request.headers.get("Content-Encoding", "")
+        body = await request.read()
+        logs = json.loads(decompress(body, encoding, dictionary) if encoding else body)["logs"]
+        received.append((encoding, len(logs)))
+        return web.json_response({"status": "ok", "count": len(logs)})
+
+    app = web.Application()
+    app.router.add_get("/ingest/capabilities", get_capabilities)
+    app.router.add_get("/ingest/zstd-dictionary", get_dictionary)
+    app.router.add_post("/logs", post_logs)
+    runner = web.AppRunner(app, auto_decompress=False)  # 본문을 그대로 받아 직접 해제
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}", received
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("capabilities, expected", [
+    ({"encodings": ["zstd", "lz4", "gzip"], "zstd_dictionary": None}, "zstd"),
+    ({"encodings": ["gzip"]}, "gzip"),
+    (None, "gzip"),  # 구버전 서버 (capabilities 없음)
+])
+async def test_negotiated_encoding(capabilities, expected):
+    """서버 capabilities에 따라 코덱 선택"""
+    runner, url, received = await start_server(capabilities)
+    client = AsyncLogClient(url, batch_size=10000, flush_interval=60)
+    try:
+        batch = [{"level": "INFO", "message": f"m{i}"} for i in range(150)]
+        await client._send_batch(batch)
+        assert received == [(expected, 150)]
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_zstd_dictionary_download():
+    """서버가 공유 사전을 알려 주면 받아서 사용"""
+    samples = [json.dumps({"level": "INFO", "message": f"User {i} login", "service": "auth"}).encode()
+               for i in range(2000)]
+    dictionary = zstandard.train_dictionary(4096, samples)
+    capabilities = {
+        "encodings": ["zstd", "gzip"],
+        "zstd_dictionary": {"id": dictionary.dict_id(), "path": "/ingest/zstd-dictionary"},
+    }
+    runner, url, received = await start_server(capabilities, dictionary.as_bytes())
+    client = AsyncLogClient(url, batch_size=10000, flush_interval=60)
+    try:
+        await client._send_batch([{"level": "INFO", "message": f"m{i}"} for i in range(150)])
+        assert received == [("zstd", 150)]
+        assert client._compressor.dictionary_id == dictionary.dict_id()
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_small_batch_not_compressed():
+    """100건 미만은 압축하지 않음 (협상도 하지 않음)"""
+    runner, url, received = await start_server({"encodings": ["zstd", "gzip"]})
+    client = AsyncLogClient(url, batch_size=10000, flush_interval=60)
+    try:
+        await client._send_batch([{"level": "INFO", "message": "m"}])
+        assert received == [("", 1)]
+        assert client._compressor is None
+    finally:
+        await client.close()
+        await runner.cleanup()
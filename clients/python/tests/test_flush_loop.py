@@ -0,0 +1,143 @@
+"""
+단위 테스트: 이벤트 기반 배치 전송 워커 (batch_size 즉시 전송, flush_interval, max_in_flight)
+로컬 aiohttp 테스트 서버 사용 (로그 서버 불필요)
+"""
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+
+from log_collector import AsyncLogClient, async_client
+
+
+async def start_server(delay: float = 0.0):
+    """받은 배치 크기와 최대 동시 요청 수를 기록하는 가짜 로그 서버"""
+    stats = {"batches": [], "active": 0, "max_active": 0}
+
+    async def post_logs(request):
+        stats["active"] += 1
+        stats["max_active"] = max(stats["max_active"], stats["active"])
+        try:
+            body = await request.json()
+            await asyncio.sleep(delay)
+            stats["batches"].append(len(body["logs"]))
+            return web.json_response({"status": "ok", "count": len(body["logs"])})
+        finally:
+            stats["active"] -= 1
+
+    app = web.Application()
+    app.router.add_post("/logs", post_logs)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}", stats
+
+
+async def wait_for(condition, timeout: float = 3.0) -> float:
+    """condition이 참이 될 때까지 대기, 걸린 시간 (초)"""
+    started = time.monotonic()
+    while not condition():
+        assert time.monotonic() - started < timeout, "timed out"
+        await asyncio.sleep(0.01)
+    return time.monotonic() - started
+
+
+@pytest.mark.asyncio
+async def test_full_batch_sent_without_waiting_for_interval():
+    """batch_size건이 모이면 flush_interval과 상관없이 바로 전송"""
+    runner, url, stats = await start_server()
+    client = AsyncLogClient(url, batch_size=10, flush_interval=60, enable_compression=False)
+    try:
+        for i in range(25):
+            client.log("INFO", f"m{i}")
+
+        elapsed = await wait_for(lambda: sum(stats["batches"]) == 20)
+        assert elapsed < 1.0
+        assert stats["batches"] == [10, 10]
+        assert len(client.queue) == 5
+    finally:
+        await client.close()
+        await runner.cleanup()
+    assert sum(stats["batches"]) == 25
+
+
+@pytest.mark.asyncio
+async def test_partial_batch_sent_after_interval():
+    """batch_size 미만이면 첫 로그 후 flush_interval이 지나서 전송"""
+    runner, url, stats = await start_server()
+    client = AsyncLogClient(url, batch_size=1000, flush_interval=0.3, enable_compression=False)
+    try:
+        client.log("INFO", "a")
+        client.log("INFO", "b")
+        await asyncio.sleep(0.1)
+        assert stats["batches"] == []
+
+        await wait_for(lambda: stats["batches"] == [2])
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_in_flight_batches_are_capped():
+    """느린 서버에서도 동시 전송은 max_in_flight개까지"""
+    runner, url, stats = await start_server(delay=0.2)
+    client = AsyncLogClient(url, batch_size=5, flush_interval=60, max_in_flight=2, enable_compression=False)
+    try:
+        for i in range(40):
+            client.log("INFO", f"m{i}")
+
+        await wait_for(lambda: sum(stats["batches"]) == 40)
+        assert stats["max_active"] == 2
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_idle_worker_is_not_woken():
+    """큐가 비어 있으면 워커는 다음 로그가 들어올 때만 깨어남"""
+    runner, url, stats = await start_server()
+    client = AsyncLogClient(url, batch_size=1000, flush_interval=60)
+    try:
+        await asyncio.sleep(0.1)
+        assert client._wake_at == 1
+
+        client.log("INFO", "a")
+        await wait_for(lambda: client._wake_at == 1000)
+        client.log("INFO", "b")
+        assert client._wake_at == 1000
+    finally:
+        await client.close()
+        await runner.cleanup()
+    assert stats["batches"] == [2]
+
+
+@pytest.mark.asyncio
+async def test_flush_falls_back_when_worker_does_not_drain(monkeypatch):
+    """워커가 예약된 _drain을 실행하지 못해도 flush()는 멈추지 않고 직접 전송"""
+    runner, url, stats = await start_server()
+    client = AsyncLogClient(url, batch_size=1000, flush_interval=60)
+    monkeypatch.setattr(async_client, "SHUTDOWN_TIMEOUT", 0.2)
+
+    async def stuck():
+        await asyncio.sleep(1)
+
+    monkeypatch.setattr(client, "_drain", stuck)
+    try:
+        client.log("INFO", "a")
+        client.log("INFO", "b")
+        await asyncio.wait_for(asyncio.to_thread(client.flush), timeout=3)
+        assert stats["batches"] == [2]
+
+        # 워커 종료 후에는 예약하지 않고 바로 전송
+        await asyncio.to_thread(client._stop_worker)
+        client.log("INFO", "c")
+        await asyncio.wait_for(asyncio.to_thread(client.flush), timeout=3)
+        assert stats["batches"] == [2, 1]
+    finally:
+        await client.close()
+        await runner.cleanup()
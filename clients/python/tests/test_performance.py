@@ -3,12 +3,20 @@
 실행 전 요구사항:
 1. 로그 서버 실행 (localhost:8000)
 2. 로컬 환경 권장 (네트워크 지연 최소화)
+
+배치 전송 지연(세션 재사용) 벤치마크는 로컬 aiohttp 대역 서버를 사용 (로그 서버 불필요)
+log() 호출 비용, 큐 메모리 / 직렬화 처리량 벤치마크는 서버 없이 실행 (큐에만 쌓음)
 """
+import asyncio
+import json
+import statistics
 import pytest
 import time
 import timeit
 import tracemalloc
+from aiohttp import web
 from log_collector import AsyncLogClient
+from log_collector.records import encode_rows, orjson
 
 
 @pytest.fixture
@@ -141,3 +149,139 @@ def test_batch_efficiency(check_server_running):
     # 모든 배치 크기에서 최소 성능 기준 충족
     for batch_size, throughput in results.items():
         assert throughput > 500, f"배치 크기 {batch_size}에서 성능 미달: {throughput:.0f} logs/sec"
+
+
+async def start_stand_in_server():
+    """로그 서버 대역: 배치를 받고 요청마다 클라이언트 커넥션(포트)을 기록"""
+    peers = []
+
+    async def post_logs(request):
+        peers.append(request.transport.get_extra_info("peername"))
+        await request.read()
+        return web.json_response({"status": "ok", "count": 1})
+
+    app = web.Application()
+    app.router.add_post("/logs", post_logs)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    # localhost로 접속 → 배치마다 새 세션이면 DNS 조회도 매번 발생
+    return runner, f"http://localhost:{port}", peers
+
+
+@pytest.mark.asyncio
+async def test_session_reuse_batch_latency():
+    """배치 전송 지연: 워커 루프의 재사용 세션 vs 배치마다 새 세션"""
+    runner, url, peers = await start_stand_in_server()
+    client = AsyncLogClient(url, batch_size=10000, flush_interval=60, enable_compression=False)
+    batch = [{"level": "INFO", "message": f"session test {i}"} for i in range(50)]
+    rounds = 100
+
+    async def timed(send) -> float:
+        started = time.perf_counter()
+        await send()
+        return (time.perf_counter() - started) * 1000
+
+    try:
+        # 배치마다 새 세션 (워커 루프 밖에서 호출하면 1회용 세션 사용)
+        fresh = [await timed(lambda: client._send_batch(batch)) for _ in range(rounds)]
+        fresh_connections = len(set(peers))
+        peers.clear()
+
+        # 워커 루프의 재사용 세션 (keep-alive 커넥션 + DNS 캐시)
+        def on_worker():
+            return asyncio.wrap_future(asyncio.run_coroutine_threadsafe(client._send_batch(batch), client._loop))
+        pooled = [await timed(on_worker) for _ in range(rounds)]
+        pooled_connections = len(set(peers))
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+    print(f"\n배치 전송 지연 ({len(batch)}건 배치, {rounds}회 중앙값):")
+    print(f"  배치마다 새 세션: {statistics.median(fresh):.3f}ms ({fresh_connections}개 커넥션)")
+    print(f"  세션 재사용:      {statistics.median(pooled):.3f}ms ({pooled_connections}개 커넥션)")
+
+    assert fresh_connections == rounds
+    assert pooled_connections == 1
+    assert statistics.median(pooled) < statistics.median(fresh)
+    assert client._session is None  # close()에서 정리됨
+
+
+def test_log_call_budget():
+    """log() / info() 호출당 비용: 호출 위치 추적 + 요청 / 사용자 컨텍스트 병합 포함 (서버 불필요)"""
+    client = AsyncLogClient(
+        "http://localhost:8000", service="bench-api", batch_size=10 ** 9, flush_interval=3600, max_queue_size=200_000
+    )
+    count = 50_000
+
+    AsyncLogClient.set_request_context(path="/api/orders", method="POST", ip="127.0.0.1")
+    try:
+        with AsyncLogClient.user_context(user_id="user_1", trace_id="trace_1"):
+            per_call = {
+                name: min(timeit.repeat(call, number=count, repeat=5)) / count
+                for name, call in (
+                    ("info", lambda: client.info("budget test", order_id=1)),
+                    ("log", lambda: client.log("INFO", "budget test", order_id=1)),
+                    ("log (auto_caller=False)", lambda: client.log("INFO", "budget test", auto_caller=False)),
+                )
+            }
+    finally:
+        AsyncLogClient.clear_request_context()
+        client.queue.clear()
+
+    print(f"\nlog() 호출 비용 ({count}회 x 5, 최소):")
+    for name, seconds in per_call.items():
+        print(f"  {name}: {seconds * 1e6:.2f}µs")
+
+    # 로컬 측정 ~2µs, CI 편차를 고려한 예산
+    for name, seconds in per_call.items():
+        assert seconds < 10e-6, f"{name} 호출당 {seconds * 1e6:.1f}µs이 예산 10µs 초과"
+
+
+def test_queue_memory_and_serialization():
+    """큐 레코드(LogRecord) vs 로그마다 병합한 dict: 큐 메모리와 배치 직렬화 처리량 (서버 불필요)"""
+    client = AsyncLogClient(
+        "http://localhost:8000", service="bench-api", batch_size=10 ** 9, flush_interval=3600, max_queue_size=20_000
+    )
+    count = 10_000
+    user = {"user_id": "user_1", "trace_id": "trace_1"}
+
+    AsyncLogClient.set_request_context(path="/api/orders", method="POST", ip="127.0.0.1")
+    try:
+        with AsyncLogClient.user_context(**user):
+            tracemalloc.start()
+            for i in range(count):
+                client.info(f"order {i} processed", order_id=i)
+            record_bytes = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+
+            # 이전 방식: log()에서 모든 필드를 dict 하나로 병합해 큐에 보관
+            request = AsyncLogClient.get_request_context()
+            tracemalloc.start()
+            dicts = [
+                {**client._base_fields, **user, **request, "function_name": "f", "file_path": __file__,
+                 "level": "INFO", "message": f"order {i} processed", "created_at": time.time(), "order_id": i}
+                for i in range(count)
+            ]
+            dict_bytes = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+    finally:
+        AsyncLogClient.clear_request_context()
+
+    records = list(client.queue)
+    client.queue.clear()
+    json_seconds = min(timeit.repeat(lambda: json.dumps({"logs": dicts}).encode(), number=1, repeat=5))
+    encode_seconds = min(timeit.repeat(lambda: encode_rows(records), number=1, repeat=5))
+
+    print(f"\n큐 메모리 ({count}건): 레코드 {record_bytes / count:.0f}B/건, dict {dict_bytes / count:.0f}B/건 "
+          f"({record_bytes / dict_bytes:.2f}x)")
+    print(f"직렬화: json.dumps(dict) {count / json_seconds:,.0f}건/s, "
+          f"encode_rows(레코드, {'orjson' if orjson else 'json'}) {count / encode_seconds:,.0f}건/s "
+          f"({json_seconds / encode_seconds:.1f}x)")
+
+    # 로컬 측정 ~0.48x (Python 버전마다 dict 크기가 조금씩 다름)
+    assert record_bytes < dict_bytes * 0.6
+    if orjson is not None:
+        assert json_seconds / encode_seconds >= 2
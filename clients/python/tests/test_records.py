@@ -0,0 +1,110 @@
+"""
+단위 테스트: 큐 레코드(LogRecord)와 배치 인코딩 (행 / 열 단위)
+로컬 aiohttp 테스트 서버 사용 (로그 서버 불필요)
+"""
+import json
+
+import pytest
+from aiohttp import web
+
+from log_collector import AsyncLogClient
+from log_collector.records import COLUMNAR_CONTENT_TYPE, LogRecord, encode_columns, encode_rows
+
+
+def make_record(message="m", caller=("handler", "/app/api.py"), fields=None, **contexts):
+    context = {"service": "base-api", "environment": "test", **contexts.get("user", {}), **contexts.get("request", {})}
+    return LogRecord(1700000000.5, "INFO", message, caller, context, fields)
+
+
+def from_columns(document):
+    """열 단위 문서 → 행 (log-save-server streaming.ColumnarParser와 같은 규칙)"""
+    names = list(document["columns"])
+    return [
+        {**document["constants"], **{n: v for n, v in zip(names, values) if v is not None}}
+        for values in zip(*document["columns"].values())
+    ]
+
+
+def test_record_merges_in_priority_order():
+    record = make_record(
+        fields=("user_id", "service", "explicit", "manual"),
+        user={"user_id": "ctx_user", "path": "/user"},
+        request={"path": "/request", "function_name": "ctx_function"},
+    )
+
+    assert record.to_dict() == {
+        "service": "manual",
+        "environment": "test",
+        "user_id": "explicit",
+        "path": "/request",
+        "function_name": "handler",
+        "file_path": "/app/api.py",
+        "level": "INFO",
+        "message": "m",
+        "created_at": 1700000000.5,
+    }
+    assert record["path"] == "/request" and "trace_id" not in record
+
+
+def test_encode_rows_accepts_records_and_dicts():
+    body = json.loads(encode_rows([make_record(caller=None), {"level": "WARN", "message": "plain"}]))
+
+    assert body["logs"][0] == {"service": "base-api", "environment": "test", "level": "INFO",
+                               "message": "m", "created_at": 1700000000.5}
+    assert body["logs"][1] == {"level": "WARN", "message": "plain"}
+
+
+def test_encode_columns_roundtrip():
+    batch = [
+        make_record("a", fields=("order_id", 1)),
+        make_record("b", user={"user_id": "u1"}),
+        make_record("c", fields=("order_id", "level", 2, "ERROR")),
+    ]
+    document = json.loads(encode_columns(batch))
+
+    assert document["count"] == 3
+    assert document["constants"] == {"service": "base-api", "environment": "test",
+                                     "function_name": "handler", "file_path": "/app/api.py"}
+    assert document["columns"]["order_id"] == [1, None, 2]
+    assert from_columns(document) == [record.to_dict() for record in batch]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("batch_formats, expected", [
+    (["rows", "columnar"], COLUMNAR_CONTENT_TYPE),
+    (["rows"], "application/json"),
+    (None, "application/json"),  # 구버전 서버
+])
+async def test_columnar_negotiated_for_large_batches(batch_formats, expected):
+    """서버 batch_formats에 columnar가 있으면 100건 이상 배치는 열 단위로"""
+    received = []
+
+    async def get_capabilities(request):
+        return web.json_response({"encodings": ["gzip"], "batch_formats": batch_formats})
+
+    async def post_logs(request):
+        document = json.loads(await request.read())
+        logs = from_columns(document) if request.content_type == COLUMNAR_CONTENT_TYPE else document["logs"]
+        received.append((request.content_type, len(logs), logs[-1]["message"]))
+        return web.json_response({"status": "ok", "count": len(logs)})
+
+    app = web.Application()
+    app.router.add_get("/ingest/capabilities", get_capabilities)
+    app.router.add_post("/logs", post_logs)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+    client = AsyncLogClient(url, service="base-api", batch_size=10000, flush_interval=60)
+    try:
+        for i in range(150):
+            client.info(f"m{i}", order_id=i)
+        await client._send_batch([client.queue.popleft() for _ in range(150)])
+        await client._send_batch([{"level": "INFO", "message": "small"}])
+
+        assert received == [(expected, 150, "m149"), ("application/json", 1, "small")]
+    finally:
+        await client.close()
+        await runner.cleanup()
@@ -0,0 +1,155 @@
+"""
+단위 테스트: 디스크 스필 큐 (서버 장애 시 배치 보관 → 복구 후 순서대로 재전송)
+로컬 aiohttp 테스트 서버 사용 (로그 서버 불필요)
+"""
+import asyncio
+import gzip
+import json
+import os
+import time
+
+import pytest
+from aiohttp import web
+
+from log_collector import AsyncLogClient
+from log_collector.spill import SpillQueue
+
+
+def payload(*messages):
+    return json.dumps({"logs": [{"message": m} for m in messages]}).encode()
+
+
+def messages(body):
+    return [log["message"] for log in json.loads(gzip.decompress(body))["logs"]]
+
+
+def test_spill_queue_is_fifo_across_segments_and_restarts(tmp_path):
+    spill = SpillQueue(str(tmp_path), max_bytes=64 * 1024 * 1024)
+    spill.segment_bytes = 1  # 레코드마다 새 세그먼트
+    for i in range(3):
+        spill.append(payload(f"m{i}"), 1, f"{i:036d}")
+    spill.close()
+
+    reopened = SpillQueue(str(tmp_path), max_bytes=64 * 1024 * 1024)
+    seen = []
+    while (segment := reopened.oldest()) is not None:
+        seq, batches = segment
+        seen.extend((batch_id[-1], messages(body)) for batch_id, _, body in batches)
+        reopened.remove(seq)
+
+    assert seen == [("0", ["m0"]), ("1", ["m1"]), ("2", ["m2"])]
+    assert not reopened and os.listdir(tmp_path) == []
+
+
+def test_spill_queue_cap_drops_oldest_segment(tmp_path):
+    spill = SpillQueue(str(tmp_path), max_bytes=1)
+    spill.segment_bytes = 1
+
+    assert spill.append(payload("a", "b"), 2, "x" * 36) == 0
+    assert spill.append(payload("c"), 1, "y" * 36) == 2
+
+    seq, batches = spill.oldest()
+    assert [messages(body) for _, _, body in batches] == [["c"]]
+
+
+def test_spill_queue_ignores_truncated_record(tmp_path):
+    spill = SpillQueue(str(tmp_path), max_bytes=64 * 1024 * 1024)
+    spill.append(payload("ok"), 1, "a" * 36)
+    spill.append(payload("torn"), 1, "b" * 36)
+    spill.close()
+    path = os.path.join(tmp_path, os.listdir(tmp_path)[0])
+    os.truncate(path, os.path.getsize(path) - 3)
+
+    _, batches = SpillQueue(str(tmp_path), max_bytes=64 * 1024 * 1024).oldest()
+    assert [messages(body) for _, _, body in batches] == [["ok"]]
+
+
+async def start_server(delay: float = 0.0):
+    """state["down"]이면 503으로 응답하는 가짜 로그 서버"""
+    state = {"down": False, "received": [], "batch_ids": [], "encodings": []}
+
+    async def post_logs(request):
+        if state["down"]:
+            return web.json_response({"detail": "down"}, status=503)
+        body = await request.read()  # aiohttp가 Content-Encoding: gzip 본문을 풀어 줌
+        state["encodings"].append(request.headers.get("Content-Encoding"))
+        await asyncio.sleep(delay)
+        state["batch_ids"].append(request.headers["X-Batch-Id"])
+        state["received"].extend(log["message"] for log in json.loads(body)["logs"])
+        return web.json_response({"status": "ok"})
+
+    app = web.Application()
+    app.router.add_post("/logs", post_logs)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}", state
+
+
+async def wait_for(condition, timeout: float = 5.0) -> None:
+    started = time.monotonic()
+    while not condition():
+        assert time.monotonic() - started < timeout, "timed out"
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_failed_batches_are_replayed_in_order_after_recovery(tmp_path):
+    """서버 장애 중 실패한 배치는 디스크에 보관 → 복구 후 첫 전송 성공 뒤 순서대로 재전송"""
+    runner, url, state = await start_server()
+    client = AsyncLogClient(url, batch_size=2, flush_interval=60, max_retries=0, max_in_flight=1,
+                            enable_compression=False, spill_dir=str(tmp_path))
+    try:
+        state["down"] = True
+        for i in range(4):
+            client.log("INFO", f"outage {i}")
+        await wait_for(lambda: client.metrics["spilled"] == 4)
+        assert client.get_metrics()["spill_pending_bytes"] > 0
+
+        state["down"] = False
+        client.log("INFO", "recovered 0")
+        client.log("INFO", "recovered 1")
+        await wait_for(lambda: client.metrics["replayed"] == 4)
+
+        assert state["received"] == ["recovered 0", "recovered 1", "outage 0", "outage 1", "outage 2", "outage 3"]
+        assert state["encodings"] == [None, "gzip", "gzip"]  # 디스크의 gzip 본문을 그대로 전송
+        assert client.get_metrics() == {"spilled": 4, "replayed": 4, "dropped": 0, "spill_pending_bytes": 0}
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_queue_overflow_spills_instead_of_dropping(tmp_path):
+    """전송이 밀려 큐가 넘치기 직전이면 오래된 배치를 디스크로 (유실 없음)"""
+    runner, url, state = await start_server(delay=0.05)
+    client = AsyncLogClient(url, batch_size=10, flush_interval=60, max_queue_size=30, max_in_flight=1,
+                            enable_compression=False, spill_dir=str(tmp_path))
+    try:
+        for i in range(200):
+            client.log("INFO", f"m{i}")
+            if i % 10 == 0:
+                await asyncio.sleep(0.001)
+
+        await wait_for(lambda: len(state["received"]) == 200 and client._replay_task is None)
+        assert client.metrics["spilled"] > 0
+        assert client.metrics["replayed"] == client.metrics["spilled"]
+        assert client.metrics["dropped"] == 0
+        assert sorted(state["received"]) == sorted(f"m{i}" for i in range(200))
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+
+def test_queue_eviction_is_counted_as_dropped():
+    """워커가 비우기 전에 큐가 넘쳐 버려진 로그도 dropped로 집계 (스필 없음)"""
+    client = AsyncLogClient("http://localhost:8000", batch_size=1000, flush_interval=3600, max_queue_size=5)
+
+    for i in range(8):
+        client.log("INFO", f"m{i}")
+
+    assert [record["message"] for record in client.queue] == [f"m{i}" for i in range(3, 8)]
+    assert client.get_metrics()["dropped"] == 3
+    client.queue.clear()
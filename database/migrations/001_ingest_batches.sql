@@ -0,0 +1,14 @@
+-- 기존 DB에 멱등 적재 테이블 추가 (새 DB는 schema.sql에 포함)
+-- psql -U postgres -d logs_db -f database/migrations/001_ingest_batches.sql
+
+CREATE TABLE IF NOT EXISTS ingest_batches (
+    batch_id UUID PRIMARY KEY,
+    accepted INTEGER NOT NULL,
+    rejected INTEGER NOT NULL DEFAULT 0,
+    received_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_ingest_batches_received
+ON ingest_batches(received_at);
+
+COMMENT ON TABLE ingest_batches IS '배치 중복 제거 창: INGEST_BATCH_RETENTION_HOURS 이후 log-save-server가 삭제';
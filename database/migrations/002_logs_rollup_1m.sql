@@ -0,0 +1,58 @@
+-- 기존 DB에 분당 롤업 테이블 추가 (새 DB는 schema.sql에 포함)
+-- psql -U postgres -d logs_db -f database/migrations/002_logs_rollup_1m.sql
+
+CREATE TABLE IF NOT EXISTS logs_rollup_1m (
+    bucket TIMESTAMPTZ NOT NULL,
+    service VARCHAR(100) NOT NULL,
+    level log_level NOT NULL,
+    error_type VARCHAR(200) NOT NULL DEFAULT '',
+    path VARCHAR(500) NOT NULL DEFAULT '',
+    log_count BIGINT NOT NULL,
+    duration_count BIGINT NOT NULL DEFAULT 0,
+    duration_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    duration_max DOUBLE PRECISION,
+    -- 구간 상한 (ms): 10, 50, 100, 250, 500, 1000, 2000, 5000, 10000, 초과
+    duration_histogram BIGINT[] NOT NULL,
+    PRIMARY KEY (bucket, service, level, error_type, path)
+);
+
+CREATE INDEX IF NOT EXISTS idx_rollup_level_bucket
+ON logs_rollup_1m(level, bucket DESC);
+
+COMMENT ON TABLE logs_rollup_1m IS '분당 롤업: log-save-server가 COPY와 같은 트랜잭션에서 upsert (soft delete 미반영)';
+COMMENT ON COLUMN logs_rollup_1m.error_type IS '에러 타입 (없으면 빈 문자열)';
+COMMENT ON COLUMN logs_rollup_1m.path IS 'API 경로 (없으면 빈 문자열)';
+COMMENT ON COLUMN logs_rollup_1m.duration_histogram IS 'duration_ms 구간별 건수 (상한 이하, 마지막은 10초 초과)';
+
+-- 기존 로그 백필 (한 번만 실행, 이후는 log-save-server가 적재 시점에 갱신)
+-- 대용량 테이블은 적재를 멈춘 상태에서 실행하세요
+INSERT INTO logs_rollup_1m (
+    bucket, service, level, error_type, path,
+    log_count, duration_count, duration_sum, duration_max, duration_histogram
+)
+SELECT
+    date_trunc('minute', created_at),
+    service,
+    level,
+    COALESCE(error_type, ''),
+    COALESCE(path, ''),
+    COUNT(*),
+    COUNT(duration_ms),
+    COALESCE(SUM(duration_ms), 0),
+    MAX(duration_ms),
+    ARRAY[
+        COUNT(*) FILTER (WHERE duration_ms <= 10),
+        COUNT(*) FILTER (WHERE duration_ms > 10 AND duration_ms <= 50),
+        COUNT(*) FILTER (WHERE duration_ms > 50 AND duration_ms <= 100),
+        COUNT(*) FILTER (WHERE duration_ms > 100 AND duration_ms <= 250),
+        COUNT(*) FILTER (WHERE duration_ms > 250 AND duration_ms <= 500),
+        COUNT(*) FILTER (WHERE duration_ms > 500 AND duration_ms <= 1000),
+        COUNT(*) FILTER (WHERE duration_ms > 1000 AND duration_ms <= 2000),
+        COUNT(*) FILTER (WHERE duration_ms > 2000 AND duration_ms <= 5000),
+        COUNT(*) FILTER (WHERE duration_ms > 5000 AND duration_ms <= 10000),
+        COUNT(*) FILTER (WHERE duration_ms > 10000)
+    ]
+FROM logs
+WHERE deleted = FALSE
+GROUP BY 1, 2, 3, 4, 5
+ON CONFLICT DO NOTHING;
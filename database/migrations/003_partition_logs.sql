@@ -0,0 +1,92 @@
+-- 기존 (파티션이 아닌) logs 테이블을 created_at 범위 파티션 테이블로 전환
+-- psql -U postgres -d logs_db -f database/migrations/003_partition_logs.sql
+--
+-- 방식: 기존 테이블을 logs_legacy로 이름만 바꾸고, 새 파티션 테이블의
+--       "가장 오래된 구간" 파티션으로 그대로 ATTACH 합니다 (행 복사 없음).
+-- - 전환 시점 이후의 행은 일 단위 파티션(logs_pYYYYMMDD)으로 들어감
+-- - ATTACH 전에 CHECK 제약을 검증해 두므로 ATTACH 시 전체 스캔이 없음
+-- - 기본 키 (id, created_at) 인덱스는 logs_legacy에서 한 번 생성됨 (테이블 크기에 비례)
+-- - logs_legacy는 이름 형식이 달라 자동 보관 기간 삭제 대상이 아님
+--   (모든 행이 LOG_RETENTION_DAYS를 지나면 ALTER TABLE logs DETACH PARTITION logs_legacy; DROP TABLE logs_legacy;)
+--
+-- log-save-server를 멈춘 상태에서 실행하세요 (전환 중 적재가 있으면 잠금 대기).
+
+BEGIN;
+
+-- 1. 기존 테이블과 인덱스 / 제약 이름 변경 (새 테이블이 같은 이름을 사용)
+ALTER TABLE logs RENAME TO logs_legacy;
+ALTER TABLE logs_legacy RENAME CONSTRAINT logs_pkey TO logs_legacy_pkey;
+ALTER INDEX idx_service_level_time RENAME TO idx_service_level_time_legacy;
+ALTER INDEX idx_error_time RENAME TO idx_error_time_legacy;
+ALTER INDEX idx_user_time RENAME TO idx_user_time_legacy;
+ALTER INDEX idx_trace RENAME TO idx_trace_legacy;
+
+-- 2. 파티션 테이블 생성 (id 시퀀스는 기존 것을 이어서 사용)
+CREATE TABLE logs (
+    LIKE logs_legacy INCLUDING DEFAULTS INCLUDING COMMENTS,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+ALTER SEQUENCE logs_id_seq OWNED BY logs.id;
+
+COMMENT ON TABLE logs IS '통합 로그 테이블 (프론트엔드 + 백엔드, created_at 범위 파티션)';
+
+CREATE INDEX idx_service_level_time
+ON logs(service, level, created_at DESC)
+WHERE deleted = FALSE;
+
+CREATE INDEX idx_error_time
+ON logs(error_type, created_at DESC)
+WHERE error_type IS NOT NULL AND deleted = FALSE;
+
+CREATE INDEX idx_user_time
+ON logs(user_id, created_at DESC)
+WHERE user_id IS NOT NULL AND deleted = FALSE;
+
+CREATE INDEX idx_trace
+ON logs(trace_id)
+WHERE trace_id IS NOT NULL AND deleted = FALSE;
+
+COMMENT ON INDEX idx_service_level_time IS '서비스별 로그 레벨 조회 최적화';
+COMMENT ON INDEX idx_error_time IS '에러 타입별 시계열 조회 최적화';
+COMMENT ON INDEX idx_user_time IS '사용자별 로그 조회 최적화';
+COMMENT ON INDEX idx_trace IS '분산 추적 (trace_id) 조회 최적화';
+
+-- 3. 기존 행 전체를 legacy 구간으로 ATTACH (전환 시점 다음 날 0시 UTC 이전)
+--    기존 부분 인덱스는 정의가 같으므로 재생성 없이 부모 인덱스에 연결됨
+DO $$
+DECLARE
+    boundary TIMESTAMPTZ := date_trunc('day', NOW() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' + INTERVAL '1 day';
+    max_created TIMESTAMPTZ;
+BEGIN
+    SELECT MAX(created_at) INTO max_created FROM logs_legacy;
+    IF max_created IS NOT NULL AND max_created >= boundary THEN
+        -- 미래 created_at 행이 있으면 그 뒤로 경계를 밀어냄
+        boundary := date_trunc('day', max_created AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' + INTERVAL '1 day';
+    END IF;
+
+    EXECUTE format(
+        'ALTER TABLE logs_legacy ADD CONSTRAINT logs_legacy_range CHECK (created_at < %L) NOT VALID',
+        boundary
+    );
+    EXECUTE 'ALTER TABLE logs_legacy VALIDATE CONSTRAINT logs_legacy_range';
+    EXECUTE format(
+        'ALTER TABLE logs ATTACH PARTITION logs_legacy FOR VALUES FROM (MINVALUE) TO (%L)',
+        boundary
+    );
+
+    -- 4. 이후 3일치 일 단위 파티션 (이후는 log-save-server가 생성)
+    FOR i IN 0..3 LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF logs FOR VALUES FROM (%L) TO (%L)',
+            'logs_p' || to_char(boundary AT TIME ZONE 'UTC' + make_interval(days => i), 'YYYYMMDD'),
+            boundary + make_interval(days => i),
+            boundary + make_interval(days => i + 1)
+        );
+    END LOOP;
+END $$;
+
+-- 5. 기본 파티션 (미리 만든 구간 밖의 행)
+CREATE TABLE logs_default PARTITION OF logs DEFAULT;
+
+COMMIT;
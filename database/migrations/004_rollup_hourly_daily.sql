@@ -0,0 +1,88 @@
+-- 기존 DB에 시간 / 일 롤업 추가 (새 DB는 schema.sql에 포함, 002_logs_rollup_1m.sql 적용 후 실행)
+-- psql -U postgres -d logs_db -f database/migrations/004_rollup_hourly_daily.sql
+--
+-- 백필은 필요 없습니다: log-save-server가 첫 갱신에서 워터마크가 없으면 logs_rollup_1m 전체를 재집계합니다.
+
+-- 시간 / 일 롤업: logs_rollup_1m을 재집계 (log-save-server가 워터마크부터 증분 갱신)
+-- 집계 질문(서비스별 에러 수, 느린 API, 지연 백분위)은 logs 스캔 대신 이 테이블을 읽음
+CREATE TABLE IF NOT EXISTS logs_rollup_1h (
+    bucket TIMESTAMPTZ NOT NULL,
+    service VARCHAR(100) NOT NULL,
+    level log_level NOT NULL,
+    error_type VARCHAR(200) NOT NULL DEFAULT '',
+    path VARCHAR(500) NOT NULL DEFAULT '',
+    log_count BIGINT NOT NULL,
+    duration_count BIGINT NOT NULL DEFAULT 0,
+    duration_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    duration_max DOUBLE PRECISION,
+    duration_histogram BIGINT[] NOT NULL,
+    PRIMARY KEY (bucket, service, level, error_type, path)
+);
+
+CREATE TABLE IF NOT EXISTS logs_rollup_1d (LIKE logs_rollup_1h INCLUDING ALL);
+
+CREATE INDEX IF NOT EXISTS idx_rollup_1h_service_bucket
+ON logs_rollup_1h(service, bucket DESC);
+
+CREATE INDEX IF NOT EXISTS idx_rollup_1d_service_bucket
+ON logs_rollup_1d(service, bucket DESC);
+
+-- 롤업별 증분 갱신 기준 (이 시각 이전 버킷은 갱신 완료, 늦게 도착한 행은 ROLLUP_LATE_MINUTES만큼 다시 계산)
+CREATE TABLE IF NOT EXISTS rollup_watermarks (
+    rollup_name VARCHAR(100) PRIMARY KEY,
+    watermark TIMESTAMPTZ NOT NULL,
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+COMMENT ON TABLE logs_rollup_1h IS '시간 롤업 (UTC 시 단위, logs_rollup_1m 재집계, soft delete 미반영)';
+COMMENT ON TABLE logs_rollup_1d IS '일 롤업 (UTC 일 단위, logs_rollup_1h 재집계, soft delete 미반영)';
+COMMENT ON COLUMN logs_rollup_1h.duration_histogram IS 'duration_ms 구간별 건수 (상한 10, 50, 100, 250, 500, 1000, 2000, 5000, 10000ms, 마지막은 초과) - histogram_percentile()로 백분위 계산';
+COMMENT ON COLUMN logs_rollup_1d.duration_histogram IS 'duration_ms 구간별 건수 (logs_rollup_1h와 같은 구간) - histogram_percentile()로 백분위 계산';
+
+-- 히스토그램 구간별 합 (버킷 재집계: histogram_sum(duration_histogram))
+CREATE OR REPLACE FUNCTION histogram_add(a BIGINT[], b BIGINT[]) RETURNS BIGINT[]
+LANGUAGE SQL IMMUTABLE PARALLEL SAFE AS $$
+    SELECT CASE
+        WHEN a IS NULL THEN b
+        WHEN b IS NULL THEN a
+        ELSE ARRAY(SELECT x + y FROM unnest(a, b) WITH ORDINALITY AS h(x, y, i) ORDER BY i)
+    END
+$$;
+
+CREATE OR REPLACE AGGREGATE histogram_sum(BIGINT[]) (
+    SFUNC = histogram_add,
+    STYPE = BIGINT[],
+    COMBINEFUNC = histogram_add,
+    PARALLEL = SAFE
+);
+
+-- 히스토그램 → 백분위 근사값 (ms, 구간 안에서 선형 보간, 10초 초과 구간은 10000)
+-- 예: histogram_percentile(histogram_sum(duration_histogram), 0.95)
+CREATE OR REPLACE FUNCTION histogram_percentile(histogram BIGINT[], q DOUBLE PRECISION)
+RETURNS DOUBLE PRECISION
+LANGUAGE plpgsql IMMUTABLE PARALLEL SAFE AS $$
+DECLARE
+    -- 구간 i의 범위는 (bounds[i], bounds[i + 1]]
+    bounds DOUBLE PRECISION[] := ARRAY[0, 10, 50, 100, 250, 500, 1000, 2000, 5000, 10000];
+    total BIGINT;
+    target DOUBLE PRECISION;
+    seen BIGINT := 0;
+BEGIN
+    SELECT SUM(c) INTO total FROM unnest(histogram) AS c;
+    IF total IS NULL OR total = 0 THEN
+        RETURN NULL;
+    END IF;
+    target := LEAST(GREATEST(q, 0), 1) * total;
+
+    FOR i IN 1 .. array_length(histogram, 1) LOOP
+        IF histogram[i] > 0 AND seen + histogram[i] >= target THEN
+            IF i >= array_length(bounds, 1) THEN
+                RETURN bounds[array_length(bounds, 1)];
+            END IF;
+            RETURN bounds[i] + (bounds[i + 1] - bounds[i]) * (target - seen) / histogram[i];
+        END IF;
+        seen := seen + histogram[i];
+    END LOOP;
+    RETURN bounds[array_length(bounds, 1)];
+END
+$$;
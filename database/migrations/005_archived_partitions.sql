@@ -0,0 +1,15 @@
+-- 기존 DB에 콜드 티어 기록 테이블 추가 (새 DB는 schema.sql에 포함)
+-- psql -U postgres -d logs_db -f database/migrations/005_archived_partitions.sql
+
+-- 콜드 티어: Parquet으로 옮긴 뒤 DROP한 logs 파티션 (log-save-server 아카이버가 기록)
+-- log-analysis-server는 MAX(range_end) 이전 구간을 DuckDB로 Parquet에서 조회
+CREATE TABLE IF NOT EXISTS archived_partitions (
+    partition_name VARCHAR(100) PRIMARY KEY,
+    range_start TIMESTAMPTZ,
+    range_end TIMESTAMPTZ NOT NULL,
+    row_count BIGINT NOT NULL,
+    location TEXT NOT NULL,
+    archived_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+COMMENT ON TABLE archived_partitions IS '콜드 티어로 옮긴 파티션 (range_start가 NULL이면 MINVALUE, location은 Parquet 루트)';
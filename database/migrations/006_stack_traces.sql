@@ -0,0 +1,39 @@
+-- 기존 DB에 스택 트레이스 중복 제거 추가 (새 DB는 schema.sql에 포함)
+-- psql -U postgres -d logs_db -f database/migrations/006_stack_traces.sql
+--
+-- 기존 행의 stack_trace는 그대로 두며 (analysis.logs 뷰가 둘 다 읽음), 적용 후 들어온 행부터 지문으로 저장합니다.
+-- logs에 NULL 컬럼을 추가하는 것은 카탈로그만 바뀌므로 행을 다시 쓰지 않습니다.
+
+ALTER TABLE logs ADD COLUMN IF NOT EXISTS stack_trace_hash BIGINT;
+
+-- 스택 트레이스: 정규화한 트레이스의 지문당 한 번만 저장 (log-save-server가 COPY 전에 삽입)
+-- logs에는 stack_trace_hash만 남아 스캔하는 힙 페이지가 작아짐
+CREATE TABLE IF NOT EXISTS stack_traces (
+    hash BIGINT PRIMARY KEY,
+    stack_trace TEXT NOT NULL,
+    first_seen TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+COMMENT ON TABLE stack_traces IS '지문(줄 번호 / 주소를 정규화한 트레이스의 해시)별 첫 트레이스 본문';
+
+-- log-analysis-server용 호환 뷰: 기존 logs 컬럼 그대로 (stack_trace는 지문이면 stack_traces에서 채움)
+-- 분석 서버는 search_path = analysis, public으로 접속하므로 에이전트 SQL의 "FROM logs"가 이 뷰를 읽음
+-- stack_trace를 읽지 않는 쿼리는 LEFT JOIN이 제거되어 (기본 키 조인) logs만 스캔
+CREATE SCHEMA IF NOT EXISTS analysis;
+
+CREATE OR REPLACE VIEW analysis.logs AS
+SELECT
+    l.id, l.created_at, l.level, l.log_type,
+    l.service, l.environment, l.service_version,
+    l.trace_id, l.user_id, l.session_id,
+    l.error_type, l.message, COALESCE(st.stack_trace, l.stack_trace) AS stack_trace,
+    l.path, l.method, l.action_type,
+    l.function_name, l.file_path,
+    l.duration_ms,
+    l.deleted,
+    l.metadata,
+    l.stack_trace_hash
+FROM public.logs l
+LEFT JOIN stack_traces st ON st.hash = l.stack_trace_hash;
+
+COMMENT ON VIEW analysis.logs IS 'logs + stack_traces (Text-to-SQL 에이전트가 읽는 logs)';
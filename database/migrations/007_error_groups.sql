@@ -0,0 +1,46 @@
+-- 기존 DB에 에러 지문 / 에러 그룹 추가 (새 DB는 schema.sql에 포함, 006_stack_traces.sql 적용 후 실행)
+-- psql -U postgres -d logs_db -f database/migrations/007_error_groups.sql
+--
+-- 적용 후 들어온 에러 로그부터 지문이 계산됩니다 (기존 행은 error_fingerprint가 NULL).
+-- 파티션 테이블의 인덱스 생성은 CONCURRENTLY를 쓸 수 없으므로 적재가 적은 시간에 실행하세요.
+
+ALTER TABLE logs ADD COLUMN IF NOT EXISTS error_fingerprint BIGINT;
+
+-- analysis.logs 뷰에 컬럼 추가 (기존 컬럼 순서 유지)
+CREATE OR REPLACE VIEW analysis.logs AS
+SELECT
+    l.id, l.created_at, l.level, l.log_type,
+    l.service, l.environment, l.service_version,
+    l.trace_id, l.user_id, l.session_id,
+    l.error_type, l.message, COALESCE(st.stack_trace, l.stack_trace) AS stack_trace,
+    l.path, l.method, l.action_type,
+    l.function_name, l.file_path,
+    l.duration_ms,
+    l.deleted,
+    l.metadata,
+    l.stack_trace_hash,
+    l.error_fingerprint
+FROM public.logs l
+LEFT JOIN stack_traces st ON st.hash = l.stack_trace_hash;
+
+-- 에러 그룹: 적재 시점 에러 지문(service, error_type, 정규화한 message, 상위 스택 프레임)별 누적
+-- log-save-server가 COPY와 같은 트랜잭션에서 갱신, "가장 많이 발생한 에러"는 이 테이블을 읽음
+CREATE TABLE IF NOT EXISTS error_groups (
+    fingerprint BIGINT PRIMARY KEY,
+    service VARCHAR(100) NOT NULL,
+    error_type VARCHAR(200) NOT NULL DEFAULT '',
+    message TEXT NOT NULL,
+    first_seen TIMESTAMPTZ NOT NULL,
+    last_seen TIMESTAMPTZ NOT NULL,
+    event_count BIGINT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_error_groups_last_seen
+ON error_groups(last_seen DESC);
+
+-- 기간별 그룹 집계 / 그룹의 최근 로그 조회
+CREATE INDEX IF NOT EXISTS idx_error_fingerprint_time
+ON logs(error_fingerprint, created_at DESC)
+WHERE error_fingerprint IS NOT NULL AND deleted = FALSE;
+
+COMMENT ON TABLE error_groups IS '에러 이슈: message는 처음 들어온 원문, event_count는 적재 시점 누적 (soft delete 미반영)';
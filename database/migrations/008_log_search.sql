@@ -0,0 +1,26 @@
+-- 기존 DB에 로그 검색 인덱스 추가 (새 DB는 schema.sql에 포함, 006_stack_traces.sql 적용 후 실행)
+-- psql -U postgres -d logs_db -f database/migrations/008_log_search.sql
+--
+-- log-analysis-server의 GET /search와 "grep" 질문이 message / stack_trace의 부분 문자열을
+-- ILIKE '%...%'로 찾을 때 순차 스캔 대신 trigram GIN 인덱스를 사용합니다 (한국어 포함, 3글자 이상).
+-- 인덱스는 COPY 시점에 PostgreSQL이 유지하므로 log-save-server 변경은 없습니다.
+-- 파티션 테이블의 인덱스 생성은 CONCURRENTLY를 쓸 수 없으므로 적재가 적은 시간에 실행하세요.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_message_trgm
+ON logs USING gin (message gin_trgm_ops)
+WHERE deleted = FALSE;
+
+-- 지문으로 저장하기 전의 행 / STACK_TRACE_DEDUP=false로 적재한 행
+CREATE INDEX IF NOT EXISTS idx_stack_trace_trgm
+ON logs USING gin (stack_trace gin_trgm_ops)
+WHERE stack_trace IS NOT NULL AND deleted = FALSE;
+
+-- 트레이스 본문 검색은 지문당 한 번 (작은 테이블), 일치한 지문의 로그는 아래 인덱스로 조회
+CREATE INDEX IF NOT EXISTS idx_stack_traces_trgm
+ON stack_traces USING gin (stack_trace gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_stack_trace_hash_time
+ON logs(stack_trace_hash, created_at DESC)
+WHERE stack_trace_hash IS NOT NULL AND deleted = FALSE;
@@ -7,10 +7,10 @@ CREATE TYPE source_type AS ENUM ('BACKEND', 'FRONTEND', 'MOBILE', 'IOT', 'WORKER
 CREATE TYPE env_type AS ENUM ('production', 'staging', 'development', 'test', 'local');
 CREATE TYPE http_method AS ENUM ('GET', 'POST', 'PUT', 'DELETE', 'PATCH', 'HEAD', 'OPTIONS');
 
--- 메인 로그 테이블
+-- 메인 로그 테이블 (created_at 범위 파티션, 파티션은 log-save-server가 미리 생성 / 만료 시 DROP)
 CREATE TABLE logs (
     -- 기본 정보 (4)
-    id BIGSERIAL PRIMARY KEY,
+    id BIGSERIAL,
     created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
     level log_level NOT NULL DEFAULT 'INFO',
     log_type source_type NOT NULL,
@@ -46,11 +46,40 @@ CREATE TABLE logs (
     deleted BOOLEAN NOT NULL DEFAULT FALSE,
 
     -- 확장 메타데이터 (1)
-    metadata JSONB
-);
+    metadata JSONB,
+
+    -- 스택 트레이스 지문 (stack_traces.hash, log-save-server는 stack_trace 대신 이 값만 저장)
+    stack_trace_hash BIGINT,
+
+    -- 에러 지문 (error_groups.fingerprint, log-save-server가 에러 행에만 계산)
+    error_fingerprint BIGINT,
+
+    -- 파티션 테이블의 기본 키는 파티션 키를 포함해야 함
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+-- 기본 파티션: 미리 만든 구간 밖의 행 (오래되었거나 먼 미래의 created_at)
+-- 나중에 해당 구간 파티션을 만들 때 log-save-server가 행을 옮김
+CREATE TABLE logs_default PARTITION OF logs DEFAULT;
+
+-- 초기 파티션: 오늘 + 3일 (UTC, 이후는 log-save-server가 PARTITION_INTERVAL 단위로 생성)
+DO $$
+DECLARE
+    day DATE;
+BEGIN
+    FOR i IN 0..3 LOOP
+        day := (NOW() AT TIME ZONE 'UTC')::date + i;
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF logs FOR VALUES FROM (%L) TO (%L)',
+            'logs_p' || to_char(day, 'YYYYMMDD'),
+            day::timestamp AT TIME ZONE 'UTC',
+            (day + 1)::timestamp AT TIME ZONE 'UTC'
+        );
+    END LOOP;
+END $$;
 
 -- 테이블 및 컬럼 설명
-COMMENT ON TABLE logs IS '통합 로그 테이블 (프론트엔드 + 백엔드)';
+COMMENT ON TABLE logs IS '통합 로그 테이블 (프론트엔드 + 백엔드, created_at 범위 파티션)';
 COMMENT ON COLUMN logs.path IS '경로: 백엔드는 API endpoint, 프론트엔드는 page path';
 COMMENT ON COLUMN logs.function_name IS '함수명: stack trace에서 추출 (프론트/백 공통)';
 COMMENT ON COLUMN logs.file_path IS '파일 경로: stack trace에서 추출 (프론트/백 공통)';
@@ -79,3 +108,212 @@ COMMENT ON INDEX idx_service_level_time IS '서비스별 로그 레벨 조회 
 COMMENT ON INDEX idx_error_time IS '에러 타입별 시계열 조회 최적화';
 COMMENT ON INDEX idx_user_time IS '사용자별 로그 조회 최적화';
 COMMENT ON INDEX idx_trace IS '분산 추적 (trace_id) 조회 최적화';
+
+-- 멱등 적재: 클라이언트 배치 ID (X-Batch-Id) 기록
+-- 로그 COPY와 같은 트랜잭션에서 삽입되므로 커밋된 배치만 남음 (재전송 중복 방지)
+CREATE TABLE ingest_batches (
+    batch_id UUID PRIMARY KEY,
+    accepted INTEGER NOT NULL,
+    rejected INTEGER NOT NULL DEFAULT 0,
+    received_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX idx_ingest_batches_received
+ON ingest_batches(received_at);
+
+COMMENT ON TABLE ingest_batches IS '배치 중복 제거 창: INGEST_BATCH_RETENTION_HOURS 이후 log-save-server가 삭제';
+
+-- 분당 롤업: 대시보드 / 알림이 logs 전체 스캔 대신 읽는 집계
+CREATE TABLE logs_rollup_1m (
+    bucket TIMESTAMPTZ NOT NULL,
+    service VARCHAR(100) NOT NULL,
+    level log_level NOT NULL,
+    error_type VARCHAR(200) NOT NULL DEFAULT '',
+    path VARCHAR(500) NOT NULL DEFAULT '',
+    log_count BIGINT NOT NULL,
+    duration_count BIGINT NOT NULL DEFAULT 0,
+    duration_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    duration_max DOUBLE PRECISION,
+    -- 구간 상한 (ms): 10, 50, 100, 250, 500, 1000, 2000, 5000, 10000, 초과
+    duration_histogram BIGINT[] NOT NULL,
+    PRIMARY KEY (bucket, service, level, error_type, path)
+);
+
+CREATE INDEX idx_rollup_level_bucket
+ON logs_rollup_1m(level, bucket DESC);
+
+COMMENT ON TABLE logs_rollup_1m IS '분당 롤업: log-save-server가 COPY와 같은 트랜잭션에서 upsert (soft delete 미반영)';
+COMMENT ON COLUMN logs_rollup_1m.error_type IS '에러 타입 (없으면 빈 문자열)';
+COMMENT ON COLUMN logs_rollup_1m.path IS 'API 경로 (없으면 빈 문자열)';
+COMMENT ON COLUMN logs_rollup_1m.duration_histogram IS 'duration_ms 구간별 건수 (상한 이하, 마지막은 10초 초과)';
+
+-- 시간 / 일 롤업: logs_rollup_1m을 재집계 (log-save-server가 워터마크부터 증분 갱신)
+-- 집계 질문(서비스별 에러 수, 느린 API, 지연 백분위)은 logs 스캔 대신 이 테이블을 읽음
+CREATE TABLE logs_rollup_1h (
+    bucket TIMESTAMPTZ NOT NULL,
+    service VARCHAR(100) NOT NULL,
+    level log_level NOT NULL,
+    error_type VARCHAR(200) NOT NULL DEFAULT '',
+    path VARCHAR(500) NOT NULL DEFAULT '',
+    log_count BIGINT NOT NULL,
+    duration_count BIGINT NOT NULL DEFAULT 0,
+    duration_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    duration_max DOUBLE PRECISION,
+    duration_histogram BIGINT[] NOT NULL,
+    PRIMARY KEY (bucket, service, level, error_type, path)
+);
+
+CREATE TABLE logs_rollup_1d (LIKE logs_rollup_1h INCLUDING ALL);
+
+CREATE INDEX idx_rollup_1h_service_bucket
+ON logs_rollup_1h(service, bucket DESC);
+
+CREATE INDEX idx_rollup_1d_service_bucket
+ON logs_rollup_1d(service, bucket DESC);
+
+-- 롤업별 증분 갱신 기준 (이 시각 이전 버킷은 갱신 완료, 늦게 도착한 행은 ROLLUP_LATE_MINUTES만큼 다시 계산)
+CREATE TABLE rollup_watermarks (
+    rollup_name VARCHAR(100) PRIMARY KEY,
+    watermark TIMESTAMPTZ NOT NULL,
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+COMMENT ON TABLE logs_rollup_1h IS '시간 롤업 (UTC 시 단위, logs_rollup_1m 재집계, soft delete 미반영)';
+COMMENT ON TABLE logs_rollup_1d IS '일 롤업 (UTC 일 단위, logs_rollup_1h 재집계, soft delete 미반영)';
+COMMENT ON COLUMN logs_rollup_1h.duration_histogram IS 'duration_ms 구간별 건수 (상한 10, 50, 100, 250, 500, 1000, 2000, 5000, 10000ms, 마지막은 초과) - histogram_percentile()로 백분위 계산';
+COMMENT ON COLUMN logs_rollup_1d.duration_histogram IS 'duration_ms 구간별 건수 (logs_rollup_1h와 같은 구간) - histogram_percentile()로 백분위 계산';
+
+-- 히스토그램 구간별 합 (버킷 재집계: histogram_sum(duration_histogram))
+CREATE OR REPLACE FUNCTION histogram_add(a BIGINT[], b BIGINT[]) RETURNS BIGINT[]
+LANGUAGE SQL IMMUTABLE PARALLEL SAFE AS $$
+    SELECT CASE
+        WHEN a IS NULL THEN b
+        WHEN b IS NULL THEN a
+        ELSE ARRAY(SELECT x + y FROM unnest(a, b) WITH ORDINALITY AS h(x, y, i) ORDER BY i)
+    END
+$$;
+
+CREATE OR REPLACE AGGREGATE histogram_sum(BIGINT[]) (
+    SFUNC = histogram_add,
+    STYPE = BIGINT[],
+    COMBINEFUNC = histogram_add,
+    PARALLEL = SAFE
+);
+
+-- 히스토그램 → 백분위 근사값 (ms, 구간 안에서 선형 보간, 10초 초과 구간은 10000)
+-- 예: histogram_percentile(histogram_sum(duration_histogram), 0.95)
+CREATE OR REPLACE FUNCTION histogram_percentile(histogram BIGINT[], q DOUBLE PRECISION)
+RETURNS DOUBLE PRECISION
+LANGUAGE plpgsql IMMUTABLE PARALLEL SAFE AS $$
+DECLARE
+    -- 구간 i의 범위는 (bounds[i], bounds[i + 1]]
+    bounds DOUBLE PRECISION[] := ARRAY[0, 10, 50, 100, 250, 500, 1000, 2000, 5000, 10000];
+    total BIGINT;
+    target DOUBLE PRECISION;
+    seen BIGINT := 0;
+BEGIN
+    SELECT SUM(c) INTO total FROM unnest(histogram) AS c;
+    IF total IS NULL OR total = 0 THEN
+        RETURN NULL;
+    END IF;
+    target := LEAST(GREATEST(q, 0), 1) * total;
+
+    FOR i IN 1 .. array_length(histogram, 1) LOOP
+        IF histogram[i] > 0 AND seen + histogram[i] >= target THEN
+            IF i >= array_length(bounds, 1) THEN
+                RETURN bounds[array_length(bounds, 1)];
+            END IF;
+            RETURN bounds[i] + (bounds[i + 1] - bounds[i]) * (target - seen) / histogram[i];
+        END IF;
+        seen := seen + histogram[i];
+    END LOOP;
+    RETURN bounds[array_length(bounds, 1)];
+END
+$$;
+
+-- 콜드 티어: Parquet으로 옮긴 뒤 DROP한 logs 파티션 (log-save-server 아카이버가 기록)
+-- log-analysis-server는 MAX(range_end) 이전 구간을 DuckDB로 Parquet에서 조회
+CREATE TABLE archived_partitions (
+    partition_name VARCHAR(100) PRIMARY KEY,
+    range_start TIMESTAMPTZ,
+    range_end TIMESTAMPTZ NOT NULL,
+    row_count BIGINT NOT NULL,
+    location TEXT NOT NULL,
+    archived_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+COMMENT ON TABLE archived_partitions IS '콜드 티어로 옮긴 파티션 (range_start가 NULL이면 MINVALUE, location은 Parquet 루트)';
+
+-- 스택 트레이스: 정규화한 트레이스의 지문당 한 번만 저장 (log-save-server가 COPY 전에 삽입)
+-- logs에는 stack_trace_hash만 남아 스캔하는 힙 페이지가 작아짐
+CREATE TABLE stack_traces (
+    hash BIGINT PRIMARY KEY,
+    stack_trace TEXT NOT NULL,
+    first_seen TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+COMMENT ON TABLE stack_traces IS '지문(줄 번호 / 주소를 정규화한 트레이스의 해시)별 첫 트레이스 본문';
+
+-- log-analysis-server용 호환 뷰: 기존 logs 컬럼 그대로 (stack_trace는 지문이면 stack_traces에서 채움)
+-- 분석 서버는 search_path = analysis, public으로 접속하므로 에이전트 SQL의 "FROM logs"가 이 뷰를 읽음
+-- stack_trace를 읽지 않는 쿼리는 LEFT JOIN이 제거되어 (기본 키 조인) logs만 스캔
+CREATE SCHEMA analysis;
+
+CREATE OR REPLACE VIEW analysis.logs AS
+SELECT
+    l.id, l.created_at, l.level, l.log_type,
+    l.service, l.environment, l.service_version,
+    l.trace_id, l.user_id, l.session_id,
+    l.error_type, l.message, COALESCE(st.stack_trace, l.stack_trace) AS stack_trace,
+    l.path, l.method, l.action_type,
+    l.function_name, l.file_path,
+    l.duration_ms,
+    l.deleted,
+    l.metadata,
+    l.stack_trace_hash,
+    l.error_fingerprint
+FROM public.logs l
+LEFT JOIN stack_traces st ON st.hash = l.stack_trace_hash;
+
+COMMENT ON VIEW analysis.logs IS 'logs + stack_traces (Text-to-SQL 에이전트가 읽는 logs)';
+
+-- 에러 그룹: 적재 시점 에러 지문(service, error_type, 정규화한 message, 상위 스택 프레임)별 누적
+-- log-save-server가 COPY와 같은 트랜잭션에서 갱신, "가장 많이 발생한 에러"는 이 테이블을 읽음
+CREATE TABLE error_groups (
+    fingerprint BIGINT PRIMARY KEY,
+    service VARCHAR(100) NOT NULL,
+    error_type VARCHAR(200) NOT NULL DEFAULT '',
+    message TEXT NOT NULL,
+    first_seen TIMESTAMPTZ NOT NULL,
+    last_seen TIMESTAMPTZ NOT NULL,
+    event_count BIGINT NOT NULL
+);
+
+CREATE INDEX idx_error_groups_last_seen
+ON error_groups(last_seen DESC);
+
+-- 기간별 그룹 집계 / 그룹의 최근 로그 조회
+CREATE INDEX idx_error_fingerprint_time
+ON logs(error_fingerprint, created_at DESC)
+WHERE error_fingerprint IS NOT NULL AND deleted = FALSE;
+
+COMMENT ON TABLE error_groups IS '에러 이슈: message는 처음 들어온 원문, event_count는 적재 시점 누적 (soft delete 미반영)';
+
+-- 로그 검색: message / stack_trace 부분 문자열(ILIKE '%...%')을 trigram GIN 인덱스로 조회
+-- log-analysis-server의 GET /search와 "grep" 질문이 사용 (COPY 시점에 PostgreSQL이 유지)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX idx_message_trgm
+ON logs USING gin (message gin_trgm_ops)
+WHERE deleted = FALSE;
+
+CREATE INDEX idx_stack_trace_trgm
+ON logs USING gin (stack_trace gin_trgm_ops)
+WHERE stack_trace IS NOT NULL AND deleted = FALSE;
+
+CREATE INDEX idx_stack_traces_trgm
+ON stack_traces USING gin (stack_trace gin_trgm_ops);
+
+CREATE INDEX idx_stack_trace_hash_time
+ON logs(stack_trace_hash, created_at DESC)
+WHERE stack_trace_hash IS NOT NULL AND deleted = FALSE;
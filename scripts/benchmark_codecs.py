@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+압축 코덱 벤치마크 (gzip / zstd / lz4)
+
+generate_test_data.py의 로그에 클라이언트가 자동으로 붙이는 공통 필드를 더해
+1000건 배치({"logs": [...]}) 단위로 압축률과 MB당 CPU 시간을 비교합니다.
+
+실행:
+    python scripts/benchmark_codecs.py
+    python scripts/benchmark_codecs.py --rows 20000 --batch-size 1000
+
+zstd 사전 학습 (log-save-server의 ZSTD_DICTIONARY_PATH로 지정):
+    python scripts/benchmark_codecs.py --train-dictionary logs.zstd-dict
+"""
+
+import argparse
+import gzip
+import json
+import random
+import time
+
+from generate_test_data import generate_log_data
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+
+def client_shaped_logs(count: int, seed: int = 42):
+    """AsyncLogClient가 실제로 보내는 형태 (공통 필드 + 호출 위치)"""
+    random.seed(seed)
+    now = time.time()
+    logs = []
+    for log in generate_log_data(count):
+        log["created_at"] = now - random.uniform(0, 86400)
+        log["environment"] = "production"
+        log["service_version"] = "v1.4.2"
+        log["log_type"] = "BACKEND"
+        log["function_name"] = random.choice(["handle_request", "process_payment", "create_order", "login"])
+        log["file_path"] = f"/app/{log['service'].replace('-', '_')}/handlers.py"
+        if random.random() < 0.3:
+            log["duration_ms"] = round(random.uniform(1, 3000), 3)
+        logs.append(log)
+    return logs
+
+
+def make_batches(logs, batch_size: int):
+    return [
+        json.dumps({"logs": logs[i:i + batch_size]}).encode()
+        for i in range(0, len(logs), batch_size)
+    ]
+
+
+def build_codecs(dictionary_bytes):
+    """(이름, 압축 함수, 해제 함수) 목록"""
+    codecs = [
+        ("gzip-9 (current)", lambda d: gzip.compress(d, 9), gzip.decompress),
+        ("gzip-6", lambda d: gzip.compress(d, 6), gzip.decompress),
+        ("gzip-1", lambda d: gzip.compress(d, 1), gzip.decompress),
+    ]
+    if zstandard:
+        for level in (1, 3):
+            cctx = zstandard.ZstdCompressor(level=level)
+            codecs.append((f"zstd-{level}", cctx.compress, zstandard.ZstdDecompressor().decompress))
+        if dictionary_bytes:
+            dictionary = zstandard.ZstdCompressionDict(dictionary_bytes)
+            cctx = zstandard.ZstdCompressor(level=3, dict_data=dictionary)
+            dctx = zstandard.ZstdDecompressor(dict_data=dictionary)
+            codecs.append(("zstd-3 + dict", cctx.compress, dctx.decompress))
+    if lz4_frame:
+        codecs.append(("lz4", lz4_frame.compress, lz4_frame.decompress))
+    return codecs
+
+
+def measure(compress, decompress, batches, repeat: int):
+    """best-of-N CPU 시간 (process_time)"""
+    compressed = [compress(batch) for batch in batches]
+    for original, packed in zip(batches[:3], compressed[:3]):
+        assert decompress(packed) == original
+
+    best_compress = best_decompress = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        for batch in batches:
+            compress(batch)
+        best_compress = min(best_compress, time.process_time() - start)
+
+        start = time.process_time()
+        for packed in compressed:
+            decompress(packed)
+        best_decompress = min(best_decompress, time.process_time() - start)
+
+    return sum(map(len, compressed)), best_compress, best_decompress
+
+
+def main():
+    parser = argparse.ArgumentParser(description="gzip / zstd / lz4 codec benchmark")
+    parser.add_argument("--rows", type=int, default=20000, help="생성할 로그 수")
+    parser.add_argument("--batch-size", type=int, default=1000, help="배치 크기 (클라이언트 기본값 1000)")
+    parser.add_argument("--repeat", type=int, default=3, help="반복 횟수 (best-of-N)")
+    parser.add_argument("--dictionary-size", type=int, default=16 * 1024, help="zstd 사전 크기 (바이트)")
+    parser.add_argument("--train-dictionary", metavar="PATH", help="학습한 zstd 사전을 이 경로에 저장")
+    args = parser.parse_args()
+
+    logs = client_shaped_logs(args.rows)
+    batches = make_batches(logs, args.batch_size)
+    raw_bytes = sum(map(len, batches))
+    raw_mb = raw_bytes / (1024 * 1024)
+
+    # 사전은 측정 데이터와 다른 시드의 로그로 학습 (과적합 방지)
+    dictionary_bytes = None
+    if zstandard:
+        samples = [json.dumps(log).encode() for log in client_shaped_logs(5000, seed=7)]
+        dictionary_bytes = zstandard.train_dictionary(args.dictionary_size, samples).as_bytes()
+        if args.train_dictionary:
+            with open(args.train_dictionary, "wb") as f:
+                f.write(dictionary_bytes)
+            print(f"💾 zstd dictionary saved: {args.train_dictionary} ({len(dictionary_bytes):,} bytes)")
+
+    print(f"📦 {len(logs):,} logs, {len(batches)} batches × {args.batch_size}, {raw_mb:.2f} MB raw JSON\n")
+    print(f"{'codec':<18} {'ratio':>7} {'compress ms/MB':>15} {'decompress ms/MB':>17}")
+    print("-" * 60)
+    for name, compress, decompress in build_codecs(dictionary_bytes):
+        size, compress_sec, decompress_sec = measure(compress, decompress, batches, args.repeat)
+        print(
+            f"{name:<18} {raw_bytes / size:>7.2f} "
+            f"{compress_sec * 1000 / raw_mb:>15.1f} {decompress_sec * 1000 / raw_mb:>17.1f}"
+        )
+
+    missing = [name for name, module in (("zstandard", zstandard), ("lz4", lz4_frame)) if module is None]
+    if missing:
+        print(f"\n⚠️  Not installed (skipped): {', '.join(missing)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+logs 파티셔닝 벤치마크 (단일 테이블 vs created_at 일 단위 파티션)
+
+임시 스키마(bench_partitions)에 같은 행을 가진 두 테이블을 만들고
+시간 범위 조회 지연과 "가장 오래된 하루" 삭제(DELETE vs DROP 파티션)를 비교합니다.
+실행 후 스키마는 삭제됩니다.
+
+실행 (log-save-server와 같은 DATABASE_* 환경 변수 사용):
+    python scripts/benchmark_partitions.py
+    python scripts/benchmark_partitions.py --rows 5000000 --days 30 --repeat 7
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+import asyncpg
+
+SCHEMA = "bench_partitions"
+
+COLUMNS = """
+    id BIGSERIAL,
+    created_at TIMESTAMPTZ NOT NULL,
+    level VARCHAR(10) NOT NULL,
+    service VARCHAR(100) NOT NULL,
+    message TEXT NOT NULL,
+    error_type VARCHAR(100),
+    duration_ms NUMERIC(10, 3),
+    deleted BOOLEAN DEFAULT FALSE
+"""
+
+# log-save-server가 자주 실행하는 형태의 조회
+QUERIES = {
+    "last 1 hour": """
+        SELECT COUNT(*) FROM {table}
+        WHERE created_at > NOW() - INTERVAL '1 hour' AND deleted = FALSE
+    """,
+    "service + level, last 24h": """
+        SELECT created_at, message FROM {table}
+        WHERE service = 'payment-api' AND level = 'ERROR' AND deleted = FALSE
+          AND created_at > NOW() - INTERVAL '24 hours'
+        ORDER BY created_at DESC LIMIT 100
+    """,
+    "errors by type, last 24h": """
+        SELECT error_type, COUNT(*) FROM {table}
+        WHERE error_type IS NOT NULL AND deleted = FALSE
+          AND created_at > NOW() - INTERVAL '24 hours'
+        GROUP BY error_type
+    """,
+}
+
+
+async def create_tables(conn, days: int):
+    await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    await conn.execute(f"CREATE SCHEMA {SCHEMA}")
+    await conn.execute(f"CREATE TABLE {SCHEMA}.logs_heap ({COLUMNS}, PRIMARY KEY (id))")
+    await conn.execute(
+        f"CREATE TABLE {SCHEMA}.logs_part ({COLUMNS}, PRIMARY KEY (id, created_at)) PARTITION BY RANGE (created_at)"
+    )
+    # 과거 days일 + 오늘 + 내일
+    for i in range(-days, 2):
+        await conn.execute(f"""
+            CREATE TABLE {SCHEMA}.logs_part_d{i + days} PARTITION OF {SCHEMA}.logs_part
+            FOR VALUES FROM (date_trunc('day', NOW()) + INTERVAL '{i} days')
+                       TO (date_trunc('day', NOW()) + INTERVAL '{i + 1} days')
+        """)
+
+
+async def load_rows(conn, rows: int, days: int):
+    await conn.execute(f"""
+        INSERT INTO {SCHEMA}.logs_heap (created_at, level, service, message, error_type, duration_ms)
+        SELECT
+            NOW() - random() * INTERVAL '{days} days',
+            (ARRAY['DEBUG', 'INFO', 'INFO', 'INFO', 'WARN', 'ERROR'])[1 + (random() * 5)::int],
+            (ARRAY['payment-api', 'order-api', 'user-api', 'web-frontend'])[1 + (random() * 3)::int],
+            'benchmark log ' || g,
+            CASE WHEN random() < 0.05 THEN (ARRAY['TimeoutError', 'DatabaseError', 'ValueError'])[1 + (random() * 2)::int] END,
+            CASE WHEN random() < 0.3 THEN (random() * 3000)::numeric(10, 3) END
+        FROM generate_series(1, {rows}) g
+    """)
+    await conn.execute(f"INSERT INTO {SCHEMA}.logs_part SELECT * FROM {SCHEMA}.logs_heap")
+
+    for table in ("logs_heap", "logs_part"):
+        await conn.execute(f"""
+            CREATE INDEX ON {SCHEMA}.{table} (service, level, created_at DESC) WHERE deleted = FALSE
+        """)
+        await conn.execute(f"""
+            CREATE INDEX ON {SCHEMA}.{table} (error_type, created_at DESC)
+            WHERE error_type IS NOT NULL AND deleted = FALSE
+        """)
+        await conn.execute(f"CREATE INDEX ON {SCHEMA}.{table} (created_at DESC)")
+        await conn.execute(f"VACUUM ANALYZE {SCHEMA}.{table}")
+
+
+def count_scans(plan) -> int:
+    """EXPLAIN JSON에서 스캔한 테이블(파티션) 수"""
+    scanned = 1 if "Relation Name" in plan else 0
+    return scanned + sum(count_scans(child) for child in plan.get("Plans", []))
+
+
+async def time_query(conn, sql: str, repeat: int):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await conn.fetch(sql)
+        durations.append((time.perf_counter() - start) * 1000)
+    # asyncpg는 json 결과를 문자열로 반환
+    plan = json.loads(await conn.fetchval(f"EXPLAIN (FORMAT JSON) {sql}"))
+    return statistics.median(durations), count_scans(plan[0]["Plan"])
+
+
+async def time_retention(conn, days: int):
+    """가장 오래된 하루 제거: DELETE (heap) vs DETACH + DROP (파티션)"""
+    start = time.perf_counter()
+    status = await conn.execute(f"""
+        DELETE FROM {SCHEMA}.logs_heap
+        WHERE created_at < date_trunc('day', NOW()) - INTERVAL '{days - 1} days'
+    """)
+    delete_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    await conn.execute(f"ALTER TABLE {SCHEMA}.logs_part DETACH PARTITION {SCHEMA}.logs_part_d0")
+    await conn.execute(f"DROP TABLE {SCHEMA}.logs_part_d0")
+    drop_ms = (time.perf_counter() - start) * 1000
+    return int(status.split()[-1]), delete_ms, drop_ms
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="logs 파티셔닝 벤치마크")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="벤치마크 스키마를 삭제하지 않음")
+    args = parser.parse_args()
+
+    conn = await asyncpg.connect(
+        host=os.getenv("DATABASE_HOST", "localhost"),
+        port=int(os.getenv("DATABASE_PORT", "5432")),
+        database=os.getenv("DATABASE_NAME", "logs_db"),
+        user=os.getenv("DATABASE_USER", "postgres"),
+        password=os.getenv("DATABASE_PASSWORD", "password"),
+    )
+    try:
+        print(f"📦 {args.rows:,} rows over {args.days} days → {SCHEMA}.logs_heap / logs_part")
+        started = time.perf_counter()
+        await create_tables(conn, args.days)
+        await load_rows(conn, args.rows, args.days)
+        print(f"   loaded in {time.perf_counter() - started:.1f}s\n")
+
+        print(f"{'query':<28} {'heap ms':>10} {'part ms':>10} {'speedup':>8} {'partitions':>11}")
+        for label, template in QUERIES.items():
+            heap_ms, _ = await time_query(conn, template.format(table=f"{SCHEMA}.logs_heap"), args.repeat)
+            part_ms, scanned = await time_query(conn, template.format(table=f"{SCHEMA}.logs_part"), args.repeat)
+            print(f"{label:<28} {heap_ms:>10.2f} {part_ms:>10.2f} {heap_ms / part_ms:>7.1f}x "
+                  f"{scanned:>5}/{args.days + 2}")
+
+        deleted, delete_ms, drop_ms = await time_retention(conn, args.days)
+        print(f"\n🗑️  oldest day ({deleted:,} rows): DELETE {delete_ms:.1f}ms vs DETACH + DROP {drop_ms:.1f}ms")
+    finally:
+        if not args.keep:
+            await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
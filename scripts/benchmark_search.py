@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+로그 텍스트 검색 벤치마크 (ILIKE 순차 스캔 vs pg_trgm GIN 인덱스)
+
+임시 스키마(bench_search)에 --rows개 로그를 만들고 같은 검색 쿼리를
+인덱스 없이(순차 스캔) / database/migrations/008_log_search.sql과 같은 트라이그램
+GIN 인덱스로 실행해 지연을 비교합니다. 인덱스 생성 시간 / 크기와
+인덱스가 있을 때의 적재(INSERT) 비용도 함께 출력합니다.
+실행 후 스키마는 삭제됩니다.
+
+실행 (log-save-server와 같은 DATABASE_* 환경 변수 사용):
+    python scripts/benchmark_search.py
+    python scripts/benchmark_search.py --rows 1000000 --repeat 7
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import asyncpg
+
+SCHEMA = "bench_search"
+
+# 드문 문자열 / 흔한 문자열 / 스택 트레이스 / SearchRepository 형태의 랭킹 + 페이지 쿼리
+QUERIES = {
+    "rare message": """
+        SELECT id FROM {schema}.logs
+        WHERE message ILIKE '%order 424242 %' AND deleted = FALSE
+    """,
+    "common, newest 50": """
+        SELECT id FROM {schema}.logs
+        WHERE message ILIKE '%connection refused%' AND deleted = FALSE
+        ORDER BY created_at DESC LIMIT 50
+    """,
+    "stack trace": """
+        SELECT COUNT(*) FROM {schema}.logs
+        WHERE stack_trace ILIKE '%handler_17_3%' AND deleted = FALSE
+    """,
+    "ranked page (service)": """
+        SELECT id, word_similarity('payment declined', message) AS rank FROM {schema}.logs
+        WHERE (message ILIKE '%payment declined%' OR stack_trace ILIKE '%payment declined%')
+          AND deleted = FALSE AND service = 'payment-api'
+        ORDER BY rank DESC, created_at DESC LIMIT 50 OFFSET 50
+    """,
+}
+
+INDEXES = [
+    "CREATE INDEX idx_bench_message_trgm ON {schema}.logs USING gin (message gin_trgm_ops) WHERE deleted = FALSE",
+    "CREATE INDEX idx_bench_stack_trace_trgm ON {schema}.logs USING gin (stack_trace gin_trgm_ops) "
+    "WHERE stack_trace IS NOT NULL AND deleted = FALSE",
+]
+
+# 적재 비용 측정용 배치 (log-save-server 배치와 비슷한 크기)
+INSERT_SQL = """
+    INSERT INTO {schema}.logs (created_at, level, service, message, stack_trace)
+    SELECT NOW(), 'INFO', 'order-api', 'benchmark insert for order ' || g || ' from user ' || (g * 7), NULL
+    FROM generate_series(1, $1) g
+"""
+
+
+async def create_table(conn):
+    await conn.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    await conn.execute(f"CREATE SCHEMA {SCHEMA}")
+    await conn.execute(f"""
+        CREATE TABLE {SCHEMA}.logs (
+            id BIGSERIAL PRIMARY KEY,
+            created_at TIMESTAMPTZ NOT NULL,
+            level VARCHAR(10) NOT NULL,
+            service VARCHAR(100) NOT NULL,
+            message TEXT NOT NULL,
+            stack_trace TEXT,
+            deleted BOOLEAN DEFAULT FALSE
+        )
+    """)
+
+
+async def load_rows(conn, rows: int, error_ratio: float):
+    # 메시지 템플릿 몇 가지 + 주문 / 사용자 번호 (실제 로그처럼 반복이 많은 텍스트)
+    await conn.execute(f"""
+        INSERT INTO {SCHEMA}.logs (created_at, level, service, message, stack_trace)
+        SELECT
+            NOW() - random() * INTERVAL '30 days',
+            CASE WHEN e THEN 'ERROR' ELSE (ARRAY['DEBUG', 'INFO', 'INFO', 'WARN'])[1 + (random() * 3)::int] END,
+            (ARRAY['payment-api', 'order-api', 'user-api', 'web-frontend'])[1 + (random() * 3)::int],
+            (ARRAY['request completed for order ', 'connection refused while loading order ',
+                   'payment declined for order ', 'cache miss for order '])[1 + (g % 4)]
+                || (random() * 1000000)::int || ' from user ' || (random() * 50000)::int,
+            CASE WHEN e THEN format(
+                E'Traceback (most recent call last):\\n  File "/app/module_%s.py", line %s, in handler_%s_%s\\nTimeoutError: upstream timed out',
+                g % 100, g % 500, g % 50, g % 7) END
+        FROM (SELECT g, random() < {error_ratio} AS e FROM generate_series(1, {rows}) g) s
+    """)
+    await conn.execute(f"VACUUM ANALYZE {SCHEMA}.logs")
+
+
+async def time_query(conn, sql: str, repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await conn.fetch(sql)
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations)
+
+
+async def time_inserts(conn, batches: int, batch_size: int) -> float:
+    """배치당 INSERT 지연 중앙값 (ms)"""
+    durations = []
+    for _ in range(batches):
+        start = time.perf_counter()
+        await conn.execute(INSERT_SQL.format(schema=SCHEMA), batch_size)
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="로그 텍스트 검색 벤치마크")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--error-ratio", type=float, default=0.05, help="스택 트레이스가 있는 에러 행 비율")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=1000, help="적재 비용 측정 배치 크기")
+    parser.add_argument("--keep", action="store_true", help="벤치마크 스키마를 삭제하지 않음")
+    args = parser.parse_args()
+
+    conn = await asyncpg.connect(
+        host=os.getenv("DATABASE_HOST", "localhost"),
+        port=int(os.getenv("DATABASE_PORT", "5432")),
+        database=os.getenv("DATABASE_NAME", "logs_db"),
+        user=os.getenv("DATABASE_USER", "postgres"),
+        password=os.getenv("DATABASE_PASSWORD", "password"),
+        command_timeout=None,
+    )
+    try:
+        print(f"📦 {args.rows:,} rows ({args.error_ratio:.0%} with stack traces) → {SCHEMA}")
+        started = time.perf_counter()
+        await create_table(conn)
+        await load_rows(conn, args.rows, args.error_ratio)
+        print(f"   loaded in {time.perf_counter() - started:.1f}s\n")
+
+        queries = {label: sql.format(schema=SCHEMA) for label, sql in QUERIES.items()}
+        seq_ms = {label: await time_query(conn, sql, args.repeat) for label, sql in queries.items()}
+        insert_before = await time_inserts(conn, args.repeat, args.batch_size)
+
+        started = time.perf_counter()
+        for sql in INDEXES:
+            await conn.execute(sql.format(schema=SCHEMA))
+        await conn.execute(f"ANALYZE {SCHEMA}.logs")
+        build_s = time.perf_counter() - started
+        index_size = await conn.fetchval(f"""
+            SELECT SUM(pg_relation_size(indexrelid)) FROM pg_index
+            WHERE indrelid = '{SCHEMA}.logs'::regclass AND indexrelid::regclass::text LIKE '%trgm%'
+        """)
+        heap_size = await conn.fetchval(f"SELECT pg_relation_size('{SCHEMA}.logs')")
+        print(f"trigram indexes: built in {build_s:.1f}s, {index_size / 1024 / 1024:,.1f} MB "
+              f"(heap {heap_size / 1024 / 1024:,.1f} MB)\n")
+
+        print(f"{'query':<24} {'ILIKE ms':>10} {'trgm ms':>10} {'speedup':>8}")
+        for label, sql in queries.items():
+            trgm_ms = await time_query(conn, sql, args.repeat)
+            print(f"{label:<24} {seq_ms[label]:>10.2f} {trgm_ms:>10.2f} {seq_ms[label] / trgm_ms:>7.1f}x")
+
+        insert_after = await time_inserts(conn, args.repeat, args.batch_size)
+        print(f"\ninsert {args.batch_size:,} rows: {insert_before:.2f} ms → {insert_after:.2f} ms "
+              f"with trigram indexes ({insert_after / insert_before:.1f}x)")
+    finally:
+        if not args.keep:
+            await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
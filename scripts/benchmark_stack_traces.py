@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+스택 트레이스 분리 저장 벤치마크 (logs에 본문 vs 지문 + stack_traces)
+
+임시 스키마(bench_stack_traces)에 같은 행을 가진 두 테이블을 만들고
+테이블 크기(힙 / TOAST / 인덱스)와 조회 지연을 비교합니다.
+에러 행의 일부가 --traces개 트레이스 중 하나를 가지며 (줄 번호만 다른 변형 포함),
+지문 테이블은 log-save-server처럼 트레이스당 한 번만 저장합니다.
+실행 후 스키마는 삭제됩니다.
+
+실행 (log-save-server와 같은 DATABASE_* 환경 변수 사용):
+    python scripts/benchmark_stack_traces.py
+    python scripts/benchmark_stack_traces.py --rows 2000000 --traces 200 --frames 15 --repeat 7
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import asyncpg
+
+SCHEMA = "bench_stack_traces"
+
+COLUMNS = """
+    id BIGSERIAL PRIMARY KEY,
+    created_at TIMESTAMPTZ NOT NULL,
+    level VARCHAR(10) NOT NULL,
+    service VARCHAR(100) NOT NULL,
+    message TEXT NOT NULL,
+    error_type VARCHAR(100),
+    duration_ms NUMERIC(10, 3),
+    deleted BOOLEAN DEFAULT FALSE
+"""
+
+# 에이전트가 자주 만드는 형태의 조회 ({logs}: 인라인 테이블 또는 호환 뷰)
+QUERIES = {
+    "errors by service, 7d": """
+        SELECT service, COUNT(*) FROM {logs}
+        WHERE level = 'ERROR' AND deleted = FALSE AND created_at > NOW() - INTERVAL '7 days'
+        GROUP BY service
+    """,
+    "message search": """
+        SELECT COUNT(*) FROM {logs}
+        WHERE message LIKE '%order 4242%' AND deleted = FALSE
+    """,
+    "latest traces": """
+        SELECT created_at, error_type, stack_trace FROM {logs}
+        WHERE stack_trace IS NOT NULL AND deleted = FALSE
+        ORDER BY created_at DESC LIMIT 50
+    """,
+}
+
+
+async def create_tables(conn):
+    await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    await conn.execute(f"CREATE SCHEMA {SCHEMA}")
+    await conn.execute(f"CREATE TABLE {SCHEMA}.logs_inline ({COLUMNS}, stack_trace TEXT)")
+    await conn.execute(f"CREATE TABLE {SCHEMA}.logs_hashed ({COLUMNS}, stack_trace_hash BIGINT)")
+    await conn.execute(f"""
+        CREATE TABLE {SCHEMA}.stack_traces (hash BIGINT PRIMARY KEY, stack_trace TEXT NOT NULL)
+    """)
+    # database/schema.sql의 analysis.logs와 같은 모양의 호환 뷰
+    await conn.execute(f"""
+        CREATE VIEW {SCHEMA}.logs_view AS
+        SELECT l.id, l.created_at, l.level, l.service, l.message, l.error_type, l.duration_ms,
+               l.deleted, st.stack_trace
+        FROM {SCHEMA}.logs_hashed l
+        LEFT JOIN {SCHEMA}.stack_traces st ON st.hash = l.stack_trace_hash
+    """)
+
+
+async def load_rows(conn, rows: int, traces: int, frames: int, error_ratio: float):
+    # 트레이스 t의 본문: 프레임마다 파일 / 함수 / 줄 번호 (변형 v는 첫 줄 번호만 다름 → 같은 지문)
+    await conn.execute(f"""
+        CREATE TEMP TABLE trace_bodies AS
+        SELECT t, v, string_agg(
+            format('  File "/app/services/module_%s.py", line %s, in handler_%s_%s',
+                   t, CASE WHEN f = 1 THEN 10 + v ELSE 100 + f * 7 END, t, f),
+            E'\\n' ORDER BY f
+        ) || E'\\nTimeoutError: upstream timed out' AS body
+        FROM generate_series(1, {traces}) t, generate_series(0, 2) v, generate_series(1, {frames}) f
+        GROUP BY t, v
+    """)
+    await conn.execute(f"""
+        CREATE TEMP TABLE bench_rows AS
+        SELECT
+            g,
+            NOW() - random() * INTERVAL '30 days' AS created_at,
+            CASE WHEN random() < {error_ratio} THEN 'ERROR'
+                 ELSE (ARRAY['DEBUG', 'INFO', 'INFO', 'WARN'])[1 + (random() * 3)::int] END AS level,
+            (ARRAY['payment-api', 'order-api', 'user-api', 'web-frontend'])[1 + (random() * 3)::int] AS service,
+            'benchmark log for order ' || (random() * 10000)::int AS message,
+            CASE WHEN random() < 0.3 THEN (random() * 3000)::numeric(10, 3) END AS duration_ms,
+            1 + (random() * ({traces} - 1))::int AS t,
+            (random() * 2)::int AS v
+        FROM generate_series(1, {rows}) g
+    """)
+    await conn.execute(f"""
+        INSERT INTO {SCHEMA}.logs_inline (created_at, level, service, message, error_type, duration_ms, stack_trace)
+        SELECT r.created_at, r.level, r.service, r.message,
+               CASE WHEN r.level = 'ERROR' THEN 'TimeoutError' END, r.duration_ms,
+               CASE WHEN r.level = 'ERROR' THEN b.body END
+        FROM bench_rows r JOIN trace_bodies b ON b.t = r.t AND b.v = r.v
+        ORDER BY r.g
+    """)
+    await conn.execute(f"""
+        INSERT INTO {SCHEMA}.stack_traces (hash, stack_trace)
+        SELECT t, body FROM trace_bodies WHERE v = 0
+    """)
+    await conn.execute(f"""
+        INSERT INTO {SCHEMA}.logs_hashed (created_at, level, service, message, error_type, duration_ms, stack_trace_hash)
+        SELECT r.created_at, r.level, r.service, r.message,
+               CASE WHEN r.level = 'ERROR' THEN 'TimeoutError' END, r.duration_ms,
+               CASE WHEN r.level = 'ERROR' THEN r.t END
+        FROM bench_rows r
+        ORDER BY r.g
+    """)
+    for table in ("logs_inline", "logs_hashed", "stack_traces"):
+        await conn.execute(f"VACUUM ANALYZE {SCHEMA}.{table}")
+
+
+async def table_sizes(conn, table: str):
+    """(힙, TOAST, 인덱스) 바이트"""
+    row = await conn.fetchrow(f"""
+        SELECT pg_relation_size(c.oid) AS heap,
+               COALESCE(pg_total_relation_size(c.reltoastrelid), 0) AS toast,
+               pg_indexes_size(c.oid) AS indexes
+        FROM pg_class c WHERE c.oid = '{SCHEMA}.{table}'::regclass
+    """)
+    return row["heap"], row["toast"], row["indexes"]
+
+
+async def time_query(conn, sql: str, repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await conn.fetch(sql)
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations)
+
+
+def mb(size: int) -> str:
+    return f"{size / 1024 / 1024:,.1f} MB"
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="스택 트레이스 분리 저장 벤치마크")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--traces", type=int, default=100, help="서로 다른 트레이스 수")
+    parser.add_argument("--frames", type=int, default=12, help="트레이스당 프레임 수 (본문 크기)")
+    parser.add_argument("--error-ratio", type=float, default=0.1, help="트레이스가 있는 에러 행 비율")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="벤치마크 스키마를 삭제하지 않음")
+    args = parser.parse_args()
+
+    conn = await asyncpg.connect(
+        host=os.getenv("DATABASE_HOST", "localhost"),
+        port=int(os.getenv("DATABASE_PORT", "5432")),
+        database=os.getenv("DATABASE_NAME", "logs_db"),
+        user=os.getenv("DATABASE_USER", "postgres"),
+        password=os.getenv("DATABASE_PASSWORD", "password"),
+    )
+    try:
+        print(f"📦 {args.rows:,} rows, {args.error_ratio:.0%} with one of {args.traces} traces "
+              f"({args.frames} frames) → {SCHEMA}")
+        started = time.perf_counter()
+        await create_tables(conn)
+        await load_rows(conn, args.rows, args.traces, args.frames, args.error_ratio)
+        print(f"   loaded in {time.perf_counter() - started:.1f}s\n")
+
+        inline = await table_sizes(conn, "logs_inline")
+        hashed = await table_sizes(conn, "logs_hashed")
+        side = await table_sizes(conn, "stack_traces")
+        print(f"{'size':<22} {'heap':>12} {'toast':>12} {'indexes':>12} {'total':>12}")
+        print(f"{'logs (inline)':<22} {mb(inline[0]):>12} {mb(inline[1]):>12} {mb(inline[2]):>12} {mb(sum(inline)):>12}")
+        print(f"{'logs (hash)':<22} {mb(hashed[0]):>12} {mb(hashed[1]):>12} {mb(hashed[2]):>12} {mb(sum(hashed)):>12}")
+        print(f"{'stack_traces':<22} {mb(side[0]):>12} {mb(side[1]):>12} {mb(side[2]):>12} {mb(sum(side)):>12}")
+        print(f"→ total {sum(inline) / (sum(hashed) + sum(side)):.1f}x smaller, "
+              f"heap pages scanned {inline[0] / hashed[0]:.1f}x fewer\n")
+
+        print(f"{'query':<24} {'inline ms':>10} {'view ms':>10} {'speedup':>8}")
+        for label, template in QUERIES.items():
+            inline_ms = await time_query(conn, template.format(logs=f"{SCHEMA}.logs_inline"), args.repeat)
+            view_ms = await time_query(conn, template.format(logs=f"{SCHEMA}.logs_view"), args.repeat)
+            print(f"{label:<24} {inline_ms:>10.2f} {view_ms:>10.2f} {inline_ms / view_ms:>7.1f}x")
+    finally:
+        if not args.keep:
+            await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
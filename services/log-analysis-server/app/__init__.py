@@ -5,8 +5,9 @@ Creates and configures the FastAPI application with all middleware and routes
 """
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.dependencies import init_db_pool, close_db_pool
-from app.controllers import health, logs, query, websocket, alerts
+from app.config import settings
+from app.dependencies import init_db_pool, init_shard_router, close_db_pool
+from app.controllers import health, logs, query, websocket, alerts, admin
 from app.middleware import error_handler_middleware
 from app.logging_config import setup_logging
 import asyncio
@@ -123,8 +124,11 @@ def create_app() -> FastAPI:
     @app.on_event("startup")
     async def startup():
         await init_db_pool()
+        await init_shard_router()
         # Feature #5: Start background anomaly detection with automatic restart
         await bg_task_manager.start_task("anomaly_detection", periodic_anomaly_detection)
+        if settings.METADATA_PROFILE_INTERVAL_SECONDS > 0:
+            await bg_task_manager.start_task("metadata_profiling", periodic_metadata_profiling)
 
     @app.on_event("shutdown")
     async def shutdown():
@@ -138,6 +142,7 @@ def create_app() -> FastAPI:
     app.include_router(query.router)
     app.include_router(websocket.router)
     app.include_router(alerts.router)  # Feature #5
+    app.include_router(admin.router)  # Index advisor
 
     return app
 
@@ -174,3 +179,30 @@ async def periodic_anomaly_detection():
                 logger.info(f"📢 Broadcasted alert: {alert.get('type', 'unknown')}")
         else:
             logger.debug("No anomalies detected")
+
+
+# Metadata key profile for the SQL generator (+ indexes for hot keys)
+async def periodic_metadata_profiling():
+    """
+    Profile logs.metadata keys now and every METADATA_PROFILE_INTERVAL_SECONDS
+
+    With METADATA_AUTO_INDEX and INDEX_ADVISOR_APPLY, also creates indexes for
+    metadata keys that recorded agent queries filter on.
+    """
+    from app.dependencies import get_schema_repository, get_index_repository
+    from app.services.index_advisor import get_index_advisor
+
+    logger.info("🚀 Metadata profiling background task started")
+
+    while True:
+        keys = await get_schema_repository().profile_metadata(settings.METADATA_PROFILE_SAMPLE_SIZE)
+        logger.info(f"📋 Profiled {len(keys)} metadata keys")
+
+        if settings.METADATA_AUTO_INDEX and settings.INDEX_ADVISOR_APPLY:
+            results = await get_index_advisor().index_hot_metadata_keys(
+                get_index_repository(), keys, settings.METADATA_INDEX_MIN_EXECUTIONS
+            )
+            for result in results:
+                logger.info(f"🗂️ Metadata index {result['name']}: {result['status']}")
+
+        await asyncio.sleep(settings.METADATA_PROFILE_INTERVAL_SECONDS)
@@ -5,7 +5,8 @@
 """
 from app.agent.state import AgentState
 from app.agent.llm_factory import get_llm
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 
 
 def validate_time_range_structured(time_range: dict) -> tuple[bool, str]:
@@ -63,6 +64,35 @@ def validate_time_range_structured(time_range: dict) -> tuple[bool, str]:
     return True, ""
 
 
+# 상대 시간 단위 → timedelta (월은 30일로 계산)
+_RELATIVE_UNITS = {"h": timedelta(hours=1), "d": timedelta(days=1), "w": timedelta(weeks=1), "m": timedelta(days=30)}
+
+
+def time_range_bounds(
+    time_range: Optional[dict], now: Optional[datetime] = None
+) -> tuple[Optional[datetime], Optional[datetime]]:
+    """
+    구조화된 시간 범위 → created_at 범위 [since, until)
+
+    절대 날짜는 UTC 기준이며 종료일 하루 전체를 포함합니다.
+
+    Returns:
+        (since, until) - 시간 범위가 없으면 (None, None)
+    """
+    if not time_range or time_range.get("type") is None:
+        return None, None
+    now = now or datetime.now(timezone.utc)
+
+    if time_range["type"] == "relative":
+        relative = time_range["relative"]
+        return now - relative["value"] * _RELATIVE_UNITS[relative["unit"]], None
+
+    absolute = time_range["absolute"]
+    start = datetime.fromisoformat(absolute["start"]).replace(tzinfo=timezone.utc)
+    end = datetime.fromisoformat(absolute["end"]).replace(tzinfo=timezone.utc)
+    return start, end + timedelta(days=1)
+
+
 async def extract_filters_node(state: AgentState) -> dict:
     """
     필터 추출: structured 우선 (사용자 지정 시간만), fallback to LLM
@@ -13,16 +13,19 @@ from .nodes import (
     generate_sql_node,
     validate_sql_node,
     execute_query_node,
+    search_logs_node,
     generate_insight_node,
     should_retry,
-    check_execution_success
+    check_execution_success,
+    check_search_success
 )
 from .context_resolver import resolve_context_node
 from .filter_extractor import extract_filters_node
 from .clarifier import clarification_node
+from .tool_selector import tool_selector_node
 
 
-def create_sql_agent(schema_repo, query_repo, conversation_service=None) -> StateGraph:
+def create_sql_agent(schema_repo, query_repo, conversation_service=None, search_repo=None) -> StateGraph:
     """
     Text-to-SQL Agent 그래프 생성 (Repository 주입)
 
@@ -30,6 +33,7 @@ def create_sql_agent(schema_repo, query_repo, conversation_service=None) -> Stat
         schema_repo: SchemaRepository instance
         query_repo: QueryRepository instance
         conversation_service: ConversationService instance (Feature #2)
+        search_repo: SearchRepository instance (grep 질문을 텍스트 검색으로 처리)
 
     Simplified Workflow:
         START → resolve_context → extract_filters → clarifier → retrieve_schema → generate_sql →
@@ -41,6 +45,11 @@ def create_sql_agent(schema_repo, query_repo, conversation_service=None) -> Stat
 
         validate_sql → [Invalid] → [retry < 3] → generate_sql (재시도)
                                    [retry >= 3] → END (error)
+
+    With search_repo:
+        clarifier → select_tool → [sql] → retrieve_schema → ...
+                                  [grep] → search_logs → generate_insight → END
+                                           [검색 실패] → retrieve_schema (SQL fallback)
     """
     # StateGraph 초기화
     workflow = StateGraph(AgentState)
@@ -69,6 +78,15 @@ def create_sql_agent(schema_repo, query_repo, conversation_service=None) -> Stat
         partial(execute_query_node, query_repo=query_repo)
     )
     workflow.add_node("generate_insight", generate_insight_node)
+    if search_repo:
+        workflow.add_node(
+            "select_tool",
+            partial(tool_selector_node, search_enabled=True)
+        )
+        workflow.add_node(
+            "search_logs",
+            partial(search_logs_node, search_repo=search_repo)
+        )
 
     # 엣지 연결
     # Feature #2: START → resolve_context (if available) → extract_filters → retrieve_schema
@@ -94,10 +112,29 @@ def create_sql_agent(schema_repo, query_repo, conversation_service=None) -> Stat
         route_after_clarification,
         {
             "wait": END,              # 재질문 필요 → 종료 (사용자 응답 대기)
-            "continue": "retrieve_schema"  # 재질문 없음 → 정상 진행
+            "continue": "select_tool" if search_repo else "retrieve_schema"  # 재질문 없음 → 정상 진행
         }
     )
 
+    # Tool selection → SQL 생성 또는 텍스트 검색
+    if search_repo:
+        workflow.add_conditional_edges(
+            "select_tool",
+            lambda state: state.get("selected_tool", "sql"),
+            {
+                "sql": "retrieve_schema",
+                "grep": "search_logs"
+            }
+        )
+        workflow.add_conditional_edges(
+            "search_logs",
+            check_search_success,
+            {
+                "insight": "generate_insight",  # 검색 성공 → 인사이트 생성
+                "sql": "retrieve_schema"         # 검색 실패 → SQL 경로
+            }
+        )
+
     # Direct path: retrieve_schema → generate_sql
     workflow.add_edge("retrieve_schema", "generate_sql")
 
@@ -7,6 +7,7 @@ LangGraph 노드 구현 (Refactored with Repository Pattern + Event Accumulation
 """
 
 import logging
+import time
 from langchain_core.messages import HumanMessage
 
 logger = logging.getLogger(__name__)
@@ -21,6 +22,10 @@ from .tools import (
 )
 from .llm_factory import get_llm, llm_invoke_with_retry, LLMError
 from .context_resolver import extract_focus_entities
+from .filter_extractor import time_range_bounds
+from .tool_selector import extract_search_pattern
+from app.repositories.search_repository import MAX_PAGE_SIZE
+from app.services.index_advisor import get_index_advisor
 
 
 async def retrieve_schema_node(state: AgentState, schema_repo) -> dict:
@@ -190,6 +195,9 @@ async def execute_query_node(state: AgentState, query_repo) -> dict:
         # Repository를 통한 쿼리 실행
         results_list, execution_time_ms = await query_repo.execute_sql(sql)
 
+        # Index advisor: record the query shape (EXPLAIN runs later, on the admin report)
+        get_index_advisor().record(sql, execution_time_ms)
+
         # 결과 포맷팅
         formatted = format_query_results(results_list, limit=state["max_results"])
 
@@ -233,6 +241,69 @@ async def execute_query_node(state: AgentState, query_repo) -> dict:
         }
 
 
+async def search_logs_node(state: AgentState, search_repo) -> dict:
+    """
+    Node 4b: 로그 텍스트 검색 (grep 질문, SearchRepository 주입)
+
+    따옴표 안의 문자열을 message / stack_trace에서 찾습니다.
+    실패하면 selected_tool을 "sql"로 바꿔 SQL 생성 경로로 넘깁니다.
+    """
+    question = state.get("resolved_question", state["question"])
+    pattern = extract_search_pattern(question)
+    since, until = time_range_bounds(state.get("extracted_time_range_structured"))
+
+    try:
+        start_time = time.time()
+        page = await search_repo.search(
+            pattern,
+            service=state.get("extracted_service"),
+            since=since,
+            until=until,
+            limit=min(state["max_results"], MAX_PAGE_SIZE)
+        )
+        execution_time_ms = (time.time() - start_time) * 1000
+
+        results_list = page["results"]
+        formatted = format_query_results(results_list, limit=state["max_results"])
+        formatted["has_more"] = page["has_more"]
+
+        return {
+            "generated_sql": f"-- search: {pattern}\n{page['sql'].strip()}",
+            "query_results": results_list,
+            "execution_time_ms": execution_time_ms,
+            "formatted_results": formatted,
+            "error_message": None,
+            "messages": [{"role": "system", "content": f"Search found {len(results_list)} logs"}],
+            "events": [{
+                "type": "node_complete",
+                "node": "search_logs",
+                "status": "completed",
+                "data": {
+                    "pattern": pattern,
+                    "result_count": len(results_list),
+                    "has_more": page["has_more"],
+                    "execution_time_ms": execution_time_ms
+                }
+            }]
+        }
+
+    except Exception as e:
+        logger.warning(f"Log search failed, falling back to SQL: {e}")
+        return {
+            "selected_tool": "sql",
+            "messages": [{"role": "system", "content": f"Search failed: {str(e)}"}],
+            "events": [{
+                "type": "execution_failed",
+                "node": "search_logs",
+                "status": "failed",
+                "data": {
+                    "error": str(e),
+                    "fallback": "sql"
+                }
+            }]
+        }
+
+
 async def generate_insight_node(state: AgentState) -> dict:
     """
     Node 5: 인사이트 생성 (Claude)
@@ -398,3 +469,12 @@ def check_execution_success(state: AgentState) -> str:
     if state.get("error_message"):
         return "fail"
     return "insight"
+
+
+def check_search_success(state: AgentState) -> str:
+    """
+    조건부 엣지: 검색 성공 여부 (실패 시 SQL 경로)
+    """
+    if state.get("selected_tool") == "sql":
+        return "sql"
+    return "insight"
@@ -11,14 +11,14 @@ SQL_GENERATION_PROMPT = """You are an expert PostgreSQL database analyst special
 {sample_data}
 
 # Important Rules
-1. **ALWAYS** include: `WHERE deleted = FALSE`
+1. **ALWAYS** include `WHERE deleted = FALSE` when querying `logs` (rollup tables have no `deleted` column)
 2. **ONLY** generate SELECT queries (no INSERT, UPDATE, DELETE, DROP)
 3. Use proper indexes for performance:
    - idx_service_level_time: (service, level, created_at DESC)
    - idx_error_time: (error_type, created_at DESC)
    - idx_user_time: (user_id, created_at DESC)
    - idx_trace: (trace_id)
-4. Always add `ORDER BY created_at DESC` for time-series data
+4. Always add `ORDER BY created_at DESC` for time-series data (`bucket` on rollup tables)
 5. Limit results to prevent overload (MAX {max_results})
 6. Use `NOW() - INTERVAL '...'` for relative time filtering, or absolute dates for date ranges:
    - Relative: `WHERE created_at > NOW() - INTERVAL '3 hours'`
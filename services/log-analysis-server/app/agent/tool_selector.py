@@ -5,6 +5,12 @@ Routes queries to the optimal execution tool (SQL, grep, metrics).
 """
 
 import re
+from typing import Optional
+
+from app.repositories.search_repository import MIN_PATTERN_LENGTH
+
+# Quoted text in the question ("...", '...', “...”, ‘...’)
+_QUOTED = re.compile(r'["\'“‘](.+?)["\'”’]')
 
 
 def select_tool_for_question(question: str) -> str:
@@ -26,7 +32,7 @@ def select_tool_for_question(question: str) -> str:
     ]
     if any(kw in question_lower for kw in pattern_keywords):
         # Check if specific pattern is mentioned
-        if re.search(r'["\'](.+?)["\']', question):
+        if _QUOTED.search(question):
             return "grep"
 
     # Metrics/aggregation keywords → metrics (if available)
@@ -42,12 +48,27 @@ def select_tool_for_question(question: str) -> str:
     return "sql"
 
 
-async def tool_selector_node(state: dict) -> dict:
+def extract_search_pattern(question: str) -> Optional[str]:
+    """
+    Text to search for: the first quoted text in the question
+
+    Returns:
+        Pattern, or None if nothing is quoted or it is too short to search
+    """
+    match = _QUOTED.search(question)
+    if not match:
+        return None
+    pattern = match.group(1).strip()
+    return pattern if len(pattern) >= MIN_PATTERN_LENGTH else None
+
+
+async def tool_selector_node(state: dict, search_enabled: bool = False) -> dict:
     """
     Select optimal tool based on question
 
     Args:
         state: AgentState
+        search_enabled: Whether the graph has a search_logs node (grep)
 
     Returns:
         Updated state with selected_tool
@@ -55,10 +76,10 @@ async def tool_selector_node(state: dict) -> dict:
     question = state.get("resolved_question", state["question"])
     selected_tool = select_tool_for_question(question)
 
-    # For now, only SQL is fully implemented
-    # grep and metrics are placeholders for future expansion
-    if selected_tool != "sql":
-        # Fallback to SQL
+    # grep runs on SearchRepository when available; metrics is not implemented yet
+    if selected_tool == "grep" and not (search_enabled and extract_search_pattern(question)):
+        selected_tool = "sql"
+    elif selected_tool == "metrics":
         selected_tool = "sql"
 
     return {
@@ -58,8 +58,8 @@ def validate_sql_safety(sql: str) -> tuple[bool, Optional[str]]:
         if re.search(rf'\b{keyword}\b', sql_upper):
             return False, f"Dangerous keyword detected: {keyword}"
 
-    # Must include deleted = FALSE
-    if "DELETED" not in sql_upper:
+    # Must include deleted = FALSE when reading logs (rollup tables have no deleted column)
+    if re.search(r'\bLOGS\b', sql_upper) and "DELETED" not in sql_upper:
         return False, "Must include 'deleted = FALSE' condition"
 
     return True, None
@@ -22,6 +22,11 @@ class Settings(BaseSettings):
     DB_POOL_MIN_SIZE: int = 5
     DB_POOL_MAX_SIZE: int = 10
 
+    # Shards: extra databases written by log-save-server (same DATABASE_SHARDS / SHARD_BY,
+    # the DATABASE_* database is shard 0); queries are routed or fanned out across all of them
+    DATABASE_SHARDS: str = ""
+    SHARD_BY: str = "service"
+
     # LLM Configuration
     LLM_PROVIDER: str = "anthropic"
     LLM_MODEL_ANTHROPIC: str = "claude-sonnet-4-5-20250929"
@@ -37,6 +42,38 @@ class Settings(BaseSettings):
     CACHE_TTL_SECONDS: int = 300     # 5 minutes
     CACHE_MAX_SIZE: int = 100        # Maximum cache entries
 
+    # Agent sample data: rows drawn per shard with TABLESAMPLE SYSTEM, rebuilt at most every TTL
+    SAMPLE_DATA_ROWS: int = 2000
+    SAMPLE_DATA_TTL_SECONDS: int = 300
+
+    # Rollups: read logs_rollup_1m (maintained by log-save-server) instead of scanning logs
+    USE_ROLLUPS: bool = True
+
+    # Index advisor: distinct agent queries kept for EXPLAIN analysis,
+    # allow POST /admin/index-advisor/apply to create indexes (needs a non read-only DB user),
+    # time limit of one CREATE INDEX (replaces the pool's short command timeout for index builds)
+    INDEX_ADVISOR_MAX_QUERIES: int = 500
+    INDEX_ADVISOR_APPLY: bool = False
+    INDEX_ADVISOR_BUILD_TIMEOUT_SECONDS: float = 3600
+
+    # Metadata profiler: block-samples about SAMPLE_SIZE logs rows per shard every interval (0 = disabled) and lists
+    # the top keys in the agent's schema; METADATA_AUTO_INDEX (with INDEX_ADVISOR_APPLY) also creates
+    # the advisor's metadata indexes for keys that recorded queries filter on at least N times
+    METADATA_PROFILE_INTERVAL_SECONDS: int = 600
+    METADATA_PROFILE_SAMPLE_SIZE: int = 10000
+    METADATA_TOP_KEYS: int = 20
+    METADATA_AUTO_INDEX: bool = False
+    METADATA_INDEX_MIN_EXECUTIONS: int = 3
+
+    # Cold tier: Parquet archive written by log-save-server, queried with DuckDB
+    # (same location as its ARCHIVE_PATH: shared directory or s3://bucket/prefix; empty = disabled)
+    ARCHIVE_PATH: str = ""
+    ARCHIVE_S3_ENDPOINT: str = ""
+    ARCHIVE_S3_REGION: str = "us-east-1"
+    ARCHIVE_S3_ACCESS_KEY_ID: str = ""
+    ARCHIVE_S3_SECRET_ACCESS_KEY: str = ""
+    ARCHIVE_S3_USE_SSL: bool = True
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,82 @@
+"""
+Admin Controller
+
+Index advisor report, index creation and the metadata key profile.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException
+from app.config import settings
+from app.dependencies import get_index_repository, get_schema_repository
+from app.models.schemas import IndexApplyRequest
+from app.repositories.schema_repository import get_metadata_keys
+from app.services.index_advisor import get_index_advisor
+
+router = APIRouter(tags=["admin"], prefix="/admin")
+
+
+@router.get("/index-advisor")
+async def get_index_advisor_report(index_repo=Depends(get_index_repository)):
+    """
+    EXPLAIN recorded agent queries and recommend indexes
+
+    Returns:
+        Seq scan predicates, index recommendations (with CREATE INDEX SQL) and top queries
+    """
+    report = await get_index_advisor().build_report(index_repo)
+    report["apply_enabled"] = settings.INDEX_ADVISOR_APPLY
+    return report
+
+
+@router.post("/index-advisor/apply")
+async def apply_index_recommendations(
+    request: IndexApplyRequest,
+    index_repo=Depends(get_index_repository)
+):
+    """
+    Create recommended indexes (requires INDEX_ADVISOR_APPLY=true)
+
+    Args:
+        request: Candidate index names from the report
+
+    Returns:
+        Per-index creation results
+    """
+    if not settings.INDEX_ADVISOR_APPLY:
+        raise HTTPException(
+            status_code=403,
+            detail="Index creation is disabled (set INDEX_ADVISOR_APPLY=true)"
+        )
+    try:
+        results = await get_index_advisor().apply(index_repo, request.names)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"results": results}
+
+
+@router.delete("/index-advisor")
+async def reset_index_advisor():
+    """Forget recorded queries (e.g. after applying indexes)"""
+    get_index_advisor().clear()
+    return {"status": "ok"}
+
+
+@router.get("/metadata-keys")
+async def get_metadata_key_profile(refresh: bool = False, schema_repo=Depends(get_schema_repository)):
+    """
+    logs.metadata key profile shown to the SQL generator
+
+    Args:
+        refresh: Sample now instead of returning the last background profile
+
+    Returns:
+        Keys with row share, distinct values and JSON types (most frequent first)
+    """
+    keys = (await schema_repo.profile_metadata(settings.METADATA_PROFILE_SAMPLE_SIZE)
+            if refresh else get_metadata_keys())
+    return {
+        "sampled": keys[0].sampled if keys else 0,
+        "keys": [
+            {**stats._asdict(), "frequency": round(stats.frequency, 4), "selectivity": round(stats.selectivity, 6)}
+            for stats in keys
+        ],
+    }
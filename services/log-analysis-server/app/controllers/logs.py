@@ -1,8 +1,11 @@
 """
-Log statistics and services controller
+Log statistics, services and search controller
 """
-from fastapi import APIRouter, HTTPException, Depends
-from app.dependencies import get_log_repository
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Query
+from app.dependencies import get_log_repository, get_search_repository
+from app.repositories.search_repository import MAX_PAGE_SIZE
 
 router = APIRouter(tags=["logs"])
 
@@ -25,3 +28,43 @@ async def get_stats(log_repo=Depends(get_log_repository)):
         return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/search")
+async def search_logs(
+    q: str = Query(..., description="Text to find in message / stack_trace (case-insensitive)"),
+    service: Optional[str] = None,
+    level: Optional[str] = None,
+    hours: Optional[int] = Query(None, ge=1, description="Only the last N hours (overrides since)"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    order: str = "relevance",
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    search_repo=Depends(get_search_repository)
+):
+    """
+    Search logs for a literal substring (pg_trgm indexes)
+
+    Examples:
+        - /search?q=connection refused&service=payment-api&hours=24
+        - /search?q=NullPointerException&order=recent&limit=20&offset=20
+    """
+    if hours is not None:
+        since = datetime.now(timezone.utc) - timedelta(hours=hours)
+    try:
+        page = await search_repo.search(
+            q, service=service, level=level, since=since, until=until,
+            order=order, limit=limit, offset=offset
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {
+        "results": page["results"],
+        "count": len(page["results"]),
+        "has_more": page["has_more"],
+        "next_offset": offset + limit if page["has_more"] else None
+    }
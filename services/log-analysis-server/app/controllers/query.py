@@ -4,7 +4,7 @@ Text-to-SQL query controller
 from fastapi import APIRouter, HTTPException, Depends
 from app.models.schemas import QueryRequest, QueryResponse, SummarizeRequest, SummarizeResponse
 from app.services.stream_service import execute_query
-from app.dependencies import get_schema_repository, get_query_repository
+from app.dependencies import get_schema_repository, get_query_repository, get_search_repository
 from app.agent.llm_factory import get_llm
 
 router = APIRouter(tags=["query"])
@@ -14,7 +14,8 @@ router = APIRouter(tags=["query"])
 async def query_logs(
     request: QueryRequest,
     schema_repo=Depends(get_schema_repository),
-    query_repo=Depends(get_query_repository)
+    query_repo=Depends(get_query_repository),
+    search_repo=Depends(get_search_repository)
 ):
     """
     Execute Text-to-SQL query synchronously
@@ -23,13 +24,15 @@ async def query_logs(
         - "최근 1시간 에러 로그"
         - "payment-api에서 가장 많이 발생한 에러 top 5"
         - "느린 API 찾기 (1초 이상)"
+        - "메시지에 'connection refused'가 포함된 로그 검색" (텍스트 검색)
     """
     try:
         result = await execute_query(
             question=request.question,
             max_results=request.max_results,
             schema_repo=schema_repo,
-            query_repo=query_repo
+            query_repo=query_repo,
+            search_repo=search_repo
         )
 
         if result.get("type") == "error":
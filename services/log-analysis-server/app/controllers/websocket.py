@@ -6,7 +6,7 @@ import logging
 import re
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from app.services.stream_service import stream_query_execution
-from app.dependencies import get_schema_repository, get_query_repository
+from app.dependencies import get_schema_repository, get_query_repository, get_search_repository
 from app.services.cache_service import get_query_cache
 from typing import List
 
@@ -155,12 +155,14 @@ async def stream_query(
         print(f"📦 Getting repositories...")  # DEBUG
         schema_repo = get_schema_repository()
         query_repo = get_query_repository()
+        search_repo = get_search_repository()
         print(f"✅ Repositories obtained")  # DEBUG
 
         # Stream events with conversation context
         print(f"🔄 Starting stream_query_execution...")  # DEBUG
         async for event in stream_query_execution(
-            question, max_results, schema_repo, query_repo, conversation_id, time_range_structured
+            question, max_results, schema_repo, query_repo, conversation_id, time_range_structured,
+            search_repo
         ):
             print(f"📤 Sending event: {event.get('type', 'unknown')}")  # DEBUG
             await websocket.send_json(event)
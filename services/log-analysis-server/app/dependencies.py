@@ -21,11 +21,19 @@ logger = logging.getLogger(__name__)
 # Global connection pool
 _pool: Optional[asyncpg.Pool] = None
 
+# Routes queries across DATABASE_SHARDS (None when there is a single database)
+_shard_router = None
+
 # Connection configuration
 POOL_RETRY_ATTEMPTS = 3
 POOL_TIMEOUT_SECONDS = 10
 CONNECTION_TIMEOUT_SECONDS = 5
 
+# analysis.logs (database/migrations/006_stack_traces.sql) is a view over public.logs that
+# fills stack_trace from stack_traces, so agent SQL keeps the original logs columns.
+# Missing schemas are skipped by PostgreSQL, so this is a no-op on older databases.
+SEARCH_PATH = "analysis, public"
+
 
 @retry(
     stop=stop_after_attempt(POOL_RETRY_ATTEMPTS),
@@ -55,7 +63,8 @@ async def init_db_pool():
             min_size=settings.DB_POOL_MIN_SIZE,
             max_size=settings.DB_POOL_MAX_SIZE,
             timeout=POOL_TIMEOUT_SECONDS,
-            command_timeout=CONNECTION_TIMEOUT_SECONDS
+            command_timeout=CONNECTION_TIMEOUT_SECONDS,
+            server_settings={"search_path": SEARCH_PATH}
         )
         logger.info("✅ Database connection pool created successfully")
         print("✅ Database connection pool created (Read-Only)")
@@ -64,9 +73,38 @@ async def init_db_pool():
         raise
 
 
+async def init_shard_router():
+    """Create pools for DATABASE_SHARDS and the router over [DATABASE_*, *shards]"""
+    global _shard_router
+    from app.repositories.sharding import ShardRouter, parse_shard_dsns
+    dsns = parse_shard_dsns(settings.DATABASE_SHARDS)
+    if not dsns or _shard_router is not None:
+        return
+    pools = [_pool]
+    try:
+        for dsn in dsns:
+            pools.append(await asyncpg.create_pool(
+                dsn,
+                min_size=settings.DB_POOL_MIN_SIZE,
+                max_size=settings.DB_POOL_MAX_SIZE,
+                timeout=POOL_TIMEOUT_SECONDS,
+                command_timeout=CONNECTION_TIMEOUT_SECONDS,
+                server_settings={"search_path": SEARCH_PATH}
+            ))
+        _shard_router = ShardRouter(pools, settings.SHARD_BY)
+    except Exception:
+        for pool in pools[1:]:
+            await pool.close()
+        raise
+    print(f"✅ Shard pools created ({len(pools)} shards, SHARD_BY={settings.SHARD_BY})")
+
+
 async def close_db_pool():
     """Close database connection pool on shutdown"""
-    global _pool
+    global _pool, _shard_router
+    if _shard_router:
+        await _shard_router.close()
+        _shard_router = None
     if _pool:
         await _pool.close()
         _pool = None
@@ -80,23 +118,40 @@ def get_pool() -> asyncpg.Pool:
     return _pool
 
 
+def get_shard_router():
+    """Get the ShardRouter (None unless DATABASE_SHARDS is set)"""
+    return _shard_router
+
+
 # Repository dependencies
 def get_schema_repository():
     """Get SchemaRepository instance"""
     from app.repositories.schema_repository import SchemaRepository
-    return SchemaRepository(get_pool())
+    return SchemaRepository(get_pool(), get_shard_router())
 
 
 def get_query_repository():
     """Get QueryRepository instance"""
     from app.repositories.query_repository import QueryRepository
-    return QueryRepository(get_pool())
+    return QueryRepository(get_pool(), get_shard_router())
 
 
 def get_log_repository():
     """Get LogRepository instance"""
     from app.repositories.log_repository import LogRepository
-    return LogRepository(get_pool())
+    return LogRepository(get_pool(), get_shard_router())
+
+
+def get_search_repository():
+    """Get SearchRepository instance"""
+    from app.repositories.search_repository import SearchRepository
+    return SearchRepository(get_pool(), get_shard_router())
+
+
+def get_index_repository():
+    """Get IndexRepository instance"""
+    from app.repositories.index_repository import IndexRepository
+    return IndexRepository(get_pool())
 
 
 # Service dependencies (Feature #2)
@@ -42,3 +42,8 @@ class SummarizeRequest(BaseModel):
 class SummarizeResponse(BaseModel):
     """Response model for conversation summarization"""
     summary: str
+
+
+class IndexApplyRequest(BaseModel):
+    """Request model for creating index advisor recommendations"""
+    names: List[str]
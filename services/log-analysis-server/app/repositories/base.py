@@ -4,20 +4,25 @@ Base repository with connection pool management
 Provides common database access methods for all repositories
 """
 import asyncpg
-from typing import List, Any, Optional
+from typing import List, Any, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from app.repositories.sharding import ShardRouter
 
 
 class BaseRepository:
     """Base class for all repositories with connection pool access"""
 
-    def __init__(self, pool: asyncpg.Pool):
+    def __init__(self, pool: asyncpg.Pool, shard_router: Optional["ShardRouter"] = None):
         """
         Initialize repository with connection pool
 
         Args:
             pool: asyncpg connection pool
+            shard_router: Router over DATABASE_SHARDS (None for a single database)
         """
         self.pool = pool
+        self.shard_router = shard_router
 
     async def execute_query(self, query: str, *args) -> List[asyncpg.Record]:
         """
@@ -60,3 +65,41 @@ class BaseRepository:
         """
         async with self.pool.acquire() as conn:
             return await conn.fetchrow(query, *args)
+
+    async def table_exists(self, table_name: str) -> bool:
+        """
+        Check whether a table exists (used for optional tables added by migrations)
+
+        Args:
+            table_name: Table name (optionally schema-qualified)
+
+        Returns:
+            True if the table exists
+        """
+        return bool(await self.execute_single("SELECT to_regclass($1) IS NOT NULL", table_name))
+
+    async def execute_sharded(self, query: str, *args) -> List[Any]:
+        """
+        Execute a SELECT over the logs data on every shard
+
+        Routed to one shard or fanned out and merged by the ShardRouter;
+        same as execute_query when DATABASE_SHARDS is not set.
+
+        Returns:
+            List of asyncpg.Record (single shard) or dict rows (merged)
+        """
+        if self.shard_router is None:
+            return await self.execute_query(query, *args)
+        return await self.shard_router.fetch(query, *args)
+
+    async def execute_sharded_single(self, query: str, *args) -> Optional[Any]:
+        """
+        Execute a SELECT over every shard and return the first column of the first row
+
+        Returns:
+            Single value, or None
+        """
+        if self.shard_router is None:
+            return await self.execute_single(query, *args)
+        rows = await self.shard_router.fetch(query, *args)
+        return next(iter(dict(rows[0]).values()), None) if rows else None
@@ -0,0 +1,281 @@
+"""
+Cold storage: archived logs partitions in Parquet, queried through DuckDB
+
+log-save-server moves logs partitions older than ARCHIVE_AFTER_DAYS to
+{ARCHIVE_PATH}/logs/day=YYYY-MM-DD/service=NAME/*.parquet and records each one in
+archived_partitions. Agent SQL over logs is routed by the created_at range it filters on:
+
+- hot: PostgreSQL only (no lower time bound, or the lower bound is after the archive boundary)
+- cold: Parquet only (the upper bound is at or before the boundary)
+- both: Parquet UNION ALL the live logs table, read through DuckDB's postgres extension
+  (every DATABASE_SHARDS database is attached too; their files share the archive tree)
+
+The SQL runs unchanged: a DuckDB temp view named logs stands in for the table.
+Rollup tables are never archived, so queries that touch them stay in PostgreSQL.
+"""
+import asyncio
+import logging
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.config import settings
+from app.repositories.sharding import parse_shard_dsns
+
+try:
+    import duckdb
+except ImportError:  # Cold tier is optional
+    duckdb = None
+
+logger = logging.getLogger(__name__)
+
+HOT = "hot"
+COLD = "cold"
+BOTH = "both"
+
+# Columns written by log-save-server (archive.ARCHIVE_COLUMNS)
+ARCHIVE_COLUMNS = (
+    "id", "created_at", "level", "log_type", "service", "environment", "service_version",
+    "trace_id", "user_id", "session_id", "error_type", "message", "stack_trace", "path",
+    "method", "action_type", "function_name", "file_path", "duration_ms", "deleted", "metadata"
+)
+
+_READS_LOGS = re.compile(r"\blogs\b", re.IGNORECASE)
+_OTHER_TABLES = re.compile(r"\b(?:logs_\w+|error_groups|stack_traces)\b", re.IGNORECASE)
+_HAS_OR = re.compile(r"\bOR\b", re.IGNORECASE)
+
+# created_at compared with NOW() [- INTERVAL '...'], CURRENT_DATE or a timestamp literal
+_COLUMN = r"(?:\b\w+\.)?created_at"
+_VALUE = (
+    r"(?:(?P<{p}now>NOW\(\)|CURRENT_TIMESTAMP|CURRENT_DATE)"
+    r"(?:\s*-\s*INTERVAL\s*'(?P<{p}interval>[^']+)')?"
+    r"|(?:TIMESTAMPTZ\s+|TIMESTAMP\s+|DATE\s+)?'(?P<{p}literal>[^']+)')"
+)
+_LOWER = re.compile(rf"{_COLUMN}\s*>=?\s*{_VALUE.format(p='a')}", re.IGNORECASE)
+_UPPER = re.compile(rf"{_COLUMN}\s*<=?\s*{_VALUE.format(p='a')}", re.IGNORECASE)
+_BETWEEN = re.compile(
+    rf"{_COLUMN}\s+BETWEEN\s+{_VALUE.format(p='a')}\s+AND\s+{_VALUE.format(p='b')}", re.IGNORECASE
+)
+_INTERVAL_PART = re.compile(
+    r"(\d+(?:\.\d+)?)\s*(second|minute|hour|day|week|month|year)s?", re.IGNORECASE
+)
+_UNIT_SECONDS = {
+    "second": 1, "minute": 60, "hour": 3600, "day": 86400,
+    "week": 7 * 86400, "month": 30 * 86400, "year": 365 * 86400,
+}
+
+
+def parse_interval(text: str) -> Optional[timedelta]:
+    """'7 days', '1 hour 30 minutes' → timedelta (months as 30 days), None if unrecognised"""
+    parts = _INTERVAL_PART.findall(text)
+    if not parts:
+        return None
+    return timedelta(seconds=sum(float(n) * _UNIT_SECONDS[unit.lower()] for n, unit in parts))
+
+
+def _moment(match: re.Match, prefix: str, now: datetime) -> Optional[datetime]:
+    literal = match.group(f"{prefix}literal")
+    if literal is not None:
+        try:
+            moment = datetime.fromisoformat(literal.strip())
+        except ValueError:
+            return None
+        # Database session timezone is UTC
+        return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+    moment = now
+    if match.group(f"{prefix}now").upper() == "CURRENT_DATE":
+        moment = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    interval = match.group(f"{prefix}interval")
+    if interval is not None:
+        delta = parse_interval(interval)
+        if delta is None:
+            return None
+        moment -= delta
+    return moment
+
+
+def time_bounds(sql: str, now: datetime) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    created_at range a query filters on (conservative)
+
+    Only AND-combined comparisons are understood; a query containing OR is
+    treated as unbounded so it is never routed away from the live table.
+
+    Args:
+        sql: SQL query
+        now: Current time (UTC)
+
+    Returns:
+        (lower, upper) bounds, None when unbounded on that side
+    """
+    if _HAS_OR.search(sql):
+        return None, None
+
+    lowers: List[datetime] = []
+    uppers: List[datetime] = []
+    for match in _BETWEEN.finditer(sql):
+        lowers.append(_moment(match, "a", now))
+        uppers.append(_moment(match, "b", now))
+    for match in _LOWER.finditer(sql):
+        lowers.append(_moment(match, "a", now))
+    for match in _UPPER.finditer(sql):
+        uppers.append(_moment(match, "a", now))
+
+    lowers = [moment for moment in lowers if moment is not None]
+    uppers = [moment for moment in uppers if moment is not None]
+    return (max(lowers) if lowers else None), (min(uppers) if uppers else None)
+
+
+def choose_tier(lower: Optional[datetime], upper: Optional[datetime], boundary: Optional[datetime]) -> str:
+    """
+    Storage tier for a created_at range
+
+    Args:
+        lower: Lower bound of the query (None = unbounded)
+        upper: Upper bound of the query (None = now)
+        boundary: End of the newest archived partition (None = nothing archived)
+
+    Returns:
+        HOT, COLD or BOTH
+    """
+    if boundary is None or lower is None or lower >= boundary:
+        return HOT
+    if upper is not None and upper <= boundary:
+        return COLD
+    return BOTH
+
+
+def reads_archived_logs(sql: str) -> bool:
+    """True if the query reads logs and no rollup / error_groups / stack_traces table (those stay in PostgreSQL)"""
+    return bool(_READS_LOGS.search(sql)) and not _OTHER_TABLES.search(sql)
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _libpq_value(value: Any) -> str:
+    return "'" + str(value).replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+class ColdStorageError(RuntimeError):
+    """A query over archived rows failed (PostgreSQL no longer holds them, so there is no fallback)"""
+
+
+class ColdStore:
+    """In-process DuckDB database over the Parquet archive (queries run in worker threads)"""
+
+    def __init__(self, path: str, postgres_dsn: str = "", shard_dsns: Sequence[str] = ()):
+        """
+        Args:
+            path: Archive root (local directory or s3://bucket/prefix), same as log-save-server ARCHIVE_PATH
+            postgres_dsn: libpq connection string for the live logs table (BOTH tier)
+            shard_dsns: DATABASE_SHARDS; their logs tables are added to the BOTH tier as hot_1, hot_2, ...
+        """
+        if duckdb is None:
+            raise RuntimeError("duckdb is not installed (pip install duckdb)")
+        self.path = path.rstrip("/")
+        self.postgres_dsn = postgres_dsn
+        self.shard_dsns = list(shard_dsns)
+        self._lock = threading.Lock()
+        self._con = None
+        self._hot_attached = False
+        self._hot_logs: List[str] = []
+
+    def _connection(self) -> Any:
+        with self._lock:
+            if self._con is None:
+                con = duckdb.connect()
+                con.execute("SET TimeZone = 'UTC'")
+                if self.path.startswith("s3://"):
+                    con.execute("INSTALL httpfs")
+                    con.execute("LOAD httpfs")
+                    options = [
+                        f"REGION {_quote(settings.ARCHIVE_S3_REGION)}",
+                        f"USE_SSL {str(settings.ARCHIVE_S3_USE_SSL).lower()}",
+                    ]
+                    if settings.ARCHIVE_S3_ACCESS_KEY_ID:
+                        options += [f"KEY_ID {_quote(settings.ARCHIVE_S3_ACCESS_KEY_ID)}",
+                                    f"SECRET {_quote(settings.ARCHIVE_S3_SECRET_ACCESS_KEY)}"]
+                    if settings.ARCHIVE_S3_ENDPOINT:
+                        options += [f"ENDPOINT {_quote(settings.ARCHIVE_S3_ENDPOINT)}", "URL_STYLE 'path'"]
+                    con.execute(f"CREATE SECRET archive (TYPE S3, {', '.join(options)})")
+                self._con = con
+            return self._con
+
+    def _attach_hot(self, con: Any) -> None:
+        """Attach PostgreSQL read-only as `hot` (shards as hot_1, hot_2, ...; once per process)"""
+        with self._lock:
+            if not self._hot_attached:
+                con.execute("INSTALL postgres")
+                con.execute("LOAD postgres")
+                sources = [("hot", self.postgres_dsn)]
+                sources += [(f"hot_{index}", dsn) for index, dsn in enumerate(self.shard_dsns, start=1)]
+                for name, dsn in sources:
+                    con.execute(f"ATTACH {_quote(dsn)} AS {name} (TYPE POSTGRES, READ_ONLY)")
+                    # analysis.logs fills stack_trace from stack_traces (database/migrations/006_stack_traces.sql)
+                    try:
+                        con.execute(f"SELECT 1 FROM {name}.analysis.logs LIMIT 0")
+                        self._hot_logs.append(f"{name}.analysis.logs")
+                    except duckdb.Error:
+                        self._hot_logs.append(f"{name}.public.logs")
+                self._hot_attached = True
+
+    def logs_view_sql(self, tier: str) -> str:
+        """Definition of the temp view that replaces logs for a COLD / BOTH query"""
+        cold = (
+            f"SELECT * EXCLUDE (day) FROM read_parquet({_quote(self.path + '/logs/**/*.parquet')}, "
+            f"hive_partitioning = true, hive_types = {{'day': VARCHAR, 'service': VARCHAR}}, "
+            f"union_by_name = true)"
+        )
+        if tier == BOTH:
+            columns = ", ".join(ARCHIVE_COLUMNS)
+            return cold + "".join(f" UNION ALL BY NAME SELECT {columns} FROM {hot}" for hot in self._hot_logs)
+        return cold
+
+    def run(self, sql: str, tier: str) -> List[Dict[str, Any]]:
+        """
+        Run SQL against the archive (blocking)
+
+        Each call gets its own cursor, so the logs temp view is private to the query.
+        """
+        con = self._connection()
+        if tier == BOTH:
+            self._attach_hot(con)
+        cursor = con.cursor()
+        try:
+            cursor.execute(f"CREATE TEMP VIEW logs AS {self.logs_view_sql(tier)}")
+            cursor.execute(sql)
+            columns = [description[0] for description in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+    async def query(self, sql: str, tier: str) -> List[Dict[str, Any]]:
+        """Run SQL against the archive without blocking the event loop"""
+        return await asyncio.to_thread(self.run, sql, tier)
+
+
+_cold_store: Optional[ColdStore] = None
+
+
+def cold_storage_enabled() -> bool:
+    """ARCHIVE_PATH is configured and duckdb is importable"""
+    return bool(settings.ARCHIVE_PATH) and duckdb is not None
+
+
+def get_cold_store() -> ColdStore:
+    """Get the process-wide ColdStore"""
+    global _cold_store
+    if _cold_store is None:
+        dsn = " ".join(f"{key}={_libpq_value(value)}" for key, value in (
+            ("host", settings.DATABASE_HOST),
+            ("port", settings.DATABASE_PORT),
+            ("dbname", settings.DATABASE_NAME),
+            ("user", settings.DATABASE_USER),
+            ("password", settings.DATABASE_PASSWORD),
+        ))
+        _cold_store = ColdStore(settings.ARCHIVE_PATH, dsn, parse_shard_dsns(settings.DATABASE_SHARDS))
+    return _cold_store
@@ -0,0 +1,107 @@
+"""
+Index repository for the index advisor
+
+Handles EXPLAIN plans, index introspection and index creation on the logs table
+"""
+import json
+import logging
+from typing import Any, Dict, List
+from app.config import settings
+from app.repositories.base import BaseRepository
+
+logger = logging.getLogger(__name__)
+
+# Indexes go on the tables, not the analysis.logs view that comes first in the pool's search_path
+TABLE_SCHEMA = "public"
+
+
+class IndexRepository(BaseRepository):
+    """Handles plan and index queries for the index advisor"""
+
+    async def explain(self, sql: str) -> Dict[str, Any]:
+        """
+        Get the estimated plan of a query (EXPLAIN without ANALYZE, the query is not executed)
+
+        Args:
+            sql: SELECT query generated by the agent
+
+        Returns:
+            Root plan node ({"Node Type": ..., "Plans": [...]})
+        """
+        # asyncpg returns json columns as strings
+        plan = await self.execute_single(f"EXPLAIN (FORMAT JSON) {sql}")
+        return json.loads(plan)[0]["Plan"]
+
+    async def get_index_names(self, table_name: str = "logs") -> List[str]:
+        """
+        List valid index names defined on a table
+
+        An interrupted CREATE INDEX CONCURRENTLY leaves an INVALID index behind that
+        the planner never uses, so it is not listed.
+
+        Args:
+            table_name: Table name
+
+        Returns:
+            Index names
+        """
+        rows = await self.execute_query(
+            "SELECT c.relname AS indexname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE i.indrelid = to_regclass($1) AND i.indisvalid ORDER BY c.relname",
+            f"{TABLE_SCHEMA}.{table_name}"
+        )
+        return [row["indexname"] for row in rows]
+
+    async def is_partitioned(self, table_name: str = "logs") -> bool:
+        """
+        Check whether a table is partitioned (CREATE INDEX CONCURRENTLY is not supported on the parent)
+
+        Args:
+            table_name: Table name
+
+        Returns:
+            True if the table is a partitioned table
+        """
+        relkind = await self.execute_single(
+            "SELECT relkind FROM pg_class WHERE oid = to_regclass($1)", f"{TABLE_SCHEMA}.{table_name}"
+        )
+        return relkind == "p"
+
+    async def create_index(self, name: str, sql: str) -> None:
+        """
+        Run a CREATE INDEX statement (outside a transaction so CONCURRENTLY works)
+
+        The build gets INDEX_ADVISOR_BUILD_TIMEOUT_SECONDS instead of the pool's command timeout.
+        An INVALID index left by a failed build is dropped before and after it, otherwise
+        IF NOT EXISTS would keep it.
+
+        Args:
+            name: Index name (the one in sql)
+            sql: CREATE INDEX statement built by the index advisor
+        """
+        async with self.pool.acquire() as conn:
+            # Session setting, reset (RESET ALL) when the connection returns to the pool
+            await conn.execute(f"SET search_path = {TABLE_SCHEMA}")
+            await self._drop_invalid_index(conn, name)
+            try:
+                await conn.execute(sql, timeout=settings.INDEX_ADVISOR_BUILD_TIMEOUT_SECONDS)
+            except Exception:
+                try:
+                    await self._drop_invalid_index(conn, name)
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not drop invalid index {name}: {e}")
+                raise
+
+    @staticmethod
+    async def _drop_invalid_index(conn, name: str) -> None:
+        relkind = await conn.fetchval(
+            "SELECT c.relkind FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE i.indexrelid = to_regclass($1) AND NOT i.indisvalid",
+            f"{TABLE_SCHEMA}.{name}"
+        )
+        if relkind is None:
+            return
+        # Indexes on a partitioned table cannot be dropped concurrently
+        concurrently = "" if relkind == "I" else "CONCURRENTLY "
+        await conn.execute(f"DROP INDEX {concurrently}IF EXISTS {TABLE_SCHEMA}.{name}",
+                           timeout=settings.INDEX_ADVISOR_BUILD_TIMEOUT_SECONDS)
@@ -1,15 +1,101 @@
 """
 Log repository for statistics and service queries
 
-Handles log-specific aggregation and statistics queries
+Handles log-specific aggregation and statistics queries.
+When the logs_rollup_1m table exists (see database/migrations/002_logs_rollup_1m.sql),
+counts are summed from the per-minute rollups maintained by log-save-server
+instead of scanning the logs table. With DATABASE_SHARDS, both sets are merged across shards.
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from app.config import settings
 from app.repositories.base import BaseRepository
 
 
+# Raw queries (full scans over logs)
+STATS_SQL_RAW = {
+    "services": """
+        SELECT DISTINCT service as name, COUNT(*) as log_count
+        FROM logs
+        WHERE deleted = FALSE
+        GROUP BY service
+        ORDER BY service
+    """,
+    "total": "SELECT COUNT(*) FROM logs WHERE deleted = FALSE",
+    "levels": """
+        SELECT level, COUNT(*) as count
+        FROM logs
+        WHERE deleted = FALSE
+        GROUP BY level
+        ORDER BY count DESC
+    """,
+    "top_services": """
+        SELECT service, COUNT(*) as count
+        FROM logs
+        WHERE deleted = FALSE
+        GROUP BY service
+        ORDER BY count DESC
+        LIMIT 10
+    """,
+    "recent_errors": """
+        SELECT COUNT(*) FROM logs
+        WHERE level = 'ERROR'
+          AND created_at > NOW() - INTERVAL '1 hour'
+          AND deleted = FALSE
+    """,
+}
+
+# Rollup queries (sums over logs_rollup_1m; soft deletes are not reflected)
+STATS_SQL_ROLLUP = {
+    "services": """
+        SELECT service as name, SUM(log_count)::bigint as log_count
+        FROM logs_rollup_1m
+        GROUP BY service
+        ORDER BY service
+    """,
+    "total": "SELECT COALESCE(SUM(log_count), 0)::bigint FROM logs_rollup_1m",
+    "levels": """
+        SELECT level, SUM(log_count)::bigint as count
+        FROM logs_rollup_1m
+        GROUP BY level
+        ORDER BY count DESC
+    """,
+    "top_services": """
+        SELECT service, SUM(log_count)::bigint as count
+        FROM logs_rollup_1m
+        GROUP BY service
+        ORDER BY count DESC
+        LIMIT 10
+    """,
+    "recent_errors": """
+        SELECT COALESCE(SUM(log_count), 0)::bigint FROM logs_rollup_1m
+        WHERE level = 'ERROR'
+          AND bucket > date_trunc('minute', NOW() - INTERVAL '1 hour')
+    """,
+}
+
+# Cached per process (repositories are created per request)
+_rollups_available: Optional[bool] = None
+
+
 class LogRepository(BaseRepository):
     """Handles log statistics and service discovery queries"""
 
+    async def uses_rollups(self) -> bool:
+        """
+        Whether statistics are read from logs_rollup_1m
+
+        Checked once per process; disabled with USE_ROLLUPS=false.
+        """
+        global _rollups_available
+        if not settings.USE_ROLLUPS:
+            return False
+        if _rollups_available is None:
+            _rollups_available = await self.table_exists("logs_rollup_1m")
+        return _rollups_available
+
+    async def _queries(self) -> Dict[str, str]:
+        return STATS_SQL_ROLLUP if await self.uses_rollups() else STATS_SQL_RAW
+
     async def get_services(self) -> List[Dict[str, Any]]:
         """
         Get list of services with log counts
@@ -17,14 +103,8 @@ class LogRepository(BaseRepository):
         Returns:
             List of dicts with 'name' and 'log_count' keys
         """
-        query = """
-        SELECT DISTINCT service as name, COUNT(*) as log_count
-        FROM logs
-        WHERE deleted = FALSE
-        GROUP BY service
-        ORDER BY service
-        """
-        rows = await self.execute_query(query)
+        queries = await self._queries()
+        rows = await self.execute_sharded(queries["services"])
         return [{"name": row["name"], "log_count": row["log_count"]} for row in rows]
 
     async def get_stats(self) -> Dict[str, Any]:
@@ -38,37 +118,19 @@ class LogRepository(BaseRepository):
             - service_distribution: Count by service (top 10)
             - recent_errors_1h: Error count in last hour
         """
+        queries = await self._queries()
+
         # Total count
-        total_count = await self.execute_single(
-            "SELECT COUNT(*) FROM logs WHERE deleted = FALSE"
-        )
+        total_count = await self.execute_sharded_single(queries["total"])
 
         # Level distribution
-        level_counts = await self.execute_query("""
-            SELECT level, COUNT(*) as count
-            FROM logs
-            WHERE deleted = FALSE
-            GROUP BY level
-            ORDER BY count DESC
-        """)
+        level_counts = await self.execute_sharded(queries["levels"])
 
         # Service distribution (top 10)
-        service_counts = await self.execute_query("""
-            SELECT service, COUNT(*) as count
-            FROM logs
-            WHERE deleted = FALSE
-            GROUP BY service
-            ORDER BY count DESC
-            LIMIT 10
-        """)
+        service_counts = await self.execute_sharded(queries["top_services"])
 
         # Recent errors (last 1 hour)
-        recent_errors = await self.execute_single("""
-            SELECT COUNT(*) FROM logs
-            WHERE level = 'ERROR'
-              AND created_at > NOW() - INTERVAL '1 hour'
-              AND deleted = FALSE
-        """)
+        recent_errors = await self.execute_sharded_single(queries["recent_errors"])
 
         return {
             "total_logs": total_count,
@@ -3,20 +3,79 @@ Query repository for SQL execution
 
 Handles SQL query execution with type conversion and timing
 """
+import logging
 import time
-from datetime import datetime
+from datetime import datetime, timezone
 from decimal import Decimal
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
 from app.repositories.base import BaseRepository
+from app.repositories.cold_storage import (
+    HOT, ColdStorageError, choose_tier, cold_storage_enabled, get_cold_store, reads_archived_logs, time_bounds
+)
+
+logger = logging.getLogger(__name__)
+
+# archived_partitions is re-read at most this often (archiving runs hourly by default)
+COLD_BOUNDARY_TTL_SECONDS = 60
+
+# (fetched_at, end of the newest archived partition), cached per process
+_cold_boundary: Optional[Tuple[float, Optional[datetime]]] = None
+
+
+def _to_json_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """datetime → ISO string, Decimal → float"""
+    for key, value in row.items():
+        if isinstance(value, datetime):
+            row[key] = value.isoformat()
+        elif isinstance(value, Decimal):
+            row[key] = float(value)
+    return row
 
 
 class QueryRepository(BaseRepository):
     """Handles SQL query execution with result formatting"""
 
+    async def get_cold_boundary(self) -> Optional[datetime]:
+        """
+        End of the newest archived partition (rows before it live in Parquet)
+
+        Returns:
+            None if nothing has been archived or archived_partitions does not exist
+        """
+        global _cold_boundary
+        if _cold_boundary is None or time.monotonic() - _cold_boundary[0] > COLD_BOUNDARY_TTL_SECONDS:
+            boundary = None
+            if await self.table_exists("archived_partitions"):
+                sql = "SELECT MAX(range_end) FROM archived_partitions WHERE row_count > 0"
+                if self.shard_router is None:
+                    boundary = await self.execute_single(sql)
+                else:
+                    # Each shard archives on its own: only rows before every shard's boundary are in Parquet
+                    ends = [rows[0][0] for rows in await self.shard_router.fetch_each(sql)]
+                    boundary = None if None in ends else min(ends)
+            _cold_boundary = (time.monotonic(), boundary)
+        return _cold_boundary[1]
+
+    async def get_query_tier(self, sql: str) -> str:
+        """
+        Storage tier for an agent query (HOT unless ARCHIVE_PATH is set and the
+        query's created_at range reaches archived partitions)
+        """
+        if not cold_storage_enabled() or not reads_archived_logs(sql):
+            return HOT
+        boundary = await self.get_cold_boundary()
+        lower, upper = time_bounds(sql, datetime.now(timezone.utc))
+        return choose_tier(lower, upper, boundary)
+
     async def execute_sql(self, sql: str, params: List[Any] = None) -> Tuple[List[Dict[str, Any]], float]:
         """
         Execute SQL query and return results with execution time
 
+        Queries without parameters whose time range reaches the Parquet archive
+        run in DuckDB (see cold_storage). The archived partitions are gone from PostgreSQL,
+        so a DuckDB failure raises instead of returning PostgreSQL's partial rows.
+        With DATABASE_SHARDS, PostgreSQL queries go through the ShardRouter (see sharding).
+
         Converts asyncpg Records to dictionaries with proper type handling:
         - datetime → ISO string
         - Decimal → float
@@ -27,25 +86,32 @@ class QueryRepository(BaseRepository):
 
         Returns:
             Tuple of (results_list, execution_time_ms)
+
+        Raises:
+            ColdStorageError: The query reaches archived rows and DuckDB failed
         """
         start_time = time.time()
 
+        rows = None
+        tier = HOT if params else await self.get_query_tier(sql)
+        if tier != HOT:
+            try:
+                rows = await get_cold_store().query(sql, tier)
+            except Exception as e:
+                logger.warning(f"Cold storage query failed ({tier}): {e}")
+                raise ColdStorageError(
+                    f"Archived logs could not be queried ({tier} tier), PostgreSQL no longer holds them: {e}"
+                ) from e
+
         # Execute query with optional parameters
-        if params:
-            rows = await self.execute_query(sql, *params)
-        else:
-            rows = await self.execute_query(sql)
+        if rows is None:
+            if params:
+                rows = await self.execute_sharded(sql, *params)
+            else:
+                rows = await self.execute_sharded(sql)
 
         # Convert asyncpg Record to dict with type handling
-        results_list = []
-        for row in rows:
-            row_dict = dict(row)
-            for key, value in row_dict.items():
-                if isinstance(value, datetime):
-                    row_dict[key] = value.isoformat()
-                elif isinstance(value, Decimal):
-                    row_dict[key] = float(value)
-            results_list.append(row_dict)
+        results_list = [_to_json_row(dict(row)) for row in rows]
 
         execution_time_ms = (time.time() - start_time) * 1000
 
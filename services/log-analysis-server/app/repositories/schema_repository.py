@@ -3,16 +3,344 @@ Schema repository for table schema and sample data retrieval
 
 Handles database schema introspection and sample data queries
 """
+import time
+from collections import Counter
+from itertools import zip_longest
+from typing import Any, List, NamedTuple, Optional, Sequence, Tuple
+from app.config import settings
 from app.repositories.base import BaseRepository
 
+# Hourly / daily rollups maintained by log-save-server (database/migrations/004_rollup_hourly_daily.sql)
+ROLLUP_TABLES = ("logs_rollup_1h", "logs_rollup_1d")
+
+# Appended to the logs schema so aggregate questions are routed to the rollups
+ROLLUP_SCHEMA_GUIDE = """
+Pre-aggregated rollups (PREFER these for counts, error rates and latency over windows of 1 hour or more):
+- logs_rollup_1h: one row per (UTC hour bucket, service, level, error_type, path)
+- logs_rollup_1d: one row per (UTC day bucket, service, level, error_type, path)
+- Filter time with `bucket` (not created_at), e.g. `WHERE bucket >= NOW() - INTERVAL '24 hours'`
+- Counts: SUM(log_count); error rate: SUM(log_count) FILTER (WHERE level = 'ERROR')::float / SUM(log_count)
+- Average latency: SUM(duration_sum) / NULLIF(SUM(duration_count), 0); max: MAX(duration_max)
+- Percentiles (ms): histogram_percentile(histogram_sum(duration_histogram), 0.95)
+- error_type / path are '' (empty string) when absent, never NULL
+- No `deleted` column (soft deletes are not reflected) and no message / user_id / trace_id:
+  use logs for individual rows, text search, users, traces or windows shorter than 1 hour
+
+Example: "서비스별 에러 개수 (최근 7일)"
+SELECT service, SUM(log_count) as error_count
+FROM logs_rollup_1d
+WHERE level = 'ERROR' AND bucket >= NOW() - INTERVAL '7 days'
+GROUP BY service
+ORDER BY error_count DESC;
+
+Example: "느린 API p95 (최근 24시간)"
+SELECT path, SUM(duration_count) as requests,
+       histogram_percentile(histogram_sum(duration_histogram), 0.95) as p95_ms
+FROM logs_rollup_1h
+WHERE path <> '' AND bucket >= NOW() - INTERVAL '24 hours'
+GROUP BY path
+HAVING SUM(duration_count) > 0
+ORDER BY p95_ms DESC
+LIMIT 10;
+"""
+
+# Error groups maintained by log-save-server at ingest (database/migrations/007_error_groups.sql)
+ERROR_GROUPS_SCHEMA_GUIDE = """
+Error groups (PREFER these for "most frequent / top / new errors" instead of GROUP BY error_type, message):
+- error_groups: one row per error fingerprint (service + error_type + message with numbers / IDs stripped
+  + top stack frames); logs.error_fingerprint references error_groups.fingerprint
+- event_count, first_seen, last_seen cover all time; message is the text of the first occurrence
+- For a time window, count logs by error_fingerprint and join error_groups for the label
+- Logs stored before error grouping was enabled have error_fingerprint NULL
+
+Example: "가장 많이 발생한 에러"
+SELECT service, error_type, message, event_count, first_seen, last_seen
+FROM error_groups
+ORDER BY event_count DESC
+LIMIT 10;
+
+Example: "최근 24시간 에러 TOP 10"
+SELECT g.service, g.error_type, g.message, COUNT(*) as occurrences, MAX(l.created_at) as last_seen
+FROM logs l
+JOIN error_groups g ON g.fingerprint = l.error_fingerprint
+WHERE l.deleted = FALSE AND l.error_fingerprint IS NOT NULL
+  AND l.created_at > NOW() - INTERVAL '24 hours'
+GROUP BY g.fingerprint
+ORDER BY occurrences DESC
+LIMIT 10;
+
+Example: "새로 발생한 에러 (최근 1시간)"
+SELECT service, error_type, message, event_count, first_seen
+FROM error_groups
+WHERE first_seen > NOW() - INTERVAL '1 hour'
+ORDER BY first_seen DESC;
+"""
+
+SHARDING_SCHEMA_GUIDE = """
+Sharding (logs are spread over several PostgreSQL databases, SHARD_BY={key}):
+- Queries run on every shard and are merged: COUNT / SUM / MIN / MAX / AVG, GROUP BY, HAVING,
+  ORDER BY, numeric LIMIT / OFFSET and DISTINCT work as usual
+- Not mergeable across shards: COUNT(DISTINCT ...), PERCENTILE_CONT, histogram_sum / other
+  aggregates, window functions (OVER), UNION, DISTINCT ON, LIMIT $n. With SHARD_BY=service they
+  still work when the query filters on one service (WHERE service = '...') or groups by service
+- With GROUP BY, every selected column is a GROUP BY expression or an aggregate
+- Subqueries and CTEs only see the rows of the shard they run on: they can filter rows, but
+  aggregates, GROUP BY, DISTINCT or LIMIT inside them are rejected (with SHARD_BY=service allowed
+  when the subquery / CTE itself groups by service or filters to one service)
+- error_groups and rollup tables are per shard: with SHARD_BY=time the same fingerprint appears on
+  several shards, so use SUM(event_count), MIN(first_seen), MAX(last_seen) GROUP BY fingerprint
+"""
+
+# Top-level logs.metadata keys in a block sample of $1 percent, at most $2 rows (one row per key and JSON type).
+# Not the newest rows: ORDER BY created_at would scan and sort every partition (logs_default / logs_legacy
+# prevent an ordered append)
+METADATA_PROFILE_SQL = """
+WITH sample AS (
+    SELECT metadata
+    FROM public.logs TABLESAMPLE SYSTEM ($1)
+    WHERE metadata IS NOT NULL AND jsonb_typeof(metadata) = 'object' AND deleted = FALSE
+    LIMIT $2
+)
+SELECT k.key, jsonb_typeof(k.value) AS type, COUNT(*) AS row_count,
+       COUNT(DISTINCT k.value) AS distinct_values, (SELECT COUNT(*) FROM sample) AS sampled
+FROM sample CROSS JOIN LATERAL jsonb_each(sample.metadata) AS k
+GROUP BY k.key, jsonb_typeof(k.value)
+"""
+
+METADATA_SCHEMA_GUIDE = """
+logs.metadata keys (sampled from {sampled:,} rows with metadata):
+{keys}
+- Filter with metadata->>'key' = 'value' (text, the indexed form) or metadata @> '{{"key": "value"}}'
+- Cast for numbers / booleans: (metadata->>'key')::numeric, (metadata->>'key')::boolean
+- Keys not listed here are rare or absent: check with metadata ? 'key'
+"""
+
+
+class MetadataKeyStats(NamedTuple):
+    """A logs.metadata key in the profile sample"""
+    key: str
+    row_count: int
+    distinct_values: int
+    types: tuple  # JSON types, most common first
+    sampled: int
+
+    @property
+    def frequency(self) -> float:
+        """Share of sampled rows that have the key"""
+        return self.row_count / self.sampled if self.sampled else 0.0
+
+    @property
+    def selectivity(self) -> float:
+        """Estimated share of rows matching metadata->>'key' = <one value>"""
+        return self.frequency / max(self.distinct_values, 1)
+
+
+def summarize_metadata_keys(shard_rows: Sequence[Sequence[Any]]) -> List[MetadataKeyStats]:
+    """
+    Merge METADATA_PROFILE_SQL rows (one list per shard) into per-key stats
+
+    Distinct values are summed over JSON types and take the largest shard
+    (a lower bound when values repeat across shards).
+
+    Returns:
+        Key stats, most frequent first
+    """
+    sampled = 0
+    totals = {}
+    for rows in shard_rows:
+        if rows:
+            sampled += rows[0]["sampled"]
+        shard_distinct = Counter()
+        for row in rows:
+            entry = totals.setdefault(row["key"], {"rows": 0, "distinct": 0, "types": Counter()})
+            entry["rows"] += row["row_count"]
+            entry["types"][row["type"]] += row["row_count"]
+            shard_distinct[row["key"]] += row["distinct_values"]
+        for key, distinct in shard_distinct.items():
+            totals[key]["distinct"] = max(totals[key]["distinct"], distinct)
+
+    stats = [
+        MetadataKeyStats(key, entry["rows"], entry["distinct"],
+                         tuple(kind for kind, _ in entry["types"].most_common()), sampled)
+        for key, entry in totals.items()
+    ]
+    return sorted(stats, key=lambda stat: (-stat.row_count, stat.key))
+
+
+def format_metadata_guide(keys: List[MetadataKeyStats]) -> str:
+    """METADATA_SCHEMA_GUIDE for the given keys (empty when there are none)"""
+    if not keys:
+        return ""
+    lines = "\n".join(
+        f"- {stat.key}: {'/'.join(stat.types)}, {stat.frequency:.0%} of rows, ~{stat.distinct_values:,} distinct values"
+        for stat in keys
+    )
+    return METADATA_SCHEMA_GUIDE.format(sampled=keys[0].sampled, keys=lines)
+
+
+# Estimated live rows of logs and its partitions (reltuples is -1 before the first ANALYZE)
+ROW_ESTIMATE_SQL = """
+SELECT COALESCE(SUM(GREATEST(c.reltuples, 0)), 0)::float8 AS row_estimate
+FROM pg_class c
+WHERE c.oid = 'public.logs'::regclass
+   OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = 'public.logs'::regclass)
+"""
+
+# Diverse rows picked from a block sample of $1 percent (public.logs: views cannot be sampled)
+SAMPLE_ROWS_SQL = """
+WITH sample AS (
+    SELECT id, created_at, level, log_type, service, error_type, message, duration_ms, path
+    FROM public.logs TABLESAMPLE SYSTEM ($1)
+    WHERE deleted = FALSE
+)
+(
+    SELECT * FROM sample
+    WHERE level = 'ERROR'
+    ORDER BY created_at DESC
+    LIMIT 3
+)
+UNION ALL
+(
+    SELECT * FROM sample
+    WHERE duration_ms > 1000
+    ORDER BY created_at DESC
+    LIMIT 3
+)
+UNION ALL
+(
+    SELECT DISTINCT ON (service) * FROM sample
+    ORDER BY service, created_at DESC
+    LIMIT 4
+);
+"""
+
+# Columns whose planner statistics are shown with the sample
+STATS_COLUMNS = ("service", "level", "error_type", "path")
+STATS_TOP_VALUES = 5
+
+# pg_stats of logs: the partitioned parent once it has been ANALYZEd (autovacuum skips it),
+# otherwise the newest analyzed partition (logs_pYYYYMMDD sorts after logs_legacy / logs_default)
+COLUMN_STATS_SQL = """
+SELECT DISTINCT ON (s.attname)
+       s.attname, s.n_distinct, s.most_common_vals::text::text[] AS most_common_vals,
+       s.most_common_freqs
+FROM pg_stats s
+WHERE s.schemaname = 'public'
+  AND s.attname = ANY($1::text[])
+  AND (s.tablename = 'logs' OR s.tablename IN (
+      SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+      WHERE i.inhparent = 'public.logs'::regclass
+  ))
+ORDER BY s.attname, s.tablename = 'logs' DESC, s.tablename DESC
+"""
+
+
+def sample_percent(row_estimate: float, target_rows: int) -> float:
+    """TABLESAMPLE SYSTEM percentage expected to return about target_rows rows"""
+    if row_estimate <= 0:
+        return 100.0
+    return min(100.0, max(0.01, target_rows * 100.0 / row_estimate))
+
+
+async def sample_rows(conn) -> list:
+    """Diverse sample rows of one database (SAMPLE_ROWS_SQL sized from ROW_ESTIMATE_SQL)"""
+    row_estimate = await conn.fetchval(ROW_ESTIMATE_SQL)
+    return await conn.fetch(SAMPLE_ROWS_SQL, sample_percent(row_estimate or 0, settings.SAMPLE_DATA_ROWS))
+
+
+async def metadata_key_rows(conn, sample_size: int) -> list:
+    """METADATA_PROFILE_SQL rows of one database (block sample sized from ROW_ESTIMATE_SQL)"""
+    row_estimate = await conn.fetchval(ROW_ESTIMATE_SQL)
+    return await conn.fetch(METADATA_PROFILE_SQL, sample_percent(row_estimate or 0, sample_size), sample_size)
+
+
+def format_column_stats(rows: Sequence[Any]) -> str:
+    """
+    pg_stats rows as text for the SQL generator
+
+    n_distinct < 0 is a fraction of the row count (the column grows with the table).
+    """
+    if not rows:
+        return ""
+    lines = []
+    for row in sorted(rows, key=lambda r: STATS_COLUMNS.index(r["attname"])):
+        n_distinct = row["n_distinct"]
+        distinct = f"~{-n_distinct:.0%} of rows distinct" if n_distinct < 0 else f"~{n_distinct:,.0f} distinct"
+        values = list(zip(row["most_common_vals"] or [], row["most_common_freqs"] or []))[:STATS_TOP_VALUES]
+        common = ", ".join(f"{value[:40]} ({freq:.0%})" for value, freq in values)
+        lines.append(f"  - {row['attname']}: {distinct}" + (f"; most common: {common}" if common else ""))
+    return "Column statistics (pg_stats):\n" + "\n".join(lines) + "\n"
+
+
+# Cached per process (repositories are created per request)
+_rollup_tables: Optional[List[str]] = None
+_error_groups_available: Optional[bool] = None
+# Refreshed by the metadata profiling background task (None until the first run)
+_metadata_keys: Optional[List[MetadataKeyStats]] = None
+# (time.monotonic() when built, text) of get_sample_data
+_sample_data: Optional[Tuple[float, str]] = None
+
+
+def get_metadata_keys() -> List[MetadataKeyStats]:
+    """Latest metadata key profile (empty before the first profile_metadata run)"""
+    return _metadata_keys or []
+
 
 class SchemaRepository(BaseRepository):
     """Handles schema and sample data queries for Text-to-SQL agent"""
 
+    async def get_rollup_tables(self) -> List[str]:
+        """
+        Hourly / daily rollup tables that exist
+
+        Checked once per process; disabled with USE_ROLLUPS=false.
+        """
+        global _rollup_tables
+        if not settings.USE_ROLLUPS:
+            return []
+        if _rollup_tables is None:
+            _rollup_tables = [table for table in ROLLUP_TABLES if await self.table_exists(table)]
+        return _rollup_tables
+
+    async def has_error_groups(self) -> bool:
+        """Whether error_groups exists (checked once per process)"""
+        global _error_groups_available
+        if _error_groups_available is None:
+            _error_groups_available = await self.table_exists("error_groups")
+        return _error_groups_available
+
+    async def profile_metadata(self, sample_size: int) -> List[MetadataKeyStats]:
+        """
+        Profile top-level logs.metadata keys (frequency, distinct values, JSON types)
+        in a TABLESAMPLE SYSTEM block sample of about sample_size rows per shard
+        and cache the result per process
+
+        Args:
+            sample_size: Rows sampled per shard (at most this many with metadata are profiled)
+
+        Returns:
+            Key stats, most frequent first
+        """
+        global _metadata_keys
+        if self.shard_router is None:
+            async with self.pool.acquire() as conn:
+                shard_rows = [await metadata_key_rows(conn, sample_size)]
+        else:
+            shard_rows = await self.shard_router.run_each(lambda conn: metadata_key_rows(conn, sample_size))
+        _metadata_keys = summarize_metadata_keys(shard_rows)
+        return _metadata_keys
+
     async def get_table_schema(self, table_name: str = "logs") -> str:
         """
         Retrieve table schema information from information_schema
 
+        For logs, the hourly / daily rollup tables and error_groups are appended with
+        usage guidance so the SQL generator answers aggregate questions from them,
+        then the most frequent metadata keys (see profile_metadata) and the
+        cross-shard limits when DATABASE_SHARDS is set.
+        Columns come from the public table, not the analysis.logs view that agent
+        SQL reads (same names, but views report no NOT NULL / DEFAULT).
+
         Args:
             table_name: Name of the table to retrieve schema for
 
@@ -22,7 +350,7 @@ class SchemaRepository(BaseRepository):
         query = """
         SELECT column_name, data_type, is_nullable, column_default
         FROM information_schema.columns
-        WHERE table_name = $1
+        WHERE table_name = $1 AND table_schema = 'public'
         ORDER BY ordinal_position;
         """
         rows = await self.execute_query(query, table_name)
@@ -33,49 +361,52 @@ class SchemaRepository(BaseRepository):
             default = f" DEFAULT {row['column_default']}" if row['column_default'] else ""
             schema_info += f"  - {row['column_name']}: {row['data_type']} {nullable}{default}\n"
 
+        if table_name == "logs":
+            rollup_tables = await self.get_rollup_tables()
+            for rollup_table in rollup_tables:
+                schema_info += "\n" + await self.get_table_schema(rollup_table)
+            if rollup_tables:
+                schema_info += ROLLUP_SCHEMA_GUIDE
+            if await self.has_error_groups():
+                schema_info += "\n" + await self.get_table_schema("error_groups")
+                schema_info += ERROR_GROUPS_SCHEMA_GUIDE
+            schema_info += format_metadata_guide(get_metadata_keys()[:settings.METADATA_TOP_KEYS])
+            if self.shard_router is not None:
+                schema_info += SHARDING_SCHEMA_GUIDE.format(key=self.shard_router.key)
+
         return schema_info
 
     async def get_sample_data(self) -> str:
         """
-        Retrieve diverse sample data for LLM learning
+        Retrieve diverse sample data and column statistics for LLM learning
 
-        Returns 10 diverse log samples:
+        Returns up to 10 diverse log samples drawn from a TABLESAMPLE SYSTEM block
+        sample (about SAMPLE_DATA_ROWS rows per shard, never a full-table scan):
         - 3 recent ERROR logs
         - 3 slow API calls (>1000ms)
         - 4 diverse services
+        followed by pg_stats for service / level / error_type / path (distinct values
+        and most common values with frequencies, from the first database when sharded).
+
+        Built at most once per SAMPLE_DATA_TTL_SECONDS per process; other calls
+        return the cached text.
 
         Returns:
-            Formatted string with sample logs
+            Formatted string with sample logs and column statistics
         """
-        query = """
-        (
-            SELECT id, created_at, level, log_type, service, error_type, message, duration_ms, path
-            FROM logs
-            WHERE deleted = FALSE AND level = 'ERROR'
-            ORDER BY created_at DESC
-            LIMIT 3
-        )
-        UNION ALL
-        (
-            SELECT id, created_at, level, log_type, service, error_type, message, duration_ms, path
-            FROM logs
-            WHERE deleted = FALSE AND duration_ms > 1000
-            ORDER BY created_at DESC
-            LIMIT 3
-        )
-        UNION ALL
-        (
-            SELECT DISTINCT ON (service)
-                id, created_at, level, log_type, service, error_type, message, duration_ms, path
-            FROM logs
-            WHERE deleted = FALSE
-            ORDER BY service, created_at DESC
-            LIMIT 4
-        );
-        """
-        rows = await self.execute_query(query)
+        global _sample_data
+        if _sample_data is not None and time.monotonic() - _sample_data[0] < settings.SAMPLE_DATA_TTL_SECONDS:
+            return _sample_data[1]
 
-        sample_data = "Sample Data (Diverse 10 logs):\n"
+        if self.shard_router is None:
+            async with self.pool.acquire() as conn:
+                shard_rows = [await sample_rows(conn)]
+        else:
+            shard_rows = await self.shard_router.run_each(sample_rows)
+        # Interleave shards so every shard contributes to the 10 rows
+        rows = [row for group in zip_longest(*shard_rows) for row in group if row is not None][:10]
+
+        sample_data = f"Sample Data (Diverse {len(rows)} logs):\n"
         for row in rows:
             duration_info = f", {row['duration_ms']:.0f}ms" if row['duration_ms'] else ""
             error_info = f", {row['error_type']}" if row['error_type'] else ""
@@ -83,4 +414,7 @@ class SchemaRepository(BaseRepository):
             message_preview = row['message'][:40] + "..." if len(row['message']) > 40 else row['message']
             sample_data += f"  - [{row['level']}] {row['service']}{duration_info}{error_info}{path_info}: {message_preview}\n"
 
+        sample_data += format_column_stats(await self.execute_query(COLUMN_STATS_SQL, list(STATS_COLUMNS)))
+
+        _sample_data = (time.monotonic(), sample_data)
         return sample_data
@@ -0,0 +1,154 @@
+"""
+Search repository for log text search
+
+Finds a literal substring in message and stack_trace (case-insensitive ILIKE), served by
+the pg_trgm GIN indexes from database/migrations/008_log_search.sql instead of a
+sequential scan. Stack traces stored once per fingerprint (stack_traces) are searched
+first and their logs fetched by stack_trace_hash.
+
+Results are ranked by pg_trgm word_similarity between the pattern and the message
+(closest first, then newest) or by time, and paginated with limit / offset.
+Only the live PostgreSQL data is searched (not the Parquet archive).
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from app.repositories.base import BaseRepository
+from app.repositories.query_repository import _to_json_row
+
+# Trigram indexes cannot narrow shorter patterns (they would scan every row)
+MIN_PATTERN_LENGTH = 3
+MAX_PAGE_SIZE = 200
+SEARCH_ORDERS = ("relevance", "recent")
+
+RESULT_COLUMNS = (
+    "l.id, l.created_at, l.level, l.service, l.error_type, l.trace_id, l.path, l.message"
+)
+
+# Cached per process (repositories are created per request)
+_stack_traces_available: Optional[bool] = None
+
+
+def escape_like(pattern: str) -> str:
+    """Escape LIKE wildcards so the pattern matches literally"""
+    return pattern.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def build_search_sql(
+    with_trace_hashes: bool,
+    service: Optional[str] = None,
+    level: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    order: str = "relevance",
+    limit: int = 50,
+    offset: int = 0,
+) -> Tuple[str, List[str]]:
+    """
+    Search SQL over public.logs and the positions of its parameters
+
+    $1 is the LIKE pattern, $2 the raw pattern (ranking), $3 the matching
+    stack_traces hashes (when with_trace_hashes); filters follow in order.
+    LIMIT fetches one extra row to report has_more.
+
+    Returns:
+        (sql, names of the parameters after $1, $2[, $3])
+    """
+    matches = ["l.message ILIKE $1", "l.stack_trace ILIKE $1"]
+    position = 3
+    if with_trace_hashes:
+        matches.append("l.stack_trace_hash = ANY($3::bigint[])")
+        position = 4
+
+    conditions = ["l.deleted = FALSE", f"({' OR '.join(matches)})"]
+    names = []
+    for name, value, condition in (
+        ("service", service, "l.service = ${}"),
+        ("level", level, "l.level = ${}"),
+        ("since", since, "l.created_at >= ${}"),
+        ("until", until, "l.created_at < ${}"),
+    ):
+        if value is not None:
+            conditions.append(condition.format(position))
+            names.append(name)
+            position += 1
+
+    where = "\n          AND ".join(conditions)
+    order_by = "rank DESC, l.created_at DESC, l.id DESC" if order == "relevance" else "l.created_at DESC, l.id DESC"
+    sql = f"""
+        SELECT {RESULT_COLUMNS},
+               l.message ILIKE $1 AS message_match,
+               word_similarity($2, l.message) AS rank
+        FROM public.logs l
+        WHERE {where}
+        ORDER BY {order_by}
+        LIMIT {int(limit) + 1} OFFSET {int(offset)}
+    """
+    return sql, names
+
+
+class SearchRepository(BaseRepository):
+    """Ranked, paginated substring search over log messages and stack traces"""
+
+    async def has_stack_traces(self) -> bool:
+        """Whether stack_traces exists (checked once per process)"""
+        global _stack_traces_available
+        if _stack_traces_available is None:
+            _stack_traces_available = await self.table_exists("stack_traces")
+        return _stack_traces_available
+
+    async def _trace_hashes(self, like: str) -> List[int]:
+        """Fingerprints whose stack trace contains the pattern (every shard keeps its own stack_traces)"""
+        sql = "SELECT hash FROM stack_traces WHERE stack_trace ILIKE $1"
+        if self.shard_router is None:
+            rows = await self.execute_query(sql, like)
+        else:
+            rows = [row for shard_rows in await self.shard_router.fetch_each(sql, like) for row in shard_rows]
+        return sorted({row["hash"] for row in rows})
+
+    async def search(
+        self,
+        pattern: str,
+        service: Optional[str] = None,
+        level: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        order: str = "relevance",
+        limit: int = 50,
+        offset: int = 0,
+    ) -> Dict[str, Any]:
+        """
+        Search log messages and stack traces for a literal substring
+
+        Args:
+            pattern: Text to find (case-insensitive, at least MIN_PATTERN_LENGTH characters)
+            service / level: Optional exact filters
+            since / until: Optional created_at range [since, until)
+            order: "relevance" (word similarity, then newest) or "recent"
+            limit / offset: Page (limit at most MAX_PAGE_SIZE)
+
+        Returns:
+            {"results": rows (JSON-ready), "has_more": bool, "sql": executed SQL}
+
+        Raises:
+            ValueError: Pattern too short, unknown order or invalid page
+        """
+        pattern = pattern.strip()
+        if len(pattern) < MIN_PATTERN_LENGTH:
+            raise ValueError(f"Search pattern must be at least {MIN_PATTERN_LENGTH} characters")
+        if order not in SEARCH_ORDERS:
+            raise ValueError(f"order must be one of {', '.join(SEARCH_ORDERS)}")
+        if not 1 <= limit <= MAX_PAGE_SIZE or offset < 0:
+            raise ValueError(f"limit must be 1-{MAX_PAGE_SIZE} and offset >= 0")
+
+        like = f"%{escape_like(pattern)}%"
+        args: List[Any] = [like, pattern]
+        with_trace_hashes = await self.has_stack_traces()
+        if with_trace_hashes:
+            args.append(await self._trace_hashes(like))
+
+        filters = {"service": service, "level": level, "since": since, "until": until}
+        sql, names = build_search_sql(with_trace_hashes, order=order, limit=limit, offset=offset, **filters)
+        args.extend(filters[name] for name in names)
+
+        rows = [_to_json_row(dict(row)) for row in await self.execute_sharded(sql, *args)]
+        return {"results": rows[:limit], "has_more": len(rows) > limit, "sql": sql}
@@ -0,0 +1,831 @@
+"""
+Shards: logs spread over several PostgreSQL databases by log-save-server
+
+DATABASE_SHARDS lists the extra databases in the same order as log-save-server
+(the DATABASE_* database is shard 0) and SHARD_BY matches its routing:
+
+- service: all rows of a service live on shard crc32(service) % N. A query whose WHERE
+  pins service = '...' runs unchanged on that shard, and GROUP BY service groups are
+  complete on their shard
+- time: rows are spread by created_at bucket, so every query fans out
+
+Fan-out queries run on every shard concurrently and the partial results are merged in DuckDB:
+
+- shard-local rows (no aggregates, or SHARD_BY=service with service in GROUP BY): each shard
+  returns at most LIMIT + OFFSET rows, ORDER BY / LIMIT / OFFSET are re-applied over all of them
+- aggregates: each shard returns partial COUNT / SUM / MIN / MAX per group (AVG as SUM and COUNT),
+  which are re-aggregated before HAVING, ORDER BY and LIMIT
+- CTEs and subqueries run on each shard against that shard's rows only, so they may filter rows
+  but not aggregate, GROUP BY, DISTINCT or LIMIT them, unless with SHARD_BY=service the CTE /
+  subquery groups by service or filters to one service
+
+Queries that cannot be merged (COUNT(DISTINCT ...), percentiles, histogram_sum and other aggregates
+across shards, select items that are neither aggregates nor GROUP BY keys, window functions, UNION)
+raise ShardQueryError.
+"""
+import asyncio
+import os
+import re
+import tempfile
+import zlib
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    import duckdb
+except ImportError:  # Only needed when DATABASE_SHARDS is set
+    duckdb = None
+
+SHARD_KEYS = ("service", "time")
+
+# Aggregates with a partial / merge form (AVG is rewritten as SUM / COUNT)
+MERGEABLE_AGGREGATES = {"count", "sum", "min", "max", "avg"}
+
+# Aggregates that are only correct when every group lives on one shard
+LOCAL_AGGREGATES = {
+    "array_agg", "string_agg", "json_agg", "jsonb_agg", "json_object_agg", "jsonb_object_agg",
+    "bool_and", "bool_or", "every", "bit_and", "bit_or", "stddev", "stddev_pop", "stddev_samp",
+    "variance", "var_pop", "var_samp", "percentile_cont", "percentile_disc", "mode",
+    "corr", "covar_pop", "covar_samp", "regr_slope", "regr_intercept",
+    # Rollup duration histograms (database/schema.sql): the summed buckets feed histogram_percentile,
+    # which has no DuckDB counterpart
+    "histogram_sum",
+}
+
+# PostgreSQL result types → DuckDB column types for the merge table (everything else is VARCHAR)
+DUCKDB_TYPES = {
+    "int2": "BIGINT", "int4": "BIGINT", "int8": "BIGINT", "oid": "BIGINT",
+    "float4": "DOUBLE", "float8": "DOUBLE", "numeric": "DOUBLE",
+    "bool": "BOOLEAN", "date": "DATE", "time": "TIME", "interval": "INTERVAL",
+    "timestamp": "TIMESTAMP", "timestamptz": "TIMESTAMPTZ",
+    "json": "JSON", "jsonb": "JSON", "uuid": "UUID", "bytea": "BLOB",
+}
+
+_TOKEN = re.compile(r"""
+      (?P<space>\s+|--[^\n]*|/\*.*?\*/)
+    | (?P<string>'(?:[^']|'')*')
+    | (?P<quoted>"(?:[^"]|"")*")
+    | (?P<param>\$\d+)
+    | (?P<number>\d+(?:\.\d*)?(?:[eE][-+]?\d+)?|\.\d+)
+    | (?P<word>[A-Za-z_][A-Za-z0-9_$]*)
+    | (?P<cast>::)
+    | (?P<open>\()
+    | (?P<close>\))
+    | (?P<comma>,)
+    | (?P<op>[<>!=]=|<>|\|\||.)
+""", re.VERBOSE | re.DOTALL)
+
+_ORDER_SUFFIX = {"ASC", "DESC", "NULLS", "FIRST", "LAST"}
+# Words that end an expression rather than name an implicit alias
+_NOT_ALIAS = {"NULL", "TRUE", "FALSE", "END", "ZONE", "DESC", "ASC"}
+
+
+class ShardQueryError(ValueError):
+    """A query that cannot be answered by merging per-shard results"""
+
+
+class Token(NamedTuple):
+    kind: str
+    text: str
+    start: int
+    end: int
+    depth: int
+
+    @property
+    def upper(self) -> str:
+        return self.text.upper() if self.kind == "word" else ""
+
+
+def tokenize(sql: str) -> List[Token]:
+    """SQL tokens without whitespace / comments; depth counts enclosing parentheses"""
+    tokens = []
+    depth = 0
+    for match in _TOKEN.finditer(sql):
+        kind = match.lastgroup
+        if kind == "space":
+            continue
+        if kind == "close":
+            depth -= 1
+        tokens.append(Token(kind, match.group(), match.start(), match.end(), depth))
+        if kind == "open":
+            depth += 1
+    return tokens
+
+
+def parse_shard_dsns(value: str) -> List[str]:
+    """DATABASE_SHARDS (comma separated DSNs) → DSN list"""
+    return [dsn.strip() for dsn in value.split(",") if dsn.strip()]
+
+
+def service_shard(service: str, count: int) -> int:
+    """Shard holding a service's rows (same as log-save-server shards.service_shard)"""
+    return zlib.crc32(service.encode("utf-8")) % count
+
+
+def _normalize(tokens: Sequence[Token]) -> str:
+    return " ".join(token.text.lower() if token.kind == "word" else token.text for token in tokens)
+
+
+def _quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _identifier_name(token: Token) -> str:
+    return token.text[1:-1].replace('""', '"') if token.kind == "quoted" else token.text.lower()
+
+
+def _split(tokens: Sequence[Token], depth: int) -> List[List[Token]]:
+    """Split on commas at the given depth"""
+    parts: List[List[Token]] = [[]]
+    for token in tokens:
+        if token.kind == "comma" and token.depth == depth:
+            parts.append([])
+        else:
+            parts[-1].append(token)
+    return [part for part in parts if part]
+
+
+def _matching_close(tokens: Sequence[Token], index: int) -> int:
+    """Index of the ) closing the ( at tokens[index]"""
+    depth = tokens[index].depth
+    for position in range(index + 1, len(tokens)):
+        if tokens[position].kind == "close" and tokens[position].depth == depth:
+            return position
+    raise ShardQueryError("Unbalanced parentheses")
+
+
+def _is_subquery(tokens: Sequence[Token], index: int) -> bool:
+    return (tokens[index].kind == "open" and index + 1 < len(tokens)
+            and tokens[index + 1].upper in ("SELECT", "WITH"))
+
+
+class AggregateCall(NamedTuple):
+    start: int     # character offsets in the expression text
+    end: int
+    name: str      # lower-case function name
+    args: str      # argument text
+    filter: str    # " FILTER (WHERE ...)" or ""
+    distinct: bool
+
+
+def aggregate_calls(sql: str, tokens: Sequence[Token]) -> List[AggregateCall]:
+    """
+    Aggregate calls in an expression (subqueries are opaque)
+
+    Raises:
+        ShardQueryError: window function (OVER)
+    """
+    calls = []
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+        if _is_subquery(tokens, index):
+            index = _matching_close(tokens, index) + 1
+            continue
+        if token.upper == "OVER":
+            raise ShardQueryError("Window functions (OVER) cannot be merged across shards")
+        name = token.text.lower() if token.kind == "word" else ""
+        if (name in MERGEABLE_AGGREGATES or name in LOCAL_AGGREGATES) \
+                and index + 1 < len(tokens) and tokens[index + 1].kind == "open":
+            close = _matching_close(tokens, index + 1)
+            end = close
+            filter_text = ""
+            # FILTER (WHERE ...) / WITHIN GROUP (ORDER BY ...)
+            while end + 2 < len(tokens) and tokens[end + 1].upper in ("FILTER", "WITHIN"):
+                opener = end + 2 if tokens[end + 1].upper == "FILTER" else end + 3
+                if opener >= len(tokens) or tokens[opener].kind != "open":
+                    break
+                clause_end = _matching_close(tokens, opener)
+                if tokens[end + 1].upper == "FILTER":
+                    filter_text = " " + sql[tokens[end + 1].start:tokens[clause_end].end]
+                end = clause_end
+            if end + 1 < len(tokens) and tokens[end + 1].upper == "OVER":
+                raise ShardQueryError("Window functions (OVER) cannot be merged across shards")
+            args = sql[tokens[index + 1].end:tokens[close].start].strip()
+            distinct = close > index + 2 and tokens[index + 2].upper == "DISTINCT"
+            calls.append(AggregateCall(token.start, tokens[end].end, name, args, filter_text, distinct))
+            index = end + 1
+            continue
+        index += 1
+    return calls
+
+
+@dataclass
+class SelectItem:
+    expr: str
+    tokens: List[Token]
+    name: str              # output column name
+    alias: Optional[str]   # explicit alias (None = derived name)
+    calls: List[AggregateCall] = field(default_factory=list)
+
+
+def _expression(sql: str, tokens: List[Token]) -> Tuple[str, List[Token]]:
+    """Expression text and its tokens with offsets relative to the text"""
+    expr = sql[tokens[0].start:tokens[-1].end]
+    offset = tokens[0].start
+    return expr, [token._replace(start=token.start - offset, end=token.end - offset) for token in tokens]
+
+
+def _default_name(tokens: Sequence[Token]) -> str:
+    """PostgreSQL's output column name for an unaliased expression"""
+    # Trailing ::type casts keep the name of the casted expression
+    while len(tokens) >= 2 and tokens[-2].kind == "cast":
+        tokens = tokens[:-2]
+    if all(token.kind in ("word", "quoted") or token.text == "." for token in tokens):
+        return _identifier_name(tokens[-1])
+    if tokens[0].kind == "word" and len(tokens) > 1 and tokens[1].kind == "open" \
+            and _matching_close(tokens, 1) == len(tokens) - 1:
+        return tokens[0].text.lower()
+    if tokens[0].upper == "CASE":
+        return "case"
+    return "?column?"
+
+
+def _select_item(sql: str, tokens: List[Token]) -> SelectItem:
+    alias = None
+    if len(tokens) >= 3 and tokens[-2].upper == "AS":
+        alias = _identifier_name(tokens[-1])
+        tokens = tokens[:-2]
+    elif (len(tokens) >= 2 and tokens[-1].kind in ("word", "quoted") and tokens[-1].upper not in _NOT_ALIAS
+          and (tokens[-2].kind in ("close", "word", "quoted", "string", "number") and tokens[-2].upper != "AS")
+          and tokens[-2].depth == tokens[-1].depth):
+        alias = _identifier_name(tokens[-1])
+        tokens = tokens[:-1]
+    expr, local = _expression(sql, tokens)
+    return SelectItem(expr, local, alias or _default_name(tokens), alias, aggregate_calls(expr, local))
+
+
+@dataclass
+class ParsedSelect:
+    """Top-level clauses of a SELECT (WITH prefix kept verbatim)"""
+    prefix: str
+    distinct: bool
+    items: List[SelectItem]
+    list_end: int                              # character offset just after the select list
+    body: str                                  # FROM ... WHERE ...
+    where: List[Token]
+    group_by: List[List[Token]]
+    having: Optional[List[Token]]
+    order_by: List[Tuple[List[Token], str]]    # (expression tokens, direction text)
+    limit: Optional[int]
+    offset: int
+    has_subquery: bool
+
+
+def parse_select(sql: str) -> ParsedSelect:
+    """
+    Split a SELECT into its top-level clauses
+
+    Raises:
+        ShardQueryError: not a single SELECT (UNION, DISTINCT ON, GROUPING SETS, ...)
+    """
+    sql = sql.strip().rstrip(";")
+    tokens = tokenize(sql)
+    if not tokens:
+        raise ShardQueryError("Empty query")
+
+    start = 0
+    if tokens[0].upper == "WITH":
+        start = next((i for i, token in enumerate(tokens) if token.depth == 0 and token.upper == "SELECT"), None)
+        if start is None:
+            raise ShardQueryError("WITH without a SELECT")
+    if tokens[start].upper != "SELECT":
+        raise ShardQueryError("Only SELECT queries can be fanned out across shards")
+
+    top = [i for i in range(start + 1, len(tokens)) if tokens[i].depth == 0]
+    for i in top:
+        if tokens[i].upper in ("UNION", "INTERSECT", "EXCEPT"):
+            raise ShardQueryError(f"{tokens[i].upper} cannot be merged across shards")
+        if tokens[i].upper in ("WINDOW", "FETCH", "FOR"):
+            raise ShardQueryError(f"{tokens[i].upper} clauses cannot be merged across shards")
+
+    def keyword(word: str, after: int = start, follow: Optional[str] = None) -> Optional[int]:
+        for i in top:
+            if i > after and tokens[i].upper == word and (
+                follow is None or (i + 1 < len(tokens) and tokens[i + 1].upper == follow)
+            ):
+                return i
+        return None
+
+    list_start = start + 1
+    distinct = False
+    if list_start < len(tokens) and tokens[list_start].upper == "DISTINCT":
+        if list_start + 1 < len(tokens) and tokens[list_start + 1].upper == "ON":
+            raise ShardQueryError("DISTINCT ON cannot be merged across shards")
+        distinct = True
+        list_start += 1
+    elif list_start < len(tokens) and tokens[list_start].upper == "ALL":
+        list_start += 1
+
+    clauses = {
+        "from": keyword("FROM"),
+        "group": keyword("GROUP", follow="BY"),
+        "having": keyword("HAVING"),
+        "order": keyword("ORDER", follow="BY"),
+        "limit": keyword("LIMIT"),
+        "offset": keyword("OFFSET"),
+    }
+    positions = sorted(position for position in clauses.values() if position is not None)
+
+    def clause_tokens(name: str, skip: int) -> Optional[List[Token]]:
+        position = clauses[name]
+        if position is None:
+            return None
+        end = next((p for p in positions if p > position), len(tokens))
+        return tokens[position + skip:end]
+
+    list_end = next((p for p in positions if p >= list_start), len(tokens))
+    items = [_select_item(sql, part) for part in _split(tokens[list_start:list_end], 0)]
+    if not items:
+        raise ShardQueryError("Empty select list")
+
+    body = ""
+    where: List[Token] = []
+    if clauses["from"] is not None:
+        body_tokens = clause_tokens("from", 0)
+        body = sql[body_tokens[0].start:body_tokens[-1].end]
+        where_at = next((i for i, token in enumerate(body_tokens) if token.depth == 0 and token.upper == "WHERE"), None)
+        if where_at is not None:
+            where = body_tokens[where_at + 1:]
+
+    group_by = _split(clause_tokens("group", 2) or [], 0)
+    for part in group_by:
+        if part[0].upper in ("ROLLUP", "CUBE", "GROUPING"):
+            raise ShardQueryError(f"GROUP BY {part[0].upper} cannot be merged across shards")
+
+    order_by = []
+    for part in _split(clause_tokens("order", 2) or [], 0):
+        suffix_at = len(part)
+        while suffix_at > 1 and part[suffix_at - 1].upper in _ORDER_SUFFIX:
+            suffix_at -= 1
+        direction = " ".join(token.text.upper() for token in part[suffix_at:])
+        order_by.append((part[:suffix_at], direction))
+
+    def count_clause(name: str) -> Optional[int]:
+        part = clause_tokens(name, 1)
+        if not part:
+            return None
+        if len(part) == 1 and part[0].upper == "ALL":
+            return None
+        if len(part) == 1 and part[0].kind == "number" and part[0].text.isdigit():
+            return int(part[0].text)
+        if len(part) == 2 and part[0].kind == "number" and part[1].upper in ("ROW", "ROWS"):
+            return int(part[0].text)
+        raise ShardQueryError(f"{name.upper()} must be a number when querying across shards")
+
+    return ParsedSelect(
+        prefix=sql[:tokens[start].start],
+        distinct=distinct,
+        items=items,
+        list_end=tokens[list_end - 1].end,
+        body=body,
+        where=where,
+        group_by=group_by,
+        having=clause_tokens("having", 1),
+        order_by=order_by,
+        limit=count_clause("limit"),
+        offset=count_clause("offset") or 0,
+        has_subquery=any(_is_subquery(tokens, i) for i in range(len(tokens))),
+    )
+
+
+# WHERE tokens that can widen, negate or rewrite a service = 'x' comparison
+_PIN_BLOCKERS = {"OR", "NOT", "IS", "CASE", "<>", "!="}
+
+
+def _conjuncts(where: Sequence[Token]) -> List[List[Token]]:
+    """Top-level AND operands of a WHERE clause (the AND of BETWEEN x AND y does not split)"""
+    parts: List[List[Token]] = [[]]
+    between = False
+    for token in where:
+        if token.depth == 0 and token.upper == "BETWEEN":
+            between = True
+        elif token.depth == 0 and token.upper == "AND":
+            if between:
+                between = False
+            else:
+                parts.append([])
+                continue
+        parts[-1].append(token)
+    return parts
+
+
+def pinned_service(parsed: ParsedSelect, args: Sequence[Any]) -> Optional[str]:
+    """
+    Service fixed by the WHERE clause: a top-level conjunct service = 'x' or service = $n
+    (AND-only, no negation / IS / CASE / function around the comparison, no CTE / subquery)
+    """
+    if parsed.prefix or parsed.has_subquery:
+        return None
+    if any((token.upper or token.text) in _PIN_BLOCKERS for token in parsed.where):
+        return None
+    services = set()
+    for part in _conjuncts(parsed.where):
+        if len(part) == 5 and part[0].kind == "word" and part[1].text == ".":
+            part = part[2:]
+        if len(part) != 3 or part[0].upper != "SERVICE" or part[1].text != "=":
+            continue
+        value = part[2]
+        if value.kind == "string":
+            services.add(value.text[1:-1].replace("''", "'"))
+        elif value.kind == "param" and int(value.text[1:]) <= len(args) and isinstance(args[int(value.text[1:]) - 1], str):
+            services.add(args[int(value.text[1:]) - 1])
+    return services.pop() if len(services) == 1 else None
+
+
+@dataclass
+class FanoutPlan:
+    """Per-shard SQL and the DuckDB query that merges its results"""
+    shard_sql: str
+    merge_sql: str
+    positional: bool   # shard-local plan: result columns keep the shard's names and order
+
+
+def _replace_calls(expr: str, calls: Sequence[AggregateCall], merged: Sequence[str]) -> str:
+    pieces = []
+    position = 0
+    for call, replacement in zip(calls, merged):
+        pieces.append(expr[position:call.start])
+        pieces.append(replacement)
+        position = call.end
+    pieces.append(expr[position:])
+    return "".join(pieces)
+
+
+def _limit_sql(limit: Optional[int], offset: int) -> str:
+    sql = ""
+    if limit is not None:
+        sql += f" LIMIT {limit}"
+    if offset:
+        sql += f" OFFSET {offset}"
+    return sql
+
+
+def _resolve_reference(parsed: ParsedSelect, tokens: List[Token]) -> Optional[int]:
+    """Select item index for an ordinal or output alias reference"""
+    if len(tokens) != 1:
+        return None
+    token = tokens[0]
+    if token.kind == "number" and token.text.isdigit():
+        index = int(token.text) - 1
+        if not 0 <= index < len(parsed.items):
+            raise ShardQueryError(f"Position {token.text} is not in the select list")
+        return index
+    if token.kind in ("word", "quoted"):
+        name = _identifier_name(token)
+        for index, item in enumerate(parsed.items):
+            if item.alias == name:
+                return index
+    return None
+
+
+def _groups_by_service(parsed: ParsedSelect) -> bool:
+    for part in parsed.group_by:
+        index = _resolve_reference(parsed, part)
+        tokens = parsed.items[index].tokens if index is not None else part
+        if tokens[-1].upper == "SERVICE" and (len(tokens) == 1 or (len(tokens) == 3 and tokens[1].text == ".")):
+            return True
+    return False
+
+
+def _check_subqueries(sql: str, key: str) -> None:
+    """
+    Raises:
+        ShardQueryError: a CTE / subquery whose rows are not final on its shard (aggregates,
+            GROUP BY, DISTINCT, LIMIT), unless with SHARD_BY=service it groups by service or
+            filters to one service
+    """
+    tokens = tokenize(sql)
+    for index in range(len(tokens)):
+        if not _is_subquery(tokens, index):
+            continue
+        inner = parse_select(sql[tokens[index].end:tokens[_matching_close(tokens, index)].start])
+        if not (inner.group_by or inner.having or inner.distinct or inner.limit is not None or inner.offset
+                or any(item.calls for item in inner.items)):
+            continue
+        if key == "service" and (_groups_by_service(inner) or pinned_service(inner, ()) is not None):
+            continue
+        raise ShardQueryError(
+            "Aggregates, GROUP BY, DISTINCT and LIMIT inside a CTE or subquery only see one shard's rows"
+            + (" unless it groups by service or filters to one service" if key == "service" else "")
+        )
+
+
+def plan_fanout(sql: str, key: str = "service") -> FanoutPlan:
+    """
+    Split a SELECT into the query each shard runs and the DuckDB query over their rows
+
+    Args:
+        sql: Agent SQL (PostgreSQL dialect)
+        key: SHARD_BY of the cluster
+
+    Raises:
+        ShardQueryError: the query cannot be merged across shards
+    """
+    sql = sql.strip().rstrip(";")
+    parsed = parse_select(sql)
+    if parsed.prefix or parsed.has_subquery:
+        _check_subqueries(sql, key)
+    calls = [call for item in parsed.items for call in item.calls]
+    having_calls = []
+    if parsed.having:
+        having_expr, having_tokens = _expression(sql, parsed.having)
+        having_calls = aggregate_calls(having_expr, having_tokens)
+    order_calls = []
+    for tokens, _ in parsed.order_by:
+        expr, local = _expression(sql, tokens)
+        order_calls.extend(aggregate_calls(expr, local))
+    aggregated = bool(parsed.group_by or calls or having_calls)
+
+    if not aggregated or (key == "service" and _groups_by_service(parsed)):
+        return _plan_local(sql, parsed)
+
+    for call in [*calls, *having_calls, *order_calls]:
+        if call.distinct:
+            raise ShardQueryError(
+                f"{call.name.upper()}(DISTINCT ...) cannot be merged across shards"
+                + (" unless grouped by service" if key == "service" else "")
+            )
+        if call.name not in MERGEABLE_AGGREGATES:
+            raise ShardQueryError(
+                f"{call.name.upper()} cannot be merged across shards"
+                + (" unless grouped by service or filtered to one service" if key == "service" else "")
+            )
+    return _plan_aggregate(sql, parsed)
+
+
+def _plan_local(sql: str, parsed: ParsedSelect) -> FanoutPlan:
+    """Rows are final on their shard: concatenate, then ORDER BY / LIMIT again"""
+    # ORDER BY terms become hidden __oN columns appended to the select list
+    hidden = []
+    order = []
+    for tokens, direction in parsed.order_by:
+        index = _resolve_reference(parsed, tokens)
+        expr = parsed.items[index].expr if index is not None else sql[tokens[0].start:tokens[-1].end]
+        if expr.strip() == "*" or expr.endswith(".*"):
+            raise ShardQueryError("ORDER BY a * position cannot be merged across shards")
+        hidden.append(f"{expr} AS __o{len(hidden)}")
+        order.append(f"__o{len(hidden) - 1} {direction}".strip())
+
+    tail = sql[parsed.list_end:]
+    cut = next((token.start for token in tokenize(tail)
+                if token.depth == 0 and token.upper in ("LIMIT", "OFFSET")), None)
+    if cut is not None:
+        tail = tail[:cut].rstrip()
+    shard_sql = sql[:parsed.list_end] + "".join(f", {column}" for column in hidden) + tail
+    if parsed.limit is not None:
+        shard_sql += f" LIMIT {parsed.limit + parsed.offset}"
+
+    source = "(SELECT DISTINCT * FROM shard_rows) AS shard_rows" if parsed.distinct else "shard_rows"
+    if hidden:
+        merge_sql = f"SELECT * EXCLUDE ({', '.join(f'__o{i}' for i in range(len(hidden)))}) FROM {source}"
+        merge_sql += f" ORDER BY {', '.join(order)}"
+    else:
+        merge_sql = f"SELECT * FROM {source}"
+    merge_sql += _limit_sql(parsed.limit, parsed.offset)
+    return FanoutPlan(shard_sql=shard_sql, merge_sql=merge_sql, positional=True)
+
+
+def _plan_aggregate(sql: str, parsed: ParsedSelect) -> FanoutPlan:
+    """Partial aggregates per shard, re-aggregated per group in DuckDB"""
+    partial: List[str] = []
+    partial_names: Dict[str, str] = {}   # normalized partial expression → column
+    merge_groups: List[str] = []
+
+    def column(expr: str, prefix: str) -> str:
+        key = " ".join(expr.lower().split())
+        if key not in partial_names:
+            partial_names[key] = f"__{prefix}{len(partial)}"
+            partial.append(f"{expr} AS {partial_names[key]}")
+        return partial_names[key]
+
+    def merge_call(call: AggregateCall) -> str:
+        if call.name == "avg":
+            total = column(f"SUM({call.args}){call.filter}", "a")
+            count = column(f"COUNT({call.args}){call.filter}", "a")
+            return f"(SUM({total}) / NULLIF(SUM({count}), 0))"
+        partial_column = column(f"{call.name.upper()}({call.args}){call.filter}", "a")
+        if call.name == "count":
+            return f"CAST(SUM({partial_column}) AS BIGINT)"
+        return f"{call.name.upper()}({partial_column})"
+
+    def merge_expression(expr: str, tokens: List[Token]) -> str:
+        calls = aggregate_calls(expr, tokens)
+        return _replace_calls(expr, calls, [merge_call(call) for call in calls])
+
+    def group_key(expr: str) -> str:
+        # Anything else would become an extra merge group (one row per shard), e.g. an unknown aggregate
+        source = partial_names.get(" ".join(expr.lower().split()))
+        if source not in merge_groups:
+            raise ShardQueryError(
+                f"{expr} is neither a GROUP BY expression nor a COUNT / SUM / MIN / MAX / AVG aggregate, "
+                "so it cannot be merged across shards"
+            )
+        return source
+
+    # Group keys (ordinals / aliases resolved to their expressions)
+    for part in parsed.group_by:
+        index = _resolve_reference(parsed, part)
+        expr = parsed.items[index].expr if index is not None else sql[part[0].start:part[-1].end]
+        merge_groups.append(column(expr, "g"))
+    group_exprs = [entry.rsplit(" AS ", 1)[0] for entry in partial]
+
+    items = []
+    item_keys = {}
+    for index, item in enumerate(parsed.items):
+        if item.expr.strip() == "*" or item.expr.endswith(".*"):
+            raise ShardQueryError("SELECT * with GROUP BY cannot be merged across shards")
+        item_keys[_normalize(item.tokens)] = index
+        if item.calls:
+            items.append(f"{merge_expression(item.expr, item.tokens)} AS {_quote_identifier(item.name)}")
+        else:
+            items.append(f"{group_key(item.expr)} AS {_quote_identifier(item.name)}")
+
+    having = ""
+    if parsed.having:
+        expr, tokens = _expression(sql, parsed.having)
+        having = f" HAVING {merge_expression(expr, tokens)}"
+
+    order = []
+    for tokens, direction in parsed.order_by:
+        index = _resolve_reference(parsed, tokens)
+        expr, local = _expression(sql, tokens)
+        if index is not None:
+            target = str(index + 1) if tokens[0].kind == "number" else _quote_identifier(parsed.items[index].name)
+        elif _normalize(local) in item_keys:
+            target = _quote_identifier(parsed.items[item_keys[_normalize(local)]].name)
+        elif aggregate_calls(expr, local):
+            target = merge_expression(expr, local)
+        else:
+            target = group_key(expr)
+        order.append(f"{target} {direction}".strip())
+
+    if any(token.kind == "param" for token in tokenize(" ".join([*items, having, *order]))):
+        raise ShardQueryError("Parameters outside aggregates cannot be merged across shards")
+
+    shard_sql = f"{parsed.prefix}SELECT {', '.join(partial)} {parsed.body}".rstrip()
+    if group_exprs:
+        shard_sql += f" GROUP BY {', '.join(group_exprs)}"
+
+    merge_sql = f"SELECT {'DISTINCT ' if parsed.distinct else ''}{', '.join(items)} FROM shard_rows"
+    if merge_groups:
+        merge_sql += f" GROUP BY {', '.join(merge_groups)}"
+    merge_sql += having
+    if order:
+        merge_sql += f" ORDER BY {', '.join(order)}"
+    merge_sql += _limit_sql(parsed.limit, parsed.offset)
+    return FanoutPlan(shard_sql=shard_sql, merge_sql=merge_sql, positional=False)
+
+
+def _duckdb_type(pg_type: str) -> str:
+    if pg_type.startswith("_"):
+        return DUCKDB_TYPES.get(pg_type[1:], "VARCHAR") + "[]"
+    return DUCKDB_TYPES.get(pg_type, "VARCHAR")
+
+
+def _blob_literal(value: bytes) -> str:
+    """bytea as DuckDB BLOB text (every byte hex-escaped)"""
+    return "".join(f"\\x{byte:02X}" for byte in value)
+
+
+def _list_element(value: Any) -> str:
+    """Element of a DuckDB list literal: quoted with backslash escapes, so commas / brackets / quotes survive"""
+    if value is None:
+        return "NULL"
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(_list_element(v) for v in value) + "]"
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        value = _blob_literal(bytes(value))
+    elif isinstance(value, timedelta):
+        value = f"{value.total_seconds()} seconds"
+    return "'" + str(value).replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def _csv_field(value: Any) -> str:
+    """CSV field for DuckDB's read_csv: NULL is an empty unquoted field, everything else is quoted"""
+    if value is None:
+        return ""
+    if isinstance(value, timedelta):
+        value = f"{value.total_seconds()} seconds"
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        value = _blob_literal(bytes(value))
+    elif isinstance(value, (list, tuple)):
+        value = _list_element(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+class ShardResult(NamedTuple):
+    columns: List[Tuple[str, str]]   # (name, PostgreSQL type)
+    rows: List[Any]
+
+
+def merge_results(plan: FanoutPlan, results: Sequence[ShardResult]) -> List[Dict[str, Any]]:
+    """
+    Run the plan's merge query over every shard's rows (blocking, call via asyncio.to_thread)
+
+    Rows are loaded through a temporary CSV file: one bulk read instead of a Python-level insert per row.
+    """
+    if duckdb is None:
+        raise RuntimeError("duckdb is required to merge results across DATABASE_SHARDS")
+    columns = results[0].columns
+    # Shard-local plans may repeat a column name (SELECT a.id, b.id): load them positionally
+    names = [name if name.startswith("__") else f"__c{i}" for i, (name, _) in enumerate(columns)]
+    types = {name: _duckdb_type(pg_type) for name, (_, pg_type) in zip(names, columns)}
+
+    handle, path = tempfile.mkstemp(suffix=".csv")
+    try:
+        with os.fdopen(handle, "w", encoding="utf-8", newline="") as file:
+            for result in results:
+                for row in result.rows:
+                    file.write(",".join(_csv_field(value) for value in row))
+                    file.write("\n")
+        conn = duckdb.connect()
+        try:
+            conn.execute("SET TimeZone = 'UTC'")
+            conn.execute(
+                "CREATE TEMP TABLE shard_rows AS SELECT * FROM read_csv(?, header = false, columns = "
+                f"{types!r}, quote = '\"', escape = '\"', allow_quoted_nulls = false, auto_detect = false)",
+                [path],
+            )
+            cursor = conn.execute(plan.merge_sql)
+            if plan.positional:
+                output = [name for name, _ in columns if not name.startswith("__o")]
+            else:
+                output = [description[0] for description in cursor.description]
+            return [dict(zip(output, row)) for row in cursor.fetchall()]
+        finally:
+            conn.close()
+    finally:
+        os.unlink(path)
+
+
+class ShardRouter:
+    """Routes agent / repository queries to one shard or fans them out to all of them"""
+
+    def __init__(self, pools: List[Any], key: str = "service"):
+        """
+        Args:
+            pools: asyncpg pools in shard order (pools[0] is the DATABASE_* database)
+            key: SHARD_BY ('service' or 'time')
+
+        Raises:
+            ValueError: Unknown key
+        """
+        if key not in SHARD_KEYS:
+            raise ValueError(f"SHARD_BY must be one of {', '.join(SHARD_KEYS)} (got {key!r})")
+        self.pools = pools
+        self.key = key
+
+    def pinned_shard(self, sql: str, args: Sequence[Any] = ()) -> Optional[int]:
+        """Shard that holds every row the query can read, or None when it has to fan out"""
+        if self.key != "service":
+            return None
+        try:
+            service = pinned_service(parse_select(sql), args)
+        except ShardQueryError:
+            return None
+        return None if service is None else service_shard(service, len(self.pools))
+
+    async def fetch(self, sql: str, *args) -> List[Any]:
+        """
+        Run a SELECT across the shards
+
+        Raises:
+            ShardQueryError: The query cannot be merged across shards
+        """
+        shard = self.pinned_shard(sql, args)
+        if shard is not None:
+            async with self.pools[shard].acquire() as conn:
+                return await conn.fetch(sql, *args)
+        plan = plan_fanout(sql, self.key)
+        results = await asyncio.gather(*(self._fetch_partial(pool, plan.shard_sql, args) for pool in self.pools))
+        return await asyncio.to_thread(merge_results, plan, results)
+
+    async def fetch_each(self, sql: str, *args) -> List[List[Any]]:
+        """Run a query unchanged on every shard (one result list per shard)"""
+        return list(await asyncio.gather(*(self._fetch_on(pool, sql, args) for pool in self.pools)))
+
+    async def run_each(self, fn: Callable[[Any], Awaitable[Any]]) -> List[Any]:
+        """Run fn(connection) on every shard (one result per shard)"""
+        async def run(pool):
+            async with pool.acquire() as conn:
+                return await fn(conn)
+        return list(await asyncio.gather(*(run(pool) for pool in self.pools)))
+
+    @staticmethod
+    async def _fetch_on(pool, sql: str, args: Sequence[Any]) -> List[Any]:
+        async with pool.acquire() as conn:
+            return await conn.fetch(sql, *args)
+
+    @staticmethod
+    async def _fetch_partial(pool, sql: str, args: Sequence[Any]) -> ShardResult:
+        async with pool.acquire() as conn:
+            statement = await conn.prepare(sql)
+            columns = [(attribute.name, attribute.type.name) for attribute in statement.get_attributes()]
+            return ShardResult(columns, await statement.fetch(*args))
+
+    async def close(self) -> None:
+        """Close the extra shard pools (pools[0] is owned by the application)"""
+        for pool in self.pools[1:]:
+            await pool.close()
@@ -3,15 +3,82 @@ Alerting Service
 
 Automatic anomaly detection for log analysis.
 Runs background checks every 5 minutes.
+
+When the logs_rollup_1m table exists, checks read per-minute rollups
+(maintained by log-save-server at write time) instead of scanning logs.
+Rollup windows are aligned to whole minutes.
+
+When the error_groups table exists, error spike alerts name the error groups
+behind the spike (and whether each one is new) using logs.error_fingerprint.
 """
 
-from datetime import datetime, timedelta
+from bisect import bisect_left
+from datetime import datetime
 from typing import List, Dict, Optional
-import asyncio
 import logging
 
+from app.config import settings
+
 logger = logging.getLogger(__name__)
 
+# Upper bounds (ms) of logs_rollup_1m.duration_histogram buckets; the last bucket is > 10s.
+# Must match DURATION_BUCKETS_MS in log-save-server/rollup.py
+DURATION_BUCKETS_MS = (10, 50, 100, 250, 500, 1000, 2000, 5000, 10000)
+
+# Error counts over the 5 complete minutes before now / 30-35 minutes ago
+ERROR_COUNT_ROLLUP_SQL = """
+SELECT COALESCE(SUM(log_count), 0)::bigint as error_count
+FROM logs_rollup_1m
+WHERE level = 'ERROR'
+  AND bucket >= date_trunc('minute', NOW()) - make_interval(mins => $1)
+  AND bucket < date_trunc('minute', NOW()) - make_interval(mins => $2)
+"""
+
+# Requests slower than the threshold come from histogram buckets starting at $1 (1-based)
+SLOW_APIS_ROLLUP_SQL = """
+WITH recent AS (
+    SELECT path, service, duration_sum, duration_count, duration_max,
+           (SELECT COALESCE(SUM(c), 0) FROM unnest(duration_histogram[$1:]) AS c) as slow_count
+    FROM logs_rollup_1m
+    WHERE path <> ''
+      AND duration_count > 0
+      AND bucket >= date_trunc('minute', NOW() - INTERVAL '10 minutes')
+)
+SELECT path, service,
+       SUM(duration_sum) / SUM(duration_count) as avg_duration,
+       MAX(duration_max) as max_duration,
+       SUM(slow_count)::bigint as count
+FROM recent
+GROUP BY path, service
+HAVING SUM(slow_count) >= 3
+ORDER BY avg_duration DESC
+LIMIT 5
+"""
+
+# Services that logged in the last hour but not in the last N minutes
+# (the cutoff is inside the aggregate so it is evaluated on each shard when sharded)
+SERVICE_DOWN_ROLLUP_SQL = """
+SELECT service
+FROM logs_rollup_1m
+WHERE bucket > NOW() - INTERVAL '1 hour'
+GROUP BY service
+HAVING COUNT(*) FILTER (WHERE bucket >= date_trunc('minute', NOW() - make_interval(mins => $1))) = 0
+"""
+
+# Error groups with the most events in the last 5 minutes (is_new: first seen in that window)
+TOP_ERROR_GROUPS_SQL = """
+SELECT g.fingerprint::text as fingerprint, g.service, g.error_type, g.message,
+       COUNT(*) as count, g.first_seen > NOW() - INTERVAL '5 minutes' as is_new
+FROM logs l
+JOIN error_groups g ON g.fingerprint = l.error_fingerprint
+WHERE l.error_fingerprint IS NOT NULL
+  AND l.created_at > NOW() - INTERVAL '5 minutes'
+  AND l.deleted = FALSE
+GROUP BY g.fingerprint
+ORDER BY count DESC
+LIMIT 5
+"""
+
 
 class AlertingService:
     """자동 이상 탐지 및 알림"""
@@ -24,6 +91,32 @@ class AlertingService:
             "service_down_minutes": 5     # 5분간 로그 없음
         }
         self._alert_history: List[Dict] = []
+        self._rollups_available: Optional[bool] = None
+        self._error_groups_available: Optional[bool] = None
+
+    async def _uses_rollups(self) -> bool:
+        """Whether checks read logs_rollup_1m (checked once, disabled with USE_ROLLUPS=false)"""
+        if not settings.USE_ROLLUPS:
+            return False
+        if self._rollups_available is None:
+            self._rollups_available = await self._query_repo.table_exists("logs_rollup_1m")
+        return self._rollups_available
+
+    async def _top_error_groups(self) -> List[Dict]:
+        """Error groups behind the last 5 minutes of errors (empty without error_groups)"""
+        if self._error_groups_available is None:
+            self._error_groups_available = await self._query_repo.table_exists("error_groups")
+        if not self._error_groups_available:
+            return []
+        results, _ = await self._query_repo.execute_sql(TOP_ERROR_GROUPS_SQL)
+        return results
+
+    def _slow_histogram_start(self) -> int:
+        """
+        First histogram bucket (1-based, for SQL array slicing) whose lower bound
+        is at least the slow API threshold
+        """
+        return bisect_left(DURATION_BUCKETS_MS, self._thresholds["slow_api_threshold"]) + 2
 
     async def check_anomalies(self) -> List[Dict]:
         """
@@ -77,7 +170,10 @@ class AlertingService:
           AND deleted = FALSE
         """
         try:
-            current_results, _ = await self._query_repo.execute_sql(sql_current)
+            if await self._uses_rollups():
+                current_results, _ = await self._query_repo.execute_sql(ERROR_COUNT_ROLLUP_SQL, [5, 0])
+            else:
+                current_results, _ = await self._query_repo.execute_sql(sql_current)
             current_count = current_results[0]["error_count"] if current_results else 0
 
             # Baseline rate (30-35 minutes ago)
@@ -88,7 +184,10 @@ class AlertingService:
               AND created_at BETWEEN NOW() - INTERVAL '35 minutes' AND NOW() - INTERVAL '30 minutes'
               AND deleted = FALSE
             """
-            baseline_results, _ = await self._query_repo.execute_sql(sql_baseline)
+            if await self._uses_rollups():
+                baseline_results, _ = await self._query_repo.execute_sql(ERROR_COUNT_ROLLUP_SQL, [35, 30])
+            else:
+                baseline_results, _ = await self._query_repo.execute_sql(sql_baseline)
             baseline_count = baseline_results[0]["error_count"] if baseline_results else 0
 
             # Check spike
@@ -96,6 +195,7 @@ class AlertingService:
                 spike_ratio = (current_count - baseline_count) / baseline_count
                 if spike_ratio > self._thresholds["error_rate_spike"]:
                     severity = "critical" if spike_ratio > 0.5 else "warning"
+                    top_groups = await self._top_error_groups()
                     return {
                         "type": "error_rate_spike",
                         "severity": severity,
@@ -103,7 +203,8 @@ class AlertingService:
                         "data": {
                             "current_count": current_count,
                             "baseline_count": baseline_count,
-                            "spike_percentage": round(spike_ratio * 100, 1)
+                            "spike_percentage": round(spike_ratio * 100, 1),
+                            "top_groups": top_groups
                         }
                     }
         except Exception as e:
@@ -139,7 +240,12 @@ class AlertingService:
         """
 
         try:
-            results, _ = await self._query_repo.execute_sql(sql, [self._thresholds["slow_api_threshold"]])
+            if await self._uses_rollups():
+                results, _ = await self._query_repo.execute_sql(
+                    SLOW_APIS_ROLLUP_SQL, [self._slow_histogram_start()]
+                )
+            else:
+                results, _ = await self._query_repo.execute_sql(sql, [self._thresholds["slow_api_threshold"]])
 
             if results:
                 return {
@@ -170,6 +276,13 @@ class AlertingService:
         Check if any service stopped logging
         """
         try:
+            if await self._uses_rollups():
+                results, _ = await self._query_repo.execute_sql(
+                    SERVICE_DOWN_ROLLUP_SQL, [self._thresholds["service_down_minutes"]]
+                )
+                down_services = [row["service"] for row in results]
+                return self._service_down_alert(down_services)
+
             # Get active services from last hour
             sql_active = """
             SELECT DISTINCT service
@@ -196,15 +309,7 @@ class AlertingService:
                 if results and results[0]["count"] == 0:
                     down_services.append(service)
 
-            if down_services:
-                return {
-                    "type": "service_down",
-                    "severity": "critical",
-                    "message": f"{len(down_services)}개 서비스 로그 없음 (5분)",
-                    "data": {
-                        "services": down_services
-                    }
-                }
+            return self._service_down_alert(down_services)
         except Exception as e:
             logger.error(f"Anomaly check failed: {e}", exc_info=True)
             # Return error as alert to notify users
@@ -220,6 +325,19 @@ class AlertingService:
 
         return None
 
+    def _service_down_alert(self, down_services: List[str]) -> Optional[Dict]:
+        """Build service_down alert (None if every service is logging)"""
+        if not down_services:
+            return None
+        return {
+            "type": "service_down",
+            "severity": "critical",
+            "message": f"{len(down_services)}개 서비스 로그 없음 (5분)",
+            "data": {
+                "services": down_services
+            }
+        }
+
     def get_alert_history(self, limit: int = 20) -> List[Dict]:
         """
         Get recent alerts
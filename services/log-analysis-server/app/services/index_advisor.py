@@ -0,0 +1,418 @@
+"""
+Index Advisor
+
+Records the SQL run by execute_query_node, EXPLAINs it on demand and
+aggregates which predicates fall back to sequential scans on logs.
+The report proposes indexes shaped for the agent's queries:
+
+- BRIN on created_at (append-only table, tiny index for time-range filters)
+- Partial indexes for ERROR rows and slow (duration_ms > 1000) rows
+- (path, created_at) with INCLUDE columns for index-only path aggregates
+- (level, created_at) for level filters without a service
+- Expression indexes on metadata->>'key' for the JSONB keys queries filter on,
+  and GIN jsonb_path_ops for metadata @> containment filters
+
+Recording is in-memory per process and cheap (no DB access on the query path).
+Indexes are only created via the admin endpoint when INDEX_ADVISOR_APPLY is enabled.
+"""
+
+import re
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+import logging
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Recorded queries EXPLAINed per report (highest total execution time first)
+REPORT_QUERY_LIMIT = 50
+
+# Slow-row partial index threshold (matches the SQL_GENERATION_PROMPT "slow API" example)
+SLOW_THRESHOLD_MS = 1000
+
+# logs and its partitions (logs_p20250115, logs_default, logs_legacy), not logs_rollup_1m
+LOGS_RELATION = re.compile(r"^logs(_p\d{8,10}|_default|_legacy)?$")
+
+# Columns tracked in seq scan filters / group keys
+TRACKED_COLUMNS = (
+    "created_at", "level", "service", "path", "duration_ms", "error_type",
+    "user_id", "trace_id", "log_type", "environment", "function_name", "metadata"
+)
+_COLUMN_PATTERNS = {column: re.compile(rf"\b{column}\b") for column in TRACKED_COLUMNS}
+
+# EXPLAIN renders predicates as ((level)::text = 'ERROR'::text), (duration_ms > '1000'::numeric)
+_ERROR_LEVEL = re.compile(r"\blevel\)?(::text)?\s*=\s*'ERROR'")
+_DURATION_LOWER_BOUND = re.compile(r"\bduration_ms\)?\s*>=?\s*'?(\d+(?:\.\d+)?)")
+# (metadata ->> 'order_id'::text), (metadata @> '{"plan": "pro"}'::jsonb)
+_METADATA_KEY = re.compile(r"\bmetadata\s*->>\s*'((?:[^']|'')+)'")
+_METADATA_CONTAINMENT = re.compile(r"\bmetadata\s*@>")
+
+# Metadata key indexes are named after the key (non-identifier keys get a checksum suffix)
+METADATA_INDEX_PREFIX = "idx_logs_meta_"
+
+# Keys whose equality filter is estimated to match more rows than this are not auto-indexed
+METADATA_MAX_SELECTIVITY = 0.05
+
+
+class ScanShape(NamedTuple):
+    """A sequential scan on logs found in a plan"""
+    relation: str
+    filter: str
+    columns: frozenset
+    group_keys: frozenset
+
+    @property
+    def filters_errors(self) -> bool:
+        return bool(_ERROR_LEVEL.search(self.filter))
+
+    @property
+    def slow_threshold(self) -> Optional[float]:
+        match = _DURATION_LOWER_BOUND.search(self.filter)
+        return float(match.group(1)) if match else None
+
+    @property
+    def metadata_keys(self) -> frozenset:
+        return frozenset(key.replace("''", "'") for key in _METADATA_KEY.findall(self.filter))
+
+    @property
+    def filters_metadata_containment(self) -> bool:
+        return bool(_METADATA_CONTAINMENT.search(self.filter))
+
+
+class IndexCandidate(NamedTuple):
+    """An index the advisor can propose"""
+    name: str
+    definition: str
+    where: Optional[str]
+    reason: str
+    matches: Callable[[ScanShape], bool]
+    metadata_key: Optional[str] = None
+
+    def create_sql(self, concurrently: bool) -> str:
+        sql = f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {self.name} ON logs {self.definition}"
+        if self.where:
+            sql += f" WHERE {self.where}"
+        return sql
+
+
+INDEX_CANDIDATES = (
+    IndexCandidate(
+        name="idx_logs_created_brin",
+        definition="USING BRIN (created_at)",
+        where=None,
+        reason="Time-range filter scanned sequentially; logs is append-only so a BRIN index "
+               "on created_at skips old blocks at a fraction of a B-tree's size",
+        matches=lambda scan: "created_at" in scan.columns,
+    ),
+    IndexCandidate(
+        name="idx_logs_errors_recent",
+        definition="(created_at DESC) INCLUDE (service, error_type, path)",
+        where="level = 'ERROR' AND deleted = FALSE",
+        reason="ERROR rows scanned sequentially; a partial index holds only errors "
+               "and returns service / error_type / path index-only",
+        matches=lambda scan: scan.filters_errors,
+    ),
+    IndexCandidate(
+        name="idx_logs_slow_requests",
+        definition="(path, created_at DESC) INCLUDE (duration_ms, service)",
+        where=f"duration_ms > {SLOW_THRESHOLD_MS} AND deleted = FALSE",
+        reason=f"Slow-request filter (duration_ms > {SLOW_THRESHOLD_MS}ms or higher) scanned sequentially; "
+               "a partial index holds only slow rows",
+        matches=lambda scan: (scan.slow_threshold or 0) >= SLOW_THRESHOLD_MS,
+    ),
+    IndexCandidate(
+        name="idx_logs_path_time",
+        definition="(path, created_at DESC) INCLUDE (duration_ms)",
+        where="deleted = FALSE",
+        reason="Filter or GROUP BY on path; (path, created_at) INCLUDE (duration_ms) "
+               "allows index-only scans for per-endpoint latency",
+        matches=lambda scan: "path" in scan.columns or "path" in scan.group_keys,
+    ),
+    IndexCandidate(
+        name="idx_logs_level_time",
+        definition="(level, created_at DESC)",
+        where="deleted = FALSE",
+        reason="level filtered without service, which idx_service_level_time cannot serve",
+        matches=lambda scan: "level" in scan.columns and "service" not in scan.columns
+                             and not scan.filters_errors,
+    ),
+    IndexCandidate(
+        name="idx_logs_metadata_path_ops",
+        definition="USING gin (metadata jsonb_path_ops)",
+        where=None,
+        reason="metadata @> containment filter scanned sequentially; a jsonb_path_ops GIN index "
+               "serves @> for any key at about a third of the default jsonb_ops size",
+        matches=lambda scan: scan.filters_metadata_containment,
+    ),
+)
+
+
+def metadata_index_name(key: str) -> str:
+    """Index name for a metadata key (PostgreSQL folds unquoted names to lowercase)"""
+    slug = re.sub(r"[^a-z0-9_]+", "_", key.lower())[:40]
+    if slug != key.lower():
+        slug += f"_{zlib.crc32(key.encode()):08x}"
+    return METADATA_INDEX_PREFIX + slug
+
+
+def metadata_key_candidate(key: str) -> IndexCandidate:
+    """
+    Expression index for metadata->>'key' filters
+
+    Partial on the key being present, so rows without it cost nothing; equality and
+    range filters on metadata->>'key' imply IS NOT NULL, so the planner can use it.
+    """
+    expression = f"(metadata ->> '{key.replace(chr(39), chr(39) * 2)}')"
+    return IndexCandidate(
+        name=metadata_index_name(key),
+        definition=f"({expression})",
+        where=f"{expression} IS NOT NULL",
+        reason=f"metadata->>'{key}' filtered with a sequential scan; an expression index "
+               "holds only rows that have the key",
+        matches=lambda scan: key in scan.metadata_keys,
+        metadata_key=key,
+    )
+
+
+def _columns(text: str) -> frozenset:
+    return frozenset(column for column, pattern in _COLUMN_PATTERNS.items() if pattern.search(text))
+
+
+def find_seq_scans(plan: Dict[str, Any], group_keys: frozenset = frozenset()) -> List[ScanShape]:
+    """
+    Collect sequential scans on logs from an EXPLAIN (FORMAT JSON) plan
+
+    Group keys of enclosing Aggregate / Sort nodes are attached to the scans below them.
+
+    Args:
+        plan: Plan node
+        group_keys: Columns grouped by enclosing nodes
+
+    Returns:
+        ScanShape list
+    """
+    keys = plan.get("Group Key") or plan.get("Sort Key") or []
+    if keys:
+        group_keys = group_keys | _columns(" ".join(keys))
+
+    scans = []
+    relation = plan.get("Relation Name", "")
+    if plan.get("Node Type") == "Seq Scan" and LOGS_RELATION.match(relation):
+        filter_text = plan.get("Filter", "")
+        scans.append(ScanShape(relation, filter_text, _columns(filter_text), group_keys))
+
+    for child in plan.get("Plans", []):
+        scans.extend(find_seq_scans(child, group_keys))
+    return scans
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace and trailing semicolons so identical queries share one entry"""
+    return " ".join(sql.split()).rstrip(";").strip()
+
+
+class QueryStats:
+    """Execution stats for one recorded query"""
+
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.count = 0
+        self.total_time_ms = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "sql": self.sql,
+            "count": self.count,
+            "total_time_ms": round(self.total_time_ms, 2),
+            "avg_time_ms": round(self.total_time_ms / self.count, 2) if self.count else 0.0,
+        }
+
+
+class IndexAdvisor:
+    """Records agent SQL and builds index recommendations from EXPLAIN plans"""
+
+    def __init__(self, max_queries: int = 500):
+        """
+        Initialize advisor
+
+        Args:
+            max_queries: Distinct queries kept (least recently seen are evicted)
+        """
+        self._queries: "OrderedDict[str, QueryStats]" = OrderedDict()
+        self._max_queries = max_queries
+        # Metadata key candidates found by build_report, so apply() can create them by name
+        self._metadata_candidates: Dict[str, IndexCandidate] = {}
+
+    def record(self, sql: str, execution_time_ms: float) -> None:
+        """
+        Record a query executed by execute_query_node
+
+        Args:
+            sql: Executed SQL
+            execution_time_ms: Execution time
+        """
+        key = normalize_sql(sql)
+        stats = self._queries.pop(key, None) or QueryStats(key)
+        stats.count += 1
+        stats.total_time_ms += execution_time_ms
+        self._queries[key] = stats
+        while len(self._queries) > self._max_queries:
+            self._queries.popitem(last=False)
+
+    def get_queries(self, limit: int = REPORT_QUERY_LIMIT) -> List[QueryStats]:
+        """Recorded queries with the highest total execution time"""
+        return sorted(self._queries.values(), key=lambda s: s.total_time_ms, reverse=True)[:limit]
+
+    def clear(self) -> None:
+        self._queries.clear()
+
+    async def build_report(self, index_repo) -> dict:
+        """
+        EXPLAIN recorded queries and aggregate seq scans into index recommendations
+
+        Args:
+            index_repo: IndexRepository instance
+
+        Returns:
+            Report with seq scan predicates, recommendations and per-query errors
+        """
+        existing = set(await index_repo.get_index_names("logs"))
+        concurrently = not await index_repo.is_partitioned("logs")
+
+        seq_scans: Dict[str, dict] = {}
+        recommendations: Dict[str, dict] = {}
+        errors = []
+        queries = self.get_queries()
+
+        for stats in queries:
+            try:
+                plan = await index_repo.explain(stats.sql)
+            except Exception as e:
+                errors.append({"sql": stats.sql, "error": str(e)})
+                continue
+
+            scans = find_seq_scans(plan)
+            candidates = list(INDEX_CANDIDATES)
+            for key in sorted(frozenset().union(*(scan.metadata_keys for scan in scans))):
+                candidate = metadata_key_candidate(key)
+                self._metadata_candidates[candidate.name] = candidate
+                candidates.append(candidate)
+
+            for column in frozenset().union(*(scan.columns for scan in scans)):
+                entry = seq_scans.setdefault(column, {"column": column, "queries": 0, "executions": 0,
+                                                      "total_time_ms": 0.0})
+                entry["queries"] += 1
+                entry["executions"] += stats.count
+                entry["total_time_ms"] += stats.total_time_ms
+
+            for candidate in candidates:
+                if not any(candidate.matches(scan) for scan in scans):
+                    continue
+                entry = recommendations.setdefault(candidate.name, {
+                    "name": candidate.name,
+                    "sql": candidate.create_sql(concurrently),
+                    "reason": candidate.reason,
+                    "exists": candidate.name in existing,
+                    "metadata_key": candidate.metadata_key,
+                    "queries": 0,
+                    "executions": 0,
+                    "total_time_ms": 0.0,
+                    "examples": [],
+                })
+                entry["queries"] += 1
+                entry["executions"] += stats.count
+                entry["total_time_ms"] += stats.total_time_ms
+                if len(entry["examples"]) < 3:
+                    entry["examples"].append(stats.sql)
+
+        for entry in (*seq_scans.values(), *recommendations.values()):
+            entry["total_time_ms"] = round(entry["total_time_ms"], 2)
+
+        return {
+            "queries_recorded": len(self._queries),
+            "queries_analyzed": len(queries) - len(errors),
+            "seq_scan_predicates": sorted(seq_scans.values(), key=lambda e: e["total_time_ms"], reverse=True),
+            "recommendations": sorted(recommendations.values(), key=lambda e: e["total_time_ms"], reverse=True),
+            "existing_indexes": sorted(existing),
+            "top_queries": [stats.to_dict() for stats in queries[:10]],
+            "errors": errors,
+        }
+
+    async def apply(self, index_repo, names: List[str]) -> List[dict]:
+        """
+        Create recommended indexes
+
+        Args:
+            index_repo: IndexRepository instance
+            names: Candidate index names (INDEX_CANDIDATES or metadata keys from a report)
+
+        Returns:
+            Per-index result ({"name", "sql", "status", "error"?})
+
+        Raises:
+            ValueError: Unknown index name
+        """
+        candidates = {candidate.name: candidate for candidate in INDEX_CANDIDATES}
+        candidates.update(self._metadata_candidates)
+        unknown = [name for name in names if name not in candidates]
+        if unknown:
+            raise ValueError(f"Unknown index candidates: {', '.join(unknown)}")
+
+        concurrently = not await index_repo.is_partitioned("logs")
+        results = []
+        for name in names:
+            sql = candidates[name].create_sql(concurrently)
+            try:
+                await index_repo.create_index(name, sql)
+                logger.info(f"✅ Index advisor created {name}")
+                results.append({"name": name, "sql": sql, "status": "created"})
+            except Exception as e:
+                logger.error(f"❌ Index advisor failed to create {name}: {e}")
+                results.append({"name": name, "sql": sql, "status": "failed", "error": str(e)})
+        return results
+
+    async def index_hot_metadata_keys(self, index_repo, key_stats: list, min_executions: int) -> List[dict]:
+        """
+        Create the metadata indexes the report recommends for keys queries filter on
+
+        A key is indexed when recorded queries filtered on it at least min_executions
+        times and an equality filter is selective (see METADATA_MAX_SELECTIVITY; keys
+        missing from the profile sample are rare, so selective).
+
+        Args:
+            index_repo: IndexRepository instance
+            key_stats: MetadataKeyStats from SchemaRepository.profile_metadata
+            min_executions: Recorded executions needed per index
+
+        Returns:
+            Per-index results of apply() (empty when nothing qualifies)
+        """
+        stats_by_key = {stats.key: stats for stats in key_stats}
+        report = await self.build_report(index_repo)
+        names = []
+        for entry in report["recommendations"]:
+            if entry["exists"] or entry["executions"] < min_executions:
+                continue
+            key = entry["metadata_key"]
+            if key is not None:
+                stats = stats_by_key.get(key)
+                if stats is not None and stats.selectivity > METADATA_MAX_SELECTIVITY:
+                    continue
+            elif entry["name"] != "idx_logs_metadata_path_ops":
+                continue
+            names.append(entry["name"])
+        return await self.apply(index_repo, names) if names else []
+
+
+# Singleton
+_index_advisor = None
+
+
+def get_index_advisor() -> IndexAdvisor:
+    """Get global index advisor instance"""
+    global _index_advisor
+    if _index_advisor is None:
+        _index_advisor = IndexAdvisor(max_queries=settings.INDEX_ADVISOR_MAX_QUERIES)
+    return _index_advisor
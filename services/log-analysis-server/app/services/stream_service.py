@@ -209,7 +209,8 @@ async def stream_query_execution(
     schema_repo,
     query_repo,
     conversation_id: str = "default",
-    time_range_structured: dict = None
+    time_range_structured: dict = None,
+    search_repo=None
 ) -> AsyncGenerator[Dict[str, Any], None]:
     """
     Stream agent execution events (meal-planner pattern)
@@ -229,6 +230,7 @@ async def stream_query_execution(
         query_repo: QueryRepository instance
         conversation_id: Conversation session ID (Feature #2)
         time_range_structured: Optional structured time range from frontend
+        search_repo: Optional SearchRepository (answers text search questions)
 
     Yields:
         Event dicts for client consumption
@@ -262,7 +264,7 @@ async def stream_query_execution(
 
     # 3. Create agent with injected repositories and conversation service (Feature #2)
     conversation_service = get_conversation_service()
-    agent = create_sql_agent(schema_repo, query_repo, conversation_service)
+    agent = create_sql_agent(schema_repo, query_repo, conversation_service, search_repo)
 
     # 4. Stream events from graph and accumulate state
     accumulated_state = initial_state.copy()
@@ -327,7 +329,8 @@ async def execute_query(
     question: str,
     max_results: int,
     schema_repo,
-    query_repo
+    query_repo,
+    search_repo=None
 ) -> dict:
     """
     Execute query synchronously (for REST API)
@@ -339,6 +342,7 @@ async def execute_query(
         max_results: Maximum number of results
         schema_repo: SchemaRepository instance
         query_repo: QueryRepository instance
+        search_repo: Optional SearchRepository (answers text search questions)
 
     Returns:
         Final result dict
@@ -346,7 +350,7 @@ async def execute_query(
     final_result = None
 
     async for event in stream_query_execution(
-        question, max_results, schema_repo, query_repo
+        question, max_results, schema_repo, query_repo, search_repo=search_repo
     ):
         # Collect only the final complete event
         if event.get("type") in ["complete", "error"]:
@@ -0,0 +1,126 @@
+"""
+Cold Storage Tests
+
+Agent queries are routed to the Parquet archive (DuckDB) by their created_at range.
+"""
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.config import settings
+from app.repositories import cold_storage, query_repository
+from app.repositories.cold_storage import (
+    BOTH, COLD, HOT, ColdStorageError, ColdStore, choose_tier, time_bounds
+)
+from app.repositories.query_repository import QueryRepository
+
+duckdb = pytest.importorskip("duckdb")
+
+NOW = datetime(2025, 3, 1, 12, 0, tzinfo=timezone.utc)
+BOUNDARY = datetime(2025, 2, 1, tzinfo=timezone.utc)
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_time_bounds_relative_and_literal():
+    assert time_bounds(
+        "SELECT * FROM logs WHERE deleted = FALSE AND created_at > NOW() - INTERVAL '7 days'", NOW
+    ) == (utc(2025, 2, 22, 12), None)
+    assert time_bounds(
+        "SELECT COUNT(*) FROM logs l WHERE l.created_at >= '2025-01-10'::timestamptz "
+        "AND l.created_at < '2025-01-11 00:00:00+00'", NOW
+    ) == (utc(2025, 1, 10), utc(2025, 1, 11))
+    assert time_bounds(
+        "SELECT * FROM logs WHERE created_at BETWEEN '2025-01-01' AND CURRENT_DATE - INTERVAL '1 month'", NOW
+    ) == (utc(2025, 1, 1), utc(2025, 1, 30))
+
+
+def test_time_bounds_unbounded_or_ambiguous():
+    assert time_bounds("SELECT * FROM logs ORDER BY created_at DESC LIMIT 10", NOW) == (None, None)
+    assert time_bounds(
+        "SELECT * FROM logs WHERE created_at > NOW() - INTERVAL '90 days' OR level = 'ERROR'", NOW
+    ) == (None, None)
+
+
+def test_choose_tier():
+    assert choose_tier(None, None, BOUNDARY) == HOT
+    assert choose_tier(utc(2025, 2, 20), None, BOUNDARY) == HOT
+    assert choose_tier(utc(2025, 1, 1), utc(2025, 1, 31), BOUNDARY) == COLD
+    assert choose_tier(utc(2025, 1, 1), None, BOUNDARY) == BOTH
+    assert choose_tier(utc(2025, 1, 1), None, None) == HOT
+
+
+@pytest.fixture
+def archive(tmp_path):
+    """Two archived rows in log-save-server's hive layout"""
+    for day, service, log_id, level in (("2025-01-10", "payment-api", 1, "ERROR"),
+                                        ("2025-01-11", "order-api", 2, "INFO")):
+        directory = tmp_path / "logs" / f"day={day}" / f"service={service}"
+        directory.mkdir(parents=True)
+        duckdb.sql(f"""
+            COPY (SELECT {log_id}::BIGINT AS id, TIMESTAMPTZ '{day} 10:00:00+00' AS created_at,
+                         '{level}' AS level, 12.5::DECIMAL(10,3) AS duration_ms, FALSE AS deleted,
+                         '{{"order": {log_id}}}'::JSON AS metadata)
+            TO '{directory}/logs_p{day.replace('-', '')}_0.parquet' (FORMAT PARQUET)
+        """)
+    return tmp_path
+
+
+def test_cold_store_runs_postgres_sql_on_parquet(archive):
+    store = ColdStore(str(archive))
+
+    rows = store.run(
+        "SELECT service, COUNT(*) AS n, MAX(metadata->>'order') AS last_order FROM logs "
+        "WHERE deleted = FALSE AND created_at >= '2025-01-01'::timestamptz "
+        "GROUP BY service ORDER BY service", COLD
+    )
+
+    assert rows == [
+        {"service": "order-api", "n": 1, "last_order": "2"},
+        {"service": "payment-api", "n": 1, "last_order": "1"},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_execute_sql_routes_archived_range_to_duckdb(archive, monkeypatch):
+    monkeypatch.setattr(settings, "ARCHIVE_PATH", str(archive))
+    monkeypatch.setattr(cold_storage, "_cold_store", None)
+    monkeypatch.setattr(query_repository, "_cold_boundary", None)
+    repo = QueryRepository(pool=None)
+    repo.table_exists = AsyncMock(return_value=True)
+    repo.execute_single = AsyncMock(return_value=BOUNDARY)
+    repo.execute_query = AsyncMock(return_value=[{"id": 99}])
+
+    results, _ = await repo.execute_sql(
+        "SELECT id, created_at, duration_ms FROM logs "
+        "WHERE created_at >= '2025-01-10' AND created_at < '2025-01-11' "
+    )
+    assert results == [{"id": 1, "created_at": "2025-01-10T10:00:00+00:00", "duration_ms": 12.5}]
+    repo.execute_query.assert_not_awaited()
+
+    # Recent data and rollups stay in PostgreSQL
+    await repo.execute_sql("SELECT id FROM logs WHERE created_at > NOW() - INTERVAL '1 hour'")
+    await repo.execute_sql("SELECT SUM(log_count) FROM logs_rollup_1d WHERE bucket >= '2025-01-01'")
+    assert repo.execute_query.await_count == 2
+    repo.execute_single.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_failed_archive_query_is_an_error_not_partial_rows(monkeypatch):
+    """Archived partitions are dropped from PostgreSQL, so re-running there would silently undercount"""
+    monkeypatch.setattr(settings, "ARCHIVE_PATH", "/nonexistent/archive")
+    monkeypatch.setattr(query_repository, "_cold_boundary", None)
+    store = AsyncMock()
+    store.query.side_effect = RuntimeError("IO Error: No files found")
+    monkeypatch.setattr(query_repository, "get_cold_store", lambda: store)
+    repo = QueryRepository(pool=None)
+    repo.table_exists = AsyncMock(return_value=True)
+    repo.execute_single = AsyncMock(return_value=BOUNDARY)
+    repo.execute_query = AsyncMock(return_value=[{"n": 3}])
+
+    with pytest.raises(ColdStorageError, match="No files found"):
+        await repo.execute_sql("SELECT COUNT(*) AS n FROM logs WHERE created_at >= '2025-01-01'")
+    repo.execute_query.assert_not_awaited()
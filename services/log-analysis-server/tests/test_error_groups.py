@@ -0,0 +1,92 @@
+"""
+Error group (error_groups) Tests
+
+log-save-server fingerprints errors at ingest; the SQL generator and error spike
+alerts read error_groups when the table exists.
+"""
+import pytest
+from unittest.mock import AsyncMock
+
+from app.config import settings
+from app.repositories import schema_repository
+from app.repositories.cold_storage import reads_archived_logs
+from app.repositories.schema_repository import ERROR_GROUPS_SCHEMA_GUIDE, SchemaRepository
+from app.services.alerting_service import AlertingService, TOP_ERROR_GROUPS_SQL
+
+
+class TestSchemaErrorGroups:
+    """The SQL generator sees error_groups next to the logs schema"""
+
+    @pytest.fixture(autouse=True)
+    def reset_caches(self, monkeypatch):
+        monkeypatch.setattr(schema_repository, "_rollup_tables", None)
+        monkeypatch.setattr(schema_repository, "_error_groups_available", None)
+
+    @staticmethod
+    def schema_repo(existing):
+        repo = SchemaRepository(pool=None)
+        repo.table_exists = AsyncMock(side_effect=lambda table: table in existing)
+        repo.execute_query = AsyncMock(side_effect=lambda query, table: [
+            {"column_name": "fingerprint" if table == "error_groups" else "error_fingerprint",
+             "data_type": "bigint", "is_nullable": "NO", "column_default": None}
+        ])
+        return repo
+
+    @pytest.mark.asyncio
+    async def test_logs_schema_includes_error_groups(self):
+        repo = self.schema_repo({"error_groups"})
+
+        schema = await repo.get_table_schema()
+
+        assert "Table: logs\n" in schema and "Table: error_groups\n" in schema
+        assert schema.endswith(ERROR_GROUPS_SCHEMA_GUIDE)
+
+    @pytest.mark.asyncio
+    async def test_no_guide_without_error_groups(self):
+        schema = await self.schema_repo(set()).get_table_schema()
+
+        assert "error_groups" not in schema
+
+
+class TestAlertingErrorGroups:
+    """Error spike alerts list the groups behind the spike"""
+
+    @pytest.mark.asyncio
+    async def test_spike_lists_top_groups(self, mock_query_repo, monkeypatch):
+        monkeypatch.setattr(settings, "USE_ROLLUPS", False)
+        groups = [{"fingerprint": "42", "service": "payment-api", "error_type": "TimeoutError",
+                   "message": "upstream timed out", "count": 25, "is_new": True}]
+        mock_query_repo.table_exists = AsyncMock(return_value=True)
+        mock_query_repo.execute_sql = AsyncMock(side_effect=[
+            ([{"error_count": 30}], 1.0),
+            ([{"error_count": 10}], 1.0),
+            (groups, 1.0),
+        ])
+        service = AlertingService(mock_query_repo)
+
+        alert = await service._check_error_rate_spike()
+
+        assert alert["type"] == "error_rate_spike"
+        assert alert["data"]["top_groups"] == groups
+        assert mock_query_repo.execute_sql.call_args_list[2].args == (TOP_ERROR_GROUPS_SQL,)
+        mock_query_repo.table_exists.assert_awaited_once_with("error_groups")
+
+    @pytest.mark.asyncio
+    async def test_spike_without_error_groups(self, mock_query_repo, monkeypatch):
+        monkeypatch.setattr(settings, "USE_ROLLUPS", False)
+        mock_query_repo.table_exists = AsyncMock(return_value=False)
+        mock_query_repo.execute_sql = AsyncMock(side_effect=[
+            ([{"error_count": 30}], 1.0),
+            ([{"error_count": 10}], 1.0),
+        ])
+
+        alert = await AlertingService(mock_query_repo)._check_error_rate_spike()
+
+        assert alert["data"]["top_groups"] == []
+
+
+def test_error_group_queries_stay_in_postgres():
+    assert not reads_archived_logs(
+        "SELECT g.message FROM logs l JOIN error_groups g ON g.fingerprint = l.error_fingerprint"
+    )
+    assert reads_archived_logs("SELECT COUNT(*) FROM logs WHERE deleted = FALSE")
@@ -0,0 +1,195 @@
+"""
+Index Advisor Tests
+
+Recorded agent queries are EXPLAINed and seq scans on logs become index recommendations.
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.config import settings
+from app.repositories.index_repository import IndexRepository
+from app.repositories.schema_repository import MetadataKeyStats
+from app.services.index_advisor import (
+    IndexAdvisor, find_seq_scans, metadata_index_name, metadata_key_candidate
+)
+
+# EXPLAIN (FORMAT JSON) plans as PostgreSQL renders them
+SLOW_PATHS_PLAN = {
+    "Node Type": "Aggregate",
+    "Group Key": ["path"],
+    "Plans": [{
+        "Node Type": "Seq Scan",
+        "Relation Name": "logs",
+        "Filter": "((NOT deleted) AND (duration_ms > '1000'::numeric) "
+                  "AND (created_at > (now() - '01:00:00'::interval)))",
+    }],
+}
+
+RECENT_ERRORS_PLAN = {
+    "Node Type": "Limit",
+    "Plans": [{
+        "Node Type": "Sort",
+        "Sort Key": ["logs.created_at DESC"],
+        "Plans": [{
+            "Node Type": "Append",
+            "Plans": [
+                {"Node Type": "Seq Scan", "Relation Name": "logs_p20250115",
+                 "Filter": "((NOT deleted) AND ((level)::text = 'ERROR'::text))"},
+                {"Node Type": "Seq Scan", "Relation Name": "logs_rollup_1m",
+                 "Filter": "((level)::text = 'ERROR'::text)"},
+            ],
+        }],
+    }],
+}
+
+INDEXED_PLAN = {
+    "Node Type": "Index Scan",
+    "Relation Name": "logs",
+    "Index Name": "idx_service_level_time",
+}
+
+
+def test_find_seq_scans_on_logs_and_partitions():
+    scans = find_seq_scans(RECENT_ERRORS_PLAN)
+
+    assert [scan.relation for scan in scans] == ["logs_p20250115"]
+    assert scans[0].filters_errors
+    assert scans[0].columns == {"level"}
+    assert scans[0].group_keys == {"created_at"}
+    assert find_seq_scans(INDEXED_PLAN) == []
+
+
+def test_slow_threshold_and_group_keys():
+    scan, = find_seq_scans(SLOW_PATHS_PLAN)
+
+    assert scan.slow_threshold == 1000
+    assert scan.columns == {"duration_ms", "created_at"}
+    assert scan.group_keys == {"path"}
+
+
+def test_record_merges_identical_queries_and_evicts():
+    advisor = IndexAdvisor(max_queries=2)
+    advisor.record("SELECT 1\nFROM logs;", 10.0)
+    advisor.record("SELECT 1 FROM logs", 5.0)
+    advisor.record("SELECT 2 FROM logs", 1.0)
+    advisor.record("SELECT 3 FROM logs", 1.0)
+
+    queries = {stats.sql: stats for stats in advisor.get_queries()}
+    assert set(queries) == {"SELECT 2 FROM logs", "SELECT 3 FROM logs"}
+
+    advisor.record("SELECT 2 FROM logs", 2.0)
+    assert advisor.get_queries()[0].count == 2
+
+
+@pytest.fixture
+def index_repo():
+    repo = AsyncMock()
+    repo.get_index_names = AsyncMock(return_value=["idx_logs_path_time", "logs_pkey"])
+    repo.is_partitioned = AsyncMock(return_value=False)
+    repo.explain = AsyncMock()
+    repo.create_index = AsyncMock()
+    return repo
+
+
+@pytest.mark.asyncio
+async def test_report_recommends_indexes_for_seq_scans(index_repo):
+    advisor = IndexAdvisor()
+    advisor.record("SELECT path, AVG(duration_ms) FROM logs WHERE duration_ms > 1000 GROUP BY path", 300.0)
+    advisor.record("SELECT * FROM logs WHERE level = 'ERROR' ORDER BY created_at DESC LIMIT 10", 100.0)
+    advisor.record("SELECT * FROM missing_table", 1.0)
+    index_repo.explain.side_effect = [SLOW_PATHS_PLAN, RECENT_ERRORS_PLAN, Exception("relation does not exist")]
+
+    report = await advisor.build_report(index_repo)
+
+    recommendations = {r["name"]: r for r in report["recommendations"]}
+    assert set(recommendations) == {
+        "idx_logs_created_brin", "idx_logs_slow_requests", "idx_logs_path_time", "idx_logs_errors_recent"
+    }
+    assert recommendations["idx_logs_path_time"]["exists"] is True
+    assert recommendations["idx_logs_created_brin"]["sql"] == (
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_logs_created_brin ON logs USING BRIN (created_at)"
+    )
+    assert recommendations["idx_logs_errors_recent"]["sql"].endswith("WHERE level = 'ERROR' AND deleted = FALSE")
+    assert report["queries_analyzed"] == 2
+    assert report["errors"][0]["sql"] == "SELECT * FROM missing_table"
+    assert report["seq_scan_predicates"][0]["column"] in ("duration_ms", "created_at")
+
+
+@pytest.mark.asyncio
+async def test_apply_skips_concurrently_on_partitioned_logs(index_repo):
+    index_repo.is_partitioned = AsyncMock(return_value=True)
+    advisor = IndexAdvisor()
+
+    results = await advisor.apply(index_repo, ["idx_logs_created_brin"])
+
+    assert results[0]["status"] == "created"
+    index_repo.create_index.assert_awaited_once_with(
+        "idx_logs_created_brin", "CREATE INDEX IF NOT EXISTS idx_logs_created_brin ON logs USING BRIN (created_at)"
+    )
+    with pytest.raises(ValueError):
+        await advisor.apply(index_repo, ["idx_unknown"])
+
+
+@pytest.mark.asyncio
+async def test_failed_build_drops_the_invalid_index():
+    conn = AsyncMock()
+    conn.execute.side_effect = [None, asyncio.TimeoutError(), None]
+    # no leftover before the build, an INVALID plain index after the timeout
+    conn.fetchval.side_effect = [None, "i"]
+    pool = MagicMock()
+    pool.acquire.return_value.__aenter__.return_value = conn
+    sql = "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_logs_created_brin ON logs USING BRIN (created_at)"
+
+    with pytest.raises(asyncio.TimeoutError):
+        await IndexRepository(pool).create_index("idx_logs_created_brin", sql)
+
+    build, drop = conn.execute.await_args_list[1:]
+    assert build.args == (sql,)
+    assert build.kwargs["timeout"] == settings.INDEX_ADVISOR_BUILD_TIMEOUT_SECONDS
+    assert drop.args == ("DROP INDEX CONCURRENTLY IF EXISTS public.idx_logs_created_brin",)
+
+
+METADATA_PLAN = {
+    "Node Type": "Seq Scan",
+    "Relation Name": "logs_p20250115",
+    "Filter": "((NOT deleted) AND ((metadata ->> 'order_id'::text) = '4242'::text) "
+              "AND ((metadata ->> 'Customer''s Plan'::text) = 'pro'::text))",
+}
+
+CONTAINMENT_PLAN = {
+    "Node Type": "Seq Scan",
+    "Relation Name": "logs",
+    "Filter": "((NOT deleted) AND (metadata @> '{\"browser\": \"chrome\"}'::jsonb))",
+}
+
+
+def test_metadata_keys_and_index_names():
+    scan, = find_seq_scans(METADATA_PLAN)
+
+    assert scan.metadata_keys == {"order_id", "Customer's Plan"}
+    assert "metadata" in scan.columns
+    assert metadata_key_candidate("order_id").create_sql(True) == (
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_logs_meta_order_id ON logs "
+        "((metadata ->> 'order_id')) WHERE (metadata ->> 'order_id') IS NOT NULL"
+    )
+    assert "'Customer''s Plan'" in metadata_key_candidate("Customer's Plan").definition
+    assert metadata_index_name("userId") == "idx_logs_meta_userid"
+    assert metadata_index_name("Customer's Plan").startswith("idx_logs_meta_customer_s_plan_")
+
+
+@pytest.mark.asyncio
+async def test_hot_metadata_keys_are_indexed(index_repo):
+    advisor = IndexAdvisor()
+    for _ in range(3):
+        advisor.record("SELECT * FROM logs WHERE metadata->>'order_id' = '4242'", 50.0)
+        advisor.record("SELECT * FROM logs WHERE metadata @> '{\"browser\": \"chrome\"}'", 50.0)
+    index_repo.explain.side_effect = lambda sql: METADATA_PLAN if "order_id" in sql else CONTAINMENT_PLAN
+    # plan: 90% of rows with 2 values → not selective; order_id: 30% of rows, 3000 values
+    key_stats = [MetadataKeyStats("order_id", 3000, 3000, ("string",), 10000),
+                 MetadataKeyStats("Customer's Plan", 9000, 2, ("string",), 10000)]
+
+    results = await advisor.index_hot_metadata_keys(index_repo, key_stats, min_executions=3)
+
+    assert {result["name"] for result in results} == {"idx_logs_meta_order_id", "idx_logs_metadata_path_ops"}
+    assert await advisor.index_hot_metadata_keys(index_repo, key_stats, min_executions=4) == []
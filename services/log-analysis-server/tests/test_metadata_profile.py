@@ -0,0 +1,95 @@
+"""
+Metadata Profile Tests
+
+Top-level logs.metadata keys are sampled in the background and listed in the
+schema given to the SQL generator.
+"""
+from contextlib import asynccontextmanager
+
+import pytest
+from unittest.mock import AsyncMock
+
+from app.repositories import schema_repository
+from app.repositories.schema_repository import (
+    METADATA_PROFILE_SQL, ROW_ESTIMATE_SQL, SchemaRepository, summarize_metadata_keys
+)
+
+
+def key_row(key, kind, row_count, distinct_values, sampled):
+    return {"key": key, "type": kind, "row_count": row_count, "distinct_values": distinct_values,
+            "sampled": sampled}
+
+
+@pytest.fixture(autouse=True)
+def reset_caches(monkeypatch):
+    monkeypatch.setattr(schema_repository, "_rollup_tables", [])
+    monkeypatch.setattr(schema_repository, "_error_groups_available", False)
+    monkeypatch.setattr(schema_repository, "_metadata_keys", None)
+
+
+def test_summarize_merges_types_and_shards():
+    keys = summarize_metadata_keys([
+        [key_row("order_id", "string", 600, 590, 1000), key_row("order_id", "number", 100, 100, 1000),
+         key_row("browser", "string", 900, 4, 1000)],
+        [key_row("order_id", "string", 500, 500, 500)],
+        [],
+    ])
+
+    order_id, browser = keys
+    assert (browser.key, browser.row_count, browser.types) == ("browser", 900, ("string",))
+    assert order_id.row_count == 1200 and order_id.distinct_values == 690
+    assert order_id.types == ("string", "number")
+    assert order_id.sampled == 1500
+    assert order_id.frequency == pytest.approx(0.8)
+    assert browser.selectivity == pytest.approx(0.6 / 4)
+
+
+class FakeConn:
+    def __init__(self, estimate, rows):
+        self.estimate = estimate
+        self.rows = rows
+        self.calls = []
+
+    async def fetchval(self, sql):
+        assert sql == ROW_ESTIMATE_SQL
+        return self.estimate
+
+    async def fetch(self, sql, *args):
+        self.calls.append((sql, args))
+        return self.rows
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.conn
+
+
+@pytest.mark.asyncio
+async def test_profile_is_listed_in_logs_schema():
+    conn = FakeConn(1_000_000, [key_row("browser", "string", 800, 3, 1000),
+                                key_row("cart_total", "number", 200, 150, 1000)])
+    repo = SchemaRepository(pool=FakePool(conn))
+    repo.execute_query = AsyncMock(return_value=[
+        {"column_name": "metadata", "data_type": "jsonb", "is_nullable": "YES", "column_default": None},
+    ])
+
+    keys = await repo.profile_metadata(1000)
+    schema = await repo.get_table_schema()
+
+    assert [stats.key for stats in keys] == ["browser", "cart_total"]
+    assert conn.calls == [(METADATA_PROFILE_SQL, (0.1, 1000))]  # block sample of ~1000 rows, no full sort
+    assert "sampled from 1,000 rows with metadata" in schema
+    assert "- browser: string, 80% of rows, ~3 distinct values" in schema
+    assert "- cart_total: number, 20% of rows, ~150 distinct values" in schema
+
+
+@pytest.mark.asyncio
+async def test_schema_without_profile_has_no_metadata_guide():
+    repo = SchemaRepository(pool=None)
+    repo.execute_query = AsyncMock(return_value=[])
+
+    assert "metadata keys" not in await repo.get_table_schema()
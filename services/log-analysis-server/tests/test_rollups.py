@@ -0,0 +1,117 @@
+"""
+Rollup (logs_rollup_1m) Tests
+
+Statistics and alert checks read per-minute rollups when the table exists.
+"""
+import pytest
+from unittest.mock import AsyncMock
+
+from app.agent.tools import validate_sql_safety
+from app.repositories import schema_repository
+from app.repositories.schema_repository import ROLLUP_SCHEMA_GUIDE, SchemaRepository
+from app.services.alerting_service import (
+    AlertingService,
+    DURATION_BUCKETS_MS,
+    ERROR_COUNT_ROLLUP_SQL,
+    SERVICE_DOWN_ROLLUP_SQL,
+    SLOW_APIS_ROLLUP_SQL,
+)
+
+
+class TestAlertingRollups:
+    """Alert checks use rollups when logs_rollup_1m exists"""
+
+    @pytest.mark.asyncio
+    async def test_error_spike_reads_rollups(self, mock_query_repo):
+        mock_query_repo.table_exists = AsyncMock(side_effect=lambda table: table == "logs_rollup_1m")
+        mock_query_repo.execute_sql = AsyncMock(side_effect=[
+            ([{"error_count": 30}], 1.0),
+            ([{"error_count": 10}], 1.0),
+        ])
+        service = AlertingService(mock_query_repo)
+
+        alert = await service._check_error_rate_spike()
+
+        assert alert["type"] == "error_rate_spike"
+        assert alert["data"]["spike_percentage"] == 200.0
+        calls = mock_query_repo.execute_sql.call_args_list
+        assert calls[0].args == (ERROR_COUNT_ROLLUP_SQL, [5, 0])
+        assert calls[1].args == (ERROR_COUNT_ROLLUP_SQL, [35, 30])
+        mock_query_repo.table_exists.assert_any_await("logs_rollup_1m")
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_logs_without_rollup_table(self, mock_query_repo):
+        mock_query_repo.table_exists = AsyncMock(return_value=False)
+        service = AlertingService(mock_query_repo)
+
+        await service._check_error_rate_spike()
+
+        sql = mock_query_repo.execute_sql.call_args_list[0].args[0]
+        assert "FROM logs\n" in sql
+
+    @pytest.mark.asyncio
+    async def test_slow_apis_histogram_slice(self, mock_query_repo):
+        """Slow count starts at the first bucket above the 2s threshold"""
+        mock_query_repo.table_exists = AsyncMock(return_value=True)
+        service = AlertingService(mock_query_repo)
+
+        await service._check_slow_apis()
+
+        sql, params = mock_query_repo.execute_sql.call_args.args
+        assert sql == SLOW_APIS_ROLLUP_SQL
+        # 1-based bucket index: bucket 8 covers (2000, 5000] ms
+        assert DURATION_BUCKETS_MS[params[0] - 2] == 2000
+
+    @pytest.mark.asyncio
+    async def test_service_down_single_query(self, mock_query_repo):
+        mock_query_repo.table_exists = AsyncMock(return_value=True)
+        mock_query_repo.execute_sql = AsyncMock(return_value=([{"service": "payment-api"}], 1.0))
+        service = AlertingService(mock_query_repo)
+
+        alert = await service._check_service_down()
+
+        assert alert["data"]["services"] == ["payment-api"]
+        mock_query_repo.execute_sql.assert_awaited_once_with(SERVICE_DOWN_ROLLUP_SQL, [5])
+
+
+class TestSchemaRollups:
+    """The SQL generator sees hourly / daily rollups next to the logs schema"""
+
+    @pytest.fixture(autouse=True)
+    def reset_rollup_cache(self, monkeypatch):
+        monkeypatch.setattr(schema_repository, "_rollup_tables", None)
+        monkeypatch.setattr(schema_repository, "_error_groups_available", None)
+
+    @staticmethod
+    def schema_repo(existing):
+        repo = SchemaRepository(pool=None)
+        repo.table_exists = AsyncMock(side_effect=lambda table: table in existing)
+        repo.execute_query = AsyncMock(side_effect=lambda query, table: [
+            {"column_name": "bucket" if "rollup" in table else "created_at",
+             "data_type": "timestamp with time zone", "is_nullable": "NO", "column_default": None}
+        ])
+        return repo
+
+    @pytest.mark.asyncio
+    async def test_logs_schema_includes_rollups(self):
+        repo = self.schema_repo({"logs_rollup_1h", "logs_rollup_1d"})
+
+        schema = await repo.get_table_schema()
+
+        assert "Table: logs\n" in schema
+        assert "Table: logs_rollup_1h\n" in schema and "Table: logs_rollup_1d\n" in schema
+        assert schema.endswith(ROLLUP_SCHEMA_GUIDE)
+
+    @pytest.mark.asyncio
+    async def test_no_guide_without_rollup_tables(self):
+        repo = self.schema_repo(set())
+
+        schema = await repo.get_table_schema()
+
+        assert "logs_rollup" not in schema
+
+    def test_rollup_queries_do_not_need_deleted_filter(self):
+        assert validate_sql_safety(
+            "SELECT service, SUM(log_count) FROM logs_rollup_1d WHERE level = 'ERROR' GROUP BY service"
+        ) == (True, None)
+        assert validate_sql_safety("SELECT COUNT(*) FROM logs")[0] is False
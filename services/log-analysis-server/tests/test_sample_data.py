@@ -0,0 +1,109 @@
+"""
+Sample Data Tests
+
+Agent sample rows come from a TABLESAMPLE SYSTEM block sample sized from the planner's
+row estimate, with pg_stats column statistics, and are cached per process.
+"""
+from contextlib import asynccontextmanager
+
+import pytest
+from unittest.mock import AsyncMock
+
+from app.repositories import schema_repository
+from app.repositories.schema_repository import (
+    COLUMN_STATS_SQL, ROW_ESTIMATE_SQL, SchemaRepository, format_column_stats, sample_percent
+)
+
+
+def log_row(i, level="INFO", service="payment-api", duration_ms=None):
+    return {"id": i, "level": level, "service": service, "duration_ms": duration_ms,
+            "error_type": "TimeoutError" if level == "ERROR" else None, "path": "/api/pay",
+            "message": f"message {i}"}
+
+
+STATS_ROWS = [
+    {"attname": "path", "n_distinct": -0.25, "most_common_vals": None, "most_common_freqs": None},
+    {"attname": "service", "n_distinct": 3.0, "most_common_vals": ["payment-api", "order-api"],
+     "most_common_freqs": [0.6, 0.3]},
+]
+
+
+class FakeConn:
+    def __init__(self, estimate, rows):
+        self.estimate = estimate
+        self.rows = rows
+        self.calls = []
+
+    async def fetchval(self, sql):
+        assert sql == ROW_ESTIMATE_SQL
+        return self.estimate
+
+    async def fetch(self, sql, percent):
+        self.calls.append(percent)
+        return self.rows
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.conn
+
+
+@pytest.fixture(autouse=True)
+def reset_cache(monkeypatch):
+    monkeypatch.setattr(schema_repository, "_sample_data", None)
+
+
+def test_sample_percent():
+    assert sample_percent(0, 2000) == 100.0
+    assert sample_percent(1000, 2000) == 100.0
+    assert sample_percent(10_000_000, 2000) == pytest.approx(0.02)
+    assert sample_percent(1e12, 2000) == 0.01
+
+
+def test_format_column_stats():
+    text = format_column_stats(STATS_ROWS)
+
+    assert text.splitlines() == [
+        "Column statistics (pg_stats):",
+        "  - service: ~3 distinct; most common: payment-api (60%), order-api (30%)",
+        "  - path: ~25% of rows distinct",
+    ]
+    assert format_column_stats([]) == ""
+
+
+@pytest.mark.asyncio
+async def test_sample_data_is_sampled_and_cached():
+    conn = FakeConn(10_000_000, [log_row(1, "ERROR"), log_row(2, duration_ms=1500), log_row(3)])
+    repo = SchemaRepository(FakePool(conn))
+    repo.execute_query = AsyncMock(return_value=STATS_ROWS)
+
+    text = await repo.get_sample_data()
+
+    assert conn.calls == [pytest.approx(0.02)]
+    assert text.startswith("Sample Data (Diverse 3 logs):")
+    assert "[ERROR] payment-api, TimeoutError /api/pay: message 1" in text
+    assert "1500ms" in text and "most common: payment-api (60%)" in text
+    assert repo.execute_query.call_args.args == (COLUMN_STATS_SQL, ["service", "level", "error_type", "path"])
+
+    assert await repo.get_sample_data() == text
+    assert len(conn.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_sharded_samples_are_interleaved():
+    class FakeRouter:
+        async def run_each(self, fn):
+            return [await fn(FakeConn(0, [log_row(i, service="a") for i in range(8)])),
+                    await fn(FakeConn(0, [log_row(i + 100, service="b") for i in range(2)]))]
+
+    repo = SchemaRepository(pool=None, shard_router=FakeRouter())
+    repo.execute_query = AsyncMock(return_value=[])
+
+    text = await repo.get_sample_data()
+
+    services = [line.split("] ")[1].split(" ")[0] for line in text.splitlines()[1:]]
+    assert services[:4] == ["a", "b", "a", "b"] and len(services) == 10
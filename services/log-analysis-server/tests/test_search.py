@@ -0,0 +1,137 @@
+"""
+Log search (SearchRepository) Tests
+
+Quoted text in "grep" questions is searched with ILIKE over the pg_trgm indexes
+(database/migrations/008_log_search.sql) instead of going through SQL generation.
+"""
+from datetime import datetime, timezone
+
+import pytest
+from unittest.mock import AsyncMock
+
+from app.agent.filter_extractor import time_range_bounds
+from app.agent.nodes import check_search_success, search_logs_node
+from app.agent.tool_selector import extract_search_pattern, tool_selector_node
+from app.repositories import search_repository
+from app.repositories.search_repository import SearchRepository, build_search_sql, escape_like
+
+
+@pytest.fixture(autouse=True)
+def reset_cache(monkeypatch):
+    monkeypatch.setattr(search_repository, "_stack_traces_available", None)
+
+
+def search_repo(rows, stack_traces=True, hashes=()):
+    repo = SearchRepository(pool=None)
+    repo.table_exists = AsyncMock(return_value=stack_traces)
+    repo.execute_query = AsyncMock(return_value=[{"hash": h} for h in hashes])
+    repo.execute_sharded = AsyncMock(return_value=rows)
+    return repo
+
+
+def test_escape_like_matches_wildcards_literally():
+    assert escape_like("100%_done\\") == "100\\%\\_done\\\\"
+
+
+def test_build_search_sql_parameter_positions():
+    sql, names = build_search_sql(True, service="payment-api", until=datetime(2025, 1, 1), limit=20, offset=40)
+
+    assert "l.stack_trace_hash = ANY($3::bigint[])" in sql
+    assert "l.service = $4" in sql and "l.created_at < $5" in sql
+    assert names == ["service", "until"]
+    assert "LIMIT 21 OFFSET 40" in sql
+    assert "ORDER BY rank DESC" in sql
+
+    sql, names = build_search_sql(False, level="ERROR", order="recent")
+    assert "ANY(" not in sql and "l.level = $3" in sql
+    assert "ORDER BY l.created_at DESC, l.id DESC" in sql
+
+
+@pytest.mark.asyncio
+async def test_search_pages_and_passes_trace_hashes():
+    created = datetime(2025, 3, 1, tzinfo=timezone.utc)
+    rows = [{"id": i, "created_at": created, "message": "timeout"} for i in range(3)]
+    repo = search_repo(rows, hashes=[7, 3])
+
+    page = await repo.search("  Timeout ", service="order-api", limit=2)
+
+    assert [row["id"] for row in page["results"]] == [0, 1]
+    assert page["has_more"] is True
+    assert page["results"][0]["created_at"] == created.isoformat()
+    args = repo.execute_sharded.call_args.args
+    assert args[1:] == ("%Timeout%", "Timeout", [3, 7], "order-api")
+
+
+@pytest.mark.asyncio
+async def test_search_without_stack_traces_table():
+    repo = search_repo([], stack_traces=False)
+
+    page = await repo.search("connection refused")
+
+    assert page == {"results": [], "has_more": False, "sql": page["sql"]}
+    repo.execute_query.assert_not_called()
+    assert len(repo.execute_sharded.call_args.args) == 3
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("kwargs", [
+    {"pattern": "ab"},
+    {"pattern": "timeout", "order": "oldest"},
+    {"pattern": "timeout", "limit": 500},
+    {"pattern": "timeout", "offset": -1},
+])
+async def test_search_rejects_invalid_requests(kwargs):
+    with pytest.raises(ValueError):
+        await search_repo([]).search(**kwargs)
+
+
+def test_extract_search_pattern():
+    assert extract_search_pattern("메시지에 'connection refused'가 포함된 로그") == "connection refused"
+    assert extract_search_pattern("“NullPointer” 검색") == "NullPointer"
+    assert extract_search_pattern("'ab' 포함된 로그") is None
+    assert extract_search_pattern("최근 에러 로그") is None
+
+
+@pytest.mark.asyncio
+async def test_tool_selector_routes_grep_only_when_search_is_enabled():
+    state = {"question": "\"timeout\" 포함된 로그 검색"}
+
+    assert (await tool_selector_node(state, search_enabled=True))["selected_tool"] == "grep"
+    assert (await tool_selector_node(state))["selected_tool"] == "sql"
+    assert (await tool_selector_node({"question": "전체 통계"}, search_enabled=True))["selected_tool"] == "sql"
+
+
+def test_time_range_bounds():
+    now = datetime(2025, 3, 10, 12, tzinfo=timezone.utc)
+
+    assert time_range_bounds(None) == (None, None)
+    assert time_range_bounds({"type": "relative", "relative": {"value": 2, "unit": "d"}}, now) == \
+        (datetime(2025, 3, 8, 12, tzinfo=timezone.utc), None)
+    assert time_range_bounds({"type": "absolute", "absolute": {"start": "2025-03-01", "end": "2025-03-02"}}) == \
+        (datetime(2025, 3, 1, tzinfo=timezone.utc), datetime(2025, 3, 3, tzinfo=timezone.utc))
+
+
+@pytest.mark.asyncio
+async def test_search_logs_node_returns_results_for_insight():
+    repo = search_repo([{"id": 1, "message": "payment timeout"}])
+    state = {"question": "'timeout' 포함된 로그", "max_results": 100, "extracted_service": "payment-api"}
+
+    result = await search_logs_node(state, repo)
+
+    assert result["error_message"] is None
+    assert result["formatted_results"]["count"] == 1
+    assert result["generated_sql"].startswith("-- search: timeout")
+    assert repo.execute_sharded.call_args.args[-1] == "payment-api"
+    assert check_search_success({**state, **result}) == "insight"
+
+
+@pytest.mark.asyncio
+async def test_search_logs_node_falls_back_to_sql():
+    repo = search_repo([])
+    repo.execute_sharded.side_effect = RuntimeError("function word_similarity does not exist")
+
+    result = await search_logs_node({"question": "'timeout' 검색", "max_results": 10}, repo)
+
+    assert result["selected_tool"] == "sql"
+    assert "error_message" not in result
+    assert check_search_success(result) == "sql"
@@ -0,0 +1,323 @@
+"""
+Sharding Tests
+
+Fan-out queries are split into per-shard SQL and merged in DuckDB. Shards are faked with
+DuckDB databases, so every merged result can be compared with the same query over all rows.
+"""
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.repositories.base import BaseRepository
+from app.repositories.sharding import (
+    ShardQueryError, ShardResult, ShardRouter, merge_results, parse_select, parse_shard_dsns, plan_fanout,
+    service_shard
+)
+
+duckdb = pytest.importorskip("duckdb")
+
+SERVICES = ["payment-api", "user-api", "web-frontend", "search-api", "auth-api"]
+LEVELS = ["INFO", "WARN", "ERROR"]
+START = datetime(2025, 3, 1, tzinfo=timezone.utc)
+
+# DuckDB result types → PostgreSQL type names reported by asyncpg
+PG_TYPES = {"BIGINT": "int8", "INTEGER": "int4", "HUGEINT": "numeric", "DOUBLE": "float8",
+            "VARCHAR": "text", "BOOLEAN": "bool", "TIMESTAMP WITH TIME ZONE": "timestamptz",
+            "INTERVAL": "interval"}
+
+
+def make_rows(count=300):
+    """(id, created_at, service) of the generated logs rows"""
+    return [(i, START + timedelta(minutes=7 * i), SERVICES[i % 5]) for i in range(count)]
+
+
+def make_db(rows):
+    con = duckdb.connect()
+    con.execute("SET TimeZone = 'UTC'")
+    ids = ", ".join(str(row[0]) for row in rows) or "NULL"
+    con.execute(
+        "CREATE TABLE logs AS SELECT i::BIGINT AS id, "
+        "TIMESTAMPTZ '2025-03-01 00:00:00+00' + i * INTERVAL 7 MINUTE AS created_at, "
+        f"{LEVELS}[i % 3 + 1] AS level, {SERVICES}[i % 5 + 1] AS service, '/api/' || (i % 4) AS path, "
+        "CASE WHEN i % 6 = 0 THEN NULL ELSE (i % 50)::DOUBLE END AS duration_ms, "
+        "'message ''' || i || '''' AS message "
+        f"FROM range(1000) t(i) WHERE i IN ({ids})"
+    )
+    return con
+
+
+class FakeStatement:
+    def __init__(self, con, sql):
+        self.con = con
+        self.sql = sql.replace("$1", "?")
+
+    def get_attributes(self):
+        relation = self.con.sql(self.sql.replace("?", "NULL"))
+        return [SimpleNamespace(name=name, type=SimpleNamespace(name=PG_TYPES[str(kind)]))
+                for name, kind in zip(relation.columns, relation.types)]
+
+    async def fetch(self, *args):
+        return self.con.execute(self.sql, list(args)).fetchall()
+
+
+class FakeConn:
+    def __init__(self, con):
+        self.con = con
+        self.queries = []
+
+    async def prepare(self, sql):
+        self.queries.append(sql)
+        return FakeStatement(self.con, sql)
+
+    async def fetch(self, sql, *args):
+        self.queries.append(sql)
+        cursor = self.con.execute(sql.replace("$1", "?"), list(args))
+        names = [description[0] for description in cursor.description]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+
+class FakePool:
+    def __init__(self, con):
+        self.conn = FakeConn(con)
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.conn
+
+
+def shard_pools(rows, count, key):
+    parts = [[] for _ in range(count)]
+    for row in rows:
+        shard = service_shard(row[2], count) if key == "service" else int(row[1].timestamp() // 86400) % count
+        parts[shard].append(row)
+    return [FakePool(make_db(part)) for part in parts]
+
+
+@pytest.fixture
+def rows():
+    return make_rows()
+
+
+@pytest.fixture
+def everything(rows):
+    return make_db(rows)
+
+
+def expected(con, sql):
+    cursor = con.execute(sql)
+    names = [description[0] for description in cursor.description]
+    return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+
+def normalize(rows):
+    # Values only: unaliased columns are named the PostgreSQL way (count, not count_star())
+    return [tuple(round(value, 6) if isinstance(value, float) else value for value in dict(row).values())
+            for row in rows]
+
+
+MERGEABLE = [
+    "SELECT COUNT(*) FROM logs",
+    "SELECT level, COUNT(*) AS cnt, ROUND(AVG(duration_ms), 2) AS avg_ms, MAX(duration_ms) "
+    "FROM logs GROUP BY 1 HAVING COUNT(*) > 10 ORDER BY COUNT(*) DESC, 1",
+    "SELECT COUNT(*) FILTER (WHERE level = 'ERROR') * 100.0 / COUNT(*) AS error_rate FROM logs",
+    "SELECT DATE_TRUNC('day', created_at) AS day, path, SUM(duration_ms) AS total "
+    "FROM logs WHERE level <> 'INFO' GROUP BY day, path ORDER BY day, path LIMIT 7 OFFSET 2",
+    "SELECT id, service, message FROM logs WHERE level = 'ERROR' ORDER BY created_at DESC, id LIMIT 5 OFFSET 3",
+    "SELECT DISTINCT path FROM logs ORDER BY path",
+    "WITH slow AS (SELECT * FROM logs WHERE duration_ms > 40) "
+    "SELECT path, COUNT(*) FROM slow GROUP BY path ORDER BY 2 DESC, 1 LIMIT 3",
+    "SELECT MIN(created_at) AS first_seen, MAX(created_at) - MIN(created_at) AS span FROM logs",
+]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("key", ["service", "time"])
+@pytest.mark.parametrize("sql", MERGEABLE)
+async def test_fanout_matches_single_database(rows, everything, sql, key):
+    router = ShardRouter(shard_pools(rows, 3, key), key)
+
+    assert normalize(await router.fetch(sql)) == normalize(expected(everything, sql))
+
+
+@pytest.mark.asyncio
+async def test_grouped_by_service_runs_shard_local(rows, everything):
+    # Every service lives on one shard, so percentiles / COUNT(DISTINCT) per service are exact
+    sql = ("SELECT service, COUNT(DISTINCT path) AS paths, PERCENTILE_CONT(0.5) WITHIN GROUP "
+           "(ORDER BY duration_ms) AS p50 FROM logs GROUP BY service ORDER BY paths DESC, service LIMIT 3")
+    router = ShardRouter(shard_pools(rows, 3, "service"), "service")
+
+    assert normalize(await router.fetch(sql)) == normalize(expected(everything, sql))
+    with pytest.raises(ShardQueryError, match="COUNT"):
+        plan_fanout(sql, "time")
+
+
+@pytest.mark.asyncio
+async def test_service_filter_is_pinned_to_one_shard(rows, everything):
+    pools = shard_pools(rows, 3, "service")
+    router = ShardRouter(pools, "service")
+    sql = "SELECT COUNT(DISTINCT path) AS paths FROM logs WHERE service = $1 AND level = 'ERROR'"
+
+    result = await router.fetch(sql, "user-api")
+
+    assert [dict(row) for row in result] == expected(
+        everything, sql.replace("$1", "'user-api'"))
+    queried = [index for index, pool in enumerate(pools) if pool.conn.queries]
+    assert queried == [service_shard("user-api", 3)]
+
+
+def test_pinning_needs_a_plain_and_filter():
+    router = ShardRouter([None, None, None], "service")
+    assert router.pinned_shard("SELECT * FROM logs l WHERE l.service = 'web-frontend'") == \
+        service_shard("web-frontend", 3)
+    assert router.pinned_shard("SELECT * FROM logs WHERE service = 'a' OR level = 'ERROR'") is None
+    assert router.pinned_shard(
+        "SELECT * FROM logs WHERE service = 'a' AND id IN (SELECT id FROM logs WHERE level = 'ERROR')"
+    ) is None
+    assert ShardRouter([None, None], "time").pinned_shard("SELECT * FROM logs WHERE service = 'a'") is None
+    assert router.pinned_shard(
+        "SELECT * FROM logs WHERE created_at BETWEEN $1 AND $2 AND service = 'a'", (1, 2)
+    ) == service_shard("a", 3)
+
+
+@pytest.mark.parametrize("where", [
+    "NOT service = 'a'",
+    "NOT (service = 'a')",
+    "service = 'a' IS NOT TRUE",
+    "(service = 'a') IS FALSE",
+    "service <> 'a'",
+    "service != 'a'",
+    "level = 'ERROR' AND NOT service = 'a'",
+    "CASE WHEN service = 'a' THEN false ELSE true END",
+    "coalesce(service = 'a', false) = false",
+    "service = 'a' = false",
+])
+def test_negated_service_filter_is_not_pinned(where):
+    router = ShardRouter([None, None, None], "service")
+    assert router.pinned_shard(f"SELECT * FROM logs WHERE {where}") is None
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT COUNT(DISTINCT user_id) FROM logs",
+    "SELECT level, STRING_AGG(message, ',') FROM logs GROUP BY level",
+    "SELECT service, COUNT(*), RANK() OVER (ORDER BY COUNT(*) DESC) FROM logs GROUP BY service",
+    "SELECT service FROM logs UNION SELECT service FROM logs_rollup_1m",
+    "SELECT DISTINCT ON (service) * FROM logs ORDER BY service, created_at DESC",
+    "SELECT * FROM logs LIMIT $1",
+    "SELECT level, COUNT(*) FROM logs GROUP BY ROLLUP (level)",
+])
+def test_unmergeable_queries_are_rejected(sql):
+    with pytest.raises(ShardQueryError):
+        plan_fanout(sql, "time")
+
+
+def test_rollup_percentiles_are_not_merged_per_shard():
+    # histogram_sum partials would otherwise become a merge group key: one row per path and shard
+    sql = ("SELECT path, histogram_percentile(histogram_sum(duration_histogram), 0.95) AS p95 "
+           "FROM logs_rollup_1h GROUP BY path ORDER BY p95 DESC LIMIT 10")
+    with pytest.raises(ShardQueryError, match="HISTOGRAM_SUM"):
+        plan_fanout(sql, "time")
+    with pytest.raises(ShardQueryError, match="HISTOGRAM_SUM"):
+        plan_fanout(sql, "service")
+    assert plan_fanout(sql.replace("path", "service"), "service").positional
+
+    with pytest.raises(ShardQueryError, match="neither a GROUP BY expression"):
+        plan_fanout("SELECT path, my_agg(duration_ms) AS m FROM logs GROUP BY path", "time")
+    with pytest.raises(ShardQueryError, match="neither a GROUP BY expression"):
+        plan_fanout("SELECT path, COUNT(*) FROM logs GROUP BY path ORDER BY level", "time")
+
+
+@pytest.mark.parametrize("sql", [
+    "WITH p AS (SELECT path, COUNT(*) c FROM logs GROUP BY path) SELECT path, c FROM p ORDER BY c DESC LIMIT 10",
+    "SELECT path, SUM(c) FROM (SELECT path, COUNT(*) c FROM logs GROUP BY path) t GROUP BY path",
+    "SELECT * FROM logs WHERE duration_ms > (SELECT MAX(duration_ms) - 5 FROM logs)",
+    "SELECT COUNT(*) FROM (SELECT DISTINCT path FROM logs) t",
+    "SELECT * FROM logs WHERE id IN (SELECT id FROM logs ORDER BY created_at DESC LIMIT 5)",
+])
+@pytest.mark.parametrize("key", ["service", "time"])
+def test_aggregating_subqueries_are_rejected(sql, key):
+    with pytest.raises(ShardQueryError, match="CTE or subquery"):
+        plan_fanout(sql, key)
+
+
+@pytest.mark.asyncio
+async def test_subquery_grouped_by_service_runs_on_service_shards(rows, everything):
+    # Each service's rows are on one shard, so per-service subquery aggregates are complete
+    sql = ("WITH per_service AS (SELECT service, MAX(duration_ms) AS worst FROM logs GROUP BY service) "
+           "SELECT COUNT(*) AS slow FROM logs l JOIN per_service p ON p.service = l.service "
+           "WHERE l.duration_ms >= p.worst - 2")
+    router = ShardRouter(shard_pools(rows, 3, "service"), "service")
+
+    assert normalize(await router.fetch(sql)) == normalize(expected(everything, sql))
+    plan_fanout("SELECT * FROM logs WHERE duration_ms > "
+                "(SELECT AVG(duration_ms) FROM logs WHERE service = 'user-api')", "service")
+    with pytest.raises(ShardQueryError, match="CTE or subquery"):
+        plan_fanout(sql, "time")
+
+
+def test_parse_select_names_and_clauses():
+    parsed = parse_select(
+        "SELECT service, COUNT(*), AVG(duration_ms)::numeric, l.path p, CASE WHEN 1 = 1 THEN 1 END "
+        "FROM logs l WHERE level = 'ERROR' GROUP BY 1, 4 ORDER BY 2 DESC NULLS LAST LIMIT 10;"
+    )
+    assert [item.name for item in parsed.items] == ["service", "count", "avg", "p", "case"]
+    assert [direction for _, direction in parsed.order_by] == ["DESC NULLS LAST"]
+    assert parsed.limit == 10 and parsed.offset == 0
+
+
+@pytest.mark.asyncio
+async def test_empty_shards_and_duplicate_column_names():
+    pools = [FakePool(make_db([])), FakePool(make_db(make_rows(10)))]
+    router = ShardRouter(pools, "time")
+
+    assert await router.fetch("SELECT COUNT(*) AS n, SUM(duration_ms) AS total FROM logs WHERE id < 0") == \
+        [{"n": 0, "total": None}]
+    rows = await router.fetch("SELECT a.id, b.id FROM logs a JOIN logs b ON a.id = b.id + 1 ORDER BY 1 LIMIT 2")
+    assert rows == [{"id": 0}, {"id": 1}]
+
+
+def test_merge_keeps_lists_and_bytea_intact():
+    plan = plan_fanout("SELECT tags, payload, elapsed FROM logs ORDER BY elapsed", "time")
+    columns = [("tags", "_text"), ("payload", "bytea"), ("elapsed", "interval"), ("__o0", "interval")]
+    first = (["a, b", "c"], b"\x00\xff,\"", timedelta(seconds=2))
+    second = (['say "hi"', None, "[x]", "it's \\"], None, timedelta(seconds=1))
+    third = (None, b"", None)
+    # shard-local plan: every row also carries its ORDER BY value as __o0
+    results = [
+        ShardResult(columns, [(*row, row[2]) for row in shard]) for shard in ([first], [second, third])
+    ]
+
+    assert merge_results(plan, results) == [
+        {"tags": ['say "hi"', None, "[x]", "it's \\"], "payload": None, "elapsed": timedelta(seconds=1)},
+        {"tags": ["a, b", "c"], "payload": b"\x00\xff,\"", "elapsed": timedelta(seconds=2)},
+        {"tags": None, "payload": b"", "elapsed": None},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_repository_uses_router_only_when_sharded():
+    class FakeRouter:
+        async def fetch(self, sql, *args):
+            return [{"n": 42}]
+
+    pool = FakePool(make_db(make_rows(3)))
+    assert await BaseRepository(pool).execute_sharded("SELECT COUNT(*) AS n FROM logs") == [{"n": 3}]
+    assert await BaseRepository(pool, FakeRouter()).execute_sharded_single("SELECT 1") == 42
+
+
+def test_parse_shard_dsns():
+    assert parse_shard_dsns("") == []
+    assert parse_shard_dsns("postgresql://a/logs_db, postgresql://b/logs_db") == [
+        "postgresql://a/logs_db", "postgresql://b/logs_db"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_run_each_gets_one_connection_per_shard(rows):
+    router = ShardRouter(shard_pools(rows, 3, "service"), "service")
+
+    async def count(conn):
+        return (await conn.fetch("SELECT COUNT(*) AS n FROM logs"))[0]["n"]
+
+    assert sum(await router.run_each(count)) == len(rows)
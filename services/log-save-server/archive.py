@@ -0,0 +1,261 @@
+"""
+콜드 티어 아카이브 (오래된 logs 파티션 → Parquet)
+
+ARCHIVE_AFTER_DAYS가 지난 파티션을 zstd 압축 Parquet으로 내보낸 뒤 DETACH + DROP 합니다.
+log-analysis-server는 조회 시간 범위가 콜드 구간에 걸치면 DuckDB로 이 파일을 읽습니다.
+
+- 경로: ARCHIVE_PATH (로컬 디렉터리 또는 s3://bucket/prefix, S3 호환 저장소는 ARCHIVE_S3_*)
+- 레이아웃: {ARCHIVE_PATH}/logs/day=YYYY-MM-DD/service=이름/{파티션}_N.parquet (hive 파티션)
+- soft delete(deleted = TRUE) 행은 내보내지 않음
+- 지문으로 저장된 스택 트레이스는 stack_traces에서 본문을 채워 내보냄 (Parquet만으로 조회 가능)
+- 내보낸 행 수, Parquet 행 수, 분리 후 파티션 행 수가 모두 같을 때만
+  archived_partitions 기록 + 파티션 DROP (한 트랜잭션, 다르면 롤백 후 다음 실행에서 재시도)
+- 파일 이름에 파티션 이름이 들어가므로 중간에 실패해도 다음 실행에서 같은 파일을 덮어씀
+  (샤드 1 이상은 shardN_ 접두사를 붙여 같은 이름의 파티션이 서로 덮어쓰지 않음)
+- 구간 끝이 있는 파티션만 대상 (logs_default 제외, 마이그레이션의 logs_legacy는 포함)
+- 롤업 테이블(logs_rollup_*)은 그대로 남으므로 집계 질문은 계속 PostgreSQL에서 답함
+"""
+
+import asyncio
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+from partitions import LOCK_TIMEOUT, Partition, list_partitions
+from records import LOG_COLUMNS
+
+try:
+    import duckdb
+except ImportError:  # 콜드 티어는 선택 사항
+    duckdb = None
+
+ARCHIVE_PATH = os.getenv("ARCHIVE_PATH", "/data/archive").rstrip("/")
+
+# S3 호환 저장소 (MinIO 등은 ENDPOINT + path 스타일)
+ARCHIVE_S3_ENDPOINT = os.getenv("ARCHIVE_S3_ENDPOINT", "")
+ARCHIVE_S3_REGION = os.getenv("ARCHIVE_S3_REGION", "us-east-1")
+ARCHIVE_S3_ACCESS_KEY_ID = os.getenv("ARCHIVE_S3_ACCESS_KEY_ID", "")
+ARCHIVE_S3_SECRET_ACCESS_KEY = os.getenv("ARCHIVE_S3_SECRET_ACCESS_KEY", "")
+ARCHIVE_S3_USE_SSL = os.getenv("ARCHIVE_S3_USE_SSL", "true").lower() == "true"
+
+# pg_try_advisory_lock 키 (파티션 관리 / 롤업 갱신과 다른 키)
+ADVISORY_LOCK_KEY = 72_014
+
+ARCHIVE_COLUMNS = ['id', *LOG_COLUMNS]
+
+# PostgreSQL CSV → DuckDB 타입 (ENUM은 VARCHAR)
+PARQUET_TYPES = {
+    'id': 'BIGINT',
+    'created_at': 'TIMESTAMPTZ',
+    'duration_ms': 'DECIMAL(10,3)',
+    'deleted': 'BOOLEAN',
+    'metadata': 'JSON',
+}
+
+RECORD_SQL = """
+    INSERT INTO archived_partitions (partition_name, range_start, range_end, row_count, location)
+    VALUES ($1, $2, $3, $4, $5)
+    ON CONFLICT (partition_name) DO UPDATE SET
+        row_count = EXCLUDED.row_count,
+        location = EXCLUDED.location,
+        archived_at = NOW()
+"""
+
+
+def duckdb_available() -> bool:
+    return duckdb is not None
+
+
+def logs_location(path: str = ARCHIVE_PATH) -> str:
+    """Parquet 루트 (hive 파티션 디렉터리의 부모)"""
+    return f"{path}/logs"
+
+
+def archive_candidates(existing: Sequence[Partition], now: datetime, after_days: float) -> List[Partition]:
+    """
+    구간 끝이 ARCHIVE_AFTER_DAYS보다 오래된 파티션 (오래된 순)
+
+    Returns:
+        after_days <= 0이면 빈 목록
+    """
+    if after_days <= 0:
+        return []
+    cutoff = now - timedelta(days=after_days)
+    candidates = [
+        partition for partition in existing
+        if not partition.is_default and partition.end is not None and partition.end <= cutoff
+    ]
+    return sorted(candidates, key=lambda partition: partition.end)
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def duckdb_connection(path: str = ARCHIVE_PATH) -> Any:
+    """
+    UTC 기준 DuckDB 연결 (s3:// 경로면 httpfs + ARCHIVE_S3_* 자격 증명)
+
+    Raises:
+        RuntimeError: duckdb 패키지가 없음
+    """
+    if duckdb is None:
+        raise RuntimeError("duckdb is not installed (pip install duckdb)")
+    con = duckdb.connect()
+    con.execute("SET TimeZone = 'UTC'")
+    if path.startswith("s3://"):
+        con.execute("INSTALL httpfs")
+        con.execute("LOAD httpfs")
+        options = [f"REGION {_quote(ARCHIVE_S3_REGION)}", f"USE_SSL {str(ARCHIVE_S3_USE_SSL).lower()}"]
+        if ARCHIVE_S3_ACCESS_KEY_ID:
+            options += [f"KEY_ID {_quote(ARCHIVE_S3_ACCESS_KEY_ID)}",
+                        f"SECRET {_quote(ARCHIVE_S3_SECRET_ACCESS_KEY)}"]
+        if ARCHIVE_S3_ENDPOINT:
+            options += [f"ENDPOINT {_quote(ARCHIVE_S3_ENDPOINT)}", "URL_STYLE 'path'"]
+        con.execute(f"CREATE SECRET archive (TYPE S3, {', '.join(options)})")
+    return con
+
+
+def write_parquet(csv_path: str, partition_name: str, path: str = ARCHIVE_PATH, file_prefix: str = '') -> int:
+    """
+    PostgreSQL CSV → day / service로 나눈 Parquet (동기, 스레드에서 실행)
+
+    Args:
+        file_prefix: 파일 이름 접두사 (샤드마다 다르게)
+
+    Returns:
+        파티션 이름으로 쓰인 Parquet 파일 전체의 행 수 (검증용)
+    """
+    stem = file_prefix + partition_name
+    location = logs_location(path)
+    if not location.startswith("s3://"):
+        os.makedirs(location, exist_ok=True)
+
+    columns = {column: PARQUET_TYPES.get(column, 'VARCHAR') for column in ARCHIVE_COLUMNS}
+    con = duckdb_connection(path)
+    try:
+        # PostgreSQL CSV: 따옴표 없는 빈 값만 NULL, "" 는 빈 문자열
+        con.execute(f"""
+            COPY (
+                SELECT *, strftime(created_at, '%Y-%m-%d') AS day
+                FROM read_csv({_quote(csv_path)}, header = false, columns = {columns!r},
+                              quote = '"', escape = '"', allow_quoted_nulls = false)
+            )
+            TO {_quote(location)} (
+                FORMAT PARQUET, COMPRESSION ZSTD, PARTITION_BY (day, service),
+                FILENAME_PATTERN {_quote(stem + '_{i}')}, OVERWRITE_OR_IGNORE
+            )
+        """)
+        return con.execute(
+            f"SELECT COUNT(*) FROM read_parquet({_quote(f'{location}/**/{stem}_*.parquet')})"
+        ).fetchone()[0]
+    finally:
+        con.close()
+
+
+def export_query(partition_name: str, stack_traces: bool = False) -> str:
+    """
+    파티션의 삭제되지 않은 행 (ARCHIVE_COLUMNS 순서)
+
+    Args:
+        stack_traces: stack_traces 테이블이 있음 (지문만 남은 행의 트레이스 본문을 채움)
+    """
+    if not stack_traces:
+        return f"SELECT {', '.join(ARCHIVE_COLUMNS)} FROM {partition_name} WHERE deleted = FALSE"
+    columns = [
+        "COALESCE(st.stack_trace, l.stack_trace)" if column == 'stack_trace' else f"l.{column}"
+        for column in ARCHIVE_COLUMNS
+    ]
+    return (
+        f"SELECT {', '.join(columns)} FROM {partition_name} l "
+        f"LEFT JOIN stack_traces st ON st.hash = l.stack_trace_hash WHERE l.deleted = FALSE"
+    )
+
+
+async def export_partition(conn: Any, partition_name: str, csv_path: str, stack_traces: bool = False) -> int:
+    """
+    파티션의 삭제되지 않은 행을 CSV로 내보내기 (타임스탬프는 UTC)
+
+    Returns:
+        내보낸 행 수
+    """
+    async with conn.transaction():
+        await conn.execute("SET LOCAL TimeZone = 'UTC'")
+        status = await conn.copy_from_query(
+            export_query(partition_name, stack_traces),
+            output=csv_path,
+            format='csv'
+        )
+    return int(status.split()[-1])
+
+
+async def archive_partition(
+    conn: Any,
+    partition: Partition,
+    path: str = ARCHIVE_PATH,
+    stack_traces: bool = False,
+    file_prefix: str = ''
+) -> int:
+    """
+    파티션 하나를 Parquet으로 옮기고 DROP
+
+    Returns:
+        아카이브한 행 수
+
+    Raises:
+        RuntimeError: 내보낸 행 수와 Parquet 행 수가 다름 (파티션은 그대로 유지)
+    """
+    with tempfile.TemporaryDirectory(prefix="logs-archive-") as tmp_dir:
+        csv_path = os.path.join(tmp_dir, f"{partition.name}.csv")
+        exported = await export_partition(conn, partition.name, csv_path, stack_traces)
+        written = (
+            await asyncio.to_thread(write_parquet, csv_path, partition.name, path, file_prefix) if exported else 0
+        )
+
+    if written != exported:
+        raise RuntimeError(f"{partition.name}: exported {exported} rows but Parquet has {written}")
+
+    # 분리한 뒤 다시 세어 내보낸 이후 늦게 들어온 행이 없는지 확인 (있으면 롤백 후 다음 실행에서 재시도)
+    async with conn.transaction():
+        await conn.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+        await conn.execute(f"ALTER TABLE logs DETACH PARTITION {partition.name}")
+        current = await conn.fetchval(f"SELECT COUNT(*) FROM {partition.name} WHERE deleted = FALSE")
+        if current != exported:
+            raise RuntimeError(f"{partition.name}: rows changed during archive ({exported} → {current})")
+        await conn.execute(RECORD_SQL, partition.name, partition.start, partition.end,
+                           exported, logs_location(path))
+        await conn.execute(f"DROP TABLE {partition.name}")
+    return exported
+
+
+async def archive_partitions(
+    conn: Any,
+    after_days: float,
+    path: str = ARCHIVE_PATH,
+    now: Optional[datetime] = None,
+    file_prefix: str = ''
+) -> Dict[str, Any]:
+    """
+    오래된 파티션 아카이브 한 번 실행 (file_prefix: 샤드별 Parquet 파일 이름 접두사)
+
+    Returns:
+        {"archived": {파티션: 행 수}, "skipped": 사유 또는 None}
+    """
+    now = now or datetime.now(timezone.utc)
+    result: Dict[str, Any] = {"archived": {}, "skipped": None}
+
+    if not await conn.fetchval("SELECT pg_try_advisory_lock($1)", ADVISORY_LOCK_KEY):
+        result["skipped"] = "another server is archiving partitions"
+        return result
+
+    try:
+        stack_traces = bool(await conn.fetchval("SELECT to_regclass('stack_traces') IS NOT NULL"))
+        for partition in archive_candidates(await list_partitions(conn), now, after_days):
+            result["archived"][partition.name] = await archive_partition(
+                conn, partition, path, stack_traces, file_prefix
+            )
+    finally:
+        await conn.fetchval("SELECT pg_advisory_unlock($1)", ADVISORY_LOCK_KEY)
+
+    return result
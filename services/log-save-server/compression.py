@@ -0,0 +1,99 @@
+"""
+Content-Encoding 코덱
+
+- gzip: 표준 라이브러리 (항상 지원)
+- zstd: zstandard 패키지 (선택), ZSTD_DICTIONARY_PATH로 학습된 사전 공유
+- lz4: lz4 패키지 (선택, frame 포맷)
+
+클라이언트는 GET /ingest/capabilities로 지원 코덱과 zstd 사전 ID를 확인한 뒤
+자신도 지원하는 코덱 중 가장 앞선 것을 고릅니다.
+"""
+
+import os
+import zlib
+from typing import Any, Tuple
+
+try:
+    import zstandard
+except ImportError:  # zstd는 선택 사항
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # lz4는 선택 사항
+    lz4_frame = None
+
+# 학습된 zstd 사전 경로 (없으면 사전 없이 압축/해제)
+ZSTD_DICTIONARY_PATH = os.getenv("ZSTD_DICTIONARY_PATH", "")
+
+# 서버가 권장하는 순서 (CPU 대비 압축률, scripts/benchmark_codecs.py 참고)
+PREFERRED_ENCODINGS = ("zstd", "lz4", "gzip")
+
+# 코덱별 해제 오류
+CODEC_ERRORS: Tuple[type, ...] = (zlib.error,)
+if zstandard:
+    CODEC_ERRORS += (zstandard.ZstdError,)
+if lz4_frame:
+    CODEC_ERRORS += (RuntimeError,)  # lz4.frame은 RuntimeError로 실패를 알림
+
+_zstd_dictionary: Any = None
+_zstd_dictionary_loaded = False
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """이 서버가 해제할 수 있는 코덱 (PREFERRED_ENCODINGS 순서)"""
+    installed = {"gzip": True, "zstd": zstandard is not None, "lz4": lz4_frame is not None}
+    return tuple(encoding for encoding in PREFERRED_ENCODINGS if installed[encoding])
+
+
+def zstd_dictionary():
+    """
+    ZSTD_DICTIONARY_PATH의 사전 (처음 호출 시 한 번만 로드)
+
+    Returns:
+        zstandard.ZstdCompressionDict 또는 None
+    """
+    global _zstd_dictionary, _zstd_dictionary_loaded
+    if not _zstd_dictionary_loaded:
+        _zstd_dictionary_loaded = True
+        if zstandard and ZSTD_DICTIONARY_PATH:
+            with open(ZSTD_DICTIONARY_PATH, "rb") as f:
+                _zstd_dictionary = zstandard.ZstdCompressionDict(f.read())
+            print(f"✅ zstd dictionary loaded (id={_zstd_dictionary.dict_id()})")
+    return _zstd_dictionary
+
+
+def new_decompressor(encoding: str):
+    """
+    스트리밍 해제 객체 생성
+
+    Args:
+        encoding: gzip | zstd | lz4
+
+    Returns:
+        zlib / zstandard / lz4.frame 해제 객체 (identity면 None)
+    """
+    if encoding == "gzip":
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if encoding == "zstd":
+        # 사전을 지정해도 사전 없이 압축된 프레임은 그대로 해제됨
+        return zstandard.ZstdDecompressor(dict_data=zstd_dictionary()).decompressobj()
+    if encoding == "lz4":
+        return lz4_frame.LZ4FrameDecompressor()
+    return None
+
+
+def train_zstd_dictionary(samples, size: int = 16 * 1024) -> bytes:
+    """
+    로그 샘플로 zstd 사전 학습
+
+    Args:
+        samples: 샘플 목록 (bytes, 보통 로그 한 건의 JSON)
+        size: 사전 크기 (바이트)
+
+    Returns:
+        ZSTD_DICTIONARY_PATH에 저장할 사전 바이트
+    """
+    if zstandard is None:
+        raise RuntimeError("zstandard is not installed")
+    return zstandard.train_dictionary(size, list(samples)).as_bytes()
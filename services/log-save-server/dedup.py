@@ -0,0 +1,190 @@
+"""
+배치 중복 제거 (멱등 적재)
+
+클라이언트는 배치마다 UUID를 X-Batch-Id 헤더로 보내고, 재시도할 때 같은 ID를 다시 씁니다.
+커밋은 됐지만 응답이 유실된 배치가 재전송되어도 두 번 적재되지 않도록
+최근 배치 ID를 기억해 두고, 재전송에는 처음 결과를 그대로 응답합니다.
+
+- 워커 메모리 LRU: 최근 INGEST_DEDUP_WINDOW개 배치 (DB 조회 없이 처음 결과로 응답)
+- ingest_batches 테이블: 워커 간 / 재시작 후 중복 확인
+  로그 COPY와 같은 트랜잭션에서 기록하므로 커밋된 배치만 남고, 이미 기록된 배치의 레코드는
+  그 트랜잭션에서 제외 (적재 전에 따로 조회하지 않음)
+- 같은 워커에서 아직 처리 중인 배치의 재전송은 원 요청이 끝날 때까지 대기
+- INGEST_BATCH_RETENTION_HOURS가 지난 기록은 주기적으로 삭제
+"""
+
+import asyncio
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+# 배치 기록 (이미 있는 ID는 건너뜀 → RETURNING에 없는 ID가 중복)
+CLAIM_SQL = """
+    INSERT INTO ingest_batches (batch_id, accepted, rejected)
+    SELECT * FROM unnest($1::uuid[], $2::int[], $3::int[])
+    ON CONFLICT (batch_id) DO NOTHING
+    RETURNING batch_id
+"""
+
+PRUNE_SQL = "DELETE FROM ingest_batches WHERE received_at < NOW() - $1::float8 * INTERVAL '1 hour'"
+
+
+class BatchResult(NamedTuple):
+    """배치 처리 결과 (재전송 시 그대로 응답)"""
+    accepted: int
+    rejected: int
+
+
+class BatchMarker(NamedTuple):
+    """WriteBuffer에 레코드와 함께 넘기는 배치 기록 (COPY 트랜잭션에서 ingest_batches에 삽입)"""
+    batch_id: uuid.UUID
+    accepted: int
+    rejected: int
+
+
+def parse_batch_id(value: str) -> uuid.UUID:
+    """
+    X-Batch-Id 헤더 파싱
+
+    Raises:
+        ValueError: UUID 형식이 아님
+    """
+    return uuid.UUID(value.strip())
+
+
+class BatchDedup:
+    """
+    배치 ID 중복 제거 창
+
+    Example:
+        duplicate = await dedup.begin(batch_id)
+        if duplicate is not None:
+            return duplicate  # 재전송 → 적재하지 않고 처음 결과로 응답
+        try:
+            ...  # 적재
+            dedup.finish(batch_id, BatchResult(accepted, rejected))
+        finally:
+            dedup.abort(batch_id)  # 실패 시 기록하지 않음 (재시도 허용)
+    """
+
+    def __init__(self, window: int = 50000):
+        """
+        Args:
+            window: 메모리에 기억할 최근 배치 수
+        """
+        self.window = window
+        self._completed: "OrderedDict[uuid.UUID, BatchResult]" = OrderedDict()
+        self._inflight: Dict[uuid.UUID, asyncio.Future] = {}
+
+        # ingest_batches 테이블 사용 여부 (시작 시 테이블 존재 확인 후 설정)
+        self.persistent = False
+
+        # 통계
+        self.duplicates = 0
+
+    async def begin(self, batch_id: uuid.UUID) -> Optional[BatchResult]:
+        """
+        배치 처리 시작
+
+        Args:
+            batch_id: 배치 ID
+
+        Returns:
+            이미 처리된 배치면 처음 결과, 새 배치면 None (이후 finish 또는 abort 호출)
+        """
+        while True:
+            result = self._completed.get(batch_id)
+            if result is not None:
+                self._completed.move_to_end(batch_id)
+                self.duplicates += 1
+                return result
+
+            inflight = self._inflight.get(batch_id)
+            if inflight is None:
+                break
+            # 원 요청이 끝나면 다시 확인 (실패했으면 이 요청이 이어서 처리)
+            await asyncio.shield(inflight)
+
+        self._inflight[batch_id] = asyncio.get_running_loop().create_future()
+        return None
+
+    def finish(self, batch_id: uuid.UUID, result: BatchResult) -> None:
+        """배치 적재 완료 (이후 재전송은 중복으로 응답)"""
+        self._completed[batch_id] = result
+        self._completed.move_to_end(batch_id)
+        while len(self._completed) > self.window:
+            self._completed.popitem(last=False)
+        self._release(batch_id)
+
+    def abort(self, batch_id: uuid.UUID) -> None:
+        """배치 적재 실패 (기록하지 않으므로 재전송 시 다시 처리)"""
+        self._release(batch_id)
+
+    def _release(self, batch_id: uuid.UUID) -> None:
+        inflight = self._inflight.pop(batch_id, None)
+        if inflight is not None and not inflight.done():
+            inflight.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        """중복 제거 창 상태"""
+        return {
+            "window": self.window,
+            "remembered_batches": len(self._completed),
+            "inflight_batches": len(self._inflight),
+            "duplicates": self.duplicates,
+            "persistent": self.persistent
+        }
+
+
+async def claim_batches(conn: Any, markers: Sequence[BatchMarker]) -> Set[uuid.UUID]:
+    """
+    배치 기록 삽입 (COPY와 같은 트랜잭션 안에서 호출)
+
+    다른 워커가 같은 배치를 동시에 적재 중이면 그 트랜잭션이 끝날 때까지
+    기본 키에서 대기하므로, 한 배치는 한 번만 기록됩니다.
+
+    Returns:
+        이번에 기록된 배치 ID (나머지는 이미 커밋된 중복)
+    """
+    rows = await conn.fetch(
+        CLAIM_SQL,
+        [marker.batch_id for marker in markers],
+        [marker.accepted for marker in markers],
+        [marker.rejected for marker in markers]
+    )
+    return {row["batch_id"] for row in rows}
+
+
+def drop_unclaimed(
+    records: List[Tuple],
+    batches: Sequence[Tuple[BatchMarker, int, int]],
+    claimed: Set[uuid.UUID]
+) -> List[Tuple]:
+    """
+    중복으로 판정된 배치의 레코드 제거
+
+    Args:
+        records: flush할 레코드 (여러 요청이 합쳐진 목록)
+        batches: (배치 기록, 시작 인덱스, 끝 인덱스) - WriteBuffer가 넘겨줌
+        claimed: claim_batches()가 기록한 배치 ID
+    """
+    duplicate_ranges = [
+        (start, end) for marker, start, end in batches
+        if marker.batch_id not in claimed
+    ]
+    if not duplicate_ranges:
+        return records
+
+    kept: List[Tuple] = []
+    position = 0
+    for start, end in sorted(duplicate_ranges):
+        kept.extend(records[position:start])
+        position = end
+    kept.extend(records[position:])
+    return kept
+
+
+async def prune_batches(conn: Any, retention_hours: float) -> int:
+    """보관 기간이 지난 배치 기록 삭제"""
+    status = await conn.execute(PRUNE_SQL, retention_hours)
+    return int(status.split()[-1])
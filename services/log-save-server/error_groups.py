@@ -0,0 +1,166 @@
+"""
+에러 지문 / 에러 그룹 (logs.error_fingerprint, error_groups)
+
+에러 로그마다 적재 시점에 안정적인 지문을 계산해 logs.error_fingerprint에 저장하고,
+지문별 first_seen / last_seen / 건수를 error_groups에 COPY와 같은 트랜잭션에서 누적합니다.
+"가장 많이 발생한 에러"는 error_groups를, 기간별 집계는 error_fingerprint 인덱스를 읽으므로
+error_type + message 문자열을 GROUP BY 할 필요가 없습니다.
+
+- 에러 로그: level이 ERROR / FATAL이거나 error_type이 있는 행
+- 지문: service, error_type, 정규화한 message, 정규화한 스택 트레이스의 상위 프레임 (blake2b 64비트)
+- message 정규화: UUID, 16진수 / 긴 ID, 따옴표 안의 값, 숫자를 자리표시자로 바꿈
+- 상위 프레임: 예외가 발생한 쪽부터 TOP_FRAMES개 (Python은 마지막 프레임이 가장 안쪽)
+- 그룹의 message는 처음 들어온 원문 (이후 갱신하지 않음)
+- 적재 시점 기준이므로 soft delete(deleted = TRUE)는 건수에 반영되지 않음 (롤업과 동일)
+"""
+
+import hashlib
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from records import LOG_COLUMNS
+from stack_traces import normalize_stack_trace
+
+ERROR_LEVELS = frozenset(('ERROR', 'FATAL'))
+
+# 지문에 쓰는 스택 프레임 수
+TOP_FRAMES = 5
+
+# 그룹에 저장하는 message 최대 길이
+MAX_GROUP_MESSAGE = 1000
+
+_CREATED_AT = LOG_COLUMNS.index('created_at')
+_LEVEL = LOG_COLUMNS.index('level')
+_SERVICE = LOG_COLUMNS.index('service')
+_ERROR_TYPE = LOG_COLUMNS.index('error_type')
+_MESSAGE = LOG_COLUMNS.index('message')
+_STACK_TRACE = LOG_COLUMNS.index('stack_trace')
+
+# (패턴, 치환) - 같은 에러에서 발생마다 달라지는 값 (순서대로 적용)
+_MESSAGE_NORMALIZERS = (
+    (re.compile(r'\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b'), '<uuid>'),
+    (re.compile(r'0x[0-9a-fA-F]+'), '0x?'),
+    (re.compile(r'\b(?=[0-9a-fA-F]*\d)[0-9a-fA-F]{12,}\b'), '<id>'),   # 해시 / 토큰 / ObjectId
+    (re.compile(r"'[^'\n]{0,200}'|\"[^\"\n]{0,200}\""), "'?'"),
+    (re.compile(r'\d+(?:\.\d+)?'), 'N'),
+)
+
+_FRAME_LINE = re.compile(r'^\s*(?:at |File ")')
+
+# 그룹 누적 (워커 간 잠금 순서를 맞추도록 지문 순서로 정렬해 전달)
+UPSERT_SQL = """
+    INSERT INTO error_groups AS g (
+        fingerprint, service, error_type, message, first_seen, last_seen, event_count
+    )
+    SELECT * FROM unnest(
+        $1::bigint[], $2::varchar[], $3::varchar[], $4::text[],
+        $5::timestamptz[], $6::timestamptz[], $7::bigint[]
+    )
+    ON CONFLICT (fingerprint) DO UPDATE SET
+        first_seen = LEAST(g.first_seen, EXCLUDED.first_seen),
+        last_seen = GREATEST(g.last_seen, EXCLUDED.last_seen),
+        event_count = g.event_count + EXCLUDED.event_count
+"""
+
+
+def normalize_message(message: str) -> str:
+    """발생마다 달라지는 값을 지운 message"""
+    for pattern, replacement in _MESSAGE_NORMALIZERS:
+        message = pattern.sub(replacement, message)
+    return message.strip()
+
+
+def top_frames(stack_trace: Optional[str], count: int = TOP_FRAMES) -> List[str]:
+    """
+    정규화한 트레이스에서 예외가 발생한 쪽 프레임 count개
+
+    프레임 줄("at ...", 'File "..."')이 없으면 앞쪽 count줄을 사용합니다.
+    """
+    if not stack_trace:
+        return []
+    lines = [line.strip() for line in normalize_stack_trace(stack_trace).splitlines() if line.strip()]
+    frames = [line for line in lines if _FRAME_LINE.match(line)]
+    if not frames:
+        return lines[:count]
+    # Python traceback은 가장 안쪽 프레임이 마지막
+    if lines[0].startswith('Traceback'):
+        return frames[-count:]
+    return frames[:count]
+
+
+def error_fingerprint(service: str, error_type: Optional[str], message: str, stack_trace: Optional[str]) -> int:
+    """에러 지문 (BIGINT 범위의 부호 있는 정수)"""
+    parts = [service, error_type or '', normalize_message(message), *top_frames(stack_trace)]
+    digest = hashlib.blake2b('\x1f'.join(parts).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def is_error(record: Tuple) -> bool:
+    return record[_LEVEL] in ERROR_LEVELS or record[_ERROR_TYPE] is not None
+
+
+def fingerprint_records(records: List[Tuple]) -> Optional[List[Optional[int]]]:
+    """
+    레코드별 에러 지문 (stack_trace를 지문으로 바꾸기 전의 LOG_COLUMNS 레코드)
+
+    Returns:
+        레코드와 같은 순서의 지문 목록 (에러가 아닌 행은 None), 에러 행이 없으면 None
+    """
+    # 같은 에러는 같은 문자열로 반복되므로 배치 안에서는 한 번만 계산
+    seen: Dict[Tuple, int] = {}
+    fingerprints: List[Optional[int]] = []
+    append = fingerprints.append
+    found = False
+    for record in records:
+        if not is_error(record):
+            append(None)
+            continue
+        key = (record[_SERVICE], record[_ERROR_TYPE], record[_MESSAGE], record[_STACK_TRACE])
+        value = seen.get(key)
+        if value is None:
+            value = seen[key] = error_fingerprint(*key)
+        append(value)
+        found = True
+    return fingerprints if found else None
+
+
+def aggregate(records: List[Tuple]) -> List[Tuple]:
+    """
+    마지막 컬럼이 error_fingerprint인 COPY 레코드 → 그룹 행
+
+    Returns:
+        지문 순서로 정렬한 (지문, service, error_type, message, first_seen, last_seen, 건수) 목록
+    """
+    groups: Dict[int, List[Any]] = {}
+    for record in records:
+        value = record[-1]
+        if value is None:
+            continue
+        created_at: datetime = record[_CREATED_AT]
+        group = groups.get(value)
+        if group is None:
+            groups[value] = [
+                record[_SERVICE], record[_ERROR_TYPE] or '', record[_MESSAGE][:MAX_GROUP_MESSAGE],
+                created_at, created_at, 1
+            ]
+            continue
+        if created_at < group[3]:
+            group[3] = created_at
+        elif created_at > group[4]:
+            group[4] = created_at
+        group[5] += 1
+    return [(value, *group) for value, group in sorted(groups.items())]
+
+
+async def upsert_error_groups(conn: Any, records: List[Tuple]) -> int:
+    """
+    레코드를 지문별로 집계해 error_groups에 누적 (COPY와 같은 트랜잭션 안에서 호출)
+
+    Returns:
+        갱신한 그룹 수
+    """
+    rows = aggregate(records)
+    if rows:
+        await conn.execute(UPSERT_SQL, *(list(column) for column in zip(*rows)))
+    return len(rows)
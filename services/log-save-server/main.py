@@ -3,48 +3,67 @@ FastAPI 로그 수집 서버
 
 기능:
 - POST /logs (배치 전송 지원)
-- gzip 압축 처리
 - PostgreSQL COPY (bulk insert)
 - Connection Pool
+- Write-behind 버퍼 (여러 요청을 모아 큰 COPY 한 번으로 flush)
+- 스트리밍 파싱 (청크 단위 gzip 해제 + logs 배열 증분 파싱)
+- 행 단위 스키마 검증 (잘못된 행만 거부, orjson 디코딩)
+- POST /logs/stream (NDJSON 스트리밍 업로드)
+- gzip / zstd / lz4 Content-Encoding (GET /ingest/capabilities로 협상, zstd 공유 사전)
+- 멱등 배치 적재 (X-Batch-Id 헤더, 재전송은 다시 적재하지 않고 처음 결과로 응답)
+- 분당 롤업 (logs_rollup_1m, COPY와 같은 트랜잭션에서 upsert)
+- 스택 트레이스 중복 제거 (stack_traces에 지문당 한 번 저장, logs에는 지문만)
+- 에러 그룹 (적재 시점 에러 지문 + error_groups 누적, COPY와 같은 트랜잭션)
+- 시간 / 일 롤업 (logs_rollup_1h / 1d, 워터마크부터 증분 재집계)
+- logs 파티션 관리 (created_at 범위 파티션 미리 생성, 보관 기간이 지난 파티션 DROP)
+- 콜드 티어 아카이브 (오래된 파티션 → Parquet, 로컬 디렉터리 또는 S3 호환 저장소)
+- 샤드 적재 (DATABASE_SHARDS, service 해시 또는 시간 구간으로 여러 PostgreSQL 노드에 분산)
+- 멀티 프로세스 워커 (WEB_CONCURRENCY, SO_REUSEPORT)
 """
 
-import gzip
-import json
-from datetime import datetime
-from typing import List, Dict, Any, Optional
+import asyncio
+import os
+import time
+import uuid
+from contextlib import AsyncExitStack
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Tuple
 
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 import asyncpg
-from pydantic import BaseModel, Field
-
-
-# Pydantic 모델
-class LogEntry(BaseModel):
-    level: str
-    message: str
-    created_at: Optional[float] = None  # Unix timestamp
-    log_type: Optional[str] = None
-    service: Optional[str] = None
-    environment: Optional[str] = "development"
-    service_version: Optional[str] = "v0.0.0-dev"
-    trace_id: Optional[str] = None
-    user_id: Optional[str] = None
-    session_id: Optional[str] = None
-    error_type: Optional[str] = None
-    stack_trace: Optional[str] = None
-    path: Optional[str] = None
-    method: Optional[str] = None
-    action_type: Optional[str] = None
-    function_name: Optional[str] = None
-    file_path: Optional[str] = None
-    duration_ms: Optional[float] = None
-    metadata: Optional[Dict[str, Any]] = None
-
-
-class LogBatch(BaseModel):
-    logs: List[LogEntry]
+
+from archive import archive_partitions, duckdb_available, logs_location
+from compression import available_encodings, zstd_dictionary
+from dedup import (
+    BatchDedup,
+    BatchMarker,
+    BatchResult,
+    claim_batches,
+    drop_unclaimed,
+    parse_batch_id,
+    prune_batches
+)
+from error_groups import fingerprint_records, upsert_error_groups
+from partitions import maintain_partitions, partition_range
+from rollup import STATS_SQL_ROLLUP, upsert_rollups
+from rollup_refresh import refresh_rollups
+from shards import ShardMap, merge_counts, parse_shard_dsns
+from stack_traces import StackTraceCache, store_stack_traces
+from records import LOG_COLUMNS, MAX_REJECTED_DETAILS, build_records, normalize_logs
+from write_buffer import WriteBuffer, BufferFullError
+from workers import ThroughputMeter, pool_size_for_worker, worker_count, worker_id
+from streaming import (
+    StreamDecoder,
+    LogDocumentParser,
+    ColumnarParser,
+    COLUMNAR_CONTENT_TYPE,
+    NdjsonParser,
+    InvalidPayloadError,
+    PayloadTooLargeError,
+    iter_with_idle
+)
 
 
 # FastAPI 앱
@@ -59,37 +78,332 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# DB Connection Pool
+# 스트리밍 파싱 설정
+MAX_DECOMPRESSED_BYTES = int(os.getenv("MAX_DECOMPRESSED_BYTES", str(64 * 1024 * 1024)))
+MAX_LOG_ENTRY_CHARS = int(os.getenv("MAX_LOG_ENTRY_CHARS", str(1024 * 1024)))
+STREAM_SUBMIT_ROWS = int(os.getenv("STREAM_SUBMIT_ROWS", "1000"))
+# 이 크기 이하의 본문은 스트리밍 대신 orjson으로 한 번에 디코딩
+FAST_DECODE_MAX_BYTES = int(os.getenv("FAST_DECODE_MAX_BYTES", str(2 * 1024 * 1024)))
+
+# NDJSON 스트리밍 업로드 설정
+# 유휴 적재 주기 (ms): 행이 드물게 들어와도 이 시간 안에 버퍼로 넘김
+STREAM_SUBMIT_INTERVAL_MS = int(os.getenv("STREAM_SUBMIT_INTERVAL_MS", "200"))
+# 업로드 하나의 최대 해제 크기 (0이면 제한 없음, 메모리는 줄 단위로 일정)
+NDJSON_MAX_BYTES = int(os.getenv("NDJSON_MAX_BYTES", "0"))
+
+# 배치 중복 제거 (X-Batch-Id)
+# 워커 메모리에 기억할 최근 배치 수, ingest_batches 보관 기간 (시간)
+INGEST_DEDUP_WINDOW = int(os.getenv("INGEST_DEDUP_WINDOW", "50000"))
+INGEST_BATCH_RETENTION_HOURS = float(os.getenv("INGEST_BATCH_RETENTION_HOURS", "24"))
+batch_dedup = BatchDedup(window=INGEST_DEDUP_WINDOW)
+_prune_task: Optional[asyncio.Task] = None
+
+# 분당 롤업 (logs_rollup_1m 테이블이 있을 때만 사용)
+ROLLUP_ENABLED = os.getenv("ROLLUP_ENABLED", "true").lower() == "true"
+rollups_active = False
+
+# 스택 트레이스 중복 제거 (stack_traces 테이블이 있을 때만 사용)
+STACK_TRACE_DEDUP = os.getenv("STACK_TRACE_DEDUP", "true").lower() == "true"
+STACK_TRACE_CACHE_SIZE = int(os.getenv("STACK_TRACE_CACHE_SIZE", "100000"))
+stack_trace_cache = StackTraceCache(size=STACK_TRACE_CACHE_SIZE)
+# 샤드마다 저장한 지문이 다르므로 캐시도 샤드별 (0번 = stack_trace_cache)
+stack_trace_caches: List[StackTraceCache] = [stack_trace_cache]
+stack_traces_active = False
+
+# 에러 지문 / 그룹 (error_groups 테이블이 있을 때만 사용)
+ERROR_GROUPS_ENABLED = os.getenv("ERROR_GROUPS_ENABLED", "true").lower() == "true"
+error_groups_active = False
+
+# logs 파티션 관리 (logs가 파티션 테이블일 때, 워커 0번만 실행)
+PARTITION_INTERVAL = os.getenv("PARTITION_INTERVAL", "daily").lower()
+PARTITION_PREMAKE = int(os.getenv("PARTITION_PREMAKE", "3"))
+# 보관 기간 (일, 0이면 삭제하지 않음)
+LOG_RETENTION_DAYS = float(os.getenv("LOG_RETENTION_DAYS", "0"))
+PARTITION_MAINTENANCE_INTERVAL = float(os.getenv("PARTITION_MAINTENANCE_INTERVAL", "3600"))
+_partition_task: Optional[asyncio.Task] = None
+
+# 시간 / 일 롤업 증분 갱신 (logs_rollup_1m과 logs_rollup_1h가 있을 때, 워커 0번만 실행)
+ROLLUP_REFRESH_INTERVAL = float(os.getenv("ROLLUP_REFRESH_INTERVAL", "300"))
+# 워터마크 이전 버킷을 다시 계산할 시간 (늦게 도착한 로그 반영)
+ROLLUP_LATE_MINUTES = float(os.getenv("ROLLUP_LATE_MINUTES", "120"))
+_rollup_refresh_task: Optional[asyncio.Task] = None
+
+# 콜드 티어 아카이브 (logs가 파티션 테이블이고 archived_partitions가 있을 때, 워커 0번만 실행)
+ARCHIVE_ENABLED = os.getenv("ARCHIVE_ENABLED", "false").lower() == "true"
+ARCHIVE_AFTER_DAYS = float(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+ARCHIVE_INTERVAL = float(os.getenv("ARCHIVE_INTERVAL", "3600"))
+_archive_task: Optional[asyncio.Task] = None
+
+# 샤드 (DATABASE_SHARDS: 기본 DB 외에 추가할 노드의 DSN, 쉼표로 구분, 순서 = 샤드 1..N-1)
+DATABASE_SHARDS = parse_shard_dsns(os.getenv("DATABASE_SHARDS", ""))
+SHARD_BY = os.getenv("SHARD_BY", "service").lower()
+SHARD_TIME_BUCKET_HOURS = float(os.getenv("SHARD_TIME_BUCKET_HOURS", "24"))
+shard_map: Optional[ShardMap] = None
+
+# DB Connection Pool (pool = 샤드 0, ingest_batches / 배치 조회는 여기만 사용)
 pool: Optional[asyncpg.Pool] = None
+shard_pools: List[asyncpg.Pool] = []
+
+# Write-behind 버퍼
+write_buffer: Optional[WriteBuffer] = None
+
+# 워커 처리량 (INGEST_STATS_INTERVAL초마다 로그 출력, 0이면 비활성화)
+INGEST_STATS_INTERVAL = float(os.getenv("INGEST_STATS_INTERVAL", "60"))
+throughput = ThroughputMeter()
+_stats_task: Optional[asyncio.Task] = None
 
 
 @app.on_event("startup")
 async def startup():
-    """서버 시작 시 DB Connection Pool 생성"""
-    import os
-
-    global pool
+    """서버 시작 시 DB Connection Pool 및 Write-behind 버퍼 생성"""
+    global pool, write_buffer, _stats_task, _prune_task, _partition_task, _rollup_refresh_task, _archive_task
+    global rollups_active, stack_traces_active, error_groups_active, shard_map, shard_pools
+
+    # 잘못된 PARTITION_INTERVAL / SHARD_BY는 시작 시점에 실패
+    partition_range(datetime.now(timezone.utc), PARTITION_INTERVAL)
+    if DATABASE_SHARDS:
+        shard_map = ShardMap(1 + len(DATABASE_SHARDS), SHARD_BY, SHARD_TIME_BUCKET_HOURS)
+
+    # 워커 수 × max_size ≤ DB_CONNECTION_BUDGET
+    min_size, max_size = pool_size_for_worker(
+        int(os.getenv("DB_POOL_MIN_SIZE", "10")),
+        int(os.getenv("DB_POOL_MAX_SIZE", "20")),
+        worker_count(),
+        int(os.getenv("DB_CONNECTION_BUDGET", "0"))
+    )
     pool = await asyncpg.create_pool(
         host=os.getenv("DATABASE_HOST", "localhost"),
         port=int(os.getenv("DATABASE_PORT", "5432")),
         database=os.getenv("DATABASE_NAME", "logs_db"),
         user=os.getenv("DATABASE_USER", "postgres"),
         password=os.getenv("DATABASE_PASSWORD", "password"),
-        min_size=int(os.getenv("DB_POOL_MIN_SIZE", "10")),
-        max_size=int(os.getenv("DB_POOL_MAX_SIZE", "20"))
+        min_size=min_size,
+        max_size=max_size
     )
-    print("✅ Database connection pool created")
+    print(f"✅ Database connection pool created (worker={worker_id()}, max_size={max_size})")
+
+    shard_pools = [pool]
+    for dsn in DATABASE_SHARDS:
+        shard_pools.append(await asyncpg.create_pool(dsn, min_size=min_size, max_size=max_size))
+    stack_trace_caches[1:] = [StackTraceCache(size=STACK_TRACE_CACHE_SIZE) for _ in DATABASE_SHARDS]
+    if shard_map is not None:
+        print(f"✅ Shards: {shard_map.count} databases by {shard_map.key} (ingest_batches on shard 0)")
+
+    write_buffer = WriteBuffer(
+        copy_records,
+        flush_rows=int(os.getenv("WRITE_BUFFER_FLUSH_ROWS", "5000")),
+        flush_interval_ms=int(os.getenv("WRITE_BUFFER_FLUSH_INTERVAL_MS", "200")),
+        max_rows=int(os.getenv("WRITE_BUFFER_MAX_ROWS", "100000")),
+        durability=os.getenv("WRITE_BUFFER_DURABILITY", "commit").lower()
+    )
+    await write_buffer.start()
+    print(f"✅ Write buffer started (durability={write_buffer.durability})")
+
+    # ingest_batches가 없는 기존 DB에서는 메모리 중복 제거만 사용
+    # (database/migrations/001_ingest_batches.sql 적용 시 워커 간 / 재시작 후에도 확인)
+    # 선택 테이블은 모든 샤드에 있어야 사용 (ingest_batches는 샤드 0만)
+    async with pool.acquire() as conn:
+        batch_dedup.persistent = await conn.fetchval("SELECT to_regclass('ingest_batches') IS NOT NULL")
+    rollups_active = ROLLUP_ENABLED and await table_on_all_shards('logs_rollup_1m')
+    hourly_rollups = rollups_active and await table_on_all_shards('logs_rollup_1h')
+    stack_traces_active = STACK_TRACE_DEDUP and await table_on_all_shards('stack_traces')
+    error_groups_active = ERROR_GROUPS_ENABLED and await table_on_all_shards('error_groups')
+    archive_ready = ARCHIVE_ENABLED and await table_on_all_shards('archived_partitions')
+    if batch_dedup.persistent:
+        _prune_task = asyncio.create_task(prune_ingest_batches())
+        print(f"✅ Batch dedup: ingest_batches (retention {INGEST_BATCH_RETENTION_HOURS:g}h)")
+    else:
+        print("⚠️  ingest_batches table not found, batch dedup is per-worker memory only")
+
+    if rollups_active:
+        print("✅ Rollups: logs_rollup_1m (updated with each COPY)")
+    elif ROLLUP_ENABLED:
+        print("⚠️  logs_rollup_1m table not found, rollups disabled (database/migrations/002_logs_rollup_1m.sql)")
+    if rollups_active and not hourly_rollups:
+        print("⚠️  logs_rollup_1h table not found, hourly / daily rollups disabled "
+              "(database/migrations/004_rollup_hourly_daily.sql)")
+
+    if stack_traces_active:
+        print("✅ Stack traces: stored once per fingerprint in stack_traces")
+    elif STACK_TRACE_DEDUP:
+        print("⚠️  stack_traces table not found, stack traces stored inline (database/migrations/006_stack_traces.sql)")
+
+    if error_groups_active:
+        print("✅ Error groups: error_fingerprint + error_groups (updated with each COPY)")
+    elif ERROR_GROUPS_ENABLED:
+        print("⚠️  error_groups table not found, error grouping disabled (database/migrations/007_error_groups.sql)")
+
+    # 사전 파일 오류는 첫 요청이 아닌 시작 시점에 드러나도록 미리 로드
+    zstd_dictionary()
+    print(f"✅ Content-Encoding: {', '.join(available_encodings())}")
+
+    if INGEST_STATS_INTERVAL > 0:
+        _stats_task = asyncio.create_task(report_throughput())
+
+    if worker_id() == 0 and PARTITION_MAINTENANCE_INTERVAL > 0:
+        _partition_task = asyncio.create_task(run_partition_maintenance())
+
+    if worker_id() == 0 and hourly_rollups and ROLLUP_REFRESH_INTERVAL > 0:
+        _rollup_refresh_task = asyncio.create_task(run_rollup_refresh())
+        print(f"✅ Hourly / daily rollups: refreshed every {ROLLUP_REFRESH_INTERVAL:g}s")
+
+    if ARCHIVE_ENABLED and not archive_ready:
+        print("⚠️  archived_partitions table not found, archiving disabled (database/migrations/005_archived_partitions.sql)")
+    elif ARCHIVE_ENABLED and not duckdb_available():
+        print("⚠️  duckdb is not installed, archiving disabled (pip install duckdb)")
+    elif ARCHIVE_ENABLED:
+        if 0 < LOG_RETENTION_DAYS <= ARCHIVE_AFTER_DAYS:
+            print("⚠️  LOG_RETENTION_DAYS <= ARCHIVE_AFTER_DAYS: partitions are dropped before they are archived")
+        if worker_id() == 0 and ARCHIVE_INTERVAL > 0:
+            _archive_task = asyncio.create_task(run_archiver())
+            print(f"✅ Cold tier: partitions older than {ARCHIVE_AFTER_DAYS:g} days → {logs_location()}")
 
 
 @app.on_event("shutdown")
 async def shutdown():
-    """서버 종료 시 Connection Pool 정리"""
-    global pool
+    """서버 종료 시 버퍼 flush 후 Connection Pool 정리"""
+    global pool, write_buffer, _stats_task, _prune_task, _partition_task, _rollup_refresh_task, _archive_task
+    global shard_pools
+    if _archive_task is not None:
+        _archive_task.cancel()
+        _archive_task = None
+    if _rollup_refresh_task is not None:
+        _rollup_refresh_task.cancel()
+        _rollup_refresh_task = None
+    if _partition_task is not None:
+        _partition_task.cancel()
+        _partition_task = None
+    if _stats_task is not None:
+        _stats_task.cancel()
+        _stats_task = None
+    if _prune_task is not None:
+        _prune_task.cancel()
+        _prune_task = None
+    if write_buffer is not None:
+        await write_buffer.stop()
+        write_buffer = None
+        print("✅ Write buffer flushed")
+    for shard_pool in shard_pools[1:]:
+        await shard_pool.close()
+    shard_pools = []
     if pool:
         await pool.close()
         print("✅ Database connection pool closed")
 
 
+async def table_on_all_shards(table: str) -> bool:
+    """모든 샤드에 테이블이 있는지 (샤드가 없으면 기본 DB만 확인)"""
+    for shard_pool in shard_pools:
+        async with shard_pool.acquire() as conn:
+            if not await conn.fetchval("SELECT to_regclass($1) IS NOT NULL", table):
+                return False
+    return True
+
+
+def shard_label(index: int) -> str:
+    """로그 메시지용 샤드 표시 (샤드가 없으면 빈 문자열)"""
+    return f" [shard {index}]" if shard_map is not None else ""
+
+
+async def report_throughput():
+    """워커별 처리량 주기 보고 (백그라운드 태스크)"""
+    while True:
+        await asyncio.sleep(INGEST_STATS_INTERVAL)
+        if write_buffer is None:
+            continue
+        rows_per_sec = throughput.sample(write_buffer.flushed_rows)
+        print(
+            f"📊 Worker {worker_id()} (pid {os.getpid()}): {rows_per_sec:,.0f} rows/sec, "
+            f"{write_buffer.flushed_rows:,} rows total, {len(write_buffer):,} buffered"
+        )
+
+
+async def prune_ingest_batches():
+    """보관 기간이 지난 ingest_batches 기록 삭제 (백그라운드 태스크, 1시간마다)"""
+    while True:
+        try:
+            async with pool.acquire() as conn:
+                deleted = await prune_batches(conn, INGEST_BATCH_RETENTION_HOURS)
+            if deleted:
+                print(f"🧹 Pruned {deleted:,} ingest_batches rows")
+        except Exception as e:
+            print(f"❌ ingest_batches prune failed: {e}")
+        await asyncio.sleep(3600)
+
+
+async def run_partition_maintenance():
+    """
+    파티션 미리 생성 / 만료 파티션 삭제 (백그라운드 태스크, 시작 시 + PARTITION_MAINTENANCE_INTERVAL초마다)
+
+    샤드마다 따로 실행하고, logs가 파티션 테이블이 아닌 샤드는 이후 건너뜁니다.
+    """
+    unpartitioned = set()
+    while len(unpartitioned) < len(shard_pools):
+        for index, shard_pool in enumerate(shard_pools):
+            if index in unpartitioned:
+                continue
+            label = shard_label(index)
+            try:
+                async with shard_pool.acquire() as conn:
+                    result = await maintain_partitions(
+                        conn, PARTITION_INTERVAL, PARTITION_PREMAKE, LOG_RETENTION_DAYS
+                    )
+                if result["skipped"]:
+                    print(f"ℹ️  Partition maintenance skipped{label}: {result['skipped']}")
+                    if result["skipped"] == "logs is not partitioned":
+                        unpartitioned.add(index)
+                if result["created"]:
+                    moved = f", {result['moved_rows']:,} rows moved from logs_default" if result["moved_rows"] else ""
+                    print(f"✅ Created partitions{label}: {', '.join(result['created'])}{moved}")
+                if result["dropped"]:
+                    print(f"🧹 Dropped expired partitions{label}: {', '.join(result['dropped'])}")
+            except Exception as e:
+                print(f"❌ Partition maintenance failed{label}: {e}")
+        await asyncio.sleep(PARTITION_MAINTENANCE_INTERVAL)
+
+
+async def run_rollup_refresh():
+    """시간 / 일 롤업 증분 갱신 (백그라운드 태스크, 시작 시 + ROLLUP_REFRESH_INTERVAL초마다, 샤드마다)"""
+    while True:
+        for index, shard_pool in enumerate(shard_pools):
+            label = shard_label(index)
+            try:
+                started = time.perf_counter()
+                async with shard_pool.acquire() as conn:
+                    result = await refresh_rollups(conn, ROLLUP_LATE_MINUTES)
+                if result["skipped"]:
+                    print(f"ℹ️  Rollup refresh skipped{label}: {result['skipped']}")
+                else:
+                    rows = ", ".join(f"{table} {count:,}" for table, count in result["rows"].items())
+                    print(f"✅ Rollups refreshed{label} in {time.perf_counter() - started:.2f}s ({rows} rows)")
+            except Exception as e:
+                print(f"❌ Rollup refresh failed{label}: {e}")
+        await asyncio.sleep(ROLLUP_REFRESH_INTERVAL)
+
+
+async def run_archiver():
+    """
+    오래된 파티션 → Parquet (백그라운드 태스크, 시작 시 + ARCHIVE_INTERVAL초마다)
+
+    샤드마다 같은 ARCHIVE_PATH에 쓰고, 샤드 1 이상은 파일 이름에 shardN_ 접두사를 붙입니다.
+    """
+    while True:
+        for index, shard_pool in enumerate(shard_pools):
+            label = shard_label(index)
+            try:
+                async with shard_pool.acquire() as conn:
+                    result = await archive_partitions(
+                        conn, ARCHIVE_AFTER_DAYS, file_prefix=f"shard{index}_" if index else ""
+                    )
+                if result["skipped"]:
+                    print(f"ℹ️  Archiving skipped{label}: {result['skipped']}")
+                for name, rows in result["archived"].items():
+                    print(f"🧊 Archived {name}{label} ({rows:,} rows) → {logs_location()}")
+            except Exception as e:
+                print(f"❌ Archiving failed{label}: {e}")
+        await asyncio.sleep(ARCHIVE_INTERVAL)
+
+
 @app.get("/")
 async def root():
     """헬스 체크"""
@@ -103,177 +417,493 @@ async def receive_logs(request: Request):
 
     지원:
     - JSON (Content-Type: application/json)
-    - gzip 압축 (Content-Encoding: gzip)
+    - 열 단위 배치 (Content-Type: application/vnd.logs.columnar+json, streaming.ColumnarParser 참고)
+    - gzip / zstd / lz4 압축 (Content-Encoding, GET /ingest/capabilities 참고)
     - 배치 전송 (logs 배열)
+    - 스트리밍 파싱: 본문을 청크 단위로 해제/파싱하여 요청당 메모리 일정
+    - Backpressure: 버퍼가 가득 차면 429 + Retry-After
+    - 행 단위 검증: 스키마에 맞지 않는 행만 거부하고 나머지는 적재
+    - 멱등 배치: X-Batch-Id (UUID) 헤더가 있으면 배치 전체를 한 번에 적재하고,
+      같은 ID의 재전송은 적재하지 않고 처음 결과에 "duplicate": true를 붙여 응답
+
+    응답:
+        {"status": "ok", "count": 적재 수, "accepted": 적재 수, "rejected": 거부 수,
+         "errors": [{"index": logs 배열 인덱스, "error": 사유}, ...]}
+        errors는 최대 MAX_REJECTED_DETAILS건까지 포함됩니다.
+
+    STREAM_SUBMIT_ROWS건마다 버퍼에 적재하므로, 본문 중간에 오류가 있으면
+    그 이전 항목은 이미 적재되어 있을 수 있습니다 (응답의 count 참고).
+    X-Batch-Id가 있는 요청은 오류 시 아무것도 적재되지 않으므로 그대로 재전송하면 됩니다.
     """
-    try:
-        # gzip 압축 처리
-        content_encoding = request.headers.get("content-encoding", "").lower()
-        body = await request.body()
+    batch_id = None
+    header = request.headers.get("x-batch-id")
+    if header is not None:
+        try:
+            batch_id = parse_batch_id(header)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid X-Batch-Id (expected UUID): {header[:64]}")
 
-        if content_encoding == "gzip":
-            try:
-                body = gzip.decompress(body)
-            except Exception as e:
-                raise HTTPException(status_code=400, detail=f"Failed to decompress gzip: {str(e)}")
+    if request.headers.get("content-type", "").split(";")[0].strip().lower() == COLUMNAR_CONTENT_TYPE:
+        parser = ColumnarParser()
+    else:
+        parser = LogDocumentParser(FAST_DECODE_MAX_BYTES, max_item_chars=MAX_LOG_ENTRY_CHARS)
+    return await ingest_stream(request, parser, MAX_DECOMPRESSED_BYTES, batch_id=batch_id)
 
-        # JSON 파싱
-        try:
-            data = json.loads(body.decode('utf-8'))
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Invalid JSON: {str(e)}")
 
-        # 로그 배치 검증
-        if "logs" not in data:
-            raise HTTPException(status_code=400, detail="Missing 'logs' field")
+@app.post("/logs/stream")
+async def receive_log_stream(request: Request):
+    """
+    NDJSON 스트리밍 수신 엔드포인트
+
+    한 줄에 로그 하나 (Content-Type: application/x-ndjson), 압축은 POST /logs와 동일.
+    chunked 업로드를 받는 동안 STREAM_SUBMIT_ROWS건 또는
+    STREAM_SUBMIT_INTERVAL_MS마다 버퍼에 적재하므로, 업로드가 끝나기 전부터
+    COPY가 진행됩니다. 사이드카/파일 tailer가 업로드 하나를 오래 열어 두는
+    용도입니다.
+
+    응답 형식은 POST /logs와 같고, index는 0부터 센 (빈 줄 제외) 줄 번호입니다.
+    잘못된 줄은 해당 행만 거부되고 스트림은 계속 처리됩니다.
+    429/400 응답의 count는 그때까지 적재된 행 수이므로, 클라이언트는
+    그 다음 줄부터 다시 보내면 됩니다.
+    """
+    parser = NdjsonParser(max_line_bytes=MAX_LOG_ENTRY_CHARS)
+    return await ingest_stream(
+        request,
+        parser,
+        NDJSON_MAX_BYTES or None,
+        submit_interval=STREAM_SUBMIT_INTERVAL_MS / 1000
+    )
 
-        logs = data["logs"]
-        if not isinstance(logs, list):
-            raise HTTPException(status_code=400, detail="'logs' must be an array")
 
-        if len(logs) == 0:
-            return JSONResponse({"status": "ok", "count": 0})
+class IngestProgress:
+    """
+    요청 하나의 적재 진행 상황 (검증 → 버퍼 적재 → 응답)
 
-        # DB 삽입
-        inserted_count = await insert_logs_batch(logs)
+    batch_id가 있으면 레코드를 모아 두었다가 commit()에서 배치 기록과 함께
+    한 번에 적재합니다 (배치 단위 all-or-nothing, 본문 크기만큼 메모리 사용).
+    버퍼 용량(WRITE_BUFFER_MAX_ROWS)보다 큰 배치는 모으는 도중 413으로 거부합니다.
+    """
 
+    def __init__(self, batch_id: Optional[uuid.UUID] = None):
+        self.batch_id = batch_id
+        self.inserted_count = 0
+        self.rejected_count = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.seen = 0
+        self._held: List[Tuple] = []
+
+    async def submit(self, logs: List[Any]) -> None:
+        """디코딩된 로그 검증 후 Write-behind 버퍼에 적재"""
+        records, rejected = build_records(logs, offset=self.seen)
+        self.seen += len(logs)
+        if rejected:
+            self.rejected_count += len(rejected)
+            self.errors.extend(rejected[:MAX_REJECTED_DETAILS - len(self.errors)])
+        if self.batch_id is not None:
+            self._held.extend(records)
+            # 배치는 버퍼에 한 번에 들어가야 하므로, 버퍼보다 크면 재전송해도 429만 반복됨
+            if len(self._held) > write_buffer.max_rows:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"X-Batch-Id batch exceeds {write_buffer.max_rows} logs "
+                           f"(WRITE_BUFFER_MAX_ROWS), split it into smaller batches"
+                )
+        elif records:
+            # durability 모드에 따라 커밋까지 대기
+            self.inserted_count += await write_buffer.submit(records)
+
+    async def commit(self) -> None:
+        """모아 둔 배치 적재 (batch_id가 있을 때만, ingest_batches 기록과 같은 COPY 트랜잭션)"""
+        if self.batch_id is None:
+            return
+        records, self._held = self._held, []
+        marker = None
+        if batch_dedup.persistent:
+            marker = BatchMarker(self.batch_id, len(records), self.rejected_count)
+        if records:
+            self.inserted_count += await write_buffer.submit(records, batch=marker)
+        batch_dedup.finish(self.batch_id, BatchResult(self.inserted_count, self.rejected_count))
+
+    @staticmethod
+    def duplicate_response(result: BatchResult) -> JSONResponse:
+        """이미 적재된 배치의 재전송 (적재하지 않고 처음 결과로 응답)"""
         return JSONResponse({
             "status": "ok",
-            "count": inserted_count
+            "duplicate": True,
+            "count": result.accepted,
+            "accepted": result.accepted,
+            "rejected": result.rejected,
+            "errors": []
         })
 
+    def response(self) -> JSONResponse:
+        return JSONResponse({
+            "status": "ok",
+            "count": self.inserted_count,
+            "accepted": self.inserted_count,
+            "rejected": self.rejected_count,
+            "errors": self.errors
+        })
+
+
+async def ingest_stream(
+    request: Request,
+    parser: Any,
+    max_bytes: Optional[int],
+    submit_interval: Optional[float] = None,
+    batch_id: Optional[uuid.UUID] = None
+) -> JSONResponse:
+    """
+    요청 본문 스트리밍 적재 (POST /logs, POST /logs/stream 공통)
+
+    Args:
+        request: 요청
+        parser: feed(bytes) / close()가 로그 목록을 반환하는 파서
+        max_bytes: 최대 해제 크기 (None이면 제한 없음)
+        submit_interval: 유휴 적재 주기 (초, None이면 STREAM_SUBMIT_ROWS 단위로만 적재)
+        batch_id: 멱등 배치 ID (X-Batch-Id)
+    """
+    if write_buffer is None:
+        raise HTTPException(status_code=500, detail="Write buffer not initialized")
+
+    if batch_id is not None:
+        # 메모리에 없는 배치는 DB 조회 없이 적재 (다른 워커 / 재시작 전에 커밋된 배치는
+        # COPY 트랜잭션의 claim_batches가 걸러냄)
+        duplicate = await batch_dedup.begin(batch_id)
+        if duplicate is not None:
+            return IngestProgress.duplicate_response(duplicate)
+
+    progress = IngestProgress(batch_id)
+    try:
+        content_encoding = request.headers.get("content-encoding", "").lower()
+        decoder = StreamDecoder(content_encoding, max_bytes)
+
+        pending: List[Any] = []
+        last_submit = time.monotonic()
+        async for chunk in iter_with_idle(request.stream(), submit_interval):
+            if chunk:
+                for piece in decoder.decompress(chunk):
+                    pending.extend(parser.feed(piece))
+            if len(pending) >= STREAM_SUBMIT_ROWS or (
+                pending
+                and submit_interval is not None
+                and time.monotonic() - last_submit >= submit_interval
+            ):
+                await progress.submit(pending)
+                pending = []
+                last_submit = time.monotonic()
+
+        decoder.finish()
+        pending.extend(parser.close())
+
+        if pending:
+            await progress.submit(pending)
+        await progress.commit()
+
+        return progress.response()
+
+    except InvalidPayloadError as e:
+        raise HTTPException(status_code=400, detail=_partial_detail(str(e), progress.inserted_count))
+    except PayloadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=_partial_detail(str(e), progress.inserted_count))
+    except BufferFullError as e:
+        return JSONResponse(
+            {"status": "busy", "detail": str(e), "count": progress.inserted_count},
+            status_code=429,
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except HTTPException:
         raise
     except Exception as e:
         print(f"❌ Error processing logs: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if batch_id is not None:
+            # commit() 전에 실패한 배치는 기록하지 않음 (재전송 시 다시 처리)
+            batch_dedup.abort(batch_id)
 
 
-async def insert_logs_batch(logs: List[Dict[str, Any]]) -> int:
+def _partial_detail(message: str, inserted_count: int) -> str:
+    """오류 메시지 (이미 적재된 항목이 있으면 개수 표시)"""
+    if inserted_count:
+        return f"{message} ({inserted_count} logs before the error were accepted)"
+    return message
+
+
+async def copy_records(records: List[Tuple], batches: List[Tuple[BatchMarker, int, int]] = ()) -> int:
     """
-    로그 배치 삽입 (PostgreSQL COPY)
+    레코드 Bulk Insert (PostgreSQL COPY - 최고 성능!)
 
     Args:
-        logs: 로그 배치
+        records: records.normalize_logs()가 만든 레코드 목록
+        batches: 멱등 배치 기록과 레코드 범위 (WriteBuffer가 전달)
+            있으면 ingest_batches 기록과 COPY를 한 트랜잭션으로 묶고,
+            이미 기록된 배치(다른 워커가 먼저 커밋)의 레코드는 제외
+
+    롤업이 켜져 있으면 같은 트랜잭션에서 logs_rollup_1m도 갱신합니다.
+    stack_traces가 있으면 트레이스는 지문으로 바꿔 COPY합니다 (새 트레이스는 COPY 전에 저장).
+    error_groups가 있으면 에러 행에 error_fingerprint를 붙이고 같은 트랜잭션에서 그룹을 누적합니다.
+    샤드가 설정되어 있으면 copy_sharded()로 나눠 적재합니다.
 
     Returns:
         삽입된 로그 개수
     """
     if not pool:
         raise Exception("Database pool not initialized")
+    if shard_map is not None:
+        return await copy_sharded(records, batches)
 
-    # 로그 데이터 정규화
-    records = []
-    for log in logs:
-        # created_at 변환 (Unix timestamp → datetime)
-        if "created_at" in log and log["created_at"]:
-            created_at = datetime.fromtimestamp(log["created_at"])
-        else:
-            created_at = datetime.now()
-
-        # metadata JSON 직렬화
-        metadata = json.dumps(log.get("metadata")) if log.get("metadata") else None
-
-        record = (
-            created_at,
-            log.get("level", "INFO"),
-            log.get("log_type", "BACKEND"),
-            log.get("service", "unknown"),
-            log.get("environment", "development"),
-            log.get("service_version", "v0.0.0-dev"),
-            log.get("trace_id"),
-            log.get("user_id"),
-            log.get("session_id"),
-            log.get("error_type"),
-            log.get("message", ""),
-            log.get("stack_trace"),
-            log.get("path"),
-            log.get("method"),
-            log.get("action_type"),
-            log.get("function_name"),
-            log.get("file_path"),
-            log.get("duration_ms"),
-            False,  # deleted
-            metadata
-        )
-        records.append(record)
-
-    # Bulk Insert (PostgreSQL COPY - 최고 성능!)
     async with pool.acquire() as conn:
-        await conn.copy_records_to_table(
-            'logs',
-            records=records,
-            columns=[
-                'created_at', 'level', 'log_type', 'service', 'environment',
-                'service_version', 'trace_id', 'user_id', 'session_id',
-                'error_type', 'message', 'stack_trace', 'path', 'method',
-                'action_type', 'function_name', 'file_path', 'duration_ms',
-                'deleted', 'metadata'
-            ]
-        )
+        records, columns, grouped = await prepare_records(conn, records, stack_trace_cache)
+
+        if not batches and not rollups_active and not grouped:
+            await conn.copy_records_to_table('logs', records=records, columns=columns)
+            return len(records)
+
+        async with conn.transaction():
+            if batches:
+                claimed = await claim_batches(conn, [marker for marker, _, _ in batches])
+                if len(claimed) < len(batches):
+                    records = drop_unclaimed(records, batches, claimed)
+                    print(f"⚠️  Skipped {len(batches) - len(claimed)} duplicate batch(es) committed by another worker")
+            await write_records(conn, records, columns, grouped)
 
     return len(records)
 
 
+async def prepare_records(
+    conn: asyncpg.Connection,
+    records: List[Tuple],
+    cache: StackTraceCache
+) -> Tuple[List[Tuple], List[str], bool]:
+    """
+    COPY 전 처리 (트랜잭션 밖, 레코드 순서와 개수는 그대로)
+
+    에러 지문은 트레이스 원문으로 계산하므로 stack_trace를 지문으로 바꾸기 전에 계산합니다.
+
+    Returns:
+        (COPY할 레코드, 컬럼, error_fingerprint 컬럼을 붙였는지)
+    """
+    columns = LOG_COLUMNS
+    fingerprints = fingerprint_records(records) if error_groups_active else None
+    if stack_traces_active:
+        records, columns = await store_stack_traces(conn, records, cache)
+    if fingerprints is not None:
+        records = [(*record, value) for record, value in zip(records, fingerprints)]
+        columns = [*columns, 'error_fingerprint']
+    return records, columns, fingerprints is not None
+
+
+async def write_records(conn: asyncpg.Connection, records: List[Tuple], columns: List[str], grouped: bool) -> int:
+    """COPY + 롤업 / 에러 그룹 갱신 (호출한 쪽의 트랜잭션 안에서)"""
+    if records:
+        await conn.copy_records_to_table('logs', records=records, columns=columns)
+        if rollups_active:
+            await upsert_rollups(conn, records)
+        if grouped:
+            await upsert_error_groups(conn, records)
+    return len(records)
+
+
+async def _gather(*coroutines) -> List[Any]:
+    """모두 끝날 때까지 기다린 뒤 첫 예외를 다시 발생 (실행 중인 연결을 반환하지 않도록)"""
+    results = await asyncio.gather(*coroutines, return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results
+
+
+async def copy_sharded(records: List[Tuple], batches: List[Tuple[BatchMarker, int, int]] = ()) -> int:
+    """
+    샤드별로 나눠 동시에 COPY
+
+    샤드마다 트랜잭션을 열고, 배치 기록(ingest_batches)은 샤드 0의 트랜잭션에서 claim 합니다.
+    커밋은 다른 샤드를 먼저, 샤드 0을 마지막에 하므로 그 사이에 실패하면 배치가 기록되지 않아
+    재전송 시 일부 샤드에 중복 적재될 수 있지만 유실되지는 않습니다 (샤드 간 2단계 커밋은 사용하지 않음).
+
+    Returns:
+        삽입된 로그 개수
+    """
+    parts = shard_map.split_indexes(records)
+    shards = [index for index, part in enumerate(parts) if part or (index == 0 and batches)]
+
+    async with AsyncExitStack() as stack:
+        conns = {index: await stack.enter_async_context(shard_pools[index].acquire()) for index in shards}
+        prepared = dict(zip(shards, await _gather(*(
+            prepare_records(conns[index], [records[i] for i in parts[index]], stack_trace_caches[index])
+            for index in shards
+        ))))
+
+        transactions = {index: conns[index].transaction() for index in shards}
+        pending = []
+        try:
+            for index in shards:
+                await transactions[index].start()
+                pending.append(index)
+
+            if batches:
+                claimed = await claim_batches(conns[0], [marker for marker, _, _ in batches])
+                if len(claimed) < len(batches):
+                    kept = set(drop_unclaimed(list(range(len(records))), batches, claimed))
+                    for index in shards:
+                        rows, columns, grouped = prepared[index]
+                        rows = [row for i, row in zip(parts[index], rows) if i in kept]
+                        prepared[index] = (rows, columns, grouped)
+                    print(f"⚠️  Skipped {len(batches) - len(claimed)} duplicate batch(es) committed by another worker")
+
+            counts = await _gather(*(write_records(conns[index], *prepared[index]) for index in shards))
+
+            for index in sorted(shards, key=lambda index: index == 0):
+                await transactions[index].commit()
+                pending.remove(index)
+        finally:
+            for index in pending:
+                await transactions[index].rollback()
+
+    return sum(counts)
+
+
+async def insert_logs_batch(logs: List[Dict[str, Any]]) -> int:
+    """
+    로그 배치 즉시 삽입 (버퍼를 거치지 않음)
+
+    Args:
+        logs: 로그 배치
+
+    Returns:
+        삽입된 로그 개수
+    """
+    return await copy_records(normalize_logs(logs))
+
+
+@app.get("/ingest/stats")
+async def get_ingest_stats():
+    """
+    Write-behind 버퍼 상태 및 워커 처리량 조회
+
+    멀티 워커 모드에서는 요청을 받은 워커의 값만 반환됩니다 (worker.worker_id 참고).
+    """
+    if write_buffer is None:
+        raise HTTPException(status_code=500, detail="Write buffer not initialized")
+    return {
+        "worker": throughput.stats(write_buffer.flushed_rows),
+        "write_buffer": write_buffer.stats(),
+        "batch_dedup": batch_dedup.stats()
+    }
+
+
+@app.get("/ingest/capabilities")
+async def get_ingest_capabilities():
+    """
+    수집 기능 조회 (클라이언트 압축 코덱 협상용)
+
+    encodings는 서버 권장 순서이며, 클라이언트는 자신도 지원하는 첫 코덱을 사용합니다.
+    batch_formats: POST /logs가 받는 본문 형식 (rows = {"logs": [...]}, columnar = 열 단위 배치)
+    zstd_dictionary가 있으면 GET /ingest/zstd-dictionary로 받아 압축에 사용할 수 있습니다.
+    """
+    encodings = available_encodings()
+    dictionary = zstd_dictionary()
+    return JSONResponse(
+        {
+            "encodings": list(encodings),
+            "zstd_dictionary": {
+                "id": dictionary.dict_id(),
+                "path": "/ingest/zstd-dictionary"
+            } if dictionary is not None else None,
+            "endpoints": ["/logs", "/logs/stream"],
+            "batch_formats": ["rows", "columnar"],
+            "max_decompressed_bytes": MAX_DECOMPRESSED_BYTES
+        },
+        headers={"Accept-Encoding": ", ".join(encodings)}
+    )
+
+
+@app.get("/ingest/zstd-dictionary")
+async def get_zstd_dictionary():
+    """공유 zstd 사전 (ZSTD_DICTIONARY_PATH가 설정된 경우)"""
+    dictionary = zstd_dictionary()
+    if dictionary is None:
+        raise HTTPException(status_code=404, detail="zstd dictionary not configured")
+    return Response(
+        content=dictionary.as_bytes(),
+        media_type="application/octet-stream",
+        headers={"X-Zstd-Dictionary-Id": str(dictionary.dict_id())}
+    )
+
+
+# /stats 쿼리: logs 전체 스캔 (롤업이 없을 때)
+STATS_SQL_RAW = {
+    "total": "SELECT COUNT(*) FROM logs WHERE deleted = FALSE",
+    "levels": """
+        SELECT level, COUNT(*) as count
+        FROM logs
+        WHERE deleted = FALSE
+        GROUP BY level
+        ORDER BY count DESC
+    """,
+    "services": """
+        SELECT service, COUNT(*) as count
+        FROM logs
+        WHERE deleted = FALSE
+        GROUP BY service
+        ORDER BY count DESC
+        LIMIT 10
+    """,
+    "recent_errors": """
+        SELECT COUNT(*) FROM logs
+        WHERE level = 'ERROR'
+          AND created_at > NOW() - INTERVAL '1 hour'
+          AND deleted = FALSE
+    """
+}
+
+
 @app.get("/stats")
 async def get_stats():
-    """로그 통계 조회"""
+    """
+    로그 통계 조회
+
+    logs_rollup_1m이 있으면 롤업을 합산합니다 (최근 1시간은 분 단위 경계).
+    """
     if not pool:
         raise HTTPException(status_code=500, detail="Database pool not initialized")
 
-    async with pool.acquire() as conn:
-        # 전체 로그 개수
-        total_count = await conn.fetchval(
-            "SELECT COUNT(*) FROM logs WHERE deleted = FALSE"
-        )
+    queries = STATS_SQL_ROLLUP if rollups_active else STATS_SQL_RAW
 
-        # 레벨별 개수
-        level_counts = await conn.fetch(
-            """
-            SELECT level, COUNT(*) as count
-            FROM logs
-            WHERE deleted = FALSE
-            GROUP BY level
-            ORDER BY count DESC
-            """
-        )
+    # 샤드가 있으면 샤드마다 조회 후 합산 (SHARD_BY=time이면 서비스 분포는 샤드별 상위 10개를 합친 값)
+    results = await _gather(*(fetch_stats(shard_pool, queries) for shard_pool in shard_pools))
 
-        # 서비스별 개수
-        service_counts = await conn.fetch(
-            """
-            SELECT service, COUNT(*) as count
-            FROM logs
-            WHERE deleted = FALSE
-            GROUP BY service
-            ORDER BY count DESC
-            LIMIT 10
-            """
-        )
+    return {
+        "total_logs": sum(result["total"] or 0 for result in results),
+        "level_distribution": merge_counts((result["levels"] for result in results), "level"),
+        "service_distribution": merge_counts((result["services"] for result in results), "service", limit=10),
+        "recent_errors_1h": sum(result["recent_errors"] or 0 for result in results)
+    }
 
-        # 최근 1시간 에러 개수
-        recent_errors = await conn.fetchval(
-            """
-            SELECT COUNT(*) FROM logs
-            WHERE level = 'ERROR'
-              AND created_at > NOW() - INTERVAL '1 hour'
-              AND deleted = FALSE
-            """
-        )
 
+async def fetch_stats(shard_pool: asyncpg.Pool, queries: Dict[str, str]) -> Dict[str, Any]:
+    """한 DB의 /stats 쿼리 결과"""
+    async with shard_pool.acquire() as conn:
         return {
-            "total_logs": total_count,
-            "level_distribution": [
-                {"level": row["level"], "count": row["count"]}
-                for row in level_counts
-            ],
-            "service_distribution": [
-                {"service": row["service"], "count": row["count"]}
-                for row in service_counts
-            ],
-            "recent_errors_1h": recent_errors
+            # 전체 로그 개수
+            "total": await conn.fetchval(queries["total"]),
+            # 레벨별 개수
+            "levels": await conn.fetch(queries["levels"]),
+            # 서비스별 개수
+            "services": await conn.fetch(queries["services"]),
+            # 최근 1시간 에러 개수
+            "recent_errors": await conn.fetchval(queries["recent_errors"])
         }
 
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    host = os.getenv("SERVER_HOST", "0.0.0.0")
+    port = int(os.getenv("SERVER_PORT", "8000"))
+
+    if worker_count() > 1:
+        from workers import run_workers
+        run_workers("main:app", host, port, worker_count())
+    else:
+        import uvicorn
+        uvicorn.run(app, host=host, port=port)
@@ -0,0 +1,259 @@
+"""
+logs 파티션 관리 (created_at 범위 파티셔닝)
+
+logs가 파티션 테이블이면 주기적으로:
+- 앞으로 PARTITION_PREMAKE개 구간의 파티션을 미리 생성 (daily: logs_p20250115, hourly: logs_p2025011510)
+- LOG_RETENTION_DAYS가 지난 파티션은 DELETE 대신 DETACH + DROP (vacuum / 인덱스 부풀림 없음)
+
+- 경계는 UTC 기준
+- 기본 파티션(logs_default)에 이미 해당 구간의 행이 있으면 새 파티션으로 옮긴 뒤 ATTACH
+- 기존 파티션과 구간이 겹치면 건너뜀 (daily ↔ hourly 전환, 마이그레이션의 logs_legacy 구간)
+- 이름 형식이 다른 파티션(logs_legacy, logs_default)은 삭제하지 않음
+- 워커 0번만 실행하고, 여러 서버가 있어도 advisory lock으로 한 곳에서만 실행
+- lock_timeout으로 적재를 오래 막지 않음 (실패하면 다음 주기에 재시도)
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+INTERVAL_DAILY = "daily"
+INTERVAL_HOURLY = "hourly"
+
+# 구간 길이, 이름 형식
+_INTERVALS = {
+    INTERVAL_DAILY: (timedelta(days=1), "%Y%m%d"),
+    INTERVAL_HOURLY: (timedelta(hours=1), "%Y%m%d%H"),
+}
+
+PARTITION_PREFIX = "logs_p"
+DEFAULT_PARTITION = "logs_default"
+
+# pg_try_advisory_lock 키 (여러 서버 / 워커 중 한 곳만 관리)
+ADVISORY_LOCK_KEY = 72_011
+
+# 파티션 DDL이 적재(COPY)를 막는 최대 시간
+LOCK_TIMEOUT = "5s"
+
+# 파티션 경계 ('FOR VALUES FROM (...) TO (...)'에서 추출, MINVALUE / MAXVALUE는 NULL)
+LIST_PARTITIONS_SQL = """
+    SELECT
+        child.relname AS name,
+        pg_get_expr(child.relpartbound, child.oid) = 'DEFAULT' AS is_default,
+        (regexp_match(pg_get_expr(child.relpartbound, child.oid), 'FROM \\(''([^'']+)''\\)'))[1]::timestamptz AS range_start,
+        (regexp_match(pg_get_expr(child.relpartbound, child.oid), 'TO \\(''([^'']+)''\\)'))[1]::timestamptz AS range_end
+    FROM pg_inherits
+    JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    WHERE parent.oid = to_regclass('logs')
+    ORDER BY child.relname
+"""
+
+
+class Partition(NamedTuple):
+    """기존 파티션 (start / end가 None이면 MINVALUE / MAXVALUE)"""
+    name: str
+    start: Optional[datetime]
+    end: Optional[datetime]
+    is_default: bool = False
+
+
+def partition_range(moment: datetime, interval: str) -> Tuple[datetime, datetime]:
+    """
+    moment가 속한 구간 [start, end) (UTC)
+
+    Raises:
+        ValueError: 알 수 없는 interval
+    """
+    if interval not in _INTERVALS:
+        raise ValueError(f"Unknown partition interval: {interval} (expected daily or hourly)")
+    length, _ = _INTERVALS[interval]
+    moment = moment.astimezone(timezone.utc)
+    if interval == INTERVAL_DAILY:
+        start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    else:
+        start = moment.replace(minute=0, second=0, microsecond=0)
+    return start, start + length
+
+
+def partition_name(start: datetime, interval: str) -> str:
+    """구간 시작 시각 → 파티션 이름"""
+    _, name_format = _INTERVALS[interval]
+    return PARTITION_PREFIX + start.strftime(name_format)
+
+
+def parse_partition_name(name: str) -> Optional[Tuple[datetime, datetime]]:
+    """
+    파티션 이름 → 구간 [start, end)
+
+    Returns:
+        관리 대상 이름 형식이 아니면 None
+    """
+    if not name.startswith(PARTITION_PREFIX):
+        return None
+    suffix = name[len(PARTITION_PREFIX):]
+    for length, name_format in _INTERVALS.values():
+        try:
+            start = datetime.strptime(suffix, name_format).replace(tzinfo=timezone.utc)
+        except ValueError:
+            continue
+        # strptime은 자릿수를 느슨하게 받으므로 되돌려 비교
+        if start.strftime(name_format) == suffix:
+            return start, start + length
+    return None
+
+
+def planned_partitions(now: datetime, interval: str, premake: int) -> List[Tuple[str, datetime, datetime]]:
+    """
+    현재 구간 + 앞으로 premake개 구간
+
+    Returns:
+        (이름, start, end) 목록
+    """
+    start, end = partition_range(now, interval)
+    length = end - start
+    planned = []
+    for i in range(premake + 1):
+        s = start + length * i
+        planned.append((partition_name(s, interval), s, s + length))
+    return planned
+
+
+def missing_partitions(
+    existing: Sequence[Partition],
+    planned: Sequence[Tuple[str, datetime, datetime]]
+) -> List[Tuple[str, datetime, datetime]]:
+    """planned 중 아직 없고 기존 파티션과 겹치지 않는 구간"""
+    names = {partition.name for partition in existing}
+    ranges = [partition for partition in existing if not partition.is_default]
+    missing = []
+    for name, start, end in planned:
+        if name in names:
+            continue
+        if any(
+            (other.end is None or start < other.end) and (other.start is None or other.start < end)
+            for other in ranges
+        ):
+            continue
+        missing.append((name, start, end))
+    return missing
+
+
+def expired_partitions(existing: Sequence[Partition], now: datetime, retention_days: float) -> List[str]:
+    """
+    구간 끝이 보관 기간보다 오래된 파티션 (retention_days <= 0이면 없음)
+
+    이름 형식(logs_pYYYYMMDD[HH])이 맞는 파티션만 대상입니다.
+    """
+    if retention_days <= 0:
+        return []
+    cutoff = now - timedelta(days=retention_days)
+    expired = []
+    for partition in existing:
+        parsed = parse_partition_name(partition.name)
+        if parsed is not None and parsed[1] <= cutoff:
+            expired.append(partition.name)
+    return expired
+
+
+def _literal(moment: datetime) -> str:
+    """파티션 경계 리터럴 (DDL에는 파라미터를 쓸 수 없음)"""
+    return moment.astimezone(timezone.utc).strftime("'%Y-%m-%d %H:%M:%S+00'")
+
+
+async def is_partitioned(conn: Any) -> bool:
+    """logs가 파티션 테이블인지 (relkind = 'p')"""
+    relkind = await conn.fetchval("SELECT relkind FROM pg_class WHERE oid = to_regclass('logs')")
+    return relkind == "p"
+
+
+async def list_partitions(conn: Any) -> List[Partition]:
+    return [
+        Partition(row["name"], row["range_start"], row["range_end"], row["is_default"])
+        for row in await conn.fetch(LIST_PARTITIONS_SQL)
+    ]
+
+
+async def create_partition(conn: Any, name: str, start: datetime, end: datetime, has_default: bool) -> int:
+    """
+    파티션 생성
+
+    기본 파티션에 이미 이 구간의 행이 있으면 CREATE ... PARTITION OF가 실패하므로,
+    별도 테이블을 만들어 행을 옮긴 뒤 ATTACH 합니다.
+
+    Returns:
+        기본 파티션에서 옮긴 행 수
+    """
+    bounds = f"FROM ({_literal(start)}) TO ({_literal(end)})"
+    async with conn.transaction():
+        stranded = has_default and await conn.fetchval(
+            f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE created_at >= $1 AND created_at < $2)",
+            start, end
+        )
+        if not stranded:
+            await conn.execute(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF logs FOR VALUES {bounds}")
+            return 0
+
+        await conn.execute(f"CREATE TABLE {name} (LIKE logs INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        status = await conn.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION}
+                WHERE created_at >= $1 AND created_at < $2
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+            """,
+            start, end
+        )
+        await conn.execute(f"ALTER TABLE logs ATTACH PARTITION {name} FOR VALUES {bounds}")
+        return int(status.split()[-1])
+
+
+async def drop_partition(conn: Any, name: str) -> None:
+    """파티션 분리 후 삭제 (DELETE 없이 구간 전체 제거)"""
+    async with conn.transaction():
+        await conn.execute(f"ALTER TABLE logs DETACH PARTITION {name}")
+        await conn.execute(f"DROP TABLE {name}")
+
+
+async def maintain_partitions(
+    conn: Any,
+    interval: str,
+    premake: int,
+    retention_days: float,
+    now: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """
+    파티션 생성 / 만료 파티션 삭제 한 번 실행
+
+    Returns:
+        {"created": [...], "dropped": [...], "moved_rows": n, "skipped": 사유 또는 None}
+    """
+    now = now or datetime.now(timezone.utc)
+    result: Dict[str, Any] = {"created": [], "dropped": [], "moved_rows": 0, "skipped": None}
+
+    if not await is_partitioned(conn):
+        result["skipped"] = "logs is not partitioned"
+        return result
+
+    if not await conn.fetchval("SELECT pg_try_advisory_lock($1)", ADVISORY_LOCK_KEY):
+        result["skipped"] = "another server is maintaining partitions"
+        return result
+
+    try:
+        await conn.execute(f"SET lock_timeout = '{LOCK_TIMEOUT}'")
+        existing = await list_partitions(conn)
+        has_default = any(partition.is_default for partition in existing)
+
+        for name, start, end in missing_partitions(existing, planned_partitions(now, interval, premake)):
+            result["moved_rows"] += await create_partition(conn, name, start, end, has_default)
+            result["created"].append(name)
+
+        for name in expired_partitions(existing, now, retention_days):
+            await drop_partition(conn, name)
+            result["dropped"].append(name)
+    finally:
+        await conn.execute("RESET lock_timeout")
+        await conn.fetchval("SELECT pg_advisory_unlock($1)", ADVISORY_LOCK_KEY)
+
+    return result
@@ -0,0 +1,127 @@
+"""
+분당 롤업 (logs_rollup_1m)
+
+COPY할 레코드를 (분, service, level, error_type, path)별로 메모리에서 집계해
+같은 트랜잭션에서 logs_rollup_1m에 upsert 합니다.
+대시보드 / 알림은 logs 전체를 스캔하는 COUNT(*) 대신 수천 행의 롤업을 읽습니다.
+
+- 건수, duration 건수/합계/최대, duration 히스토그램 (DURATION_BUCKETS_MS)
+- error_type / path가 없으면 '' (기본 키에 NULL을 쓸 수 없음)
+- 적재 시점 기준이므로 soft delete(deleted = TRUE)는 롤업에 반영되지 않음
+"""
+
+from bisect import bisect_left
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+
+from records import LOG_COLUMNS
+
+# duration 히스토그램 상한 (ms, 각 구간은 상한 이하), 마지막 구간은 10초 초과
+# log-analysis-server의 DURATION_BUCKETS_MS와 같아야 함
+DURATION_BUCKETS_MS = (10, 50, 100, 250, 500, 1000, 2000, 5000, 10000)
+HISTOGRAM_SIZE = len(DURATION_BUCKETS_MS) + 1
+
+_CREATED_AT = LOG_COLUMNS.index('created_at')
+_SERVICE = LOG_COLUMNS.index('service')
+_LEVEL = LOG_COLUMNS.index('level')
+_ERROR_TYPE = LOG_COLUMNS.index('error_type')
+_PATH = LOG_COLUMNS.index('path')
+_DURATION = LOG_COLUMNS.index('duration_ms')
+
+# 기존 행과 합산 (히스토그램은 구간별 합)
+UPSERT_SQL = """
+    INSERT INTO logs_rollup_1m AS r (
+        bucket, service, level, error_type, path,
+        log_count, duration_count, duration_sum, duration_max, duration_histogram
+    )
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
+    ON CONFLICT (bucket, service, level, error_type, path) DO UPDATE SET
+        log_count = r.log_count + EXCLUDED.log_count,
+        duration_count = r.duration_count + EXCLUDED.duration_count,
+        duration_sum = r.duration_sum + EXCLUDED.duration_sum,
+        duration_max = GREATEST(r.duration_max, EXCLUDED.duration_max),
+        duration_histogram = ARRAY(
+            SELECT a + b
+            FROM unnest(r.duration_histogram, EXCLUDED.duration_histogram) WITH ORDINALITY AS h(a, b, i)
+            ORDER BY i
+        )
+"""
+
+# /stats 쿼리 (logs 스캔 대신 롤업 합산)
+STATS_SQL_ROLLUP = {
+    "total": "SELECT SUM(log_count)::bigint FROM logs_rollup_1m",
+    "levels": """
+        SELECT level, SUM(log_count)::bigint as count
+        FROM logs_rollup_1m
+        GROUP BY level
+        ORDER BY count DESC
+    """,
+    "services": """
+        SELECT service, SUM(log_count)::bigint as count
+        FROM logs_rollup_1m
+        GROUP BY service
+        ORDER BY count DESC
+        LIMIT 10
+    """,
+    "recent_errors": """
+        SELECT SUM(log_count)::bigint FROM logs_rollup_1m
+        WHERE level = 'ERROR'
+          AND bucket > date_trunc('minute', NOW() - INTERVAL '1 hour')
+    """
+}
+
+
+def aggregate(records: List[Tuple]) -> List[Tuple]:
+    """
+    COPY 레코드 → 롤업 행
+
+    Args:
+        records: LOG_COLUMNS 순서의 레코드 (created_at은 UTC aware datetime)
+
+    Returns:
+        UPSERT_SQL 파라미터 튜플 목록 (키 순서로 정렬 - 워커 간 upsert 잠금 순서를 맞춰 교착 방지)
+    """
+    groups: Dict[Tuple, List[Any]] = {}
+    minutes: Dict[int, datetime] = {}
+    buckets = DURATION_BUCKETS_MS
+
+    for record in records:
+        # datetime.replace()보다 timestamp() 정수 나눗셈이 빠름 (분 datetime은 분마다 한 번 생성)
+        minute_index = int(record[_CREATED_AT].timestamp() // 60)
+        minute = minutes.get(minute_index)
+        if minute is None:
+            minute = minutes[minute_index] = datetime.fromtimestamp(minute_index * 60, timezone.utc)
+
+        key = (minute, record[_SERVICE], record[_LEVEL], record[_ERROR_TYPE] or '', record[_PATH] or '')
+        group = groups.get(key)
+        if group is None:
+            # [건수, duration 건수, 합계, 최대, 히스토그램]
+            group = groups[key] = [0, 0, 0.0, None, [0] * HISTOGRAM_SIZE]
+        group[0] += 1
+
+        duration = record[_DURATION]
+        if duration is not None:
+            duration = float(duration)
+            group[1] += 1
+            group[2] += duration
+            if group[3] is None or duration > group[3]:
+                group[3] = duration
+            group[4][bisect_left(buckets, duration)] += 1
+
+    return [
+        (*key, count, duration_count, duration_sum, duration_max, histogram)
+        for key, (count, duration_count, duration_sum, duration_max, histogram) in sorted(groups.items())
+    ]
+
+
+async def upsert_rollups(conn: Any, records: List[Tuple]) -> int:
+    """
+    레코드를 집계해 logs_rollup_1m에 upsert (COPY와 같은 트랜잭션 안에서 호출)
+
+    Returns:
+        upsert한 롤업 행 수
+    """
+    rows = aggregate(records)
+    if rows:
+        await conn.executemany(UPSERT_SQL, rows)
+    return len(rows)
@@ -0,0 +1,128 @@
+"""
+시간 / 일 롤업 증분 갱신 (logs_rollup_1h, logs_rollup_1d)
+
+logs_rollup_1m → logs_rollup_1h → logs_rollup_1d 순으로 재집계합니다.
+REFRESH MATERIALIZED VIEW처럼 전체를 다시 계산하지 않고,
+rollup_watermarks의 워터마크(마지막 갱신 때 열려 있던 버킷)부터만 다시 계산합니다.
+
+- 워터마크보다 ROLLUP_LATE_MINUTES 앞선 버킷부터 재계산 (늦게 도착한 로그 반영)
+- 재계산 구간은 DELETE 후 INSERT (원본 전체 합이므로 여러 번 실행해도 결과가 같음)
+- 워터마크가 없으면 원본 전체를 집계 (마이그레이션 후 첫 실행 = 백필)
+- 버킷 경계는 UTC 기준, 히스토그램은 histogram_sum()으로 구간별 합산
+- 워커 0번만 실행하고, 여러 서버가 있어도 advisory lock으로 한 곳에서만 실행
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, NamedTuple, Optional
+
+# pg_try_advisory_lock 키 (파티션 관리와 다른 키)
+ADVISORY_LOCK_KEY = 72_013
+
+
+class RollupLevel(NamedTuple):
+    """한 단계 롤업: source를 unit 단위로 재집계해 target에 저장"""
+    target: str
+    source: str
+    unit: str
+
+
+# 순서대로 갱신 (일 롤업은 방금 갱신한 시간 롤업을 읽음)
+ROLLUP_LEVELS = (
+    RollupLevel("logs_rollup_1h", "logs_rollup_1m", "hour"),
+    RollupLevel("logs_rollup_1d", "logs_rollup_1h", "day"),
+)
+
+_UNITS = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+
+DELETE_SQL = "DELETE FROM {target} WHERE bucket >= $1"
+
+INSERT_SQL = """
+    INSERT INTO {target} (
+        bucket, service, level, error_type, path,
+        log_count, duration_count, duration_sum, duration_max, duration_histogram
+    )
+    SELECT
+        date_trunc('{unit}', bucket, 'UTC'), service, level, error_type, path,
+        SUM(log_count), SUM(duration_count), SUM(duration_sum), MAX(duration_max),
+        histogram_sum(duration_histogram)
+    FROM {source}
+    WHERE bucket >= $1
+    GROUP BY 1, 2, 3, 4, 5
+"""
+
+WATERMARK_SQL = "SELECT watermark FROM rollup_watermarks WHERE rollup_name = $1"
+
+SET_WATERMARK_SQL = """
+    INSERT INTO rollup_watermarks (rollup_name, watermark, refreshed_at)
+    VALUES ($1, $2, NOW())
+    ON CONFLICT (rollup_name) DO UPDATE SET
+        watermark = EXCLUDED.watermark,
+        refreshed_at = EXCLUDED.refreshed_at
+"""
+
+# 워터마크가 없을 때 (전체 집계)
+_BEGINNING = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def bucket_start(moment: datetime, unit: str) -> datetime:
+    """moment가 속한 버킷 시작 (UTC)"""
+    moment = moment.astimezone(timezone.utc)
+    if unit == "day":
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def refresh_start(watermark: Optional[datetime], unit: str, late_minutes: float) -> datetime:
+    """
+    다시 계산할 첫 버킷
+
+    Args:
+        watermark: 마지막 갱신 때 열려 있던 버킷 시작 (없으면 전체)
+        unit: "hour" / "day"
+        late_minutes: 늦게 도착한 로그를 반영할 시간
+
+    Returns:
+        bucket >= 반환값인 버킷을 재계산
+    """
+    if watermark is None:
+        return _BEGINNING
+    return bucket_start(watermark - timedelta(minutes=late_minutes), unit)
+
+
+async def refresh_level(conn: Any, level: RollupLevel, now: datetime, late_minutes: float) -> int:
+    """
+    한 단계 롤업 갱신 (DELETE + INSERT + 워터마크를 한 트랜잭션으로)
+
+    Returns:
+        다시 계산한 롤업 행 수
+    """
+    async with conn.transaction():
+        watermark = await conn.fetchval(WATERMARK_SQL, level.target)
+        start = refresh_start(watermark, level.unit, late_minutes)
+        await conn.execute(DELETE_SQL.format(target=level.target), start)
+        status = await conn.execute(INSERT_SQL.format(**level._asdict()), start)
+        await conn.execute(SET_WATERMARK_SQL, level.target, bucket_start(now, level.unit))
+    return int(status.split()[-1])
+
+
+async def refresh_rollups(conn: Any, late_minutes: float, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    시간 → 일 롤업을 차례로 갱신
+
+    Returns:
+        {"rows": {target: 재계산 행 수}, "skipped": 사유 또는 None}
+    """
+    now = now or datetime.now(timezone.utc)
+    result: Dict[str, Any] = {"rows": {}, "skipped": None}
+
+    if not await conn.fetchval("SELECT pg_try_advisory_lock($1)", ADVISORY_LOCK_KEY):
+        result["skipped"] = "another server is refreshing rollups"
+        return result
+
+    try:
+        for level in ROLLUP_LEVELS:
+            result["rows"][level.target] = await refresh_level(conn, level, now, late_minutes)
+    finally:
+        await conn.fetchval("SELECT pg_advisory_unlock($1)", ADVISORY_LOCK_KEY)
+
+    return result
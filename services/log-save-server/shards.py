@@ -0,0 +1,94 @@
+"""
+샤드 라우팅 (여러 PostgreSQL 노드에 logs 분산 적재)
+
+DATABASE_SHARDS에 추가 노드의 DSN을 쉼표로 나열하면 기본 DB(DATABASE_*)가 샤드 0,
+나열한 순서대로 샤드 1..N-1이 됩니다. log-analysis-server에도 같은 목록 / 순서 / SHARD_BY를
+설정해야 조회를 모든 샤드로 fan-out 하고, service 조건이 있는 쿼리를 한 샤드로 보낼 수 있습니다.
+
+- SHARD_BY=service: service 이름의 CRC32 % N (한 서비스의 로그는 한 샤드에 모이므로 서비스별 집계가 샤드 안에서 끝남)
+- SHARD_BY=time: created_at을 SHARD_TIME_BUCKET_HOURS 단위로 자른 구간 번호 % N (구간마다 돌아가며 적재)
+- 샤드마다 같은 schema.sql을 적용 (롤업, stack_traces, error_groups, 파티션은 샤드 안에서 관리)
+- ingest_batches(멱등 배치 기록)는 샤드 0에만 기록
+- 샤드 수 / 순서를 바꿔도 기존 행은 옮기지 않음 (새로 들어오는 로그부터 새 규칙 적용)
+"""
+
+import zlib
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from records import LOG_COLUMNS
+
+SHARD_KEYS = ('service', 'time')
+
+_CREATED_AT = LOG_COLUMNS.index('created_at')
+_SERVICE = LOG_COLUMNS.index('service')
+
+
+def parse_shard_dsns(value: str) -> List[str]:
+    """DATABASE_SHARDS (쉼표로 구분한 DSN 목록) → DSN 목록"""
+    return [dsn.strip() for dsn in value.split(',') if dsn.strip()]
+
+
+def service_shard(service: str, count: int) -> int:
+    """service가 저장되는 샤드 (프로세스 / 서버가 달라도 같은 값, log-analysis-server와 동일)"""
+    return zlib.crc32(service.encode('utf-8')) % count
+
+
+class ShardMap:
+    """레코드 → 샤드 번호"""
+
+    def __init__(self, count: int, key: str = 'service', bucket_hours: float = 24):
+        """
+        Args:
+            count: 샤드 수 (기본 DB 포함)
+            key: 'service' 또는 'time'
+            bucket_hours: SHARD_BY=time일 때 한 샤드에 연속으로 쌓는 구간 길이 (시간)
+
+        Raises:
+            ValueError: 알 수 없는 key / 잘못된 count, bucket_hours
+        """
+        if key not in SHARD_KEYS:
+            raise ValueError(f"SHARD_BY must be one of {', '.join(SHARD_KEYS)} (got {key!r})")
+        if count < 1 or bucket_hours <= 0:
+            raise ValueError("shard count must be >= 1 and SHARD_TIME_BUCKET_HOURS > 0")
+        self.count = count
+        self.key = key
+        self.bucket_seconds = bucket_hours * 3600
+        self._service_shards: Dict[str, int] = {}
+
+    def shard_of(self, record: Tuple) -> int:
+        if self.key == 'time':
+            return int(record[_CREATED_AT].timestamp() // self.bucket_seconds) % self.count
+        service = record[_SERVICE]
+        shard = self._service_shards.get(service)
+        if shard is None:
+            shard = self._service_shards[service] = service_shard(service, self.count)
+        return shard
+
+    def split_indexes(self, records: Sequence[Tuple]) -> List[List[int]]:
+        """
+        샤드별 레코드 인덱스 (원래 순서 유지)
+
+        인덱스로 나누므로 WriteBuffer의 배치 범위(시작, 끝 인덱스)를 그대로 적용할 수 있습니다.
+        """
+        parts: List[List[int]] = [[] for _ in range(self.count)]
+        for index, record in enumerate(records):
+            parts[self.shard_of(record)].append(index)
+        return parts
+
+
+def merge_counts(shard_rows: Iterable[Iterable[Any]], key: str, limit: int = 0) -> List[Dict[str, Any]]:
+    """
+    샤드별 (key, count) 행 합산 (건수 내림차순)
+
+    Args:
+        shard_rows: 샤드마다의 행 목록 (row[key], row["count"])
+        limit: 상위 N개만 (0이면 전체)
+    """
+    totals: Dict[Any, int] = {}
+    for rows in shard_rows:
+        for row in rows:
+            totals[row[key]] = totals.get(row[key], 0) + (row["count"] or 0)
+    merged = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+    if limit:
+        merged = merged[:limit]
+    return [{key: value, "count": count} for value, count in merged]
@@ -0,0 +1,132 @@
+"""
+스택 트레이스 중복 제거 (stack_traces)
+
+같은 에러는 같은 스택 트레이스를 수천 번 반복하므로, logs 행에는 지문(해시)만 남기고
+트레이스 본문은 stack_traces에 지문당 한 번만 저장합니다.
+log-analysis-server는 analysis.logs 뷰로 기존과 같은 stack_trace 컬럼을 읽습니다.
+
+- 지문: 줄 번호, 16진수 주소, goroutine / 람다 번호를 정규화한 트레이스의 blake2b 8바이트 (BIGINT)
+- 본문은 그 지문으로 처음 들어온 트레이스 (같은 코드 위치면 줄 번호만 다른 트레이스는 하나로 합쳐짐)
+- 워커마다 이미 저장한 지문을 기억해 (최대 STACK_TRACE_CACHE_SIZE개) 대부분의 배치는 DB 왕복 없이 COPY
+- 새 지문은 COPY 전에 별도 문장으로 upsert (COPY가 실패해도 남는 트레이스는 재시도 때 다시 쓰임)
+- 트레이스가 없는 배치는 기존 컬럼 그대로 COPY
+"""
+
+import hashlib
+import re
+from typing import Any, Dict, List, Tuple
+
+from records import LOG_COLUMNS
+
+# stack_trace는 NULL로, 지문은 마지막 컬럼으로 COPY
+STACK_TRACE_COLUMNS = [*LOG_COLUMNS, 'stack_trace_hash']
+
+_STACK_TRACE = LOG_COLUMNS.index('stack_trace')
+
+INSERT_SQL = """
+    INSERT INTO stack_traces (hash, stack_trace)
+    SELECT * FROM unnest($1::bigint[], $2::text[])
+    ON CONFLICT (hash) DO NOTHING
+"""
+
+# (패턴, 치환) - 같은 코드 위치에서 실행마다 달라지는 부분
+_NORMALIZERS = (
+    (re.compile(r'\bline \d+'), 'line N'),                       # Python: File "x.py", line 42
+    (re.compile(r':\d+(?::\d+)?(?=[)\s]|$)', re.M), ':N'),       # JS / Java / Go: file.js:12:34, Foo.java:42
+    (re.compile(r'0x[0-9a-fA-F]+'), '0x?'),                      # 메모리 주소, Go +0x1d
+    (re.compile(r'\bgoroutine \d+'), 'goroutine N'),
+    (re.compile(r'\$\$Lambda\$\d+'), '$$Lambda$N'),
+)
+
+
+def normalize_stack_trace(stack_trace: str) -> str:
+    """줄 번호 / 주소를 지운 트레이스 (지문 계산용)"""
+    for pattern, replacement in _NORMALIZERS:
+        stack_trace = pattern.sub(replacement, stack_trace)
+    return stack_trace.strip()
+
+
+def fingerprint(stack_trace: str) -> int:
+    """정규화한 트레이스의 64비트 지문 (BIGINT 범위의 부호 있는 정수)"""
+    digest = hashlib.blake2b(normalize_stack_trace(stack_trace).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+class StackTraceCache:
+    """워커가 이미 stack_traces에 저장한 지문 (가득 차면 오래된 것부터 잊음)"""
+
+    def __init__(self, size: int = 100000):
+        self.size = size
+        self._known: Dict[int, None] = {}
+
+    def __contains__(self, value: int) -> bool:
+        return value in self._known
+
+    def __len__(self) -> int:
+        return len(self._known)
+
+    def add(self, fingerprints) -> None:
+        known = self._known
+        for value in fingerprints:
+            known[value] = None
+        while len(known) > self.size:
+            del known[next(iter(known))]
+
+
+def split_stack_traces(
+    records: List[Tuple],
+    cache: StackTraceCache
+) -> Tuple[List[Tuple], List[str], Dict[int, str]]:
+    """
+    레코드의 stack_trace를 지문으로 교체
+
+    Args:
+        records: LOG_COLUMNS 순서의 COPY 레코드
+        cache: 이미 저장한 지문
+
+    Returns:
+        (COPY 레코드, COPY 컬럼, 새로 저장할 {지문: 트레이스})
+        트레이스가 하나도 없으면 입력 레코드와 LOG_COLUMNS를 그대로 반환
+    """
+    index = _STACK_TRACE
+    if all(record[index] is None for record in records):
+        return records, LOG_COLUMNS, {}
+
+    # 배치 안에서는 같은 문자열의 트레이스가 반복되므로 정규화는 문자열당 한 번
+    seen: Dict[str, int] = {}
+    new_traces: Dict[int, str] = {}
+    split = []
+    append = split.append
+    for record in records:
+        stack_trace = record[index]
+        if stack_trace is None:
+            append((*record, None))
+            continue
+        value = seen.get(stack_trace)
+        if value is None:
+            value = seen[stack_trace] = fingerprint(stack_trace)
+            if value not in cache and value not in new_traces:
+                new_traces[value] = stack_trace
+        append((*record[:index], None, *record[index + 1:], value))
+
+    return split, STACK_TRACE_COLUMNS, new_traces
+
+
+async def store_stack_traces(
+    conn: Any,
+    records: List[Tuple],
+    cache: StackTraceCache
+) -> Tuple[List[Tuple], List[str]]:
+    """
+    새 트레이스를 stack_traces에 저장하고 지문으로 바꾼 레코드 반환 (COPY 직전에 호출)
+
+    Returns:
+        (COPY 레코드, COPY 컬럼)
+    """
+    records, columns, new_traces = split_stack_traces(records, cache)
+    if new_traces:
+        # 지문 순서로 삽입 (워커 간 잠금 순서를 맞춰 교착 방지)
+        fingerprints = sorted(new_traces)
+        await conn.execute(INSERT_SQL, fingerprints, [new_traces[value] for value in fingerprints])
+        cache.add(fingerprints)
+    return records, columns
@@ -0,0 +1,593 @@
+"""
+스트리밍 요청 본문 처리
+
+`request.body()` + `gzip.decompress` + `json.loads` 대신 청크 단위로 처리합니다.
+요청 크기와 무관하게 요청당 메모리 사용량이 일정하게 유지됩니다.
+
+- StreamDecoder: Content-Encoding 해제 (청크 단위, 최대 해제 크기 제한 → gzip bomb 방지)
+- LogArrayParser: {"logs": [...]} 문서에서 logs 항목을 하나씩 파싱
+- LogDocumentParser: 작은 본문은 모아서 orjson으로 한 번에, 큰 본문은 LogArrayParser로
+- ColumnarParser: 열 단위 배치 문서 (POST /logs, Content-Type: application/vnd.logs.columnar+json)
+- NdjsonParser: 줄 단위 JSON (POST /logs/stream)
+- iter_with_idle: 오래 열려 있는 업로드에서 유휴 시간마다 깨어나기
+"""
+
+import asyncio
+import codecs
+import json
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from compression import CODEC_ERRORS, available_encodings, new_decompressor
+from records import RejectedEntry
+
+try:
+    import orjson
+    _loads = orjson.loads
+    _JSON_ERRORS = (orjson.JSONDecodeError,)
+except ImportError:  # orjson 없으면 표준 json 사용
+    _loads = json.loads
+    _JSON_ERRORS = (json.JSONDecodeError, UnicodeDecodeError)
+
+# 한 번의 decompress 호출이 만드는 최대 출력 크기
+DECOMPRESS_PIECE_BYTES = 64 * 1024
+
+# zstd는 출력 크기를 제한하는 인자가 없으므로 입력을 잘라서 넣음
+# (블록당 최대 압축률 기준, 256바이트 입력 → 최대 수 MB 출력)
+ZSTD_INPUT_SLICE_BYTES = 256
+
+
+class InvalidPayloadError(ValueError):
+    """잘못된 요청 본문 (→ 400)"""
+
+
+class PayloadTooLargeError(Exception):
+    """최대 해제 크기 초과 (→ 413)"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Decompressed payload exceeds {max_bytes} bytes")
+        self.max_bytes = max_bytes
+
+
+class StreamDecoder:
+    """
+    Content-Encoding 스트리밍 해제
+
+    Example:
+        decoder = StreamDecoder("gzip", max_bytes=64 * 1024 * 1024)
+        async for chunk in request.stream():
+            for piece in decoder.decompress(chunk):
+                ...
+        decoder.finish()
+    """
+
+    SUPPORTED_ENCODINGS = ("", "identity") + available_encodings()
+
+    def __init__(self, content_encoding: str, max_bytes: Optional[int]):
+        """
+        Args:
+            content_encoding: Content-Encoding 헤더 값 (소문자)
+            max_bytes: 허용하는 최대 해제 크기 (바이트, None이면 제한 없음)
+        """
+        if content_encoding not in self.SUPPORTED_ENCODINGS:
+            raise InvalidPayloadError(f"Unsupported Content-Encoding: {content_encoding}")
+
+        self.content_encoding = content_encoding
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._decompressor = new_decompressor(content_encoding)
+
+    def decompress(self, chunk: bytes) -> Iterator[bytes]:
+        """
+        압축 청크 → 해제된 조각들 (각 조각 최대 DECOMPRESS_PIECE_BYTES, zstd는 입력 조각 단위)
+
+        Raises:
+            InvalidPayloadError: 압축 해제 실패
+            PayloadTooLargeError: 최대 해제 크기 초과
+        """
+        if self._decompressor is None:
+            self._count(len(chunk))
+            if chunk:
+                yield chunk
+            return
+
+        if self.content_encoding == "zstd":
+            pieces = self._decompress_zstd(chunk)
+        elif self.content_encoding == "lz4":
+            pieces = self._decompress_lz4(chunk)
+        else:
+            pieces = self._decompress_gzip(chunk)
+
+        try:
+            for piece in pieces:
+                self._count(len(piece))
+                if piece:
+                    yield piece
+        except CODEC_ERRORS as e:
+            raise InvalidPayloadError(f"Failed to decompress {self.content_encoding}: {e}")
+
+    def _decompress_gzip(self, data: bytes) -> Iterator[bytes]:
+        while data:
+            yield self._decompressor.decompress(data, DECOMPRESS_PIECE_BYTES)
+            data = self._next_member(self._decompressor.unconsumed_tail)
+
+    def _decompress_zstd(self, chunk: bytes) -> Iterator[bytes]:
+        data = memoryview(chunk)
+        while data:
+            yield self._decompressor.decompress(data[:ZSTD_INPUT_SLICE_BYTES])
+            data = memoryview(self._next_member(data[ZSTD_INPUT_SLICE_BYTES:]))
+
+    def _decompress_lz4(self, data: bytes) -> Iterator[bytes]:
+        while data:
+            yield self._decompressor.decompress(data, DECOMPRESS_PIECE_BYTES)
+            # 출력 한도 때문에 남은 입력은 해제 객체 내부에 보관됨
+            while not self._decompressor.needs_input and not self._decompressor.eof:
+                yield self._decompressor.decompress(b"", DECOMPRESS_PIECE_BYTES)
+            data = self._next_member(b"")
+
+    def _next_member(self, rest):
+        """
+        다음에 넣을 입력 (다중 멤버 gzip / 다중 프레임 zstd·lz4는 이어서 해제)
+        """
+        if not self._decompressor.eof:
+            return rest
+        data = (self._decompressor.unused_data or b"") + rest
+        if data:
+            self._decompressor = new_decompressor(self.content_encoding)
+        return data
+
+    def finish(self) -> None:
+        """스트림 종료 검증 (잘린 압축 스트림 거부)"""
+        if self._decompressor is not None and not self._decompressor.eof:
+            raise InvalidPayloadError(f"Failed to decompress {self.content_encoding}: truncated stream")
+
+    def _count(self, size: int) -> None:
+        self.total_bytes += size
+        if self.max_bytes is not None and self.total_bytes > self.max_bytes:
+            raise PayloadTooLargeError(self.max_bytes)
+
+
+# LogArrayParser 상태
+_START = 0          # '{' 대기
+_KEY_OR_END = 1     # 첫 키 또는 '}'
+_KEY = 2            # ',' 다음 키
+_COLON = 3
+_VALUE = 4
+_ITEM_OR_END = 5    # logs 첫 항목 또는 ']'
+_ITEM = 6           # ',' 다음 항목
+_ITEM_SEP = 7       # ',' 또는 ']'
+_OBJ_SEP = 8        # ',' 또는 '}'
+_DONE = 9
+
+_WHITESPACE = " \t\n\r"
+
+# 청크 경계에서 잘려 아직 완성되지 않은 값
+_INCOMPLETE = object()
+
+
+class LogArrayParser:
+    """
+    {"logs": [...], ...} 문서 증분 파서
+
+    logs 배열의 항목은 완성되는 즉시 반환하고, 나머지 최상위 필드는
+    fields에 보관합니다. 버퍼에는 아직 완성되지 않은 항목 하나만 남습니다.
+
+    Example:
+        parser = LogArrayParser()
+        for text in texts:
+            for log in parser.feed_text(text):
+                ...
+        parser.close()
+    """
+
+    def __init__(self, max_item_chars: int = 1024 * 1024):
+        """
+        Args:
+            max_item_chars: 로그 항목 하나의 최대 크기 (문자 수)
+        """
+        self.max_item_chars = max_item_chars
+        self.fields: Dict[str, Any] = {}
+        self.found_logs = False
+
+        self._buf = ""
+        self._pos = 0
+        self._state = _START
+        self._key = None
+        self._json = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+
+    def feed(self, data: bytes) -> List[Any]:
+        """UTF-8 바이트 조각 입력 → 완성된 logs 항목 목록"""
+        try:
+            text = self._utf8.decode(data)
+        except UnicodeDecodeError as e:
+            raise InvalidPayloadError(f"Invalid JSON: {e}")
+        return self.feed_text(text)
+
+    def feed_text(self, text: str) -> List[Any]:
+        """문자열 조각 입력 → 완성된 logs 항목 목록"""
+        self._buf = self._buf[self._pos:] + text
+        self._pos = 0
+        items = []
+
+        buf = self._buf
+        end = len(buf)
+        while True:
+            pos = self._pos
+            while pos < end and buf[pos] in _WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos >= end:
+                break
+
+            ch = buf[pos]
+            state = self._state
+
+            if state == _START:
+                if ch != "{":
+                    raise InvalidPayloadError("Invalid JSON: expected an object with 'logs' field")
+                self._advance(_KEY_OR_END)
+
+            elif state in (_KEY_OR_END, _KEY):
+                if ch == "}" and state == _KEY_OR_END:
+                    self._advance(_DONE)
+                elif ch == '"':
+                    key = self._decode_value()
+                    if key is _INCOMPLETE:
+                        break
+                    self._key = key
+                    self._state = _COLON
+                else:
+                    raise InvalidPayloadError(f"Invalid JSON: unexpected '{ch}' at object key")
+
+            elif state == _COLON:
+                if ch != ":":
+                    raise InvalidPayloadError(f"Invalid JSON: expected ':' but got '{ch}'")
+                self._advance(_VALUE)
+
+            elif state == _VALUE:
+                if self._key == "logs":
+                    if ch != "[":
+                        raise InvalidPayloadError("'logs' must be an array")
+                    self.found_logs = True
+                    self._advance(_ITEM_OR_END)
+                else:
+                    value = self._decode_value()
+                    if value is _INCOMPLETE:
+                        break
+                    self.fields[self._key] = value
+                    self._state = _OBJ_SEP
+
+            elif state in (_ITEM_OR_END, _ITEM):
+                if ch == "]" and state == _ITEM_OR_END:
+                    self._advance(_OBJ_SEP)
+                else:
+                    item = self._decode_value()
+                    if item is _INCOMPLETE:
+                        break
+                    items.append(item)
+                    self._state = _ITEM_SEP
+
+            elif state == _ITEM_SEP:
+                if ch == ",":
+                    self._advance(_ITEM)
+                elif ch == "]":
+                    self._advance(_OBJ_SEP)
+                else:
+                    raise InvalidPayloadError(f"Invalid JSON: expected ',' or ']' but got '{ch}'")
+
+            elif state == _OBJ_SEP:
+                if ch == ",":
+                    self._advance(_KEY)
+                elif ch == "}":
+                    self._advance(_DONE)
+                else:
+                    raise InvalidPayloadError(f"Invalid JSON: expected ',' or '}}' but got '{ch}'")
+
+            else:  # _DONE
+                raise InvalidPayloadError("Invalid JSON: extra data after document")
+
+        return items
+
+    def close(self) -> None:
+        """
+        입력 종료 검증
+
+        Raises:
+            InvalidPayloadError: 문서가 완성되지 않았거나 logs 필드가 없음
+        """
+        try:
+            tail = self._utf8.decode(b"", final=True)
+        except UnicodeDecodeError as e:
+            raise InvalidPayloadError(f"Invalid JSON: {e}")
+        if tail.strip() or self._buf[self._pos:].strip():
+            if self._state != _DONE:
+                raise InvalidPayloadError("Invalid JSON: unexpected end of data")
+            raise InvalidPayloadError("Invalid JSON: extra data after document")
+        if self._state != _DONE:
+            raise InvalidPayloadError("Invalid JSON: unexpected end of data")
+        if not self.found_logs:
+            raise InvalidPayloadError("Missing 'logs' field")
+
+    def _advance(self, state: int) -> None:
+        self._pos += 1
+        self._state = state
+
+    def _decode_value(self) -> Any:
+        """
+        현재 위치의 JSON 값 디코딩
+
+        값 뒤에 최소 한 글자가 더 있어야 완성으로 판단합니다
+        (청크 경계에서 잘린 숫자 "12|3"을 12로 오인하지 않기 위함).
+        """
+        try:
+            value, end = self._json.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError:
+            end = None
+
+        if end is None or end >= len(self._buf):
+            if len(self._buf) - self._pos > self.max_item_chars:
+                raise InvalidPayloadError(
+                    f"Invalid JSON or log entry larger than {self.max_item_chars} chars"
+                )
+            return _INCOMPLETE
+
+        self._pos = end
+        return value
+
+
+class LogDocumentParser:
+    """
+    {"logs": [...]} 문서 파서 (빠른 경로 + 스트리밍 경로)
+
+    본문이 fast_path_bytes 이하이면 모아 두었다가 close()에서 orjson으로
+    한 번에 디코딩합니다 (항목마다 raw_decode를 호출하는 것보다 훨씬 빠름).
+    그보다 커지는 순간 LogArrayParser로 전환하므로 요청당 메모리는
+    fast_path_bytes 수준으로 유지됩니다.
+
+    Example:
+        parser = LogDocumentParser(fast_path_bytes=2 * 1024 * 1024)
+        for piece in pieces:
+            logs.extend(parser.feed(piece))
+        logs.extend(parser.close())
+    """
+
+    def __init__(self, fast_path_bytes: int, max_item_chars: int = 1024 * 1024):
+        """
+        Args:
+            fast_path_bytes: 한 번에 디코딩할 최대 본문 크기 (바이트, 0이면 항상 스트리밍)
+            max_item_chars: 로그 항목 하나의 최대 크기 (스트리밍 경로, 문자 수)
+        """
+        self.fast_path_bytes = fast_path_bytes
+        self.max_item_chars = max_item_chars
+        self.fields: Dict[str, Any] = {}
+
+        self._chunks: List[bytes] = []
+        self._size = 0
+        self._stream: Optional[LogArrayParser] = None
+
+    @property
+    def streaming(self) -> bool:
+        """스트리밍 경로로 전환되었는지 여부"""
+        return self._stream is not None
+
+    def feed(self, data: bytes) -> List[Any]:
+        """해제된 바이트 조각 입력 → 완성된 logs 항목 목록 (빠른 경로에서는 빈 목록)"""
+        if self._stream is not None:
+            return self._stream.feed(data)
+
+        self._chunks.append(data)
+        self._size += len(data)
+        if self._size <= self.fast_path_bytes:
+            return []
+
+        # 본문이 커서 증분 파싱으로 전환
+        self._stream = LogArrayParser(max_item_chars=self.max_item_chars)
+        self.fields = self._stream.fields
+        body = b"".join(self._chunks)
+        self._chunks = []
+        return self._stream.feed(body)
+
+    def close(self) -> List[Any]:
+        """
+        입력 종료 → 남은 logs 항목 목록
+
+        Raises:
+            InvalidPayloadError: 잘못된 문서
+        """
+        if self._stream is not None:
+            self._stream.close()
+            return []
+
+        body = b"".join(self._chunks)
+        self._chunks = []
+        try:
+            document = _loads(body)
+        except _JSON_ERRORS as e:
+            raise InvalidPayloadError(f"Invalid JSON: {e}")
+
+        if not isinstance(document, dict):
+            raise InvalidPayloadError("Invalid JSON: expected an object with 'logs' field")
+        if "logs" not in document:
+            raise InvalidPayloadError("Missing 'logs' field")
+        logs = document.pop("logs")
+        if not isinstance(logs, list):
+            raise InvalidPayloadError("'logs' must be an array")
+        self.fields = document
+        return logs
+
+
+# 열 단위 배치 문서의 Content-Type (GET /ingest/capabilities의 batch_formats에 "columnar")
+COLUMNAR_CONTENT_TYPE = "application/vnd.logs.columnar+json"
+
+
+class ColumnarParser:
+    """
+    열 단위 배치 문서 파서
+
+    {"count": n, "columns": {"level": [...], "message": [...], ...}, "constants": {"service": ..., ...}}
+    - columns: 필드마다 n개 값 (null = 그 행에 없는 필드)
+    - constants: 모든 행에 같은 필드 (선택)
+
+    필드 이름이 행마다 반복되지 않아 본문이 작고, 클라이언트는 배치를 한 번에 인코딩합니다.
+    본문을 모아 close()에서 한 번에 디코딩해 행 dict 목록으로 바꾸므로
+    요청당 메모리는 최대 해제 크기(max_bytes)로 제한됩니다.
+
+    Example:
+        parser = ColumnarParser()
+        for piece in pieces:
+            parser.feed(piece)
+        logs = parser.close()
+    """
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self._chunks: List[bytes] = []
+
+    def feed(self, data: bytes) -> List[Any]:
+        """해제된 바이트 조각 입력 (항목은 close()에서 반환)"""
+        self._chunks.append(data)
+        return []
+
+    def close(self) -> List[Any]:
+        """
+        입력 종료 → 행 dict 목록
+
+        Raises:
+            InvalidPayloadError: 잘못된 문서 (열 길이가 count와 다름 등)
+        """
+        body = b"".join(self._chunks)
+        self._chunks = []
+        try:
+            document = _loads(body)
+        except _JSON_ERRORS as e:
+            raise InvalidPayloadError(f"Invalid JSON: {e}")
+
+        if not isinstance(document, dict) or not isinstance(document.get("columns"), dict):
+            raise InvalidPayloadError("Invalid columnar batch: expected an object with 'columns' field")
+        columns = document.pop("columns")
+        constants = document.pop("constants", None)
+        if constants is None:
+            constants = {}
+        count = document.pop("count", None)
+        if not isinstance(constants, dict):
+            raise InvalidPayloadError("'constants' must be an object")
+        if not isinstance(count, int) or count < 0:
+            raise InvalidPayloadError("'count' must be a non-negative integer")
+        for name, values in columns.items():
+            if not isinstance(values, list) or len(values) != count:
+                raise InvalidPayloadError(f"Column '{name}' must be an array of {count} values")
+        self.fields = document
+
+        names = list(columns)
+        rows = []
+        append = rows.append
+        for values in zip(*columns.values()) if names else ((),) * count:
+            row = dict(constants)
+            row.update((name, value) for name, value in zip(names, values) if value is not None)
+            append(row)
+        return rows
+
+
+class NdjsonParser:
+    """
+    줄 단위 JSON (NDJSON) 증분 파서
+
+    한 줄이 로그 하나입니다. 잘못된 줄이나 max_line_bytes를 넘는 줄은
+    RejectedEntry로 반환되어 해당 행만 거부되고, 스트림은 계속 처리됩니다.
+    빈 줄은 무시합니다.
+
+    Example:
+        parser = NdjsonParser()
+        for piece in pieces:
+            logs.extend(parser.feed(piece))
+        logs.extend(parser.close())
+    """
+
+    def __init__(self, max_line_bytes: int = 1024 * 1024):
+        """
+        Args:
+            max_line_bytes: 한 줄의 최대 크기 (바이트)
+        """
+        self.max_line_bytes = max_line_bytes
+        self._buf = b""
+        self._skipping = False  # 너무 긴 줄의 나머지를 버리는 중
+
+    def feed(self, data: bytes) -> List[Any]:
+        """해제된 바이트 조각 입력 → 완성된 줄의 로그 목록"""
+        lines = (self._buf + data if self._buf else data).split(b"\n")
+        rest = lines.pop()
+
+        items = []
+        append = items.append
+        for line in lines:
+            if self._skipping:
+                self._skipping = False
+                append(self._oversized())
+            elif len(line) > self.max_line_bytes:
+                append(self._oversized())
+            else:
+                item = self._decode(line)
+                if item is not None:
+                    append(item)
+
+        if self._skipping or len(rest) > self.max_line_bytes:
+            # 줄 끝이 올 때까지 버퍼에 쌓지 않고 버림
+            self._skipping = True
+            rest = b""
+        self._buf = rest
+        return items
+
+    def close(self) -> List[Any]:
+        """입력 종료 → 마지막 줄 (개행 없이 끝난 경우)"""
+        if self._skipping:
+            self._skipping = False
+            return [self._oversized()]
+        rest, self._buf = self._buf, b""
+        item = self._decode(rest)
+        return [item] if item is not None else []
+
+    def _decode(self, line: bytes) -> Any:
+        try:
+            return _loads(line)
+        except _JSON_ERRORS as e:
+            if not line.strip():
+                return None
+            return RejectedEntry(f"Invalid JSON: {e}")
+
+    def _oversized(self) -> RejectedEntry:
+        return RejectedEntry(f"log entry larger than {self.max_line_bytes} bytes")
+
+
+async def iter_with_idle(
+    chunks: AsyncIterator[bytes],
+    idle_seconds: Optional[float]
+) -> AsyncIterator[Optional[bytes]]:
+    """
+    청크 비동기 반복 + 유휴 알림
+
+    idle_seconds 동안 새 청크가 없으면 None을 내보냅니다. 오래 열려 있는
+    업로드에서 드물게 들어온 행을 다음 청크까지 붙잡아 두지 않기 위함입니다.
+    idle_seconds가 None이면 청크를 그대로 전달합니다.
+    """
+    if idle_seconds is None:
+        async for chunk in chunks:
+            yield chunk
+        return
+
+    iterator = chunks.__aiter__()
+    next_chunk = asyncio.ensure_future(iterator.__anext__())
+    try:
+        while True:
+            done, _ = await asyncio.wait((next_chunk,), timeout=idle_seconds)
+            if not done:
+                yield None
+                continue
+            try:
+                chunk = next_chunk.result()
+            except StopAsyncIteration:
+                return
+            next_chunk = asyncio.ensure_future(iterator.__anext__())
+            yield chunk
+    finally:
+        if not next_chunk.done():
+            next_chunk.cancel()
@@ -0,0 +1,142 @@
+"""
+콜드 티어 아카이브 테스트
+DB 없이 실행 가능 (PostgreSQL CSV 출력을 흉내 낸 가짜 연결 + 로컬 디렉터리), duckdb 필요
+"""
+from datetime import datetime, timezone
+
+import pytest
+
+from archive import archive_candidates, archive_partitions, export_query, write_parquet
+from partitions import Partition
+
+duckdb = pytest.importorskip("duckdb")
+
+NOW = datetime(2025, 3, 1, 10, 0, tzinfo=timezone.utc)
+
+# COPY ... TO STDOUT (FORMAT csv) 출력 형식: 따옴표 없는 빈 값 = NULL, "" = 빈 문자열
+PARTITION_CSV = (
+    '1,2025-01-15 10:00:00.123+00,ERROR,BACKEND,payment-api,production,v1,,u1,,DbError,'
+    '"multi\nline ""msg""",,/api/pay,POST,,charge,pay.py,1234.500,f,"{""order"": 7}"\n'
+    '2,2025-01-15 23:59:59+00,INFO,BACKEND,order-api,production,v1,,,,,"",,/api/o,GET,,,,,f,\n'
+)
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_archive_candidates_oldest_first():
+    existing = [
+        Partition("logs_default", None, None, is_default=True),
+        Partition("logs_p20250116", utc(2025, 1, 16), utc(2025, 1, 17)),
+        Partition("logs_legacy", None, utc(2025, 1, 15)),
+        Partition("logs_p20250301", utc(2025, 3, 1), utc(2025, 3, 2)),
+    ]
+    assert [p.name for p in archive_candidates(existing, NOW, 30)] == ["logs_legacy", "logs_p20250116"]
+    assert archive_candidates(existing, NOW, 0) == []
+
+
+def test_write_parquet_by_day_and_service(tmp_path):
+    csv_path = tmp_path / "logs_p20250115.csv"
+    csv_path.write_text(PARTITION_CSV)
+
+    # 재실행해도 같은 파일을 덮어씀
+    assert write_parquet(str(csv_path), "logs_p20250115", str(tmp_path / "archive")) == 2
+    assert write_parquet(str(csv_path), "logs_p20250115", str(tmp_path / "archive")) == 2
+
+    files = sorted(p.relative_to(tmp_path / "archive").as_posix() for p in (tmp_path / "archive").rglob("*.parquet"))
+    assert files == [
+        "logs/day=2025-01-15/service=order-api/logs_p20250115_0.parquet",
+        "logs/day=2025-01-15/service=payment-api/logs_p20250115_0.parquet",
+    ]
+    rows = duckdb.sql(
+        f"SELECT id, service, message, metadata->>'order', duration_ms, trace_id "
+        f"FROM read_parquet('{tmp_path}/archive/logs/**/*.parquet', hive_partitioning = true) ORDER BY id"
+    ).fetchall()
+    assert rows[0][:4] == (1, "payment-api", 'multi\nline "msg"', "7")
+    assert float(rows[0][4]) == 1234.5
+    assert rows[1][2] == "" and rows[1][5] is None
+
+
+def test_write_parquet_shard_prefix_keeps_files_apart(tmp_path):
+    csv_path = tmp_path / "logs_p20250115.csv"
+    csv_path.write_text(PARTITION_CSV)
+    archive = str(tmp_path / "archive")
+
+    assert write_parquet(str(csv_path), "logs_p20250115", archive) == 2
+    # 다른 샤드의 같은 이름 파티션은 덮어쓰지 않고, 검증도 자기 파일만 셈
+    assert write_parquet(str(csv_path), "logs_p20250115", archive, file_prefix="shard1_") == 2
+
+    names = sorted(p.name for p in (tmp_path / "archive").rglob("*.parquet"))
+    assert names == ["logs_p20250115_0.parquet", "logs_p20250115_0.parquet",
+                     "shard1_logs_p20250115_0.parquet", "shard1_logs_p20250115_0.parquet"]
+
+
+def test_export_fills_deduplicated_stack_traces():
+    assert export_query("logs_p20250115").endswith("FROM logs_p20250115 WHERE deleted = FALSE")
+    sql = export_query("logs_p20250115", stack_traces=True)
+    assert "l.message, COALESCE(st.stack_trace, l.stack_trace), l.path" in sql
+    assert "LEFT JOIN stack_traces st ON st.hash = l.stack_trace_hash WHERE l.deleted = FALSE" in sql
+
+
+class FakeConn:
+    """COPY 결과로 PARTITION_CSV를 쓰는 가짜 asyncpg 연결"""
+
+    def __init__(self, partitions, rows_after_detach=2):
+        self.partitions = partitions
+        self.rows_after_detach = rows_after_detach
+        self.executed = []
+
+    def transaction(self):
+        class Transaction:
+            async def __aenter__(self):
+                pass
+
+            async def __aexit__(self, *exc):
+                pass
+
+        return Transaction()
+
+    async def fetch(self, sql, *args):
+        return [
+            {"name": p.name, "range_start": p.start, "range_end": p.end, "is_default": p.is_default}
+            for p in self.partitions
+        ]
+
+    async def fetchval(self, sql, *args):
+        if "advisory" in sql:
+            return True
+        if "COUNT(*)" in sql:
+            return self.rows_after_detach
+        return None
+
+    async def copy_from_query(self, query, output, format):
+        self.executed.append(query)
+        with open(output, "w") as f:
+            f.write(PARTITION_CSV)
+        return "COPY 2"
+
+    async def execute(self, sql, *args):
+        self.executed.append(" ".join(sql.split()))
+
+
+@pytest.mark.asyncio
+async def test_archive_drops_partition_after_parquet(tmp_path):
+    conn = FakeConn([Partition("logs_p20250115", utc(2025, 1, 15), utc(2025, 1, 16))])
+    result = await archive_partitions(conn, 30, path=str(tmp_path), now=NOW)
+
+    assert result == {"archived": {"logs_p20250115": 2}, "skipped": None}
+    ddl = [sql for sql in conn.executed if sql.startswith(("ALTER", "DROP", "INSERT"))]
+    assert ddl[0] == "ALTER TABLE logs DETACH PARTITION logs_p20250115"
+    assert ddl[1].startswith("INSERT INTO archived_partitions")
+    assert ddl[2] == "DROP TABLE logs_p20250115"
+    assert "WHERE deleted = FALSE" in conn.executed[1]
+
+
+@pytest.mark.asyncio
+async def test_archive_keeps_partition_when_rows_changed(tmp_path):
+    conn = FakeConn([Partition("logs_p20250115", utc(2025, 1, 15), utc(2025, 1, 16))], rows_after_detach=3)
+
+    with pytest.raises(RuntimeError, match="rows changed"):
+        await archive_partitions(conn, 30, path=str(tmp_path), now=NOW)
+    assert "DROP TABLE logs_p20250115" not in conn.executed
@@ -0,0 +1,133 @@
+"""
+배치 중복 제거 테스트
+DB 없이 실행 가능 (ingest_batches 조회는 가짜 함수로 대체)
+"""
+import asyncio
+import json
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+import main
+from dedup import BatchDedup, BatchMarker, BatchResult, drop_unclaimed, parse_batch_id
+from write_buffer import WriteBuffer
+
+
+def test_parse_batch_id():
+    batch_id = uuid.uuid4()
+    assert parse_batch_id(f" {batch_id} ") == batch_id
+    with pytest.raises(ValueError):
+        parse_batch_id("batch-1")
+
+
+@pytest.mark.asyncio
+async def test_replay_returns_first_result():
+    """완료된 배치의 재전송은 처음 결과로 응답"""
+    dedup = BatchDedup()
+    batch_id = uuid.uuid4()
+
+    assert await dedup.begin(batch_id) is None
+    dedup.finish(batch_id, BatchResult(accepted=998, rejected=2))
+
+    assert await dedup.begin(batch_id) == BatchResult(998, 2)
+    assert dedup.duplicates == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_can_be_retried():
+    """적재 실패(abort)한 배치는 기억하지 않음"""
+    dedup = BatchDedup()
+    batch_id = uuid.uuid4()
+
+    assert await dedup.begin(batch_id) is None
+    dedup.abort(batch_id)
+    assert await dedup.begin(batch_id) is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_replay_waits_for_original():
+    """처리 중인 배치의 재전송은 원 요청 결과를 기다림"""
+    dedup = BatchDedup()
+    batch_id = uuid.uuid4()
+    assert await dedup.begin(batch_id) is None
+
+    replay = asyncio.create_task(dedup.begin(batch_id))
+    await asyncio.sleep(0.01)
+    assert not replay.done()
+
+    dedup.finish(batch_id, BatchResult(10, 0))
+    assert await asyncio.wait_for(replay, timeout=1) == BatchResult(10, 0)
+
+
+@pytest.mark.asyncio
+async def test_window_is_bounded():
+    """LRU 창 크기 유지 (가장 오래된 배치부터 잊음)"""
+    dedup = BatchDedup(window=3)
+    batch_ids = [uuid.uuid4() for _ in range(5)]
+    for batch_id in batch_ids:
+        await dedup.begin(batch_id)
+        dedup.finish(batch_id, BatchResult(1, 0))
+
+    assert dedup.stats()["remembered_batches"] == 3
+    assert await dedup.begin(batch_ids[0]) is None
+    assert await dedup.begin(batch_ids[-1]) == BatchResult(1, 0)
+
+
+def test_drop_unclaimed():
+    """다른 워커가 먼저 커밋한 배치의 레코드만 제외"""
+    a, b, c = (BatchMarker(uuid.uuid4(), 2, 0) for _ in range(3))
+    records = [("free",), ("a1",), ("a2",), ("b1",), ("b2",), ("c1",), ("c2",)]
+    batches = [(a, 1, 3), (b, 3, 5), (c, 5, 7)]
+
+    assert drop_unclaimed(records, batches, {a.batch_id, b.batch_id, c.batch_id}) == records
+    assert drop_unclaimed(records, batches, {a.batch_id}) == [("free",), ("a1",), ("a2",)]
+    assert drop_unclaimed(records, batches, {b.batch_id}) == [("free",), ("b1",), ("b2",)]
+
+
+@pytest.mark.asyncio
+async def test_write_buffer_passes_batch_ranges():
+    """WriteBuffer가 합쳐진 레코드 안의 배치 범위를 flush 함수에 전달"""
+    calls = []
+
+    async def copy(records, batches):
+        calls.append((list(records), list(batches)))
+
+    buffer = WriteBuffer(copy, flush_rows=1000, flush_interval_ms=10000, durability="buffer")
+    await buffer.start()
+    marker = BatchMarker(uuid.uuid4(), 2, 0)
+    await buffer.submit([(1,)])
+    await buffer.submit([(2,), (3,)], batch=marker)
+    await buffer.stop()
+
+    assert calls == [([(1,), (2,), (3,)], [(marker, 1, 3)])]
+
+
+@pytest.mark.asyncio
+async def test_batch_larger_than_buffer_is_rejected(monkeypatch):
+    """버퍼 용량보다 큰 배치는 429 대신 413 (재전송해도 들어갈 수 없음)"""
+    buffer = WriteBuffer(lambda records, batches: None, flush_rows=1000, flush_interval_ms=10000,
+                         max_rows=5, durability="buffer")
+    monkeypatch.setattr(main, "write_buffer", buffer)
+    monkeypatch.setattr(main, "batch_dedup", BatchDedup())
+    batch_id = uuid.uuid4()
+    body = json.dumps({"logs": [{"level": "INFO", "message": f"m{i}"} for i in range(8)]}).encode()
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    request = Request({
+        "type": "http",
+        "method": "POST",
+        "path": "/logs",
+        "headers": [(b"content-type", b"application/json"), (b"x-batch-id", str(batch_id).encode())],
+    }, receive)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await main.receive_logs(request)
+
+    assert exc_info.value.status_code == 413
+    assert "WRITE_BUFFER_MAX_ROWS" in exc_info.value.detail
+    assert buffer.rejected_rows == 0
+    assert await main.batch_dedup.begin(batch_id) is None
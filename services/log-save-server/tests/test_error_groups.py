@@ -0,0 +1,107 @@
+"""
+에러 지문 / 그룹 테스트
+DB 없이 실행 가능 (지문 정규화 + 가짜 연결로 upsert 파라미터 확인)
+"""
+import pytest
+
+from error_groups import (
+    aggregate,
+    error_fingerprint,
+    fingerprint_records,
+    normalize_message,
+    top_frames,
+    upsert_error_groups,
+)
+from records import normalize_logs
+
+PYTHON_TRACE = '''Traceback (most recent call last):
+  File "/app/api.py", line {line}, in handle
+    return charge(order)
+  File "/app/payment.py", line 88, in charge
+    raise TimeoutError(url)
+TimeoutError: upstream timed out'''
+
+
+def test_normalize_message_strips_numbers_and_ids():
+    assert normalize_message("Order 12345 failed after 3.5s") == "Order N failed after Ns"
+    assert normalize_message(
+        "User 'alice@example.com' not found (request 550e8400-e29b-41d4-a716-446655440000)"
+    ) == "User '?' not found (request <uuid>)"
+    assert normalize_message("Document 507f1f77bcf86cd799439011 locked") == "Document <id> locked"
+    # 숫자가 없는 긴 단어는 그대로
+    assert normalize_message("deadbeefcafe") == "deadbeefcafe"
+
+
+def test_top_frames_innermost_first():
+    frames = top_frames(PYTHON_TRACE.format(line=10), count=1)
+    assert frames == ['File "/app/payment.py", line N, in charge']
+    js = "TypeError: x is undefined\n    at render (app.js:10:5)\n    at commit (vendor.js:2:1)"
+    assert top_frames(js, count=1) == ["at render (app.js:N)"]
+    assert top_frames(None) == []
+
+
+def test_fingerprint_stable_across_occurrences():
+    first = error_fingerprint("payment-api", "TimeoutError", "timeout after 3000ms (order 17)",
+                              PYTHON_TRACE.format(line=10))
+    second = error_fingerprint("payment-api", "TimeoutError", "timeout after 5000ms (order 99)",
+                               PYTHON_TRACE.format(line=12))
+    assert first == second
+    assert first != error_fingerprint("order-api", "TimeoutError", "timeout after 3000ms (order 17)",
+                                      PYTHON_TRACE.format(line=10))
+    assert first != error_fingerprint("payment-api", "ValueError", "timeout after 3000ms (order 17)",
+                                      PYTHON_TRACE.format(line=10))
+
+
+def test_fingerprint_records_only_errors():
+    records = normalize_logs([
+        {"level": "INFO", "message": "ok", "created_at": 1.0},
+        {"level": "ERROR", "message": "db down 1", "created_at": 2.0},
+        {"level": "WARN", "error_type": "Retry", "message": "retry 2", "created_at": 3.0},
+    ])
+    fingerprints = fingerprint_records(records)
+
+    assert fingerprints[0] is None and None not in fingerprints[1:]
+    assert fingerprint_records(records[:1]) is None
+
+
+def test_aggregate_counts_and_bounds():
+    records = normalize_logs([
+        {"level": "ERROR", "service": "api", "message": "db down 1", "created_at": 20.0},
+        {"level": "ERROR", "service": "api", "message": "db down 2", "created_at": 10.0},
+        {"level": "ERROR", "service": "api", "message": "db down 3", "created_at": 30.0},
+        {"level": "INFO", "service": "api", "message": "ok", "created_at": 40.0},
+    ])
+    with_fingerprints = [(*record, value) for record, value in zip(records, fingerprint_records(records))]
+
+    (value, service, error_type, message, first_seen, last_seen, count), = aggregate(with_fingerprints)
+
+    assert value == error_fingerprint("api", None, "db down 1", None)
+    assert (service, error_type, message, count) == ("api", "", "db down 1", 3)
+    assert first_seen.timestamp() == 10.0 and last_seen.timestamp() == 30.0
+
+
+class FakeConn:
+    def __init__(self):
+        self.executed = []
+
+    async def execute(self, sql, *args):
+        self.executed.append((" ".join(sql.split()), *args))
+
+
+@pytest.mark.asyncio
+async def test_upsert_passes_columns_sorted_by_fingerprint():
+    records = normalize_logs([
+        {"level": "ERROR", "service": "a", "message": "x", "created_at": 1.0},
+        {"level": "ERROR", "service": "b", "message": "y", "created_at": 2.0},
+    ])
+    with_fingerprints = [(*record, value) for record, value in zip(records, fingerprint_records(records))]
+    conn = FakeConn()
+
+    assert await upsert_error_groups(conn, with_fingerprints) == 2
+    (sql, fingerprints, services, *_rest, counts), = conn.executed
+    assert sql.startswith("INSERT INTO error_groups") and "event_count = g.event_count + EXCLUDED.event_count" in sql
+    assert fingerprints == sorted(fingerprints)
+    assert sorted(services) == ["a", "b"] and counts == [1, 1]
+
+    assert await upsert_error_groups(conn, [(*records[0], None)]) == 0
+    assert len(conn.executed) == 1
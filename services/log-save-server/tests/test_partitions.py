@@ -0,0 +1,172 @@
+"""
+logs 파티션 관리 테스트
+DB 없이 실행 가능 (구간 계산 + 가짜 연결로 DDL 순서 확인)
+"""
+from datetime import datetime, timezone
+
+import pytest
+
+from partitions import (
+    Partition,
+    expired_partitions,
+    maintain_partitions,
+    missing_partitions,
+    parse_partition_name,
+    partition_range,
+    planned_partitions,
+)
+
+NOW = datetime(2025, 1, 15, 10, 42, 7, tzinfo=timezone.utc)
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def partitions(*names):
+    """이름 형식으로 구간을 채운 기존 파티션 목록"""
+    existing = []
+    for name in names:
+        if name == "logs_default":
+            existing.append(Partition(name, None, None, is_default=True))
+        else:
+            existing.append(Partition(name, *(parse_partition_name(name) or (None, None))))
+    return existing
+
+
+def test_partition_range():
+    assert partition_range(NOW, "daily") == (utc(2025, 1, 15), utc(2025, 1, 16))
+    assert partition_range(NOW, "hourly") == (utc(2025, 1, 15, 10), utc(2025, 1, 15, 11))
+    with pytest.raises(ValueError):
+        partition_range(NOW, "weekly")
+
+
+def test_planned_partitions_names():
+    assert [name for name, _, _ in planned_partitions(NOW, "daily", 2)] == [
+        "logs_p20250115", "logs_p20250116", "logs_p20250117"
+    ]
+    assert [name for name, _, _ in planned_partitions(NOW, "hourly", 1)] == [
+        "logs_p2025011510", "logs_p2025011511"
+    ]
+
+
+def test_parse_partition_name():
+    assert parse_partition_name("logs_p20250115") == (utc(2025, 1, 15), utc(2025, 1, 16))
+    assert parse_partition_name("logs_p2025011523") == (utc(2025, 1, 15, 23), utc(2025, 1, 16))
+    assert parse_partition_name("logs_default") is None
+    assert parse_partition_name("logs_legacy") is None
+    assert parse_partition_name("logs_p2025015") is None
+
+
+def test_missing_skips_existing_and_overlapping():
+    """daily → hourly 전환 시 오늘 daily 파티션과 겹치는 hourly는 만들지 않음"""
+    existing = partitions("logs_default", "logs_p20250115")
+    missing = missing_partitions(existing, planned_partitions(NOW, "hourly", 20))
+    assert [name for name, _, _ in missing] == ["logs_p2025011600", "logs_p2025011601", "logs_p2025011602",
+                                                "logs_p2025011603", "logs_p2025011604", "logs_p2025011605",
+                                                "logs_p2025011606"]
+
+
+def test_missing_skips_legacy_range():
+    """마이그레이션으로 붙인 logs_legacy (MINVALUE ~ 내일 0시) 구간은 만들지 않음"""
+    existing = [Partition("logs_legacy", None, utc(2025, 1, 16)), *partitions("logs_default")]
+    missing = missing_partitions(existing, planned_partitions(NOW, "daily", 2))
+    assert [name for name, _, _ in missing] == ["logs_p20250116", "logs_p20250117"]
+
+
+def test_expired_partitions():
+    existing = [Partition("logs_legacy", None, utc(2025, 1, 2)),
+                *partitions("logs_default", "logs_p20250101", "logs_p20250107", "logs_p20250108",
+                            "logs_p2025010723")]
+    assert expired_partitions(existing, NOW, 0) == []
+    # 보관 7일: 2025-01-08 10:42 이전에 끝난 구간만
+    assert expired_partitions(existing, NOW, 7) == ["logs_p20250101", "logs_p20250107", "logs_p2025010723"]
+
+
+class FakeConn:
+    """실행된 SQL을 기록하는 가짜 asyncpg 연결"""
+
+    def __init__(self, partitions, relkind="p", stranded=False, locked=True):
+        self.partitions = partitions
+        self.relkind = relkind
+        self.stranded = stranded
+        self.locked = locked
+        self.executed = []
+
+    def transaction(self):
+        conn = self
+
+        class Transaction:
+            async def __aenter__(self):
+                conn.executed.append("BEGIN")
+
+            async def __aexit__(self, *exc):
+                conn.executed.append("COMMIT")
+
+        return Transaction()
+
+    async def fetchval(self, sql, *args):
+        if "relkind" in sql:
+            return self.relkind
+        if "pg_try_advisory_lock" in sql:
+            return self.locked
+        if "EXISTS" in sql:
+            return self.stranded
+        return None
+
+    async def fetch(self, sql, *args):
+        return [
+            {"name": p.name, "range_start": p.start, "range_end": p.end, "is_default": p.is_default}
+            for p in self.partitions
+        ]
+
+    async def execute(self, sql, *args):
+        self.executed.append(" ".join(sql.split()))
+        return "INSERT 0 42"
+
+
+@pytest.mark.asyncio
+async def test_maintain_creates_and_drops():
+    conn = FakeConn(partitions("logs_default", "logs_p20250101", "logs_p20250115"))
+    result = await maintain_partitions(conn, "daily", premake=1, retention_days=7, now=NOW)
+
+    assert result["created"] == ["logs_p20250116"]
+    assert result["dropped"] == ["logs_p20250101"]
+    ddl = [sql for sql in conn.executed if sql.startswith(("CREATE", "ALTER", "DROP"))]
+    assert ddl == [
+        "CREATE TABLE IF NOT EXISTS logs_p20250116 PARTITION OF logs "
+        "FOR VALUES FROM ('2025-01-16 00:00:00+00') TO ('2025-01-17 00:00:00+00')",
+        "ALTER TABLE logs DETACH PARTITION logs_p20250101",
+        "DROP TABLE logs_p20250101",
+    ]
+    assert conn.executed[0] == "SET lock_timeout = '5s'"
+    assert conn.executed[-1] == "RESET lock_timeout"
+
+
+@pytest.mark.asyncio
+async def test_rows_in_default_partition_are_moved():
+    """기본 파티션에 해당 구간 행이 있으면 옮긴 뒤 ATTACH"""
+    conn = FakeConn(partitions("logs_default"), stranded=True)
+    result = await maintain_partitions(conn, "daily", premake=0, retention_days=0, now=NOW)
+
+    assert result["created"] == ["logs_p20250115"]
+    assert result["moved_rows"] == 42
+    statements = [sql.split(" (")[0] for sql in conn.executed if sql not in ("BEGIN", "COMMIT")]
+    assert statements[1:4] == [
+        "CREATE TABLE logs_p20250115",
+        "WITH moved AS",
+        "ALTER TABLE logs ATTACH PARTITION logs_p20250115 FOR VALUES FROM",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_unpartitioned_or_locked_is_skipped():
+    conn = FakeConn([], relkind="r")
+    result = await maintain_partitions(conn, "daily", 3, 30, now=NOW)
+    assert result["skipped"] == "logs is not partitioned"
+    assert conn.executed == []
+
+    conn = FakeConn([], locked=False)
+    result = await maintain_partitions(conn, "daily", 3, 30, now=NOW)
+    assert result["skipped"] == "another server is maintaining partitions"
+    assert conn.executed == []
@@ -0,0 +1,201 @@
+"""
+성능 테스트: 레코드 정규화 / COPY 인코딩 / 디코딩+검증 비용 벤치마크
+DB 없이 실행 가능 (COPY 직전 단계까지만 측정)
+
+실행:
+    python -m pytest tests/test_performance.py -s
+"""
+import gc
+import json
+import random
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from records import build_records, normalize_logs
+from streaming import LogArrayParser, LogDocumentParser
+
+
+def legacy_normalize_logs(logs):
+    """기존 insert_logs_batch의 per-log dict 루프 (비교 기준)"""
+    records = []
+    for log in logs:
+        if "created_at" in log and log["created_at"]:
+            created_at = datetime.fromtimestamp(log["created_at"])
+        else:
+            created_at = datetime.now()
+
+        metadata = json.dumps(log.get("metadata")) if log.get("metadata") else None
+
+        record = (
+            created_at,
+            log.get("level", "INFO"),
+            log.get("log_type", "BACKEND"),
+            log.get("service", "unknown"),
+            log.get("environment", "development"),
+            log.get("service_version", "v0.0.0-dev"),
+            log.get("trace_id"),
+            log.get("user_id"),
+            log.get("session_id"),
+            log.get("error_type"),
+            log.get("message", ""),
+            log.get("stack_trace"),
+            log.get("path"),
+            log.get("method"),
+            log.get("action_type"),
+            log.get("function_name"),
+            log.get("file_path"),
+            log.get("duration_ms"),
+            False,
+            metadata
+        )
+        records.append(record)
+    return records
+
+
+def make_logs(count: int, seed: int = 42):
+    """실제 클라이언트가 보내는 형태의 로그 생성"""
+    rng = random.Random(seed)
+    services = ["payment-api", "user-service", "order-service", "auth-service"]
+    paths = ["/api/v1/payment", "/api/v1/users", "/api/v1/orders", "/login"]
+    logs = []
+    now = time.time()
+    for i in range(count):
+        level = rng.choice(["INFO", "INFO", "INFO", "WARN", "ERROR"])
+        log = {
+            "level": level,
+            "message": f"Request processed {i}",
+            "created_at": now - rng.random() * 3600,
+            "service": rng.choice(services),
+            "environment": "production",
+            "service_version": "v1.2.3",
+            "log_type": "BACKEND",
+            "path": rng.choice(paths),
+            "method": "POST",
+            "duration_ms": rng.random() * 2000,
+            "function_name": "handle_request",
+            "file_path": "/app/handlers.py",
+            "trace_id": f"trace{i:08d}",
+        }
+        if level == "ERROR":
+            log["error_type"] = "TimeoutError"
+            log["stack_trace"] = "Traceback (most recent call last):\n  File \"/app/db.py\", line 42"
+        if i % 3 == 0:
+            log["metadata"] = {"browser": "Chrome", "retry": i % 5, "tags": ["a", "b"]}
+        logs.append(log)
+    return logs
+
+
+def rows_per_sec(fn, logs, repeat: int = 5, rows: int = None) -> float:
+    """best-of-N 처리량 (rows/sec, 측정 중 GC 중지로 편차 감소)"""
+    best = float("inf")
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn(logs)
+            best = min(best, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return (rows or len(logs)) / best
+
+
+def test_normalize_matches_legacy():
+    """새 row builder가 기존 루프와 동일한 레코드 생성"""
+    logs = make_logs(500) + [
+        {"message": "defaults only"},
+        {"level": None, "message": "explicit None", "metadata": {}},
+        {"level": "INFO", "message": "no timestamp", "created_at": 0},
+    ]
+    new = normalize_logs(logs)
+    old = legacy_normalize_logs(logs)
+
+    assert len(new) == len(old)
+    for new_row, old_row in zip(new, old):
+        # created_at 누락 시 now()는 호출 시점이 다르므로 제외
+        assert new_row[1:19] == old_row[1:19]
+        assert (json.loads(new_row[19]) if new_row[19] else None) == \
+               (json.loads(old_row[19]) if old_row[19] else None)
+    # 같은 시각 (naive 로컬 → UTC aware)
+    assert new[0][0].timestamp() == old[0][0].timestamp()
+    assert new[0][0].tzinfo is timezone.utc
+
+
+@pytest.mark.parametrize("batch_size", [1_000, 10_000, 100_000])
+def test_normalize_throughput(batch_size):
+    """정규화 처리량: 기존 루프 대비 rows/sec"""
+    logs = make_logs(batch_size)
+
+    before = rows_per_sec(legacy_normalize_logs, logs)
+    after = rows_per_sec(normalize_logs, logs)
+
+    print(f"\n정규화 처리량 ({batch_size:,} rows):")
+    print(f"  before: {before:,.0f} rows/sec")
+    print(f"  after:  {after:,.0f} rows/sec ({after / before:.2f}x)")
+
+    # CI 환경 편차를 고려한 완화된 기준 (회귀만 방지)
+    assert after > before * 0.9, f"정규화가 기존보다 느림: {after:,.0f} < {before:,.0f} rows/sec"
+
+
+@pytest.mark.parametrize("batch_size", [10_000])
+def test_timestamptz_encode_cost(batch_size):
+    """
+    asyncpg TIMESTAMPTZ 인코딩 비용: 레코드 생성 + asyncpg의 행당 astimezone(utc)
+
+    naive datetime은 로컬 타임존 변환이 두 번 일어나므로 UTC aware가 더 저렴
+    """
+    timestamps = [log["created_at"] for log in make_logs(batch_size)]
+    utc = timezone.utc
+
+    def naive(values):
+        return [datetime.fromtimestamp(ts).astimezone(utc) for ts in values]
+
+    def aware(values):
+        return [datetime.fromtimestamp(ts, utc).astimezone(utc) for ts in values]
+
+    before = rows_per_sec(naive, timestamps)
+    after = rows_per_sec(aware, timestamps)
+
+    print(f"\nTIMESTAMPTZ 인코딩 ({batch_size:,} rows):")
+    print(f"  naive: {before:,.0f} rows/sec")
+    print(f"  aware: {after:,.0f} rows/sec ({after / before:.2f}x)")
+
+    assert aware(timestamps[:10]) == naive(timestamps[:10])
+    assert after > before * 0.9
+
+
+def decode_unvalidated(body: bytes):
+    """기존 경로: 증분 파싱 + 검증 없는 정규화"""
+    parser = LogArrayParser()
+    logs = parser.feed(body)
+    parser.close()
+    return normalize_logs(logs)
+
+
+def decode_validated(body: bytes):
+    """새 경로: orjson 빠른 경로 + 행 단위 검증"""
+    parser = LogDocumentParser(fast_path_bytes=len(body))
+    logs = parser.feed(body) + parser.close()
+    records, rejected = build_records(logs)
+    assert not rejected
+    return records
+
+
+@pytest.mark.parametrize("batch_size", [1_000, 10_000])
+def test_validated_decode_throughput(batch_size):
+    """디코딩 + 검증 + 정규화 처리량: 검증 없는 기존 경로 이상"""
+    logs = make_logs(batch_size)
+    body = json.dumps({"logs": logs}).encode()
+
+    assert [row[1:] for row in decode_validated(body)] == [row[1:] for row in decode_unvalidated(body)]
+
+    before = rows_per_sec(decode_unvalidated, body, rows=batch_size)
+    after = rows_per_sec(decode_validated, body, rows=batch_size)
+
+    print(f"\n디코딩 + 검증 처리량 ({batch_size:,} rows):")
+    print(f"  before (검증 없음): {before:,.0f} rows/sec")
+    print(f"  after  (검증 포함): {after:,.0f} rows/sec ({after / before:.2f}x)")
+
+    assert after > before * 0.9, f"검증 경로가 기존보다 느림: {after:,.0f} < {before:,.0f} rows/sec"
@@ -0,0 +1,80 @@
+"""
+분당 롤업 집계 테스트
+DB 없이 실행 가능 (upsert SQL 전 단계인 메모리 집계만 검증)
+"""
+import time
+from datetime import datetime, timezone
+
+from records import normalize_logs
+from rollup import DURATION_BUCKETS_MS, HISTOGRAM_SIZE, aggregate
+
+BASE = datetime(2025, 1, 15, 10, 30, tzinfo=timezone.utc).timestamp()
+
+
+def make_log(offset: float, **fields):
+    return {"created_at": BASE + offset, "service": "api", "level": "INFO", "message": "m", **fields}
+
+
+def test_groups_by_minute_and_dimensions():
+    """(분, service, level, error_type, path)별 건수"""
+    logs = [
+        make_log(1),
+        make_log(59.9),
+        make_log(60),  # 다음 분
+        make_log(5, level="ERROR", error_type="ValueError"),
+        make_log(6, level="ERROR", error_type="ValueError"),
+        make_log(7, path="/api/users"),
+    ]
+    rows = aggregate(normalize_logs(logs))
+    counts = {(row[0].minute, row[2], row[3], row[4]): row[5] for row in rows}
+
+    assert counts == {
+        (30, "INFO", "", ""): 2,
+        (31, "INFO", "", ""): 1,
+        (30, "ERROR", "ValueError", ""): 2,
+        (30, "INFO", "", "/api/users"): 1,
+    }
+    assert all(row[0].second == 0 and row[0].microsecond == 0 for row in rows)
+
+
+def test_duration_sum_max_and_histogram():
+    """duration 건수/합계/최대와 히스토그램 구간"""
+    durations = [5, 10, 10.5, 2000, 2500, 60000]
+    logs = [make_log(i, duration_ms=d) for i, d in enumerate(durations)] + [make_log(10)]
+    (row,) = aggregate(normalize_logs(logs))
+    _, _, _, _, _, count, duration_count, duration_sum, duration_max, histogram = row
+
+    assert count == 7
+    assert duration_count == 6
+    assert duration_sum == sum(durations)
+    assert duration_max == 60000
+    assert len(histogram) == HISTOGRAM_SIZE == len(DURATION_BUCKETS_MS) + 1
+    # 구간 상한 이하: 10 이하 2건, 50 이하 1건, 2000 이하 1건, 5000 이하 1건, 10초 초과 1건
+    assert histogram == [2, 1, 0, 0, 0, 0, 1, 1, 0, 1]
+
+
+def test_rows_sorted_by_key():
+    """upsert 잠금 순서가 워커 간에 같도록 키 순서로 정렬"""
+    logs = [make_log(120, service="b"), make_log(0, service="c"), make_log(60, service="a")]
+    rows = aggregate(normalize_logs(logs))
+    assert rows == sorted(rows, key=lambda row: row[:5])
+
+
+def test_aggregate_throughput():
+    """집계 비용은 COPY 대비 작아야 함 (5000건 flush 기준)"""
+    now = time.time()
+    logs = [
+        {"created_at": now - i * 0.01, "service": f"svc-{i % 5}", "level": ("INFO", "ERROR")[i % 2],
+         "message": "m", "path": f"/api/{i % 20}", "duration_ms": i % 700}
+        for i in range(5000)
+    ]
+    records = normalize_logs(logs)
+    best = min(_timed(aggregate, records) for _ in range(5))
+    print(f"\n  aggregate 5000 rows: {best * 1000:.2f} ms ({best / 5000 * 1e6:.2f} µs/row)")
+    assert best < 0.1
+
+
+def _timed(fn, arg):
+    start = time.perf_counter()
+    fn(arg)
+    return time.perf_counter() - start
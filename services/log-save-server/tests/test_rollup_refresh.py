@@ -0,0 +1,92 @@
+"""
+시간 / 일 롤업 증분 갱신 테스트
+DB 없이 실행 가능 (워터마크 계산 + 가짜 연결로 SQL 순서 확인)
+"""
+from datetime import datetime, timezone
+
+import pytest
+
+from rollup_refresh import bucket_start, refresh_rollups, refresh_start
+
+NOW = datetime(2025, 1, 15, 10, 42, 7, tzinfo=timezone.utc)
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_bucket_start():
+    assert bucket_start(NOW, "hour") == utc(2025, 1, 15, 10)
+    assert bucket_start(NOW, "day") == utc(2025, 1, 15)
+
+
+def test_refresh_start_rewinds_for_late_rows():
+    # 워터마크 10:00, 늦은 로그 120분 → 08:00 버킷부터 재계산
+    assert refresh_start(utc(2025, 1, 15, 10), "hour", 120) == utc(2025, 1, 15, 8)
+    # 일 롤업은 워터마크 2시간 전이 속한 날부터
+    assert refresh_start(utc(2025, 1, 15), "day", 120) == utc(2025, 1, 14)
+    assert refresh_start(utc(2025, 1, 15, 10), "day", 120) == utc(2025, 1, 15)
+
+
+def test_refresh_start_without_watermark_is_full():
+    assert refresh_start(None, "hour", 120).year == 1970
+
+
+class FakeConn:
+    """실행된 SQL과 파라미터를 기록하는 가짜 asyncpg 연결"""
+
+    def __init__(self, watermarks, locked=True):
+        self.watermarks = watermarks
+        self.locked = locked
+        self.executed = []
+
+    def transaction(self):
+        conn = self
+
+        class Transaction:
+            async def __aenter__(self):
+                conn.executed.append(("BEGIN",))
+
+            async def __aexit__(self, *exc):
+                conn.executed.append(("COMMIT",))
+
+        return Transaction()
+
+    async def fetchval(self, sql, *args):
+        if "pg_try_advisory_lock" in sql:
+            return self.locked
+        if "FROM rollup_watermarks" in sql:
+            return self.watermarks.get(args[0])
+        return None
+
+    async def execute(self, sql, *args):
+        self.executed.append((" ".join(sql.split()), *args))
+        return "INSERT 0 7"
+
+
+@pytest.mark.asyncio
+async def test_refresh_hourly_then_daily_from_watermarks():
+    conn = FakeConn({"logs_rollup_1h": utc(2025, 1, 15, 10), "logs_rollup_1d": utc(2025, 1, 15)})
+    result = await refresh_rollups(conn, late_minutes=60, now=NOW)
+
+    assert result == {"rows": {"logs_rollup_1h": 7, "logs_rollup_1d": 7}, "skipped": None}
+    statements = [entry for entry in conn.executed if entry[0] not in ("BEGIN", "COMMIT")]
+
+    delete_1h, insert_1h, watermark_1h, delete_1d, insert_1d, watermark_1d = statements
+    assert delete_1h == ("DELETE FROM logs_rollup_1h WHERE bucket >= $1", utc(2025, 1, 15, 9))
+    assert "FROM logs_rollup_1m" in insert_1h[0] and "date_trunc('hour', bucket, 'UTC')" in insert_1h[0]
+    assert "histogram_sum(duration_histogram)" in insert_1h[0]
+    assert watermark_1h[1:] == ("logs_rollup_1h", utc(2025, 1, 15, 10))
+
+    assert delete_1d == ("DELETE FROM logs_rollup_1d WHERE bucket >= $1", utc(2025, 1, 14))
+    assert "FROM logs_rollup_1h" in insert_1d[0]
+    assert watermark_1d[1:] == ("logs_rollup_1d", utc(2025, 1, 15))
+
+
+@pytest.mark.asyncio
+async def test_refresh_skipped_when_locked():
+    conn = FakeConn({}, locked=False)
+    result = await refresh_rollups(conn, late_minutes=60, now=NOW)
+
+    assert result["skipped"] == "another server is refreshing rollups"
+    assert conn.executed == []
@@ -0,0 +1,162 @@
+"""
+샤드 라우팅 / 샤드 적재 테스트
+DB 없이 실행 가능 (가짜 pool로 샤드별 COPY와 커밋 순서 확인)
+"""
+import uuid
+from contextlib import asynccontextmanager
+
+import pytest
+
+import main
+from dedup import BatchMarker
+from records import LOG_COLUMNS, normalize_logs
+from shards import ShardMap, merge_counts, parse_shard_dsns, service_shard
+
+_SERVICE = LOG_COLUMNS.index('service')
+
+
+def test_parse_shard_dsns():
+    assert parse_shard_dsns("") == []
+    assert parse_shard_dsns(" postgresql://a:5432/logs_db , postgresql://b/logs_db,") == [
+        "postgresql://a:5432/logs_db", "postgresql://b/logs_db"
+    ]
+
+
+def test_service_shard_is_stable():
+    # CRC32: log-analysis-server와 같은 값이어야 service 조건 쿼리를 한 샤드로 보낼 수 있음
+    assert service_shard("payment-api", 4) == 0
+    assert service_shard("user-api", 4) == 3 and service_shard("web-frontend", 4) == 2
+    assert {service_shard(f"svc-{i}", 3) for i in range(50)} == {0, 1, 2}
+
+
+def test_split_by_service_keeps_order():
+    records = normalize_logs([{"service": name, "message": str(i)} for i, name in enumerate("abcabc")])
+    parts = ShardMap(3).split_indexes(records)
+
+    assert sorted(i for part in parts for i in part) == list(range(6))
+    for shard, part in enumerate(parts):
+        assert part == sorted(part)
+        assert all(service_shard(records[i][_SERVICE], 3) == shard for i in part)
+
+
+def test_split_by_time_buckets():
+    hour = 3600.0
+    records = normalize_logs([{"created_at": t} for t in (60.0, 0.5 * hour, 1.5 * hour, 2.5 * hour, 3.5 * hour)])
+
+    assert ShardMap(3, "time", bucket_hours=1).split_indexes(records) == [[0, 1, 4], [2], [3]]
+    with pytest.raises(ValueError):
+        ShardMap(2, "tenant")
+
+
+def test_merge_counts():
+    merged = merge_counts([
+        [{"service": "a", "count": 5}, {"service": "b", "count": 1}],
+        [{"service": "b", "count": 7}, {"service": "c", "count": 2}],
+    ], "service", limit=2)
+    assert merged == [{"service": "b", "count": 8}, {"service": "a", "count": 5}]
+
+
+class FakeTransaction:
+    def __init__(self, conn):
+        self.conn = conn
+
+    async def start(self):
+        self.conn.log.append((self.conn.shard, "begin"))
+
+    async def commit(self):
+        self.conn.log.append((self.conn.shard, "commit"))
+
+    async def rollback(self):
+        self.conn.log.append((self.conn.shard, "rollback"))
+
+
+class FakeConn:
+    def __init__(self, shard, log, fail_copy=False):
+        self.shard = shard
+        self.log = log
+        self.fail_copy = fail_copy
+        self.copied = []
+
+    def transaction(self):
+        return FakeTransaction(self)
+
+    async def fetch(self, sql, batch_ids, *args):
+        # claim_batches: 첫 배치만 새로 기록된 것으로 응답
+        return [{"batch_id": batch_ids[0]}]
+
+    async def copy_records_to_table(self, table, records, columns):
+        if self.fail_copy:
+            raise RuntimeError("shard down")
+        self.copied.extend(records)
+        self.log.append((self.shard, "copy"))
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.conn
+
+
+@pytest.fixture
+def sharded(monkeypatch):
+    log = []
+    conns = [FakeConn(index, log) for index in range(2)]
+    monkeypatch.setattr(main, "pool", FakePool(conns[0]))
+    monkeypatch.setattr(main, "shard_pools", [FakePool(conn) for conn in conns])
+    monkeypatch.setattr(main, "shard_map", ShardMap(2))
+    monkeypatch.setattr(main, "stack_trace_caches", [main.StackTraceCache(), main.StackTraceCache()])
+    monkeypatch.setattr(main, "rollups_active", False)
+    monkeypatch.setattr(main, "stack_traces_active", False)
+    monkeypatch.setattr(main, "error_groups_active", False)
+    return conns, log
+
+
+def services_on(shard):
+    return next(f"svc-{i}" for i in range(100) if service_shard(f"svc-{i}", 2) == shard)
+
+
+@pytest.mark.asyncio
+async def test_copy_sharded_routes_rows_and_commits_shard0_last(sharded):
+    conns, log = sharded
+    records = normalize_logs([
+        {"service": services_on(0), "message": "a"},
+        {"service": services_on(1), "message": "b"},
+        {"service": services_on(1), "message": "c"},
+    ])
+
+    assert await main.copy_records(records) == 3
+    assert [r[LOG_COLUMNS.index('message')] for r in conns[0].copied] == ["a"]
+    assert [r[LOG_COLUMNS.index('message')] for r in conns[1].copied] == ["b", "c"]
+    commits = [shard for shard, action in log if action == "commit"]
+    assert commits == [1, 0]
+
+
+@pytest.mark.asyncio
+async def test_copy_sharded_drops_duplicate_batches_on_every_shard(sharded):
+    conns, log = sharded
+    records = normalize_logs([
+        {"service": services_on(1), "message": "new"},
+        {"service": services_on(0), "message": "dup"},
+        {"service": services_on(1), "message": "dup"},
+    ])
+    batches = [(BatchMarker(uuid.uuid4(), 1, 0), 0, 1), (BatchMarker(uuid.uuid4(), 2, 0), 1, 3)]
+
+    assert await main.copy_records(records, batches) == 1
+    assert conns[0].copied == [] and len(conns[1].copied) == 1
+    # 샤드 0은 행이 없어도 배치 기록을 위해 트랜잭션에 참여
+    assert (0, "commit") in log
+
+
+@pytest.mark.asyncio
+async def test_copy_sharded_rolls_back_all_on_failure(sharded):
+    conns, log = sharded
+    conns[1].fail_copy = True
+    records = normalize_logs([{"service": services_on(0)}, {"service": services_on(1)}])
+
+    with pytest.raises(RuntimeError):
+        await main.copy_records(records)
+    assert sorted(shard for shard, action in log if action == "rollback") == [0, 1]
+    assert not any(action == "commit" for _, action in log)
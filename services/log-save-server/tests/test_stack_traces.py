@@ -0,0 +1,101 @@
+"""
+스택 트레이스 중복 제거 테스트
+DB 없이 실행 가능 (지문 정규화 + 가짜 연결로 삽입 SQL 확인)
+"""
+import pytest
+
+from records import LOG_COLUMNS, normalize_logs
+from stack_traces import (
+    STACK_TRACE_COLUMNS,
+    StackTraceCache,
+    fingerprint,
+    normalize_stack_trace,
+    split_stack_traces,
+    store_stack_traces,
+)
+
+PYTHON_TRACE = '''Traceback (most recent call last):
+  File "/app/payment.py", line {line}, in charge
+    client.post(url)
+  File "/usr/lib/python3.11/http/client.py", line 1286, in request
+ConnectionError: <Connection object at 0x7f3a{addr}> refused'''
+
+JS_TRACE = '''TypeError: Cannot read properties of undefined
+    at render (https://cdn.example.com/app.js:{line}:17)
+    at commit (https://cdn.example.com/vendor.js:2:88123)'''
+
+_STACK_TRACE = LOG_COLUMNS.index('stack_trace')
+
+
+def test_fingerprint_ignores_line_numbers_and_addresses():
+    assert fingerprint(PYTHON_TRACE.format(line=42, addr="1c20")) == fingerprint(PYTHON_TRACE.format(line=57, addr="9d00"))
+    assert fingerprint(JS_TRACE.format(line=10)) == fingerprint(JS_TRACE.format(line=11))
+    assert fingerprint(PYTHON_TRACE.format(line=42, addr="1c20")) != fingerprint(JS_TRACE.format(line=10))
+    assert "line N" in normalize_stack_trace(PYTHON_TRACE.format(line=42, addr="1c20"))
+    assert "app.js:N)" in normalize_stack_trace(JS_TRACE.format(line=10))
+    assert -2 ** 63 <= fingerprint("x") < 2 ** 63
+
+
+def test_split_replaces_traces_with_fingerprints():
+    records = normalize_logs([
+        {"service": "payment-api", "stack_trace": PYTHON_TRACE.format(line=42, addr="1c20"), "created_at": 1.0},
+        {"service": "payment-api", "stack_trace": PYTHON_TRACE.format(line=43, addr="1c20"), "created_at": 2.0},
+        {"service": "web", "created_at": 3.0},
+    ])
+    cache = StackTraceCache()
+
+    split, columns, new_traces = split_stack_traces(records, cache)
+
+    assert columns == STACK_TRACE_COLUMNS
+    assert [record[_STACK_TRACE] for record in split] == [None, None, None]
+    value = fingerprint(PYTHON_TRACE.format(line=42, addr="1c20"))
+    assert [record[-1] for record in split] == [value, value, None]
+    # 첫 트레이스 본문만 저장
+    assert new_traces == {value: PYTHON_TRACE.format(line=42, addr="1c20")}
+    # 나머지 컬럼은 그대로
+    assert split[0][:_STACK_TRACE] == records[0][:_STACK_TRACE]
+    assert split[0][_STACK_TRACE + 1:-1] == records[0][_STACK_TRACE + 1:]
+
+    cache.add(new_traces)
+    assert split_stack_traces(records, cache)[2] == {}
+
+
+def test_split_without_traces_keeps_columns():
+    records = normalize_logs([{"service": "web"}])
+    assert split_stack_traces(records, StackTraceCache()) == (records, LOG_COLUMNS, {})
+
+
+def test_cache_forgets_oldest():
+    cache = StackTraceCache(size=2)
+    cache.add([1, 2, 3])
+    assert len(cache) == 2 and 1 not in cache and 3 in cache
+
+
+class FakeConn:
+    def __init__(self):
+        self.executed = []
+
+    async def execute(self, sql, *args):
+        self.executed.append((" ".join(sql.split()), *args))
+
+
+@pytest.mark.asyncio
+async def test_store_inserts_only_unknown_traces_sorted():
+    traces = [PYTHON_TRACE.format(line=1, addr="0"), JS_TRACE.format(line=1), "custom trace"]
+    records = normalize_logs([{"stack_trace": trace} for trace in traces])
+    cache = StackTraceCache()
+    cache.add([fingerprint("custom trace")])
+    conn = FakeConn()
+
+    copied, columns = await store_stack_traces(conn, records, cache)
+
+    assert columns == STACK_TRACE_COLUMNS and len(copied) == 3
+    (sql, fingerprints, bodies), = conn.executed
+    assert sql.startswith("INSERT INTO stack_traces") and "ON CONFLICT (hash) DO NOTHING" in sql
+    assert fingerprints == sorted([fingerprint(traces[0]), fingerprint(traces[1])])
+    assert set(bodies) == set(traces[:2])
+    assert all(value in cache for value in fingerprints)
+
+    # 두 번째 배치는 DB 왕복 없음
+    await store_stack_traces(conn, records, cache)
+    assert len(conn.executed) == 1
@@ -0,0 +1,317 @@
+"""
+스트리밍 본문 처리 테스트: 청크 경계, gzip bomb, 잘못된 문서, NDJSON
+"""
+import asyncio
+import gzip
+import json
+import pytest
+
+from records import RejectedEntry
+
+from streaming import (
+    StreamDecoder,
+    LogArrayParser,
+    LogDocumentParser,
+    ColumnarParser,
+    NdjsonParser,
+    InvalidPayloadError,
+    PayloadTooLargeError,
+    iter_with_idle
+)
+
+
+def parse_in_chunks(body: bytes, chunk_size: int, encoding: str = "", max_bytes: int = 10 ** 9):
+    """본문을 chunk_size 단위로 잘라 디코더 + 파서에 통과"""
+    decoder = StreamDecoder(encoding, max_bytes)
+    parser = LogArrayParser()
+    items = []
+    for i in range(0, len(body), chunk_size):
+        for piece in decoder.decompress(body[i:i + chunk_size]):
+            items.extend(parser.feed(piece))
+    decoder.finish()
+    parser.close()
+    return items, parser
+
+
+SAMPLE_LOGS = [
+    {"level": "INFO", "message": "결제 완료 ✅", "duration_ms": 123, "metadata": {"a": [1, 2]}},
+    {"level": "ERROR", "message": "quote \" and brace } inside", "created_at": 1700000000.5},
+    {"level": "WARN", "message": "", "user_id": None},
+]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64, 100000])
+def test_chunk_boundaries_plain(chunk_size):
+    """어떤 청크 경계에서도 json.loads와 동일한 결과"""
+    body = json.dumps({"batch": 12345, "logs": SAMPLE_LOGS}, ensure_ascii=False).encode()
+    items, parser = parse_in_chunks(body, chunk_size)
+    assert items == SAMPLE_LOGS
+    assert parser.fields == {"batch": 12345}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 13, 4096])
+def test_chunk_boundaries_gzip(chunk_size):
+    """gzip 본문 청크 단위 해제"""
+    body = gzip.compress(json.dumps({"logs": SAMPLE_LOGS * 50}).encode())
+    items, _ = parse_in_chunks(body, chunk_size, "gzip")
+    assert items == SAMPLE_LOGS * 50
+
+
+def test_number_split_across_chunks():
+    """청크 경계에서 잘린 숫자를 잘못 파싱하지 않음"""
+    parser = LogArrayParser()
+    assert parser.feed_text('{"logs": [12') == []
+    assert parser.feed_text('3, 4') == [123]
+    assert parser.feed_text(']}') == [4]
+    parser.close()
+
+
+def test_multi_member_gzip():
+    """다중 멤버 gzip (gzip.decompress와 동일)"""
+    text = json.dumps({"logs": SAMPLE_LOGS}).encode()
+    body = gzip.compress(text[:20]) + gzip.compress(text[20:])
+    items, _ = parse_in_chunks(body, 16, "gzip")
+    assert items == SAMPLE_LOGS
+
+
+def test_gzip_bomb_rejected():
+    """최대 해제 크기 초과 시 PayloadTooLargeError"""
+    bomb = gzip.compress(b" " * (10 * 1024 * 1024))
+    assert len(bomb) < 20 * 1024
+
+    decoder = StreamDecoder("gzip", max_bytes=1024 * 1024)
+    with pytest.raises(PayloadTooLargeError):
+        for _ in decoder.decompress(bomb):
+            pass
+
+
+def test_truncated_gzip_rejected():
+    """잘린 gzip 거부"""
+    body = gzip.compress(json.dumps({"logs": SAMPLE_LOGS}).encode())
+    with pytest.raises(InvalidPayloadError):
+        parse_in_chunks(body[:-10], 8, "gzip")
+
+
+def test_corrupt_gzip_rejected():
+    """손상된 gzip 거부"""
+    with pytest.raises(InvalidPayloadError):
+        parse_in_chunks(b"not gzip at all", 4, "gzip")
+
+
+def test_unsupported_encoding_rejected():
+    """지원하지 않는 Content-Encoding"""
+    with pytest.raises(InvalidPayloadError):
+        StreamDecoder("br", 1024)
+
+
+@pytest.mark.parametrize("body, message", [
+    ('{"other": 1}', "Missing 'logs' field"),
+    ('{"logs": {"level": "INFO"}}', "'logs' must be an array"),
+    ('[{"level": "INFO"}]', "Invalid JSON"),
+    ('{"logs": [{"level": "INFO"}', "Invalid JSON"),
+    ('{"logs": [] } trailing', "Invalid JSON"),
+    ('{"logs": [1 2]}', "Invalid JSON"),
+])
+def test_invalid_documents(body, message):
+    """잘못된 문서는 InvalidPayloadError"""
+    with pytest.raises(InvalidPayloadError) as exc_info:
+        parse_in_chunks(body.encode(), 5)
+    assert message in str(exc_info.value)
+
+
+def test_oversized_entry_rejected():
+    """max_item_chars를 넘는 항목 거부 (버퍼 무한 증가 방지)"""
+    parser = LogArrayParser(max_item_chars=100)
+    parser.feed_text('{"logs": [{"message": "')
+    with pytest.raises(InvalidPayloadError):
+        parser.feed_text("x" * 200)
+
+
+def test_empty_logs():
+    """빈 logs 배열"""
+    items, _ = parse_in_chunks(b'{"logs": []}', 2)
+    assert items == []
+
+
+@pytest.mark.parametrize("fast_path_bytes", [0, 50, 10 ** 6])
+def test_document_parser_paths(fast_path_bytes):
+    """빠른 경로(orjson)와 스트리밍 경로가 같은 결과"""
+    body = json.dumps({"batch": 1, "logs": SAMPLE_LOGS * 3}, ensure_ascii=False).encode()
+    parser = LogDocumentParser(fast_path_bytes)
+    items = []
+    for i in range(0, len(body), 16):
+        items.extend(parser.feed(body[i:i + 16]))
+    items.extend(parser.close())
+
+    assert items == SAMPLE_LOGS * 3
+    assert parser.fields == {"batch": 1}
+    assert parser.streaming == (fast_path_bytes < len(body))
+
+
+@pytest.mark.parametrize("body, message", [
+    ('{"other": 1}', "Missing 'logs' field"),
+    ('{"logs": {"level": "INFO"}}', "'logs' must be an array"),
+    ('[{"level": "INFO"}]', "Invalid JSON"),
+    ('{"logs": [{"level": "INFO"}', "Invalid JSON"),
+    ('', "Invalid JSON"),
+])
+def test_document_parser_invalid(body, message):
+    """빠른 경로에서도 같은 오류 메시지"""
+    parser = LogDocumentParser(fast_path_bytes=1024)
+    parser.feed(body.encode())
+    with pytest.raises(InvalidPayloadError) as exc_info:
+        parser.close()
+    assert message in str(exc_info.value)
+
+
+def columnar(body: str) -> list:
+    parser = ColumnarParser()
+    data = body.encode()
+    for i in range(0, len(data), 7):
+        assert parser.feed(data[i:i + 7]) == []
+    return parser.close()
+
+
+def test_columnar_parser_rows():
+    """열 단위 배치 → 행 dict (null은 그 행에 없는 필드, constants는 모든 행에)"""
+    rows = columnar(json.dumps({
+        "count": 3,
+        "constants": {"service": "payment-api"},
+        "columns": {
+            "level": ["INFO", "ERROR", "WARN"],
+            "message": ["결제 완료 ✅", "boom", ""],
+            "duration_ms": [123, None, None],
+            "service": [None, "order-api", None],
+        },
+    }, ensure_ascii=False))
+
+    assert rows == [
+        {"service": "payment-api", "level": "INFO", "message": "결제 완료 ✅", "duration_ms": 123},
+        {"service": "order-api", "level": "ERROR", "message": "boom"},
+        {"service": "payment-api", "level": "WARN", "message": ""},
+    ]
+
+
+@pytest.mark.parametrize("body, message", [
+    ('{"logs": []}', "expected an object with 'columns' field"),
+    ('{"count": 2, "columns": {"level": ["INFO"]}}', "Column 'level' must be an array of 2 values"),
+    ('{"count": -1, "columns": {}}', "'count' must be a non-negative integer"),
+    ('{"count": 1, "columns": {}, "constants": []}', "'constants' must be an object"),
+    ('{"count": 1, "columns": {', "Invalid JSON"),
+])
+def test_columnar_parser_invalid(body, message):
+    with pytest.raises(InvalidPayloadError) as exc_info:
+        columnar(body)
+    assert message in str(exc_info.value)
+
+
+def ndjson_in_chunks(body: bytes, chunk_size: int, max_line_bytes: int = 1024 * 1024):
+    parser = NdjsonParser(max_line_bytes)
+    items = []
+    for i in range(0, len(body), chunk_size):
+        items.extend(parser.feed(body[i:i + chunk_size]))
+    items.extend(parser.close())
+    return items
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 4096])
+def test_ndjson_chunk_boundaries(chunk_size):
+    """어떤 청크 경계에서도 줄 단위로 동일하게 파싱, 빈 줄/CRLF/마지막 개행 없음 허용"""
+    lines = [json.dumps(log, ensure_ascii=False) for log in SAMPLE_LOGS]
+    body = ("\r\n".join(lines[:2]) + "\n\n" + lines[2]).encode()
+    assert ndjson_in_chunks(body, chunk_size) == SAMPLE_LOGS
+
+
+def test_ndjson_bad_lines_rejected_individually():
+    """잘못된 줄/너무 긴 줄은 RejectedEntry, 나머지 줄은 계속 파싱"""
+    body = b'{"level": "INFO"}\nnot json\n{"message": "' + b"x" * 200 + b'"}\n{"level": "WARN"}\n'
+    items = ndjson_in_chunks(body, 16, max_line_bytes=100)
+
+    assert items[0] == {"level": "INFO"}
+    assert isinstance(items[1], RejectedEntry) and "Invalid JSON" in items[1].error
+    assert isinstance(items[2], RejectedEntry) and "larger than 100 bytes" in items[2].error
+    assert items[3] == {"level": "WARN"}
+
+
+def test_ndjson_oversized_last_line():
+    """개행 없이 끝난 너무 긴 마지막 줄"""
+    items = ndjson_in_chunks(b'{"level": "INFO"}\n' + b"y" * 500, 64, max_line_bytes=100)
+    assert items[0] == {"level": "INFO"}
+    assert isinstance(items[1], RejectedEntry)
+
+
+def test_zstd_multi_frame():
+    """zstd 다중 프레임 청크 단위 해제"""
+    zstandard = pytest.importorskip("zstandard")
+    text = json.dumps({"logs": SAMPLE_LOGS * 20}).encode()
+    compressor = zstandard.ZstdCompressor()
+    body = compressor.compress(text[:100]) + compressor.compress(text[100:])
+    items, _ = parse_in_chunks(body, 37, "zstd")
+    assert items == SAMPLE_LOGS * 20
+
+
+def test_zstd_bomb_rejected():
+    """zstd도 최대 해제 크기 초과 시 PayloadTooLargeError"""
+    zstandard = pytest.importorskip("zstandard")
+    bomb = zstandard.ZstdCompressor().compress(b" " * (64 * 1024 * 1024))
+
+    decoder = StreamDecoder("zstd", max_bytes=1024 * 1024)
+    with pytest.raises(PayloadTooLargeError):
+        for _ in decoder.decompress(bomb):
+            pass
+    # 입력을 잘라서 넣으므로 한도를 크게 넘기 전에 중단
+    assert decoder.total_bytes < 16 * 1024 * 1024
+
+
+@pytest.mark.asyncio
+async def test_iter_with_idle():
+    """청크 사이가 길면 None (유휴 알림)"""
+    async def slow_chunks():
+        yield b"a"
+        await asyncio.sleep(0.15)
+        yield b"b"
+
+    received = [chunk async for chunk in iter_with_idle(slow_chunks(), 0.05)]
+    assert received[0] == b"a"
+    assert received[-1] == b"b"
+    assert None in received
+
+    received = [chunk async for chunk in iter_with_idle(slow_chunks(), None)]
+    assert received == [b"a", b"b"]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 13, 65536])
+def test_lz4_chunks_and_frames(chunk_size):
+    """lz4 frame 청크 단위 해제 (다중 프레임 포함)"""
+    lz4_frame = pytest.importorskip("lz4.frame")
+    text = json.dumps({"logs": SAMPLE_LOGS * 200}).encode()
+    body = lz4_frame.compress(text[:50]) + lz4_frame.compress(text[50:])
+    items, _ = parse_in_chunks(body, chunk_size, "lz4")
+    assert items == SAMPLE_LOGS * 200
+
+
+def test_lz4_bomb_rejected():
+    lz4_frame = pytest.importorskip("lz4.frame")
+    bomb = lz4_frame.compress(b" " * (32 * 1024 * 1024))
+    decoder = StreamDecoder("lz4", max_bytes=1024 * 1024)
+    with pytest.raises(PayloadTooLargeError):
+        for _ in decoder.decompress(bomb):
+            pass
+
+
+def test_zstd_shared_dictionary(monkeypatch):
+    """공유 사전으로 압축한 프레임과 사전 없는 프레임 모두 해제"""
+    zstandard = pytest.importorskip("zstandard")
+    import compression
+
+    samples = [json.dumps({"level": "INFO", "message": f"User {i} login"}).encode() for i in range(2000)]
+    dictionary = zstandard.train_dictionary(4096, samples)
+    monkeypatch.setattr(compression, "_zstd_dictionary", dictionary)
+    monkeypatch.setattr(compression, "_zstd_dictionary_loaded", True)
+
+    text = json.dumps({"logs": SAMPLE_LOGS}).encode()
+    with_dictionary = zstandard.ZstdCompressor(dict_data=dictionary).compress(text)
+    without_dictionary = zstandard.ZstdCompressor().compress(text)
+    for body in (with_dictionary, without_dictionary):
+        items, _ = parse_in_chunks(body, 7, "zstd")
+        assert items == SAMPLE_LOGS
@@ -0,0 +1,83 @@
+"""
+행 단위 검증 테스트: 잘못된 행만 거부하고 나머지는 normalize_logs와 동일하게 변환
+"""
+import json
+
+import pytest
+
+from records import build_records, normalize_logs
+
+VALID_LOG = {
+    "level": "ERROR",
+    "message": "결제 실패",
+    "created_at": 1700000000.5,
+    "service": "payment-api",
+    "environment": "production",
+    "method": "POST",
+    "path": "/api/v1/payment",
+    "duration_ms": 123.456,
+    "user_id": "user_123",
+    "metadata": {"retry": 3},
+}
+
+
+def test_valid_rows_match_normalize():
+    """유효한 행은 normalize_logs와 같은 레코드"""
+    logs = [VALID_LOG, {"level": "INFO", "message": "defaults only"}, {**VALID_LOG, "metadata": {}}]
+    records, rejected = build_records(logs)
+
+    assert rejected == []
+    expected = normalize_logs(logs)
+    assert [row[:19] for row in records[:1]] == [row[:19] for row in expected[:1]]
+    assert [row[1:19] for row in records] == [row[1:19] for row in expected]
+    assert json.loads(records[0][19]) == {"retry": 3}
+    assert records[2][19] is None
+
+
+@pytest.mark.parametrize("override, error", [
+    ({"level": "VERBOSE"}, "invalid level: 'VERBOSE'"),
+    ({"level": None}, "'level' must not be null"),
+    ({"message": None}, "'message' must not be null"),
+    ({"message": 42}, "'message' must be a string, got int"),
+    ({"environment": "prod"}, "invalid environment: 'prod'"),
+    ({"log_type": ["BACKEND"]}, "'log_type' must be a string, got list"),
+    ({"method": "get"}, "invalid method: 'get'"),
+    ({"user_id": 123}, "'user_id' must be a string, got int"),
+    ({"trace_id": "a" * 33}, "'trace_id' exceeds 32 characters"),
+    ({"service": "s" * 101}, "'service' exceeds 100 characters"),
+    ({"message": "nul\x00byte"}, "'message' contains a NUL character"),
+    ({"duration_ms": "12"}, "'duration_ms' must be a number, got str"),
+    ({"duration_ms": True}, "'duration_ms' must be a number, got bool"),
+    ({"duration_ms": 1e7}, "'duration_ms' out of range"),
+    ({"created_at": "2024-01-01"}, "'created_at' must be a Unix timestamp, got str"),
+    ({"created_at": -5}, "'created_at' out of range"),
+    ({"created_at": 1e20}, "'created_at' out of range"),
+    ({"metadata": [1, 2]}, "'metadata' must be an object"),
+    ({"metadata": {"a": "nul\x00"}}, "'metadata' contains a NUL character"),
+])
+def test_invalid_row_rejected(override, error):
+    """스키마에 맞지 않는 행은 사유와 함께 거부"""
+    records, rejected = build_records([VALID_LOG, {**VALID_LOG, **override}])
+
+    assert len(records) == 1
+    assert len(rejected) == 1
+    assert rejected[0]["index"] == 1
+    assert error in rejected[0]["error"]
+
+
+def test_non_object_rejected_with_offset():
+    """객체가 아닌 항목 거부, index는 요청 전체 기준 (offset 반영)"""
+    records, rejected = build_records([VALID_LOG, "oops", VALID_LOG, None], offset=1000)
+
+    assert len(records) == 2
+    assert rejected == [
+        {"index": 1001, "error": "log entry must be an object"},
+        {"index": 1003, "error": "log entry must be an object"},
+    ]
+
+
+def test_unknown_fields_ignored():
+    """스키마에 없는 필드는 무시 (클라이언트 확장 필드 호환)"""
+    records, rejected = build_records([{**VALID_LOG, "action": "checkout", "success": True}])
+    assert len(records) == 1
+    assert rejected == []
@@ -0,0 +1,44 @@
+"""
+멀티 프로세스 워커 설정 테스트: pool 예산 분배, 처리량 계산
+"""
+import time
+
+from workers import ThroughputMeter, pool_size_for_worker, worker_count
+
+
+def test_pool_size_without_budget():
+    """예산이 없으면 설정값 그대로"""
+    assert pool_size_for_worker(10, 20, 4, 0) == (10, 20)
+
+
+def test_pool_size_respects_budget():
+    """워커 수 × max_size ≤ 예산"""
+    min_size, max_size = pool_size_for_worker(10, 20, 16, 100)
+    assert max_size == 6
+    assert min_size == 6
+    assert 16 * max_size <= 100
+
+
+def test_pool_size_at_least_one():
+    """예산보다 워커가 많아도 최소 1개 연결"""
+    assert pool_size_for_worker(10, 20, 8, 4) == (1, 1)
+
+
+def test_worker_count_from_env(monkeypatch):
+    """WEB_CONCURRENCY에서 워커 수 로드"""
+    monkeypatch.setenv("WEB_CONCURRENCY", "8")
+    assert worker_count() == 8
+    monkeypatch.delenv("WEB_CONCURRENCY")
+    assert worker_count() == 1
+
+
+def test_throughput_meter():
+    """구간 처리량 계산"""
+    meter = ThroughputMeter()
+    time.sleep(0.05)
+    rate = meter.sample(1000)
+    assert 0 < rate <= 1000 / 0.05
+
+    stats = meter.stats(1000)
+    assert stats["rows_total"] == 1000
+    assert stats["rows_per_sec"] == round(rate, 1)
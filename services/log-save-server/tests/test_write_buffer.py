@@ -0,0 +1,105 @@
+"""
+Write-behind 버퍼 테스트
+DB 없이 실행 가능 (flush 함수를 가짜로 대체)
+"""
+import asyncio
+import pytest
+
+from write_buffer import WriteBuffer, BufferFullError
+
+
+class FakeCopy:
+    """COPY 호출을 기록하는 가짜 flush 함수"""
+
+    def __init__(self, fail: bool = False):
+        self.calls = []
+        self.fail = fail
+
+    async def __call__(self, records, batches=()):
+        if self.fail:
+            raise RuntimeError("COPY failed")
+        self.calls.append(list(records))
+        return len(records)
+
+
+@pytest.mark.asyncio
+async def test_requests_are_coalesced_into_one_copy():
+    """여러 요청이 한 번의 COPY로 합쳐지는지 확인"""
+    copy = FakeCopy()
+    buffer = WriteBuffer(copy, flush_rows=100, flush_interval_ms=50)
+    await buffer.start()
+
+    counts = await asyncio.gather(*[
+        buffer.submit([(i, j) for j in range(5)]) for i in range(10)
+    ])
+    await buffer.stop()
+
+    assert counts == [5] * 10
+    assert len(copy.calls) == 1
+    assert len(copy.calls[0]) == 50
+
+
+@pytest.mark.asyncio
+async def test_flush_on_row_threshold():
+    """flush_rows 도달 시 타이머를 기다리지 않고 flush"""
+    copy = FakeCopy()
+    buffer = WriteBuffer(copy, flush_rows=10, flush_interval_ms=10000)
+    await buffer.start()
+
+    await asyncio.wait_for(buffer.submit([(i,) for i in range(10)]), timeout=1)
+    await buffer.stop()
+
+    assert buffer.flushed_rows == 10
+
+
+@pytest.mark.asyncio
+async def test_backpressure_when_full():
+    """버퍼 용량 초과 시 BufferFullError"""
+    copy = FakeCopy()
+    buffer = WriteBuffer(copy, flush_rows=1000, flush_interval_ms=10000,
+                         max_rows=10, durability="buffer")
+    await buffer.start()
+
+    await buffer.submit([(i,) for i in range(8)])
+    with pytest.raises(BufferFullError) as exc_info:
+        await buffer.submit([(i,) for i in range(5)])
+
+    assert exc_info.value.retry_after >= 1
+    assert buffer.rejected_rows == 5
+    await buffer.stop()
+    assert buffer.flushed_rows == 8
+
+
+@pytest.mark.asyncio
+async def test_buffer_durability_acks_before_copy():
+    """durability=buffer: COPY 전에 응답"""
+    copy = FakeCopy()
+    buffer = WriteBuffer(copy, flush_rows=1000, flush_interval_ms=10000,
+                         durability="buffer")
+    await buffer.start()
+
+    count = await asyncio.wait_for(buffer.submit([(1,), (2,)]), timeout=1)
+    assert count == 2
+    assert copy.calls == []
+
+    await buffer.stop()
+    assert copy.calls == [[(1,), (2,)]]
+
+
+@pytest.mark.asyncio
+async def test_commit_durability_propagates_copy_error():
+    """durability=commit: COPY 실패가 요청으로 전파"""
+    buffer = WriteBuffer(FakeCopy(fail=True), flush_rows=1, flush_interval_ms=50)
+    await buffer.start()
+
+    with pytest.raises(RuntimeError):
+        await buffer.submit([(1,)])
+
+    await buffer.stop()
+    assert buffer.failed_rows == 1
+
+
+def test_unknown_durability_rejected():
+    """알 수 없는 durability 모드 거부"""
+    with pytest.raises(ValueError):
+        WriteBuffer(FakeCopy(), durability="eventually")
@@ -0,0 +1,157 @@
+"""
+멀티 프로세스 수집 워커
+
+JSON 파싱/레코드 생성은 CPU 바운드이므로 코어 수만큼 프로세스를 띄웁니다.
+- 워커마다 SO_REUSEPORT 소켓을 따로 bind → 커널이 연결을 분산
+- 워커마다 asyncpg pool (워커 수 × max_size ≤ DB_CONNECTION_BUDGET)
+- SIGTERM/SIGINT → 모든 워커에 전달 → 각 워커가 버퍼 flush 후 종료
+- 워커별 처리량 주기 보고
+
+워커 번호(INGEST_WORKER_ID)는 이 모듈이 지정하므로 Docker 이미지도 python main.py로 실행합니다.
+Gunicorn으로 실행하면 pool 크기 계산은 같지만 모든 워커가 워커 0이 됩니다.
+"""
+
+import os
+import signal
+import socket
+import time
+from multiprocessing import Process
+from typing import Any, Dict, List, Tuple
+
+# 종료 시 워커가 버퍼를 flush 할 때까지 기다리는 시간 (초)
+GRACEFUL_TIMEOUT = float(os.getenv("GRACEFUL_TIMEOUT", "30"))
+
+
+def worker_count() -> int:
+    """워커 프로세스 수 (WEB_CONCURRENCY, 기본 1)"""
+    return max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+
+
+def worker_id() -> int:
+    """현재 워커 번호 (단일 프로세스면 0)"""
+    return int(os.getenv("INGEST_WORKER_ID", "0"))
+
+
+def pool_size_for_worker(min_size: int, max_size: int, workers: int, budget: int) -> Tuple[int, int]:
+    """
+    워커당 pool 크기 계산
+
+    Args:
+        min_size: DB_POOL_MIN_SIZE
+        max_size: DB_POOL_MAX_SIZE
+        workers: 워커 프로세스 수
+        budget: 전체 연결 예산 (DB_CONNECTION_BUDGET, 0이면 제한 없음)
+
+    Returns:
+        (min_size, max_size) - workers × max_size ≤ budget
+    """
+    if budget > 0:
+        max_size = max(1, min(max_size, budget // workers))
+    return min(min_size, max_size), max_size
+
+
+class ThroughputMeter:
+    """누적 카운터로부터 구간 처리량(rows/sec) 계산"""
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self._last_at = self.started_at
+        self._last_rows = 0
+        self.rows_per_sec = 0.0
+
+    def sample(self, total_rows: int) -> float:
+        """직전 sample 이후 처리량 갱신"""
+        now = time.monotonic()
+        elapsed = now - self._last_at
+        if elapsed > 0:
+            self.rows_per_sec = (total_rows - self._last_rows) / elapsed
+        self._last_at = now
+        self._last_rows = total_rows
+        return self.rows_per_sec
+
+    def stats(self, total_rows: int) -> Dict[str, Any]:
+        uptime = time.monotonic() - self.started_at
+        return {
+            "worker_id": worker_id(),
+            "pid": os.getpid(),
+            "rows_total": total_rows,
+            "rows_per_sec": round(self.rows_per_sec, 1),
+            "rows_per_sec_avg": round(total_rows / uptime, 1) if uptime > 0 else 0.0,
+            "uptime_sec": round(uptime, 1)
+        }
+
+
+def _reuseport_socket(host: str, port: int) -> socket.socket:
+    """SO_REUSEPORT 리스닝 소켓 생성"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.set_inheritable(True)
+    return sock
+
+
+def _serve(app_path: str, host: str, port: int, index: int) -> None:
+    """워커 프로세스 진입점"""
+    import uvicorn
+
+    # 터미널 Ctrl+C가 워커에 직접 전달되지 않도록 분리 (종료 신호는 부모가 한 번만 전달)
+    os.setpgrp()
+    os.environ["INGEST_WORKER_ID"] = str(index)
+    sock = _reuseport_socket(host, port)
+    config = uvicorn.Config(app_path, host=host, port=port, timeout_graceful_shutdown=int(GRACEFUL_TIMEOUT))
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def run_workers(app_path: str, host: str, port: int, workers: int) -> None:
+    """
+    워커 프로세스 N개 실행 및 종료 조정
+
+    Args:
+        app_path: ASGI 앱 경로 (예: "main:app")
+        host: bind 주소
+        port: bind 포트
+        workers: 워커 수
+    """
+    if not hasattr(socket, "SO_REUSEPORT"):
+        raise RuntimeError("SO_REUSEPORT is not supported on this platform")
+
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    processes: List[Process] = []
+    for index in range(workers):
+        process = Process(target=_serve, args=(app_path, host, port, index), name=f"ingest-worker-{index}")
+        process.start()
+        processes.append(process)
+    print(f"✅ Started {workers} ingest workers (SO_REUSEPORT {host}:{port})")
+
+    stopping = False
+
+    def stop_all(reason: str) -> None:
+        nonlocal stopping
+        if stopping:
+            return
+        stopping = True
+        print(f"🛑 {reason}, flushing workers...")
+        for process in processes:
+            if process.is_alive():
+                os.kill(process.pid, signal.SIGTERM)
+
+    def handle_signal(signum, frame):
+        stop_all(f"Received signal {signum}")
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    # 한 워커가 죽으면 나머지도 정리 (컨테이너 재시작에 맡김)
+    while not stopping and all(process.is_alive() for process in processes):
+        time.sleep(0.5)
+    stop_all("Worker exited")
+
+    deadline = time.monotonic() + GRACEFUL_TIMEOUT
+    for process in processes:
+        process.join(timeout=max(0.0, deadline - time.monotonic()))
+        if process.is_alive():
+            print(f"⚠️ Worker {process.name} did not exit in {GRACEFUL_TIMEOUT}s, killing")
+            process.kill()
+            process.join()
+    print("✅ All ingest workers stopped")
@@ -0,0 +1,200 @@
+"""
+Write-behind 버퍼
+
+여러 HTTP 요청에서 들어온 레코드를 모아 큰 COPY 한 번으로 flush 합니다.
+
+- flush 조건: N건 도달 or M밀리초 경과
+- Backpressure: 버퍼가 가득 차면 BufferFullError (→ 429 + Retry-After)
+- 배치 기록: submit(records, batch=...)으로 넘긴 배치 기록과 레코드 범위를
+  flush_fn(records, batches)에 함께 전달 (COPY와 같은 트랜잭션에서 기록하도록)
+- Durability 모드:
+  - "commit": COPY 커밋 후 응답 (기본값, 기존 동작과 동일한 보장)
+  - "buffer": 버퍼 적재 즉시 응답 (최저 지연, 프로세스 장애 시 유실 가능)
+"""
+
+import asyncio
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+DURABILITY_COMMIT = "commit"
+DURABILITY_BUFFER = "buffer"
+
+
+class BufferFullError(Exception):
+    """버퍼 용량 초과 (클라이언트는 retry_after초 후 재시도)"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Write buffer is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class WriteBuffer:
+    """
+    비동기 write-behind 버퍼
+
+    Example:
+        buffer = WriteBuffer(copy_records, flush_rows=5000, flush_interval_ms=200)
+        await buffer.start()
+        await buffer.submit(records)
+        await buffer.submit(records, batch=marker)  # 멱등 배치
+        await buffer.stop()  # 남은 레코드 flush
+    """
+
+    def __init__(
+        self,
+        flush_fn: Callable[[List[Tuple], List[Tuple[Any, int, int]]], Awaitable[Any]],
+        flush_rows: int = 5000,
+        flush_interval_ms: int = 200,
+        max_rows: int = 100000,
+        durability: str = DURABILITY_COMMIT
+    ):
+        """
+        Args:
+            flush_fn: 레코드 리스트를 DB에 기록하는 코루틴 함수 (COPY)
+                flush_fn(records, batches) - batches는 (배치 기록, 시작 인덱스, 끝 인덱스) 목록
+            flush_rows: 이 건수가 모이면 즉시 flush
+            flush_interval_ms: 최대 대기 시간 (밀리초)
+            max_rows: 버퍼 최대 건수 (초과 시 BufferFullError)
+            durability: "commit" (커밋 후 응답) | "buffer" (적재 후 응답)
+        """
+        if durability not in (DURABILITY_COMMIT, DURABILITY_BUFFER):
+            raise ValueError(f"Unknown durability mode: {durability}")
+
+        self.flush_fn = flush_fn
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_rows = max_rows
+        self.durability = durability
+
+        self._records: List[Tuple] = []
+        self._batches: List[Tuple[Any, int, int]] = []
+        self._waiters: List[asyncio.Future] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+        # 통계
+        self.flushed_rows = 0
+        self.flush_count = 0
+        self.failed_rows = 0
+        self.rejected_rows = 0
+        self.last_flush_ms = 0.0
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    async def start(self) -> None:
+        """flush 루프 시작"""
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """flush 루프 종료 (남은 레코드는 모두 flush)"""
+        self._closing = True
+        self._wakeup.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    async def submit(self, records: Sequence[Tuple], batch: Any = None) -> int:
+        """
+        레코드 적재
+
+        Args:
+            records: COPY 레코드 튜플 목록
+            batch: 이 레코드들의 배치 기록 (있으면 flush_fn에 레코드 범위와 함께 전달)
+
+        Returns:
+            적재된 레코드 개수
+
+        Raises:
+            BufferFullError: 버퍼 용량 초과
+            Exception: durability="commit"에서 COPY 실패 시 flush_fn의 예외
+        """
+        if not records:
+            return 0
+
+        if self._closing:
+            raise BufferFullError(self.retry_after)
+
+        if len(self._records) + len(records) > self.max_rows:
+            self.rejected_rows += len(records)
+            raise BufferFullError(self.retry_after)
+
+        if batch is not None:
+            start = len(self._records)
+            self._batches.append((batch, start, start + len(records)))
+        self._records.extend(records)
+
+        waiter = None
+        if self.durability == DURABILITY_COMMIT:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+
+        if len(self._records) >= self.flush_rows:
+            self._wakeup.set()
+
+        if waiter is not None:
+            await waiter
+
+        return len(records)
+
+    @property
+    def retry_after(self) -> int:
+        """권장 재시도 대기 시간 (초, 최소 1)"""
+        return max(1, math.ceil(self.flush_interval + self.last_flush_ms / 1000))
+
+    def stats(self) -> Dict[str, Any]:
+        """버퍼 상태 및 누적 통계"""
+        return {
+            "buffered_rows": len(self._records),
+            "max_rows": self.max_rows,
+            "durability": self.durability,
+            "flushed_rows": self.flushed_rows,
+            "flush_count": self.flush_count,
+            "failed_rows": self.failed_rows,
+            "rejected_rows": self.rejected_rows,
+            "last_flush_ms": round(self.last_flush_ms, 2)
+        }
+
+    async def _flush_loop(self) -> None:
+        """N건 or M밀리초마다 flush (백그라운드 태스크)"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            if self._records:
+                await self._flush()
+
+            if self._closing and not self._records:
+                break
+
+    async def _flush(self) -> None:
+        """버퍼를 교체하고 한 번의 COPY로 기록"""
+        records, self._records = self._records, []
+        batches, self._batches = self._batches, []
+        waiters, self._waiters = self._waiters, []
+
+        start = time.perf_counter()
+        try:
+            await self.flush_fn(records, batches)
+        except Exception as e:
+            self.failed_rows += len(records)
+            print(f"❌ Write buffer flush failed ({len(records)} rows): {e}")
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_exception(e)
+            return
+        finally:
+            self.last_flush_ms = (time.perf_counter() - start) * 1000
+
+        self.flushed_rows += len(records)
+        self.flush_count += 1
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)